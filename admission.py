@@ -0,0 +1,109 @@
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+
+class Overloaded(Exception):
+    """Raised when a request is not admitted; retry_after is a hint in whole seconds."""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(f"Overloaded ({reason}), retry after {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionLimiter:
+    """
+    Bounds how many requests run a section at once.
+
+    Up to `max_in_flight` callers run concurrently and up to `max_queue` more
+    wait in FIFO order for at most `queue_timeout` seconds. Anyone beyond
+    that, or still waiting at the timeout, gets Overloaded right away, so
+    latency stays bounded by roughly queue_timeout plus one service time
+    no matter how many clients pile on.
+    """
+
+    def __init__(self, max_in_flight=100, max_queue=200, queue_timeout=5.0):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._in_flight = 0
+        self._waiters = deque()
+        self._service_time = None  # EWMA of seconds a slot is held
+        self.admitted = 0
+        self.rejected = {"queue_full": 0, "queue_timeout": 0}
+
+    @property
+    def in_flight(self):
+        return self._in_flight
+
+    @property
+    def queued(self):
+        return len(self._waiters)
+
+    def retry_after(self):
+        """Seconds until a slot is likely free for a new caller (at least 1)."""
+        per_slot = self._service_time if self._service_time is not None else 1.0
+        return max(1, math.ceil(per_slot * (len(self._waiters) + 1) / self.max_in_flight))
+
+    @asynccontextmanager
+    async def admit(self):
+        """Hold one slot for the body of the `async with`, or raise Overloaded."""
+        await self._acquire()
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            held = time.monotonic() - start
+            self._service_time = held if self._service_time is None else 0.8 * self._service_time + 0.2 * held
+            self._release()
+
+    async def _acquire(self):
+        if self._in_flight < self.max_in_flight and not self._waiters:
+            self._in_flight += 1
+            self.admitted += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self._reject("queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except BaseException as e:
+            if waiter.done() and not waiter.cancelled():
+                # A slot was handed over just as we gave up: pass it on
+                self._release()
+            else:
+                self._waiters.remove(waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                self._reject("queue_timeout")
+            raise
+        self.admitted += 1
+
+    def _release(self):
+        # Hand the slot straight to the oldest waiter so newcomers can't overtake the queue
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._in_flight -= 1
+
+    def _reject(self, reason):
+        self.rejected[reason] += 1
+        raise Overloaded(reason, self.retry_after())
+
+    def to_dict(self):
+        return {
+            "in_flight": self._in_flight,
+            "queued": len(self._waiters),
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "queue_timeout": self.queue_timeout,
+            "service_time": round(self._service_time, 4) if self._service_time is not None else None,
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+        }
@@ -0,0 +1,653 @@
+"""
+Vectorised backtester for the treasury rebalance policy.
+
+Replays a EUR/USD history through the scheduler's rebalance trigger (an
+oracle_policy.UpdatePolicy checked every `cadence` seconds) and the
+TreasuryManager.reBalance mint/burn arithmetic, including its
+rebalanceToleranceBps band, for a whole grid of (mapping, cadence,
+deviation, heartbeat, tolerance_bps) combinations at once.
+
+Balances follow the contract math exactly in wei: they are two int64 limbs
+(base 10**12), so targets, band tests and amounts match the uint256 results
+(oracle_policy.rebalance_amounts). reBalance only ever mints EURC and burns
+USDC, so once a call at target p has traded, every later call at a target
+>= p is a no-op, with or without a band; only the record lows of each
+combo's target sequence are simulated, the rest are counted as no-op
+transactions. `transactions` counts the calls the policy triggers: with a
+band the scheduler skips those of the no-op calls whose target is within the
+band of the on-chain proportion, so it sends between `state_changes` and
+`transactions` of them. Deposits and withdrawals are not modelled.
+
+    python backtest.py --synthetic-days 365                    # 1-minute random walk, default 1,000-point grid
+    python backtest.py --csv prices.csv --deviation 0.01 --heartbeat 21600 --cadence 30
+    python backtest.py --synthetic-days 365 --tolerance-bps 0 --tolerance-bps 100 --tolerance-bps 200
+    python backtest.py --archive archive --output grid.csv --workers 4
+"""
+import itertools
+import time
+
+import numpy as np
+
+from oracle_policy import load_price_series
+
+# Balances are held as (hi, lo) int64 limbs: value = hi * LIMB + lo
+LIMB = 10**12
+MAX_WEI = (2**63 - 1) // 100 * LIMB  # p * hi must fit in int64
+WEI = 10**18
+
+# Target USD% (1-99) for each price; "inverse" is oracle_policy.compute_targets
+MAPPINGS = {
+    "inverse": lambda prices: np.clip(100 / prices, 1, 99).astype(np.int64),
+    "inverse-round": lambda prices: np.clip(np.rint(100 / prices), 1, 99).astype(np.int64),
+    "hold-50": lambda prices: np.full(len(prices), 50, dtype=np.int64),
+}
+
+DEFAULT_DEVIATIONS = (0.0, 0.01, 0.02, 0.03, 0.05, 0.075, 0.1, 0.15, 0.2, 0.3)
+DEFAULT_HEARTBEATS = (60, 900, 3600, 6 * 3600, 12 * 3600, 86400, 3 * 86400, 7 * 86400, 30 * 86400, float("inf"))
+DEFAULT_CADENCES = (60, 300, 900, 1800, 3600)
+DEFAULT_MAPPINGS = ("inverse", "inverse-round")
+DEFAULT_TOLERANCES = (0,)
+
+
+# Limb arithmetic ------------------------------------------------------------
+
+def to_limbs(value, n):
+    """
+    `n` copies of a wei balance as (hi, lo) int64 arrays, value = hi * LIMB + lo.
+
+    Treasury balances are ~1e21 wei and up, past both int64 (9.2e18) and
+    float64's exact range (2**53), while the contract floors every target to
+    the wei. At that size float64 rounds to ~1e5 wei, enough to flip a band
+    test sitting on its threshold (and so whether a transaction is counted)
+    or a mint that should be exactly 0. Two base-10**12 limbs keep the numpy
+    arithmetic exact up to MAX_WEI (~9e28 wei).
+    """
+    if not 0 <= value <= MAX_WEI:
+        raise ValueError(f"Balance {value} wei outside the supported range 0..{MAX_WEI}")
+    return np.full(n, value // LIMB, dtype=np.int64), np.full(n, value % LIMB, dtype=np.int64)
+
+
+def limbs_to_float(limbs, scale=WEI):
+    return limbs[0] * (LIMB / scale) + limbs[1] / scale
+
+
+def _add(a, b):
+    lo = a[1] + b[1]
+    carry = lo >= LIMB
+    return a[0] + b[0] + carry, lo - carry * LIMB
+
+
+def _sub(a, b):
+    lo = a[1] - b[1]
+    borrow = lo < 0
+    return a[0] - b[0] - borrow, lo + borrow * LIMB
+
+
+def _less(a, b):
+    return (a[0] < b[0]) | ((a[0] == b[0]) & (a[1] < b[1]))
+
+
+def _mul_div100(p, t):
+    """floor(p * t / 100) for integer percentages p."""
+    q_hi, r = np.divmod(p * t[0], 100)
+    q_lo = (r * LIMB + p * t[1]) // 100
+    carry = q_lo // LIMB
+    return q_hi + carry, q_lo - carry * LIMB
+
+
+def _mul(p, t):
+    """p * t for integer factors p <= 100."""
+    lo = p * t[1]
+    carry = lo // LIMB
+    return p * t[0] + carry, lo - carry * LIMB
+
+
+def _mul_div10000(bps, t):
+    """floor(bps * t / 10000) for basis points 0 <= bps <= 10000, without overflowing the limbs."""
+    # bps = 100a + b: floor((a*t + floor(b*t / 100)) / 100), the dropped remainder is < 1
+    a, b = np.divmod(bps, 100)
+    return _mul_div100(np.ones_like(bps), _add(_mul(a, t), _mul_div100(b, t)))
+
+
+def _select(mask, a, b):
+    return np.where(mask, a[0], b[0]), np.where(mask, a[1], b[1])
+
+
+def rebalance(p, usd, eur, tolerance_bps=None):
+    """
+    TreasuryManager.reBalance(p) on limb arrays.
+
+    (p * totalValue * 1 ether) / (100 * 1 ether) == floor(p * totalValue / 100),
+    so the targets need no 1e18 factor. With `tolerance_bps`, balances whose
+    drift from the target is within the band are left alone
+    (drift * 10000 <= bps * total, i.e. drift <= floor(bps * total / 10000)).
+
+    Returns:
+        tuple: (usd, eur, minted_eur, burned_usd) as limb pairs
+    """
+    total = _add(usd, eur)
+    target_usd = _mul_div100(p, total)
+    target_eur = _mul_div100(100 - p, total)
+    mint = _less(eur, target_eur)
+    burn = _less(target_usd, usd)
+    if tolerance_bps is not None:
+        drift = _select(burn, _sub(usd, target_usd), _sub(target_usd, usd))
+        trade = _less(_mul_div10000(tolerance_bps, total), drift)
+        mint, burn = mint & trade, burn & trade
+    zero = (np.zeros_like(p), np.zeros_like(p))
+    minted = _select(mint, _sub(target_eur, eur), zero)
+    burned = _select(burn, _sub(usd, target_usd), zero)
+    return _select(burn, target_usd, usd), _select(mint, target_eur, eur), minted, burned
+
+
+# Inputs ---------------------------------------------------------------------
+
+def load_csv_series(path):
+    """(timestamps, prices) arrays from a timestamp,price CSV."""
+    rows = load_price_series(path)
+    return np.array([r[0] for r in rows], dtype=np.float64), np.array([r[1] for r in rows], dtype=np.float64)
+
+
+def load_archive_series(root, start=None, end=None, source="expected"):
+    """
+    (timestamps, prices) from the Kalshi snapshot archive: per fetch, the
+    earliest-expiring event's distribution price, as the scheduler computes it.
+
+    Args:
+        source: 'expected', 'median' or 'mode' (see market_distribution.distribution)
+    """
+    import pyarrow.compute as pc
+
+    from market_distribution import distribution
+    from snapshot_archive import scan
+
+    table = scan(root, start, end, columns=["fetched_at", "strike_date", "floor_strike", "cap_strike", "yes_bid", "yes_ask"])
+    if table.num_rows == 0:
+        return np.array([], dtype=np.float64), np.array([], dtype=np.float64)
+
+    fetched = pc.cast(table["fetched_at"], "int64").to_numpy()
+    strike_date = pc.fill_null(pc.cast(table["strike_date"], "int64"), np.iinfo(np.int64).max).to_numpy()
+    floor_strike = table["floor_strike"].to_numpy(zero_copy_only=False)
+    cap_strike = table["cap_strike"].to_numpy(zero_copy_only=False)
+    bids = pc.fill_null(table["yes_bid"], 0).to_numpy().astype(float)
+    asks = pc.fill_null(table["yes_ask"], 0).to_numpy().astype(float)
+
+    # market_strike(): midpoint of a 'between' bucket, otherwise the single bound
+    strikes = np.where(np.isnan(floor_strike), cap_strike,
+                       np.where(np.isnan(cap_strike), floor_strike, (floor_strike + cap_strike) / 2))
+
+    # select_event(): keep the rows of the earliest strike_date in each fetch
+    order = np.lexsort((strike_date, fetched))
+    fetched, strike_date, strikes, bids, asks = (a[order] for a in (fetched, strike_date, strikes, bids, asks))
+    snapshots, first, counts = np.unique(fetched, return_index=True, return_counts=True)
+    row = np.repeat(np.arange(len(snapshots)), counts)
+    keep = strike_date == np.repeat(strike_date[first], counts)
+    row, strikes, bids, asks = row[keep], strikes[keep], bids[keep], asks[keep]
+
+    # Pad to (snapshots, markets) like pad_events()
+    col = np.arange(len(row)) - np.searchsorted(row, row)
+    width = col.max() + 1
+    padded = [np.zeros((len(snapshots), width)) for _ in range(3)]
+    for target, values in zip(padded, (strikes, bids, asks)):
+        target[row, col] = values
+    prices = distribution(*padded)[source]
+    valid = ~np.isnan(prices)
+    return snapshots[valid] / 1000.0, prices[valid]
+
+
+def synthetic_series(days=365, interval=60, start_price=1.16, annual_vol=0.07, seed=1):
+    """Geometric random walk sampled every `interval` seconds (for benchmarks)."""
+    n = int(days * 86400 // interval)
+    rng = np.random.default_rng(seed)
+    step_vol = annual_vol * np.sqrt(interval / (365 * 86400))
+    prices = start_price * np.exp(np.cumsum(rng.normal(0, step_vol, n)))
+    timestamps = 1_700_000_000 + np.arange(n, dtype=np.float64) * interval
+    return timestamps, prices
+
+
+def make_grid(mappings=DEFAULT_MAPPINGS, cadences=DEFAULT_CADENCES, deviations=DEFAULT_DEVIATIONS,
+              heartbeats=DEFAULT_HEARTBEATS, tolerances=DEFAULT_TOLERANCES):
+    """Every (mapping, cadence, deviation, heartbeat, tolerance_bps) combination."""
+    return [
+        {"mapping": m, "cadence": c, "deviation": d, "heartbeat": h, "tolerance_bps": b}
+        for m, c, d, h, b in itertools.product(mappings, cadences, deviations, heartbeats, tolerances)
+    ]
+
+
+# Engine ---------------------------------------------------------------------
+
+def check_indices(timestamps, cadence):
+    """
+    Sample indices at which the policy is evaluated: the first sample, then
+    the first sample at least `cadence` seconds after the previous check
+    (oracle_policy.simulate's check_interval).
+    """
+    n = len(timestamps)
+    if n < 2 or cadence <= 0 or np.min(np.diff(timestamps)) >= cadence:
+        return np.arange(n)
+    jump = np.searchsorted(timestamps, timestamps + cadence, side="left").tolist()
+    indices = []
+    i = 0
+    while i < n:
+        indices.append(i)
+        i = jump[i]
+    return np.array(indices)
+
+
+def deviation_bounds(deviation):
+    """
+    For each last value v (0-100): the largest x < v and the smallest x > v
+    with abs(x - v) / v >= deviation (UpdatePolicy.check), or 0 / 100 if none.
+    """
+    v = np.arange(1, 100, dtype=np.float64)[:, None]
+    x = np.arange(1, 100, dtype=np.float64)[None, :]
+    due = np.abs(x - v) / v >= deviation
+    lo = np.where(due & (x < v), x, 0).max(axis=1)
+    hi = np.where(due & (x > v), x, 100).min(axis=1)
+    return np.concatenate([[0], lo, [0]]).astype(np.int64), np.concatenate([[100], hi, [100]]).astype(np.int64)
+
+
+class _Sparse:
+    """Policy events of the combos that do not fire on every check, followed one event per round for all of them."""
+
+    def __init__(self, groups, combos, initial_perc):
+        # Flat check arrays across groups; each group's times are shifted past the previous one
+        # so a single searchsorted finds heartbeat deadlines for every combo
+        span = max(g["t"][-1] - g["t"][0] for g in groups) if groups else 0
+        max_heartbeat = max((c["heartbeat"] for c in combos if np.isfinite(c["heartbeat"])), default=0)
+        gap = span + max_heartbeat + 1
+        xs, ts, run_x, run_start, run_of, sentinel = [], [], [], [], [], []
+        offset = 0
+        runs = 0
+        for g_index, g in enumerate(groups):
+            x = g["x"]
+            g["offset"] = offset
+            g["shift"] = g_index * gap - g["t"][0]
+            xs.append(x)
+            ts.append(g["t"] + g["shift"])
+            starts = np.flatnonzero(np.diff(x, prepend=-1))
+            run_of.append(np.repeat(np.arange(len(starts)), np.diff(starts, append=len(x))) + runs)
+            run_x.append(np.append(x[starts], 0))
+            run_start.append(np.append(starts, len(x)) + offset)
+            sentinel.append(np.append(np.zeros(len(starts), bool), True))
+            offset += len(x)
+            runs += len(starts) + 1
+        self.x = np.concatenate(xs) if xs else np.zeros(0, np.int64)
+        self.t = np.concatenate(ts) if ts else np.zeros(0)
+        self.run_of = np.concatenate(run_of) if run_of else np.zeros(0, np.int64)
+        self.run_start = np.concatenate(run_start) if run_start else np.zeros(0, np.int64)
+        run_x = np.concatenate(run_x) if run_x else np.zeros(0, np.int64)
+        sentinel = np.concatenate(sentinel) if sentinel else np.zeros(0, bool)
+
+        # next_le[level][r]: first run >= r whose target is <= level (or the group's end)
+        self.xmin = int(self.x.min()) if len(self.x) else 1
+        self.xmax = int(self.x.max()) if len(self.x) else 99
+        index = np.arange(len(run_x))
+
+        def next_run(mask):
+            return np.minimum.accumulate(np.where(mask | sentinel, index, len(run_x))[::-1])[::-1]
+
+        levels = range(self.xmin, self.xmax + 1)
+        self.next_le = np.array([next_run(run_x <= level) for level in levels]).reshape(len(levels), -1)
+        self.next_ge = np.array([next_run(run_x >= level) for level in levels]).reshape(len(levels), -1)
+
+        deviations = sorted({c["deviation"] for c in combos})
+        bounds = [deviation_bounds(d) for d in deviations]
+        self.lo_table = np.array([b[0] for b in bounds]).reshape(len(bounds), -1)
+        self.hi_table = np.array([b[1] for b in bounds]).reshape(len(bounds), -1)
+        self.dev_index = np.array([deviations.index(c["deviation"]) for c in combos], dtype=np.int64)
+        self.heartbeat = np.array([c["heartbeat"] for c in combos], dtype=np.float64)
+        self.group = np.array([c["group"] for c in combos], dtype=np.int64)
+        self.initial_perc = initial_perc
+        self.groups = groups
+
+    def run(self):
+        """
+        Returns:
+            tuple: (event counts per combo, candidate (combo, flat check index, target) arrays in time order)
+        """
+        n = len(self.group)
+        offsets = np.array([g["offset"] for g in self.groups], dtype=np.int64)
+        lengths = np.array([len(g["x"]) for g in self.groups], dtype=np.int64)
+        start_times = np.array([g["t"][0] + g["shift"] for g in self.groups])
+        end = (offsets + lengths)[self.group]
+        pos = offsets[self.group] - 1
+        value = np.full(n, self.initial_perc, dtype=np.int64)
+        last_update = start_times[self.group]
+        running_min = np.full(n, 101, dtype=np.int64)
+        counts = np.zeros(n, dtype=np.int64)
+        found = []
+
+        active = np.arange(n)
+        while active.size:
+            s = pos[active] + 1
+            alive = s < end[active]
+            active, s = active[alive], s[alive]
+            if not active.size:
+                break
+            dev_index = self.dev_index[active]
+            lo = self.lo_table[dev_index, value[active]]
+            hi = self.hi_table[dev_index, value[active]]
+            seg_end = end[active]
+
+            x_now = self.x[s]
+            next_run = self.run_of[s] + 1
+            # Rows of out-of-range levels are computed but discarded by the where()
+            le = np.where(lo < self.xmin, seg_end,
+                          self.run_start[self.next_le[np.minimum(np.maximum(lo, self.xmin), self.xmax) - self.xmin, next_run]])
+            ge = np.where(hi > self.xmax, seg_end,
+                          self.run_start[self.next_ge[np.minimum(np.maximum(hi, self.xmin), self.xmax) - self.xmin, next_run]])
+            j = np.where((x_now <= lo) | (x_now >= hi), s, np.minimum(le, ge))
+            deadline = np.searchsorted(self.t, last_update[active] + self.heartbeat[active], side="left")
+            j = np.minimum(j, np.maximum(deadline, s))
+
+            hit = j < seg_end
+            done = active[~hit]
+            pos[done] = end[done]
+            active, j = active[hit], j[hit]
+            p = self.x[j]
+            counts[active] += 1
+            candidate = p <= running_min[active]
+            if candidate.any():
+                found.append((active[candidate], j[candidate], p[candidate]))
+            running_min[active] = np.minimum(running_min[active], p)
+            pos[active] = j
+            value[active] = p
+            last_update[active] = self.t[j]
+
+        if found:
+            combo, index, p = (np.concatenate(a) for a in zip(*found))
+            order = np.argsort(combo, kind="stable")
+            return counts, (combo[order], index[order], p[order])
+        empty = np.zeros(0, dtype=np.int64)
+        return counts, (empty, empty, empty)
+
+
+def _record_low_runs(p):
+    """Positions, targets and lengths of the runs of record lows (x <= every earlier x) in a target sequence."""
+    previous_min = np.concatenate([[101], np.minimum.accumulate(p)[:-1]])
+    candidates = np.flatnonzero(p <= previous_min)
+    values, first, counts = np.unique(-p[candidates], return_index=True, return_counts=True)
+    return candidates[first], -values, counts
+
+
+class _RangeExtrema:
+    """Sparse table for min/max of an integer series over [start, end)."""
+
+    def __init__(self, values):
+        self.mins = [values]
+        self.maxs = [values]
+        width = 1
+        while 2 * width <= len(values):
+            self.mins.append(np.minimum(self.mins[-1][:-width], self.mins[-1][width:]))
+            self.maxs.append(np.maximum(self.maxs[-1][:-width], self.maxs[-1][width:]))
+            width *= 2
+
+    def query(self, start, end):
+        length = np.maximum(end - start, 1)
+        level = np.floor(np.log2(length)).astype(np.int64)
+        lows = np.empty(len(start), dtype=np.float64)
+        highs = np.empty(len(start), dtype=np.float64)
+        for k in np.unique(level):
+            rows = np.flatnonzero(level == k)
+            a, b = start[rows], end[rows] - (1 << k)
+            lows[rows] = np.minimum(self.mins[k][a], self.mins[k][b])
+            highs[rows] = np.maximum(self.maxs[k][a], self.maxs[k][b])
+        return lows, highs
+
+
+def run_grid(timestamps, prices, grid, usd=1000 * WEI, eur=1000 * WEI, initial_perc=50, gas_per_tx=None):
+    """
+    Backtest every combination in `grid` (see make_grid) over one price series.
+
+    Args:
+        timestamps, prices: sample arrays (UNIX seconds, EUR/USD), sorted by time
+        usd, eur: starting treasury balances in wei
+        initial_perc: on-chain usdToEurProportion / 1e18 at the start (the policy's last value)
+        gas_per_tx: gas per reBalance call, to report total gas (optional)
+
+    Returns:
+        list of dicts, one per grid entry, in grid order
+    """
+    if not 1 <= initial_perc <= 99:
+        raise ValueError("initial_perc must be between 1 and 99")
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    prices = np.asarray(prices, dtype=np.float64)
+    n_samples = len(timestamps)
+    n = len(grid)
+    if n_samples == 0 or n == 0:
+        return []
+
+    tolerance = np.array([c.get("tolerance_bps", 0) for c in grid], dtype=np.int64)
+    if tolerance.min() < 0 or tolerance.max() > 10_000:
+        raise ValueError("tolerance_bps must be between 0 and 10000")
+
+    targets = {m: MAPPINGS[m](prices) for m in {c["mapping"] for c in grid}}
+    checks = {c: check_indices(timestamps, c) for c in {c["cadence"] for c in grid}}
+    group_keys = sorted({(c["mapping"], c["cadence"]) for c in grid}, key=str)
+    groups = [
+        {"mapping": m, "cadence": c, "samples": checks[c], "x": targets[m][checks[c]], "t": timestamps[checks[c]]}
+        for m, c in group_keys
+    ]
+    group_of = {key: i for i, key in enumerate(group_keys)}
+
+    counts = np.zeros(n, dtype=np.int64)
+    run_combo, run_sample, run_p, run_len = [], [], [], []
+
+    # Combos that rebalance on every check (after possibly skipping the first): heartbeat <= cadence
+    # means each check is at least one heartbeat after the previous update
+    sparse = []
+    every = {}
+    for i, c in enumerate(grid):
+        g = groups[group_of[(c["mapping"], c["cadence"])]]
+        if c["deviation"] <= 0 or c["heartbeat"] <= c["cadence"]:
+            first = 0 if c["deviation"] <= 0 or c["heartbeat"] <= 0 or \
+                abs(int(g["x"][0]) - initial_perc) / initial_perc >= c["deviation"] else 1
+            every.setdefault((group_of[(c["mapping"], c["cadence"])], first), []).append(i)
+        else:
+            sparse.append(dict(c, index=i, group=group_of[(c["mapping"], c["cadence"])]))
+
+    for (g_index, first), members in every.items():
+        g = groups[g_index]
+        positions, values, lengths = _record_low_runs(g["x"][first:])
+        members = np.array(members)
+        counts[members] = len(g["x"]) - first
+        run_combo.append(np.repeat(members, len(values)))
+        run_sample.append(np.tile(g["samples"][positions + first], len(members)))
+        run_p.append(np.tile(values, len(members)))
+        run_len.append(np.tile(lengths, len(members)))
+
+    if sparse:
+        engine = _Sparse(groups, sparse, initial_perc)
+        sparse_counts, (combo, flat_index, p) = engine.run()
+        indices = np.array([c["index"] for c in sparse])
+        counts[indices] = sparse_counts
+        samples = np.concatenate([g["samples"] for g in groups])
+        # Consecutive candidates with the same target form one run (targets only go down)
+        key = combo * 128 + (100 - p)
+        keys, first, lengths = np.unique(key, return_index=True, return_counts=True)
+        run_combo.append(indices[combo[first]])
+        run_sample.append(samples[flat_index[first]])
+        run_p.append(p[first])
+        run_len.append(lengths)
+
+    run_combo, run_sample, run_p, run_len = (np.concatenate(a) for a in (run_combo, run_sample, run_p, run_len))
+    order = np.lexsort((run_sample, run_combo))
+    run_combo, run_sample, run_p, run_len = (a[order] for a in (run_combo, run_sample, run_p, run_len))
+    runs_per_combo = np.bincount(run_combo, minlength=n)
+    width = int(runs_per_combo.max()) if len(run_combo) else 0
+    rank = np.arange(len(run_combo)) - np.searchsorted(run_combo, run_combo)
+
+    # Contract arithmetic over each combo's record-low runs
+    usd_l = to_limbs(usd, n)
+    eur_l = to_limbs(eur, n)
+    minted = (np.zeros(n, np.int64), np.zeros(n, np.int64))
+    burned = (np.zeros(n, np.int64), np.zeros(n, np.int64))
+    changes = np.zeros(n, dtype=np.int64)
+    seg_start = np.full((n, width + 1), n_samples, dtype=np.int64)
+    seg_share = np.zeros((n, width + 1))
+    seg_start[:, 0] = 0
+    total0 = usd + eur
+    seg_share[:, 0] = usd / total0 if total0 else 0
+
+    for k in range(width):
+        at_k = rank == k
+        live = run_combo[at_k]
+        p = run_p[at_k]
+        remaining = run_len[at_k]
+        seg_start[live, k + 1] = run_sample[at_k]
+        rows = live
+        while live.size:
+            # Repeated calls at the same target can still move a few wei of rounding dust;
+            # they stop changing anything after the first no-op
+            u = (usd_l[0][live], usd_l[1][live])
+            e = (eur_l[0][live], eur_l[1][live])
+            u, e, m, b = rebalance(p, u, e, tolerance[live])
+            changed = (m[0] > 0) | (m[1] > 0) | (b[0] > 0) | (b[1] > 0)
+            usd_l[0][live], usd_l[1][live] = u
+            eur_l[0][live], eur_l[1][live] = e
+            mh, ml = _add((minted[0][live], minted[1][live]), m)
+            minted[0][live], minted[1][live] = mh, ml
+            bh, bl = _add((burned[0][live], burned[1][live]), b)
+            burned[0][live], burned[1][live] = bh, bl
+            changes[live] += changed
+            remaining = remaining - 1
+            keep = changed & (remaining > 0)
+            live, p, remaining = live[keep], p[keep], remaining[keep]
+        u = limbs_to_float((usd_l[0][rows], usd_l[1][rows]))
+        e = limbs_to_float((eur_l[0][rows], eur_l[1][rows]))
+        seg_share[rows, k + 1] = np.where(u + e > 0, u / np.where(u + e > 0, u + e, 1), 0)
+
+    # Tracking error: treasury USD share vs the mapping's target at every sample
+    seg_end = np.concatenate([seg_start[:, 1:], np.full((n, 1), n_samples)], axis=1)
+    seg_end = np.maximum(seg_end, seg_start)
+    squared = np.zeros(n)
+    worst = np.zeros(n)
+    mapping_of = np.array([c["mapping"] for c in grid])
+    for m, x in targets.items():
+        rows = np.flatnonzero(mapping_of == m)
+        d = x / 100.0
+        s1 = np.concatenate([[0.0], np.cumsum(d)])
+        s2 = np.concatenate([[0.0], np.cumsum(d * d)])
+        start, stop, share = seg_start[rows], seg_end[rows], seg_share[rows]
+        length = stop - start
+        squared[rows] = (length * share**2 - 2 * share * (s1[stop] - s1[start]) + (s2[stop] - s2[start])).sum(axis=1)
+        nonempty = length > 0
+        lows, highs = _RangeExtrema(x).query(start[nonempty], stop[nonempty])
+        gap = np.zeros(start.shape)
+        gap[nonempty] = np.maximum(np.abs(share[nonempty] * 100 - lows), np.abs(highs - share[nonempty] * 100))
+        worst[rows] = gap.max(axis=1)
+
+    minted_f = limbs_to_float(minted)
+    burned_f = limbs_to_float(burned)
+    usd_f = limbs_to_float(usd_l)
+    eur_f = limbs_to_float(eur_l)
+    tvl0 = (usd + eur) / WEI
+    results = []
+    for i, c in enumerate(grid):
+        result = {
+            **c,
+            "transactions": int(counts[i]),
+            "state_changes": int(changes[i]),
+            "noop_transactions": int(counts[i] - changes[i]),
+            "minted_eurc": round(float(minted_f[i]), 6),
+            "burned_usdc": round(float(burned_f[i]), 6),
+            "turnover": round(float(minted_f[i] + burned_f[i]), 6),
+            "turnover_pct_of_tvl": round(float((minted_f[i] + burned_f[i]) / tvl0 * 100), 4) if tvl0 else 0.0,
+            "final_usd_perc": round(float(usd_f[i] / (usd_f[i] + eur_f[i]) * 100), 4) if usd_f[i] + eur_f[i] else 0.0,
+            "final_tvl": round(float(usd_f[i] + eur_f[i]), 6),
+            "tracking_error_rms": round(float(np.sqrt(max(squared[i], 0) / n_samples) * 100), 4),
+            "tracking_error_max": round(float(worst[i]), 4),
+            "usd_wei": int(usd_l[0][i]) * LIMB + int(usd_l[1][i]),
+            "eur_wei": int(eur_l[0][i]) * LIMB + int(eur_l[1][i]),
+        }
+        if gas_per_tx:
+            result["gas"] = int(counts[i] * gas_per_tx)
+        results.append(result)
+    return results
+
+
+def run_grid_parallel(timestamps, prices, grid, workers, **kwargs):
+    """run_grid split across a process pool, one chunk of (mapping, cadence) groups per task."""
+    from concurrent.futures import ProcessPoolExecutor
+
+    if workers <= 1:
+        return run_grid(timestamps, prices, grid, **kwargs)
+    by_group = {}
+    for i, c in enumerate(grid):
+        by_group.setdefault((c["mapping"], c["cadence"]), []).append(i)
+    chunks = [[] for _ in range(min(workers, len(by_group)))]
+    for n, indices in enumerate(sorted(by_group.values(), key=len, reverse=True)):
+        chunks[n % len(chunks)].extend(indices)
+
+    results = [None] * len(grid)
+    with ProcessPoolExecutor(max_workers=len(chunks)) as pool:
+        futures = [(chunk, pool.submit(run_grid, timestamps, prices, [grid[i] for i in chunk], **kwargs)) for chunk in chunks]
+        for chunk, future in futures:
+            for i, result in zip(chunk, future.result()):
+                results[i] = result
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+    import csv
+    import json
+    import sys
+
+    parser = argparse.ArgumentParser(description="Backtest rebalance policies against a EUR/USD history")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--csv", help="CSV with timestamp,price columns")
+    source.add_argument("--archive", help="Kalshi snapshot archive directory (KALSHI_ARCHIVE_DIR)")
+    source.add_argument("--synthetic-days", type=float, help="Random walk of this many days at 1-minute samples")
+    parser.add_argument("--price-source", default="expected", choices=["expected", "median", "mode"])
+    parser.add_argument("--mapping", action="append", choices=sorted(MAPPINGS))
+    parser.add_argument("--cadence", type=float, action="append", help="Seconds between policy checks")
+    parser.add_argument("--deviation", type=float, action="append", help="Relative deviation trigger")
+    parser.add_argument("--heartbeat", type=float, action="append", help="Heartbeat in seconds (inf = none)")
+    parser.add_argument("--tolerance-bps", type=int, action="append", help="reBalance tolerance band (rebalanceToleranceBps)")
+    parser.add_argument("--usd", type=float, default=1000, help="Starting USDC balance (tokens)")
+    parser.add_argument("--eur", type=float, default=1000, help="Starting EURC balance (tokens)")
+    parser.add_argument("--initial-perc", type=int, default=50, help="Starting on-chain target USD%%")
+    parser.add_argument("--gas-per-tx", type=int, help="Gas per reBalance call, to report total gas")
+    parser.add_argument("--workers", type=int, default=1, help="Process pool size")
+    parser.add_argument("--sort", default="tracking_error_rms", help="Result field to rank by")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--output", help="Write every result to this CSV")
+    args = parser.parse_args()
+
+    if args.csv:
+        timestamps, prices = load_csv_series(args.csv)
+    elif args.archive:
+        timestamps, prices = load_archive_series(args.archive, source=args.price_source)
+    else:
+        timestamps, prices = synthetic_series(args.synthetic_days)
+    if len(prices) == 0:
+        sys.exit("No price samples")
+
+    grid = make_grid(
+        args.mapping or DEFAULT_MAPPINGS, args.cadence or DEFAULT_CADENCES,
+        args.deviation or DEFAULT_DEVIATIONS, args.heartbeat or DEFAULT_HEARTBEATS,
+        args.tolerance_bps or DEFAULT_TOLERANCES,
+    )
+    start = time.perf_counter()
+    results = run_grid_parallel(
+        timestamps, prices, grid, args.workers,
+        usd=int(round(args.usd * 1e6)) * 10**12, eur=int(round(args.eur * 1e6)) * 10**12,
+        initial_perc=args.initial_perc, gas_per_tx=args.gas_per_tx,
+    )
+    elapsed = time.perf_counter() - start
+
+    if args.output:
+        with open(args.output, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(results[0]))
+            writer.writeheader()
+            writer.writerows(results)
+
+    ranked = sorted(results, key=lambda r: (r[args.sort], r["transactions"]))
+    print(json.dumps({
+        "samples": len(prices),
+        "combinations": len(grid),
+        "seconds": round(elapsed, 2),
+        "top": [{k: v for k, v in r.items() if not k.endswith("_wei")} for r in ranked[:args.top]],
+    }, indent=2, default=str))
@@ -0,0 +1,102 @@
+from eth_abi.decoding import ContextFramesBytesIO
+from eth_abi.registry import registry
+from eth_utils import function_abi_to_4byte_selector, to_checksum_address
+from web3._utils.abi import collapse_if_tuple
+
+# Argument types encoded directly as one 32-byte word, without eth_abi validation
+_WORD_ENCODERS = {
+    "uint256": lambda value: value.to_bytes(32, "big"),
+    "address": lambda value: bytes.fromhex(value[2:]).rjust(32, b"\0") if len(value) == 42 else _bad_address(value),
+}
+
+
+def _bad_address(value):
+    raise ValueError(f"Invalid address {value!r}")
+
+
+class FunctionEncoder:
+    """
+    Calldata encoder and result decoder for one contract function, resolved
+    once at startup.
+
+    Building contract.functions.fn(...) re-resolves and re-validates the ABI
+    on every call (~100-400us); this keeps the selector and eth_abi coders,
+    and encodes all-uint256/address arguments word by word.
+    """
+
+    def __init__(self, w3, contract, fn_name):
+        abi = next(e for e in contract.abi if e.get("type") == "function" and e["name"] == fn_name)
+        self.w3 = w3
+        self.address = contract.address
+        self.fn_name = fn_name
+        self.selector = function_abi_to_4byte_selector(abi)
+        self.input_types = [collapse_if_tuple(i) for i in abi["inputs"]]
+        self.output_types = [collapse_if_tuple(o) for o in abi.get("outputs", [])]
+        if all(t in _WORD_ENCODERS for t in self.input_types):
+            self._word_encoders = [_WORD_ENCODERS[t] for t in self.input_types]
+        else:
+            self._word_encoders = None
+            self._encoder = registry.get_encoder(f"({','.join(self.input_types)})")
+        if any("address" in t and t != "address" for t in self.output_types):
+            raise ValueError(f"{fn_name}: nested address outputs are not supported, use the web3 contract function")
+        self._decoder = registry.get_decoder(f"({','.join(self.output_types)})") if self.output_types else None
+        self._address_outputs = [t == "address" for t in self.output_types]
+
+    def __call__(self, *args):
+        return EncodedCall(self, self.encode(*args))
+
+    def encode(self, *args):
+        """Hex calldata: selector followed by the ABI-encoded arguments."""
+        if len(args) != len(self.input_types):
+            raise TypeError(f"{self.fn_name} takes {len(self.input_types)} arguments, got {len(args)}")
+        if self._word_encoders is not None:
+            body = b"".join(encode(value) for encode, value in zip(self._word_encoders, args))
+        else:
+            body = self._encoder(args)
+        return "0x" + (self.selector + body).hex()
+
+    def decode(self, data):
+        """Decoded return value: a single value, or a tuple for several outputs."""
+        if self._decoder is None:
+            return None
+        values = self._decoder(ContextFramesBytesIO(bytes(data)))
+        if any(self._address_outputs):
+            # Same normalization as web3: addresses come back checksummed
+            values = tuple(to_checksum_address(v) if a else v for v, a in zip(values, self._address_outputs))
+        return values[0] if len(values) == 1 else values
+
+
+class EncodedCall:
+    """
+    A contract call with its calldata already encoded.
+
+    Accepted wherever a bound web3 contract function is sent through the
+    TransactionManager or read through batch_read.
+    """
+
+    __slots__ = ("encoder", "data")
+
+    def __init__(self, encoder, data):
+        self.encoder = encoder
+        self.data = data
+
+    @property
+    def address(self):
+        return self.encoder.address
+
+    @property
+    def fn_name(self):
+        return self.encoder.fn_name
+
+    def _encode_transaction_data(self):
+        return self.data
+
+    def request(self, block_identifier="latest"):
+        """eth_call request (pass to w3.batch_requests().add or await directly)."""
+        return self.encoder.w3.eth.call({"to": self.address, "data": self.data}, block_identifier)
+
+    async def call(self, block_identifier="latest"):
+        return self.encoder.decode(await self.request(block_identifier))
+
+    async def estimate_gas(self, transaction=None):
+        return await self.encoder.w3.eth.estimate_gas({**(transaction or {}), "to": self.address, "data": self.data})
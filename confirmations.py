@@ -0,0 +1,185 @@
+import asyncio
+import json
+import logging
+import time
+
+import websockets
+from web3._utils.method_formatters import receipt_formatter
+from web3.datastructures import AttributeDict
+
+from metrics import CHAIN_REORGS, TRACKED_TRANSACTIONS, observe_rpc
+
+logger = logging.getLogger(__name__)
+
+
+class _Tracked:
+    def __init__(self, tx_hash):
+        self.tx_hash = tx_hash
+        self.future = asyncio.get_running_loop().create_future()
+        self.receipt = None  # latest receipt seen, None while not included
+        self.waiters = 0
+
+
+class ConfirmationTracker:
+    """
+    Waits for receipts of every pending transaction from one shared loop.
+
+    The loop follows new heads (eth_subscribe newHeads over `ws_url`, or one
+    eth_blockNumber poll per `poll_interval` as fallback) and, once per new
+    block, fetches the receipts of all tracked transactions in a single
+    JSON-RPC batch. A transaction resolves once it is `confirmations` blocks
+    deep; until then its receipt is re-checked every block, so a reorg that
+    drops or moves it is noticed. The loop stops when nothing is tracked.
+    """
+
+    def __init__(self, w3, confirmations=1, poll_interval=2, ws_url=None, ws_retry=60):
+        self.w3 = w3
+        self.confirmations = max(1, confirmations)
+        self.poll_interval = poll_interval
+        self.ws_url = ws_url
+        self.ws_retry = ws_retry
+        self.head = None
+        self._entries = {}  # tx_hash -> _Tracked
+        self._task = None
+        self._ws_retry_at = 0.0
+        self._unchecked = False  # entries added since the last receipt batch
+
+    @property
+    def pending_count(self):
+        return len(self._entries)
+
+    async def wait_for_receipt(self, tx_hash, timeout=120):
+        """
+        Wait until a transaction is `confirmations` blocks deep.
+
+        Returns:
+            receipt (AttributeDict, same shape as w3.eth.wait_for_transaction_receipt)
+
+        Raises:
+            asyncio.TimeoutError: if not confirmed within timeout seconds
+        """
+        tx_hash = tx_hash.lower()
+        entry = self._entries.get(tx_hash)
+        if entry is None:
+            entry = self._entries[tx_hash] = _Tracked(tx_hash)
+            self._unchecked = True
+            TRACKED_TRANSACTIONS.set(len(self._entries))
+        entry.waiters += 1
+        self.start()
+        try:
+            return await asyncio.wait_for(asyncio.shield(entry.future), timeout)
+        finally:
+            entry.waiters -= 1
+            if entry.waiters == 0 and self._entries.get(tx_hash) is entry:
+                self._drop(entry)
+
+    def forget(self, tx_hash):
+        """Stop tracking a hash that can no longer be mined (e.g. replaced by a speed-up)."""
+        entry = self._entries.get(tx_hash.lower())
+        if entry is not None:
+            self._drop(entry)
+            if not entry.future.done():
+                entry.future.set_exception(RuntimeError("Transaction no longer tracked"))
+                entry.future.exception()
+
+    def _drop(self, entry):
+        del self._entries[entry.tx_hash]
+        TRACKED_TRANSACTIONS.set(len(self._entries))
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while self._entries:
+            try:
+                async for head in self._heads():
+                    await self._on_head(head)
+                    if not self._entries:
+                        return  # idle: stop following heads until the next transaction
+            except Exception as e:
+                logger.warning(f"Confirmation tracker error, retrying: {str(e)}")
+                await asyncio.sleep(self.poll_interval)
+
+    async def _heads(self):
+        """New block numbers: from the WebSocket subscription when available, otherwise polled."""
+        if self.ws_url and time.monotonic() >= self._ws_retry_at:
+            try:
+                async for head in self._subscribe_heads():
+                    yield head
+                return
+            except Exception as e:
+                logger.warning(f"newHeads subscription failed, polling blocks for {self.ws_retry}s: {str(e)}")
+                self._ws_retry_at = time.monotonic() + self.ws_retry
+
+        while self._entries:
+            head = await observe_rpc("block_number", self.w3.eth.block_number)
+            # New transactions are checked once even without a new block: one may have
+            # been registered just after the block that includes it was processed
+            if head != self.head or self._unchecked:
+                yield head
+            if self.ws_url and time.monotonic() >= self._ws_retry_at:
+                return  # time to try the subscription again
+            await asyncio.sleep(self.poll_interval)
+
+    async def _subscribe_heads(self):
+        async with websockets.connect(self.ws_url) as ws:
+            await ws.send(json.dumps({"jsonrpc": "2.0", "id": 1, "method": "eth_subscribe", "params": ["newHeads"]}))
+            response = json.loads(await ws.recv())
+            if "error" in response:
+                raise RuntimeError(response["error"].get("message"))
+            # Catch up on anything mined between the send and the subscription
+            yield await observe_rpc("block_number", self.w3.eth.block_number)
+            async for message in ws:
+                params = json.loads(message).get("params") or {}
+                header = params.get("result") or {}
+                if "number" in header:
+                    yield int(header["number"], 16)
+                if not self._entries:
+                    return
+
+    async def _on_head(self, head):
+        self.head = head
+        self._unchecked = False
+        entries = list(self._entries.values())
+        if not entries:
+            return
+
+        responses = await observe_rpc(
+            "receipt_batch",
+            self.w3.provider.make_batch_request([("eth_getTransactionReceipt", [e.tx_hash]) for e in entries])
+        )
+        if not isinstance(responses, list):
+            # A whole-batch error comes back as a single response
+            raise RuntimeError((responses.get("error") or {}).get("message", "Invalid batch response"))
+        for entry, response in zip(entries, responses):
+            if entry.future.done() or response.get("error"):
+                continue
+            raw = response.get("result")
+            receipt = AttributeDict.recursive(receipt_formatter(raw)) if raw else None
+
+            if entry.receipt is not None and (receipt is None or receipt['blockHash'] != entry.receipt['blockHash']):
+                CHAIN_REORGS.inc()
+                logger.warning(
+                    f"Reorg: transaction {entry.tx_hash} moved from block {entry.receipt['blockNumber']} "
+                    f"to {receipt['blockNumber'] if receipt else 'mempool'}"
+                )
+            entry.receipt = receipt
+
+            if receipt is not None and max(head, receipt['blockNumber']) - receipt['blockNumber'] + 1 >= self.confirmations:
+                entry.future.set_result(receipt)
+                self._drop(entry)
+
+    def to_dict(self):
+        return {
+            "confirmations": self.confirmations,
+            "head": self.head,
+            "tracked": len(self._entries),
+            "source": "newHeads" if self.ws_url and time.monotonic() >= self._ws_retry_at else "poll",
+        }
@@ -0,0 +1,21 @@
+// SPDX-License-Identifier: MIT
+pragma solidity 0.8.20;
+
+import "@openzeppelin/contracts/access/Ownable.sol";
+
+interface IMintable {
+    function mint(address to, uint256 amount) external;
+}
+
+// Faucet helper: many MockERC20 mints (any tokens, any recipients) in one transaction
+contract BatchMinter is Ownable {
+
+    constructor(address initialOwner) Ownable(initialOwner) {}
+
+    function mintBatch(address[] calldata _tokens, address[] calldata _recipients, uint256[] calldata _amounts) external onlyOwner {
+        require(_tokens.length == _recipients.length && _tokens.length == _amounts.length, "Length mismatch");
+        for (uint256 i = 0; i < _tokens.length; i++) {
+            IMintable(_tokens[i]).mint(_recipients[i], _amounts[i]);
+        }
+    }
+}
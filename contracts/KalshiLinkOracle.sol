@@ -8,6 +8,7 @@ contract KalshiLinkOracle is Ownable {
 
     string public name = "KalshiLinkOracle";
 
+    // ABI shape returned by every getter (unchanged)
     struct DataPoint {
         address submitter;
         uint256 submitterTimestamp; // UNIX timestamp
@@ -17,31 +18,151 @@ contract KalshiLinkOracle is Ownable {
         uint256 resolutionTimestamp; // UNIX timestamp
     }
 
+    // Storage layout: two slots per point instead of five
+    struct PackedDataPoint {
+        // slot 0
+        address submitter;
+        uint40 submitterTimestamp;
+        uint56 blockNumber;
+        // slot 1
+        uint32 value;
+        uint40 resolutionTimestamp;
+    }
+
     uint256 public nextIndexDataPoint = 0;
 
-    mapping (uint256 => DataPoint) public dataEurUsd;
+    mapping (uint256 => PackedDataPoint) private _dataEurUsd;
+
+    // Additional feeds (other series), keyed by feed id e.g. "KXEURUSD" as bytes32
+    bytes32 public constant EUR_USD_FEED = "KXEURUSD";
+    mapping (bytes32 => mapping (uint256 => PackedDataPoint)) private _feedData;
+    mapping (bytes32 => uint256) public nextIndexFeed;
+
+    // One event per EUR/USD data point, so history can be rebuilt with eth_getLogs
+    event DataPointFulfilled(
+        uint256 indexed index,
+        address indexed submitter,
+        uint256 value,
+        uint256 submitterTimestamp,
+        uint256 resolutionTimestamp
+    );
+
+    // One event per data point of any other feed
+    event FeedFulfilled(
+        bytes32 indexed feedId,
+        uint256 indexed index,
+        address indexed submitter,
+        uint256 value,
+        uint256 submitterTimestamp,
+        uint256 resolutionTimestamp
+    );
 
     constructor(address initialOwner) Ownable(initialOwner) {}
 
     function fulfillPredictionMarketDataEurUsd(uint256 _value, uint256 _timestamp, uint256 _resolutionTimestamp) external onlyOwner {
         // value is percentage value - 1 and 99_999 ( 3 decimal places )
         uint256 index = nextIndexDataPoint;
-        dataEurUsd[index] = DataPoint({
-            submitter: msg.sender,
-            submitterTimestamp: _timestamp,
-            blockNumber: block.number,
-            value: _value,
-            resolutionTimestamp: _resolutionTimestamp
+        _store(_dataEurUsd[index], _value, _timestamp, _resolutionTimestamp);
+        nextIndexDataPoint = index + 1;
+        emit DataPointFulfilled(index, msg.sender, _value, _timestamp, _resolutionTimestamp);
+    }
+
+    // Append several EUR/USD points in one transaction (one counter write for the whole batch)
+    function fulfillBatch(uint256[] calldata _values, uint256[] calldata _timestamps, uint256[] calldata _resolutionTimestamps) external onlyOwner {
+        require(_values.length == _timestamps.length && _values.length == _resolutionTimestamps.length, "Length mismatch");
+        uint256 index = nextIndexDataPoint;
+        for (uint256 i = 0; i < _values.length; i++) {
+            _store(_dataEurUsd[index], _values[i], _timestamps[i], _resolutionTimestamps[i]);
+            emit DataPointFulfilled(index, msg.sender, _values[i], _timestamps[i], _resolutionTimestamps[i]);
+            index++;
+        }
+        nextIndexDataPoint = index;
+    }
+
+    // Fulfil several feeds in one transaction; the EUR/USD feed keeps using dataEurUsd
+    function fulfillFeedsBatch(bytes32[] calldata _feedIds, uint256[] calldata _values, uint256 _timestamp, uint256[] calldata _resolutionTimestamps) external onlyOwner {
+        require(_feedIds.length == _values.length && _feedIds.length == _resolutionTimestamps.length, "Length mismatch");
+        for (uint256 i = 0; i < _feedIds.length; i++) {
+            if (_feedIds[i] == EUR_USD_FEED) {
+                uint256 index = nextIndexDataPoint;
+                _store(_dataEurUsd[index], _values[i], _timestamp, _resolutionTimestamps[i]);
+                emit DataPointFulfilled(index, msg.sender, _values[i], _timestamp, _resolutionTimestamps[i]);
+                nextIndexDataPoint = index + 1;
+            } else {
+                uint256 index = nextIndexFeed[_feedIds[i]];
+                _store(_feedData[_feedIds[i]][index], _values[i], _timestamp, _resolutionTimestamps[i]);
+                nextIndexFeed[_feedIds[i]] = index + 1;
+                emit FeedFulfilled(_feedIds[i], index, msg.sender, _values[i], _timestamp, _resolutionTimestamps[i]);
+            }
+        }
+    }
+
+    function _store(PackedDataPoint storage _point, uint256 _value, uint256 _timestamp, uint256 _resolutionTimestamp) private {
+        require(_value <= type(uint32).max, "Value out of range");
+        require(_timestamp <= type(uint40).max && _resolutionTimestamp <= type(uint40).max, "Timestamp out of range");
+        _point.submitter = msg.sender;
+        _point.submitterTimestamp = uint40(_timestamp);
+        _point.blockNumber = uint56(block.number);
+        _point.value = uint32(_value);
+        _point.resolutionTimestamp = uint40(_resolutionTimestamp);
+    }
+
+    function _unpack(PackedDataPoint storage _point) private view returns (DataPoint memory) {
+        return DataPoint({
+            submitter: _point.submitter,
+            submitterTimestamp: _point.submitterTimestamp,
+            blockNumber: _point.blockNumber,
+            value: _point.value,
+            resolutionTimestamp: _point.resolutionTimestamp
         });
-        nextIndexDataPoint++;
     }
 
     // View functions
+
+    // Same ABI as the former public mapping getters
+    function dataEurUsd(uint256 _index) external view returns (address submitter, uint256 submitterTimestamp, uint256 blockNumber, uint256 value, uint256 resolutionTimestamp) {
+        DataPoint memory d = _unpack(_dataEurUsd[_index]);
+        return (d.submitter, d.submitterTimestamp, d.blockNumber, d.value, d.resolutionTimestamp);
+    }
+
+    function feedData(bytes32 _feedId, uint256 _index) external view returns (address submitter, uint256 submitterTimestamp, uint256 blockNumber, uint256 value, uint256 resolutionTimestamp) {
+        DataPoint memory d = _unpack(_feedData[_feedId][_index]);
+        return (d.submitter, d.submitterTimestamp, d.blockNumber, d.value, d.resolutionTimestamp);
+    }
+
     function getDataPoint(uint256 _index) public view returns (DataPoint memory) {
-        DataPoint memory d = dataEurUsd[_index];
+        DataPoint memory d = _unpack(_dataEurUsd[_index]);
         return d;
     }
 
+    // Number of data points and the newest one (empty if there is none yet) in a single call
+    function latestDataPoint() public view returns (uint256 count, DataPoint memory latest) {
+        count = nextIndexDataPoint;
+        if (count > 0) {
+            latest = _unpack(_dataEurUsd[count - 1]);
+        }
+    }
+
+    // Up to _count data points starting at _start; shorter at the end of the series
+    function getDataPoints(uint256 _start, uint256 _count) public view returns (DataPoint[] memory points) {
+        if (_start >= nextIndexDataPoint || _count == 0) {
+            return new DataPoint[](0);
+        }
+        // Clamped before adding, so "everything from _start" (_count = type(uint256).max) cannot overflow
+        uint256 end = _count > nextIndexDataPoint - _start ? nextIndexDataPoint : _start + _count;
+        points = new DataPoint[](end - _start);
+        for (uint256 i = _start; i < end; i++) {
+            points[i - _start] = _unpack(_dataEurUsd[i]);
+        }
+    }
+
+    function getFeedDataPoint(bytes32 _feedId, uint256 _index) public view returns (DataPoint memory) {
+        if (_feedId == EUR_USD_FEED) {
+            return _unpack(_dataEurUsd[_index]);
+        }
+        return _unpack(_feedData[_feedId][_index]);
+    }
+
     function getName() public view returns (string memory) {
         return name;
     }
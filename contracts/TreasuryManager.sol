@@ -6,12 +6,12 @@ pragma solidity ^0.8.0;
 // import "@openzeppelin/contracts/token/ERC20/presets/ERC20PresetMinterPauser.sol";
 // import "@openzeppelin/contracts/token/ERC20/ERC20Burnable.sol";
 import { MockERC20 } from "./MockERC20.sol";
-// import "@openzeppelin/contracts/access/Ownable.sol";
+import "@openzeppelin/contracts/access/Ownable.sol";
 // import "@openzeppelin/contracts/token/ERC20/utils/SafeERC20.sol";
 // import "@openzeppelin/contracts/utils/ReentrancyGuard.sol";
 // import "@openzeppelin/contracts/utils/cryptography/ECDSA.sol";
 
-contract TreasuryManager /*is Ownable*/ {
+contract TreasuryManager is Ownable {
     MockERC20 public usdcToken;
     MockERC20 public eurcToken;
     MockERC20 public pstToken;
@@ -22,6 +22,7 @@ contract TreasuryManager /*is Ownable*/ {
     event Withdraw(address, uint256, uint256);
     event Log(uint256);
     event NewRatioCalculated(uint256);
+    event RebalanceToleranceUpdated(uint256);
 
     uint256 public usdToEurProportion = 50 * 10**18; // 10**6
     uint256 public eurToUsdProportion = 50 * 10**18; // 10**6
@@ -29,7 +30,11 @@ contract TreasuryManager /*is Ownable*/ {
     // uint256 public usdToEurProportion = 25 * 10**18;
     // uint256 public eurToUsdProportion = 75 * 10**18;
 
-    constructor(address _usdcTokenAddr, address _eurcTokenAddr, address _pstTokenAddr) {
+    // reBalance leaves the balances alone while the USDC balance is within this many
+    // basis points of total value from its target (0 = always trade)
+    uint256 public rebalanceToleranceBps = 0;
+
+    constructor(address _usdcTokenAddr, address _eurcTokenAddr, address _pstTokenAddr) Ownable(msg.sender) {
         usdcToken = MockERC20(_usdcTokenAddr);
         eurcToken = MockERC20(_eurcTokenAddr);
         pstToken = MockERC20(_pstTokenAddr);
@@ -91,21 +96,40 @@ contract TreasuryManager /*is Ownable*/ {
     }
 
     function reBalance(uint256 _targetUsdPerc /*25*/ /*, uint256 targetEurPerc 75*/) external {
-        uint256 totalValue = usdcToken.balanceOf(address(this)) + eurcToken.balanceOf(address(this));
+        // Each balance is read once
+        uint256 usdBalance = usdcToken.balanceOf(address(this));
+        uint256 eurBalance = eurcToken.balanceOf(address(this));
+        uint256 totalValue = usdBalance + eurBalance;
 
         uint256 targetUsd = (_targetUsdPerc         * totalValue * 1 ether) / (100 * 1 ether);
         uint256 targetEur = ((100 - _targetUsdPerc) * totalValue * 1 ether) / (100 * 1 ether);
 
-        uint256 amountEur = eurcToken.balanceOf(address(this)) > targetEur ? 0 : targetEur - eurcToken.balanceOf(address(this));
-        eurcToken.mint(address(this), amountEur); // mint
+        uint256 drift = usdBalance > targetUsd ? usdBalance - targetUsd : targetUsd - usdBalance;
+        if (drift * 10_000 > rebalanceToleranceBps * totalValue) {
+            uint256 amountEur = eurBalance > targetEur ? 0 : targetEur - eurBalance;
+            if (amountEur > 0) {
+                eurcToken.mint(address(this), amountEur); // mint
+            }
+
+            uint256 amountUsd = usdBalance > targetUsd ? usdBalance - targetUsd : 0;
+            // usdcToken.approve(address(this), amountUsd); // burn step one
+            // usdcToken.transferFrom(address(this), deadAddress, amountUsd); // burn step two
+            if (amountUsd > 0) {
+                usdcToken.burn(amountUsd); // burn
+            }
+        }
 
-        uint256 amountUsd = usdcToken.balanceOf(address(this)) > targetUsd ? usdcToken.balanceOf(address(this)) - targetUsd : 0;
-        // usdcToken.approve(address(this), amountUsd); // burn step one
-        // usdcToken.transferFrom(address(this), deadAddress, amountUsd); // burn step two
-        usdcToken.burn(amountUsd); // burn
+        uint256 newUsdToEurProportion = _targetUsdPerc * 10**18;
+        if (newUsdToEurProportion != usdToEurProportion) {
+            usdToEurProportion = newUsdToEurProportion;
+            eurToUsdProportion = (100 - _targetUsdPerc) * 10**18;
+        }
+    }
 
-        usdToEurProportion = _targetUsdPerc * 10**18;
-        eurToUsdProportion = (100 - _targetUsdPerc) * 10**18;
+    function setRebalanceTolerance(uint256 _toleranceBps) external onlyOwner {
+        require(_toleranceBps <= 10_000, "Tolerance above 100%");
+        rebalanceToleranceBps = _toleranceBps;
+        emit RebalanceToleranceUpdated(_toleranceBps);
     }
 
     // VIEW ONLY FUNCTIONS
@@ -0,0 +1,328 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import cached_property
+
+from metrics import FAILURES
+
+logger = logging.getLogger(__name__)
+
+JOB_COLUMNS = "job_id, address, status, created_at, results, error"
+
+
+class FaucetJob:
+    """
+    One faucet request.
+
+    Attributes:
+        job_id: str
+        address: str (checksum address)
+        status: 'queued', 'submitted', 'minted' or 'failed'
+        results: dict {token: {'success', 'transaction_hash', 'amount', 'matched_real_balance'}}
+    """
+
+    def __init__(self, address, job_id=None, status="queued", created_at=None, results=None, error=None):
+        self.job_id = job_id or uuid.uuid4().hex
+        self.address = address
+        self.status = status
+        self.created_at = created_at or time.time()
+        self.results = results or {}
+        self.error = error
+        self._done = asyncio.get_running_loop().create_future()
+
+    async def wait(self, timeout=None):
+        await asyncio.wait_for(asyncio.shield(self._done), timeout)
+        return self
+
+    def _finish(self, status, error=None):
+        self.status = status
+        self.error = error
+        if not self._done.done():
+            self._done.set_result(status)
+
+    def to_dict(self):
+        data = {
+            "job_id": self.job_id,
+            "address": self.address,
+            "status": self.status,
+            "created_at": int(self.created_at),
+            "results": self.results,
+        }
+        if self.error:
+            data["error"] = self.error
+        return data
+
+
+class FaucetQueue:
+    """
+    Accepts faucet requests immediately and mints for all of them together.
+
+    Every `interval` seconds the pending jobs are flushed: amounts for all
+    addresses are resolved in one go and the mints are sent as a single
+    batched transaction. Repeated requests for an address within `cooldown`
+    seconds return the existing job instead of minting again.
+
+    With a `db_path`, jobs are also written to a SQLite file shared by every
+    worker on the host, so job lookups and the cooldown work whichever
+    worker a request lands on. Pending jobs are still minted by the worker
+    that accepted them. SQLite calls run in worker threads, one at a time,
+    so waiting on another worker's write lock never blocks the event loop.
+
+    Args:
+        resolve_amounts: async fn(addresses) -> {address: {token: (mint_amount, display_amount)}}
+        submit_mints: async fn([(token, address, amount)]) -> [(TxHandle, [indexes of the mints it carries])]
+    """
+
+    def __init__(self, resolve_amounts, submit_mints, interval=5, cooldown=3600, max_batch=100, history_size=10000,
+                 db_path=None, pending_timeout=300, retention=7 * 86400, poll_interval=0.5):
+        self.resolve_amounts = resolve_amounts
+        self.submit_mints = submit_mints
+        self.interval = interval
+        self.cooldown = cooldown
+        self.max_batch = max_batch
+        self.history_size = history_size
+        self._pending = []
+        self._jobs = OrderedDict()  # job_id -> FaucetJob
+        self._by_address = {}  # address -> latest FaucetJob
+        self._task = None
+        self._wakeup = asyncio.Event()
+        self._trackers = set()
+        self.pending_timeout = pending_timeout
+        self.retention = retention
+        self.poll_interval = poll_interval
+        self._last_purge = 0.0
+        self.db_path = db_path
+        self._db_lock = threading.Lock()
+
+    @cached_property
+    def db(self):
+        """The shared job store, opened (and created) on first use; None without a db_path."""
+        if not self.db_path:
+            return None
+        db = sqlite3.connect(self.db_path, timeout=5, isolation_level=None, check_same_thread=False)
+        db.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS faucet_jobs (
+                job_id TEXT PRIMARY KEY,
+                address TEXT NOT NULL,
+                status TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                results TEXT NOT NULL,
+                error TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_faucet_jobs_address ON faucet_jobs(address, created_at);
+        """)
+        return db
+
+    @property
+    def pending_count(self):
+        return len(self._pending)
+
+    async def _run_db(self, fn, *args):
+        """Run fn(db, *args) in a worker thread, holding the connection for the whole call."""
+        def call():
+            with self._db_lock:
+                return fn(self.db, *args)
+        return await asyncio.to_thread(call)
+
+    async def get(self, job_id):
+        """Job by id, from this process or (with a db_path) any worker sharing the file."""
+        job = self._jobs.get(job_id)
+        if job is None and self.db_path:
+            row = await self._run_db(
+                lambda db: db.execute(f"SELECT {JOB_COLUMNS} FROM faucet_jobs WHERE job_id = ?", (job_id,)).fetchone()
+            )
+            job = self._load(row)
+        return job
+
+    async def wait(self, job, timeout=None):
+        """
+        Wait until a job is minted or failed. Jobs of other workers are
+        polled from the shared file.
+
+        Returns:
+            FaucetJob: the job with its latest status
+        """
+        if self._jobs.get(job.job_id) is job or not self.db_path:
+            return await job.wait(timeout)
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while job.status not in ("minted", "failed"):
+            if deadline is not None and time.monotonic() >= deadline:
+                raise asyncio.TimeoutError()
+            await asyncio.sleep(self.poll_interval)
+            job = await self.get(job.job_id) or job
+        return job
+
+    async def request(self, address):
+        """
+        Queue a mint for an address, or return its recent job.
+
+        Returns:
+            tuple: (FaucetJob, deduplicated: bool)
+        """
+        now = time.time()
+        existing = self._by_address.get(address)
+        if existing and existing.status != "failed" and now - existing.created_at < self.cooldown:
+            return existing, True
+
+        job = FaucetJob(address)
+        if self.db_path:
+            row = await self._run_db(self._claim, job, now)
+            if row is not None:
+                return self._jobs.get(row[0]) or self._load(row), True
+
+        self.start()
+        self._pending.append(job)
+        self._jobs[job.job_id] = job
+        self._by_address[address] = job
+        while len(self._jobs) > self.history_size:
+            _, old = self._jobs.popitem(last=False)
+            if self._by_address.get(old.address) is old:
+                del self._by_address[old.address]
+        if len(self._pending) >= self.max_batch:
+            self._wakeup.set()
+        return job, False
+
+    def _claim(self, db, job, now):
+        """
+        Store a new job unless the address has a recent one (in a worker thread).
+
+        The check and the insert run under SQLite's write lock, so two workers
+        can't both mint for an address.
+
+        Returns:
+            tuple: the recent job's row, or None if `job` was stored
+        """
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            # A job left queued/submitted past pending_timeout belonged to a worker that died
+            row = db.execute(
+                f"""
+                SELECT {JOB_COLUMNS} FROM faucet_jobs
+                WHERE address = ? AND created_at >= ? AND status != 'failed'
+                    AND (status = 'minted' OR created_at >= ?)
+                ORDER BY created_at DESC LIMIT 1
+                """,
+                (job.address, now - self.cooldown, now - self.pending_timeout)
+            ).fetchone()
+            if row is None:
+                self._insert(db, job)
+                self._purge(db, now)
+            return row
+        finally:
+            db.execute("COMMIT")
+
+    @staticmethod
+    def _insert(db, job):
+        db.execute(
+            f"INSERT OR REPLACE INTO faucet_jobs ({JOB_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)",
+            (job.job_id, job.address, job.status, job.created_at, json.dumps(job.results), job.error)
+        )
+
+    async def _save(self, job):
+        if self.db_path:
+            await self._run_db(self._insert, job)
+
+    @staticmethod
+    def _load(row):
+        if row is None:
+            return None
+        job_id, address, status, created_at, results, error = row
+        return FaucetJob(address, job_id, status, created_at, json.loads(results), error)
+
+    async def _finish(self, job, status, error=None):
+        job._finish(status, error)
+        await self._save(job)
+
+    def _purge(self, db, now, interval=60):
+        if now - self._last_purge < interval:
+            return
+        self._last_purge = now
+        db.execute("DELETE FROM faucet_jobs WHERE created_at < ?", (now - self.retention,))
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        tasks = list(self._trackers)
+        if self._task is not None:
+            tasks.append(self._task)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            while self._pending:
+                jobs, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+                try:
+                    await self.flush(jobs)
+                except Exception as e:
+                    logger.error(f"Faucet flush of {len(jobs)} jobs failed: {str(e)}")
+                    FAILURES.labels("faucet").inc()
+                    for job in jobs:
+                        await self._finish(job, "failed", str(e))
+
+    async def flush(self, jobs):
+        """
+        Resolve amounts and send the mints for a group of jobs in one batched
+        transaction; receipts are followed in the background.
+        """
+        amounts = await self.resolve_amounts([job.address for job in jobs])
+
+        mints = []  # (job, token, amount, display_amount)
+        for job in jobs:
+            for token, (amount, display_amount) in amounts.get(job.address, {}).items():
+                if amount > 0:
+                    mints.append((job, token, amount, display_amount))
+                else:
+                    job.results[token] = {"success": True, "amount": "0", "matched_real_balance": True}
+
+        if not mints:
+            for job in jobs:
+                await self._finish(job, "minted")
+            return
+
+        sent = await self.submit_mints([(token, job.address, amount) for job, token, amount, _ in mints])
+        for job in jobs:
+            job.status = "submitted"
+            await self._save(job)
+        logger.info(f"Faucet flushed {len(jobs)} requests as {len(mints)} mints in {len(sent)} transaction(s)")
+
+        task = asyncio.create_task(self._settle(jobs, mints, sent))
+        self._trackers.add(task)
+        task.add_done_callback(self._trackers.discard)
+
+    async def _settle(self, jobs, mints, sent):
+        async def track(handle, indexes):
+            try:
+                receipt = await handle.wait()
+                success = receipt['status'] == 1
+            except Exception as e:
+                success = False
+                logger.error(f"Faucet mint transaction {handle.tx_hash} failed: {str(e)}")
+            for i in indexes:
+                job, token, _, display_amount = mints[i]
+                job.results[token] = {
+                    "success": success,
+                    "transaction_hash": handle.tx_hash,
+                    "amount": str(display_amount),
+                    "matched_real_balance": True
+                }
+
+        await asyncio.gather(*(track(handle, indexes) for handle, indexes in sent))
+        for job in jobs:
+            ok = all(result.get("success") for result in job.results.values())
+            await self._finish(job, "minted" if ok else "failed", None if ok else "Mint transaction failed")
@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import os
+
+from kalshi_client import get_events, market_snapshot, select_event
+from oracle_policy import compute_targets
+
+logger = logging.getLogger(__name__)
+
+# Which estimate feeds the oracle: "expected", "median" or "argmax"
+ORACLE_PRICE_SOURCE = os.getenv("ORACLE_PRICE_SOURCE", "expected")
+
+# Maximum number of series fetched from Kalshi at the same time
+FEED_FETCH_CONCURRENCY = int(os.getenv("FEED_FETCH_CONCURRENCY", "8"))
+
+EUR_USD_FEED = "KXEURUSD"
+
+
+def snapshot_price(snapshot, source=None):
+    """
+    Price estimate from a market snapshot: the probability-weighted expectation
+    across all strikes by default, or the single most likely strike ('argmax').
+    """
+    source = source or ORACLE_PRICE_SOURCE
+    if source != "argmax" and snapshot.get(f"{source}_price"):
+        return float(snapshot[f"{source}_price"])
+    # Convert price string to float (e.g., '1.163' -> 1.163)
+    return float(snapshot["price"])
+
+
+def eur_usd_value(snapshot):
+    """Oracle value for the EUR/USD feed (target USD% * 1000)."""
+    return compute_targets(snapshot_price(snapshot))[1]
+
+
+def scaled_value(scale):
+    """Value mapping that publishes price * scale, clamped to 1-99999."""
+    def value(snapshot):
+        return max(1, min(99999, int(round(snapshot_price(snapshot) * scale))))
+    return value
+
+
+class Feed:
+    """
+    One oracle feed: which Kalshi series to read, which event to pick and
+    how to map the resulting snapshot to an on-chain value.
+
+    The feed name doubles as its on-chain bytes32 feed id.
+    """
+
+    def __init__(self, name, series_ticker, value_fn, select_fn=select_event, resolution_offset=24 * 60 * 60):
+        if len(name.encode()) > 32:
+            raise ValueError(f"Feed name '{name}' does not fit in bytes32")
+        self.name = name
+        self.series_ticker = series_ticker
+        self.value_fn = value_fn
+        self.select_fn = select_fn
+        self.resolution_offset = resolution_offset
+
+    @property
+    def feed_id(self):
+        return self.name.encode().ljust(32, b"\0")
+
+    def evaluate(self, events):
+        """Snapshot of the selected event with its oracle 'value', or None."""
+        return self.with_value(market_snapshot(self.select_fn(events)))
+
+    def with_value(self, snapshot):
+        if not snapshot:
+            return None
+        return {**snapshot, 'value': self.value_fn(snapshot)}
+
+
+# Registry of published feeds, keyed by name
+FEEDS = {}
+
+
+def register_feed(feed):
+    FEEDS[feed.name] = feed
+    return feed
+
+
+register_feed(Feed(EUR_USD_FEED, "KXEURUSD", eur_usd_value))
+
+# Extra feeds from the environment: ORACLE_FEEDS="SERIES:scale,SERIES2:scale"
+for entry in filter(None, os.getenv("ORACLE_FEEDS", "").split(",")):
+    series, _, scale = entry.strip().partition(":")
+    register_feed(Feed(series, series, scaled_value(float(scale or 1000))))
+
+
+async def compute_feeds(feeds=None, snapshots=None):
+    """
+    Fetch every distinct series once, concurrently, and evaluate all feeds.
+
+    Args:
+        feeds: dict of Feed (defaults to the registry)
+        snapshots: optional {feed name: market snapshot} that skip the fetch
+            (e.g. the live WebSocket snapshot for EUR/USD)
+
+    Returns:
+        dict: {feed name: snapshot with 'value', or None if unavailable}
+    """
+    feeds = feeds or FEEDS
+    snapshots = snapshots or {}
+    semaphore = asyncio.Semaphore(FEED_FETCH_CONCURRENCY)
+
+    async def fetch(series_ticker):
+        async with semaphore:
+            return await get_events(series_ticker)
+
+    series = list(dict.fromkeys(
+        f.series_ticker for f in feeds.values() if not snapshots.get(f.name)
+    ))
+    responses = await asyncio.gather(*(fetch(s) for s in series), return_exceptions=True)
+    events_by_series = {}
+    for series_ticker, response in zip(series, responses):
+        if isinstance(response, Exception):
+            logger.error(f"Failed to fetch Kalshi series {series_ticker}: {str(response)}")
+        else:
+            events_by_series[series_ticker] = response.get('events', [])
+
+    results = {}
+    for name, feed in feeds.items():
+        try:
+            if snapshots.get(name):
+                results[name] = feed.with_value(snapshots[name])
+            elif feed.series_ticker in events_by_series:
+                results[name] = feed.evaluate(events_by_series[feed.series_ticker])
+            else:
+                results[name] = None
+        except Exception as e:
+            logger.error(f"Failed to compute feed {name}: {str(e)}")
+            results[name] = None
+    return results
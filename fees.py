@@ -0,0 +1,176 @@
+import asyncio
+import logging
+import time
+
+from metrics import observe_rpc
+
+logger = logging.getLogger(__name__)
+
+
+class GasEstimateCache:
+    """
+    Gas limits per (contract, function selector, calldata size).
+
+    Calls with the same selector and argument layout cost almost the same
+    gas, so one estimate is reused until it expires or a transaction using
+    it reverts. Cached estimates get a safety margin; unused gas is refunded.
+
+    Functions whose gas depends on state rather than arguments (reBalance
+    only mints and burns when the treasury is outside its band) are listed
+    by selector in `uncached` and estimated on every send.
+    """
+
+    def __init__(self, ttl=600, margin=1.2, buffer=10000, uncached=()):
+        self.ttl = ttl
+        self.margin = margin
+        self.buffer = buffer
+        self.uncached = {"0x" + selector.hex() for selector in uncached}
+        self._entries = {}  # key -> (gas limit, estimated at)
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+
+    @staticmethod
+    def key(contract_function, data):
+        # Calldata size separates e.g. fulfillFeedsBatch calls with different array lengths
+        return (contract_function.address, data[:10], len(data))
+
+    async def gas_limit(self, contract_function, data, sender):
+        """
+        Gas limit for a call, estimating only on a cache miss.
+
+        Returns:
+            int: estimate * margin + buffer
+        """
+        if data[:10] in self.uncached:
+            self.bypassed += 1
+            estimate = await observe_rpc("estimate_gas", contract_function.estimate_gas({'from': sender}))
+            return int(estimate * self.margin) + self.buffer
+
+        key = self.key(contract_function, data)
+        entry = self._entries.get(key)
+        if entry and time.monotonic() - entry[1] < self.ttl:
+            self.hits += 1
+            return entry[0]
+
+        self.misses += 1
+        estimate = await observe_rpc("estimate_gas", contract_function.estimate_gas({'from': sender}))
+        gas_limit = int(estimate * self.margin) + self.buffer
+        self._entries[key] = (gas_limit, time.monotonic())
+        return gas_limit
+
+    def invalidate(self, contract_function=None, data=None):
+        """Drop one entry (e.g. after a revert) or everything."""
+        if contract_function is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(self.key(contract_function, data), None)
+
+    def stats(self):
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses, "bypassed": self.bypassed}
+
+
+class FeeOracle:
+    """
+    EIP-1559 fee suggestions from eth_feeHistory, refreshed in the background.
+
+    maxFeePerGas = 2 * next base fee + tip, which survives several full
+    blocks of base fee growth; the tip is the median reward of recent blocks.
+    Chains without a base fee fall back to a legacy gasPrice.
+    """
+
+    def __init__(self, w3, blocks=10, reward_percentile=50, min_priority_fee=1, max_age=15, refresh_interval=5):
+        self.w3 = w3
+        self.blocks = blocks
+        self.reward_percentile = reward_percentile
+        self.min_priority_fee = min_priority_fee
+        self.max_age = max_age
+        self.refresh_interval = refresh_interval
+        self.base_fee = None
+        self.priority_fee = None
+        self.gas_price = None  # legacy chains only
+        self.updated_at = None
+        self._task = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def eip1559(self):
+        return self.base_fee is not None
+
+    async def refresh(self):
+        """Fetch fee history once and update the cached suggestion."""
+        history = await observe_rpc(
+            "fee_history",
+            self.w3.eth.fee_history(self.blocks, 'latest', [self.reward_percentile])
+        )
+        base_fees = history.get('baseFeePerGas') or []
+        if not base_fees or not any(base_fees):
+            self.base_fee = None
+            self.gas_price = await observe_rpc("gas_price", self.w3.eth.gas_price)
+        else:
+            # The last entry is the base fee of the next block
+            self.base_fee = base_fees[-1]
+            rewards = sorted(r[0] for r in history.get('reward') or [] if r)
+            tip = rewards[len(rewards) // 2] if rewards else 0
+            self.priority_fee = max(self.min_priority_fee, tip)
+        self.updated_at = time.monotonic()
+
+    async def fees(self):
+        """
+        Current fee fields for a transaction, from the cache when fresh.
+
+        Returns:
+            dict: {'maxFeePerGas', 'maxPriorityFeePerGas'} or {'gasPrice'}
+        """
+        if self.updated_at is None or time.monotonic() - self.updated_at > self.max_age:
+            async with self._lock:
+                if self.updated_at is None or time.monotonic() - self.updated_at > self.max_age:
+                    await self.refresh()
+        if self.eip1559:
+            return {
+                'maxFeePerGas': 2 * self.base_fee + self.priority_fee,
+                'maxPriorityFeePerGas': self.priority_fee,
+            }
+        return {'gasPrice': self.gas_price}
+
+    def start(self):
+        """Keep the suggestion warm so the send path never waits for fees."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Failed to refresh fee history: {str(e)}")
+            await asyncio.sleep(self.refresh_interval)
+
+    def to_dict(self):
+        return {
+            "eip1559": self.eip1559,
+            "base_fee": self.base_fee,
+            "priority_fee": self.priority_fee,
+            "gas_price": self.gas_price,
+            "age_seconds": round(time.monotonic() - self.updated_at, 1) if self.updated_at else None,
+        }
+
+
+def bump_fees(old, current, factor=1.125):
+    """
+    Fee fields for a replacement transaction: at least `factor` times the old
+    fees (nodes reject replacements below +10%) and never below current fees.
+    """
+    bumped = {}
+    for field, value in current.items():
+        previous = old.get(field)
+        bumped[field] = max(value, int(previous * factor) + 1) if previous else value
+    if 'maxFeePerGas' in bumped and bumped['maxFeePerGas'] < bumped['maxPriorityFeePerGas']:
+        bumped['maxFeePerGas'] = bumped['maxPriorityFeePerGas']
+    return bumped
@@ -3,6 +3,7 @@ require("@nomicfoundation/hardhat-toolbox");
 module.exports = {
   solidity: { version: "0.8.20", settings: { optimizer: { enabled: true, runs: 200 } } },
   networks: {
+    localhost: { url: process.env.LOCAL_RPC_URL || 'http://127.0.0.1:8545' },
     'arc-testnet': { url: 'https://rpc.testnet.arc.network' },
   },
   defaultNetwork: 'arc-testnet',
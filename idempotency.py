@@ -0,0 +1,168 @@
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import time
+from functools import cached_property
+
+import orjson
+
+from leader import default_owner_id
+
+logger = logging.getLogger(__name__)
+
+
+class IdempotencyConflict(Exception):
+    """The key was already used for a different request body."""
+
+
+class IdempotencyInProgress(Exception):
+    """Another worker is still processing a request with this key."""
+
+
+def fingerprint(payload):
+    """Stable hash of a JSON-serializable request body."""
+    return hashlib.sha256(orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
+class IdempotencyStore:
+    """
+    Idempotency-Key records in a SQLite file shared by every worker on one
+    host, so a retried request gets the original result instead of running
+    again.
+
+    A key is claimed with begin() and settled with complete(response) or
+    abort(). Concurrent requests with the same key in this process wait for
+    the first one; in another worker they get IdempotencyInProgress. A claim
+    left pending for `pending_timeout` seconds (its worker died) can be taken
+    over, and completed keys are kept for `ttl` seconds.
+    """
+
+    def __init__(self, db_path, ttl=86400, pending_timeout=300, owner_id=None):
+        self.ttl = ttl
+        self.pending_timeout = pending_timeout
+        self.owner_id = owner_id or default_owner_id()
+        self.db_path = db_path
+        self._claims = {}  # key -> (fingerprint, future) for keys being processed here
+        self._last_purge = 0.0
+        self.replays = 0
+
+    @cached_property
+    def db(self):
+        """The shared SQLite file, opened (and created) on first use."""
+        db = sqlite3.connect(self.db_path, timeout=5, isolation_level=None, check_same_thread=False)
+        db.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS idempotency_keys (
+                key TEXT PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                owner TEXT NOT NULL,
+                response BLOB,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_idempotency_created ON idempotency_keys(created_at);
+        """)
+        return db
+
+    async def begin(self, key, request_fingerprint):
+        """
+        Claim a key, or return the stored response of an earlier request.
+
+        Returns:
+            dict or None: the response to replay, or None if the caller now
+            owns the key and must call complete() or abort()
+        """
+        while key in self._claims:
+            claimed_fingerprint, future = self._claims[key]
+            if claimed_fingerprint != request_fingerprint:
+                raise IdempotencyConflict(f"Idempotency-Key {key!r} was used with a different request")
+            # Raises the error the first request was aborted with, if any
+            response = await asyncio.shield(future)
+            if response is not None:
+                self.replays += 1
+                return response
+            # The first request was aborted without an error: the next waiter claims the key
+
+        now = time.time()
+        self._purge(now)
+        claimed = self.db.execute(
+            """
+            INSERT INTO idempotency_keys (key, fingerprint, owner, response, created_at)
+            VALUES (?, ?, ?, NULL, ?)
+            ON CONFLICT(key) DO UPDATE SET
+                fingerprint = excluded.fingerprint, owner = excluded.owner,
+                response = NULL, created_at = excluded.created_at
+            WHERE (idempotency_keys.response IS NULL AND idempotency_keys.created_at < ?)
+                OR idempotency_keys.created_at < ?
+            """,
+            (key, request_fingerprint, self.owner_id, now, now - self.pending_timeout, now - self.ttl)
+        ).rowcount
+        if claimed:
+            self._claims[key] = (request_fingerprint, asyncio.get_running_loop().create_future())
+            return None
+
+        row = self.db.execute(
+            "SELECT fingerprint, response FROM idempotency_keys WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            # Deleted by an abort in another worker between the two statements
+            return await self.begin(key, request_fingerprint)
+        if row[0] != request_fingerprint:
+            raise IdempotencyConflict(f"Idempotency-Key {key!r} was used with a different request")
+        if row[1] is None:
+            raise IdempotencyInProgress(f"A request with Idempotency-Key {key!r} is still in progress")
+        self.replays += 1
+        return orjson.loads(row[1])
+
+    def complete(self, key, response):
+        """Store the response for a claimed key and hand it to any waiters."""
+        self.db.execute(
+            "UPDATE idempotency_keys SET response = ? WHERE key = ? AND owner = ?",
+            (orjson.dumps(response), key, self.owner_id)
+        )
+        self._settle(key, response)
+
+    def abort(self, key, error=None):
+        """
+        Release a claimed key without a response, so a retry runs the request
+        again. Requests waiting on the key here get `error` raised, or claim
+        the key themselves if it is None.
+        """
+        self.db.execute(
+            "DELETE FROM idempotency_keys WHERE key = ? AND owner = ? AND response IS NULL",
+            (key, self.owner_id)
+        )
+        self._settle(key, None, error)
+
+    def _settle(self, key, response, error=None):
+        claim = self._claims.pop(key, None)
+        if claim is None or claim[1].done():
+            return
+        if error is not None:
+            claim[1].set_exception(error)
+            # Mark as retrieved so a claim nobody waited on doesn't log a warning
+            claim[1].exception()
+        else:
+            claim[1].set_result(response)
+
+    def _purge(self, now, interval=60):
+        if now - self._last_purge < interval:
+            return
+        self._last_purge = now
+        deleted = self.db.execute(
+            "DELETE FROM idempotency_keys WHERE response IS NOT NULL AND created_at < ?", (now - self.ttl,)
+        ).rowcount
+        if deleted:
+            logger.info(f"Purged {deleted} expired idempotency keys")
+
+    def stats(self):
+        pending, stored = self.db.execute(
+            "SELECT COALESCE(SUM(response IS NULL), 0), COALESCE(SUM(response IS NOT NULL), 0) FROM idempotency_keys"
+        ).fetchone()
+        return {
+            "stored": stored,
+            "pending": pending,
+            "in_process": len(self._claims),
+            "replays": self.replays,
+            "ttl": self.ttl,
+        }
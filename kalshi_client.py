@@ -1,5 +1,102 @@
-import requests
+import os
+import httpx
 from datetime import datetime, timedelta, timezone
+from market_cache import SingleFlightCache
+from metrics import KALSHI_FETCH_SECONDS
+
+KALSHI_API_URL = os.getenv("KALSHI_API_URL", "https://demo-api.kalshi.co/trade-api/v2")
+
+# Event snapshots are cached for KALSHI_CACHE_TTL seconds, then served stale
+# (while one request refreshes them) for up to KALSHI_CACHE_STALE_TTL seconds.
+# A failed refresh is retried after KALSHI_CACHE_RETRY_BACKOFF seconds, doubling up to 30
+events_cache = SingleFlightCache(
+    ttl=float(os.getenv("KALSHI_CACHE_TTL", "10")),
+    stale_ttl=float(os.getenv("KALSHI_CACHE_STALE_TTL", "60")),
+    retry_backoff=float(os.getenv("KALSHI_CACHE_RETRY_BACKOFF", "1")),
+)
+
+# Last ETag and body per series, for If-None-Match revalidation
+_etags = {}
+upstream_stats = {"requests": 0, "not_modified": 0}
+
+# Callables invoked with (series_ticker, result) for every new upstream body
+# (not for 304 revalidations, which carry no new data)
+fetch_listeners = []
+
+# Shared connection pool for all Kalshi requests (created on first use)
+_http_client = None
+
+
+def get_http_client():
+    """Return the shared async HTTP client, creating it on first use."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            base_url=KALSHI_API_URL,
+            timeout=httpx.Timeout(10.0, connect=5.0),
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        )
+    return _http_client
+
+
+async def close_http_client():
+    """Close the shared HTTP client (call on app shutdown)."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+def events_query(series_ticker):
+    """Query parameters for the open events (with nested markets) of a series."""
+    return {
+        "series_ticker": series_ticker,
+        "status": "open",
+        "with_nested_markets": "true",
+    }
+
+
+async def _fetch_events(series_ticker):
+    """Download open events (with nested markets) for a series from Kalshi."""
+    querystring = events_query(series_ticker)
+    headers = {}
+    cached = _etags.get(series_ticker)
+    if cached:
+        headers["If-None-Match"] = cached[0]
+
+    upstream_stats["requests"] += 1
+    with KALSHI_FETCH_SECONDS.labels(series_ticker).time():
+        response = await get_http_client().get("/events", params=querystring, headers=headers)
+
+    if response.status_code == 304 and cached:
+        upstream_stats["not_modified"] += 1
+        return cached[1]
+
+    response.raise_for_status()
+    result = response.json()
+
+    etag = response.headers.get("ETag")
+    if etag:
+        _etags[series_ticker] = (etag, result)
+    for listener in fetch_listeners:
+        listener(series_ticker, result)
+    return result
+
+
+async def get_events(series_ticker="KXEURUSD"):
+    """
+    Fetch open events for a series through the shared cache.
+    Concurrent callers share one upstream request.
+    """
+    return await events_cache.get(series_ticker, lambda: _fetch_events(series_ticker))
+
+
+def get_cache_stats():
+    """Cache and upstream request counters for the Kalshi events fetch."""
+    return {
+        **events_cache.stats,
+        **{f"upstream_{k}": v for k, v in upstream_stats.items()},
+    }
 
 
 def implied_probability(market):
@@ -24,9 +121,38 @@ def implied_probability(market):
     return 0.5
 
 
-def get_latest_maket():
+def select_event(events):
+    """Return the event with the earliest strike_date, or None."""
+    if not events:
+        return None
+
+    # Sort by strike_date (earliest first)
+    return min(
+        events,
+        key=lambda x: x.get('strike_date', '9999-12-31T23:59:59Z')
+    )
+
+
+def price_from_ticker(ticker):
     """
-    Fetch today's EUR/USD market from Kalshi and return the most likely outcome.
+    Extract price component from ticker.
+
+    Ticker format: KXEURUSD-25NOV1810-T1.17399 or KXEURUSD-25NOV1810-B1.17399
+    Split by '-' and get the last part, then remove the 'T' or 'B' prefix
+    """
+    parts = ticker.split('-')
+    if parts:
+        last_part = parts[-1]
+        # Remove first character if it's 'T' or 'B'
+        if last_part and last_part[0] in ['T', 'B']:
+            return last_part[1:]
+        return last_part
+    return ticker
+
+
+def market_snapshot(event):
+    """
+    Most likely outcome of one event plus the distribution summary.
 
     Returns:
         dict: {
@@ -35,69 +161,53 @@ def get_latest_maket():
             'ticker': str,
             'yes_bid': int,
             'no_ask': int,
+            'expected_price': float (probability-weighted EUR/USD across all strikes),
+            'median_price': float,
+            'mode_price': float,
+            'confidence_band': [float, float],
             'event': dict (full event data)
         }
-        or None if no data available
+        or None if the event has no markets
     """
-    try:
-        url = "https://demo-api.kalshi.co/trade-api/v2/events"
-        querystring = {
-            "series_ticker": "KXEURUSD",
-            "status": "open",
-            "with_nested_markets": True,
-        }
-        response = requests.get(url, params=querystring)
-        response.raise_for_status()
-        result = response.json()
-
-        events = result.get('events', [])
-        if not events:
-            return None
-
-        # Sort by strike_date (earliest first)
-        sorted_events = sorted(
-            events,
-            key=lambda x: x.get('strike_date', '9999-12-31T23:59:59Z')
-        )
-
-        event = sorted_events[0]
-        markets = event.get("markets", [])
-
-        if not markets:
-            return None
-
-        # Compute most likely outcome
-        ranked = sorted(
-            [(m["ticker"], implied_probability(m), m) for m in markets],
-            key=lambda x: x[1],
-            reverse=True
-        )
+    markets = event.get("markets", []) if event else []
+
+    if not markets:
+        return None
+
+    # Compute most likely outcome
+    ranked = sorted(
+        [(m["ticker"], implied_probability(m), m) for m in markets],
+        key=lambda x: x[1],
+        reverse=True
+    )
+
+    most_likely_ticker, most_likely_prob, most_likely_market = ranked[0]
+    price = price_from_ticker(most_likely_ticker)
+    # Imported here so numpy (~0.1 s) is loaded with the first snapshot, not with the app
+    from market_distribution import summarize_markets
+
+    return {
+        'price': price,
+        'probability': most_likely_prob,
+        'ticker': most_likely_ticker,
+        'yes_bid': most_likely_market.get('yes_bid'),
+        'no_ask': most_likely_market.get('no_ask'),
+        **(summarize_markets(markets) or {}),
+        'event': event
+    }
+
+
+async def get_latest_maket(series_ticker="KXEURUSD"):
+    """
+    Fetch today's EUR/USD market from Kalshi and return the most likely outcome.
 
-        most_likely_ticker, most_likely_prob, most_likely_market = ranked[0]
-
-        # Extract price component from ticker
-        # Ticker format: KXEURUSD-25NOV1810-T1.17399 or KXEURUSD-25NOV1810-B1.17399
-        # Split by '-' and get the last part, then remove the 'T' or 'B' prefix
-        parts = most_likely_ticker.split('-')
-        if parts:
-            last_part = parts[-1]
-            # Remove first character if it's 'T' or 'B'
-            if last_part and last_part[0] in ['T', 'B']:
-                price = last_part[1:]
-            else:
-                price = last_part
-        else:
-            price = most_likely_ticker
-
-        return {
-            'price': price,
-            'probability': most_likely_prob,
-            'ticker': most_likely_ticker,
-            'yes_bid': most_likely_market.get('yes_bid'),
-            'no_ask': most_likely_market.get('no_ask'),
-            'event': event
-        }
+    Returns:
+        dict: see market_snapshot(), or None if no data available
+    """
+    try:
+        result = await get_events(series_ticker)
+        return market_snapshot(select_event(result.get('events', [])))
 
     except Exception as e:
         print(f"Error fetching Kalshi market: {e}")
-        return None
\ No newline at end of file
+        return None
@@ -0,0 +1,376 @@
+"""
+Real-time Kalshi ingestion over WebSocket.
+
+Subscribes to the orderbook_delta channel for every market in the current
+KXEURUSD event, keeps a local order book per market ticker and updates the
+most likely strike incrementally on each delta. A gap in a subscription's
+seq numbers drops the connection and resubscribes for fresh snapshots.
+
+Run a local replay server from a recorded message file for offline testing:
+
+    python kalshi_stream.py record recorded.jsonl          # capture live messages
+    python kalshi_stream.py replay recorded.jsonl --port 8765
+    KALSHI_WS_URL=ws://localhost:8765 KALSHI_INGEST_MODE=stream python main.py
+"""
+import asyncio
+import base64
+import json
+import logging
+import os
+import time
+
+import websockets
+
+from metrics import FAILURES
+
+from feeds import snapshot_price
+from kalshi_client import get_events, implied_probability, price_from_ticker, select_event
+
+logger = logging.getLogger(__name__)
+
+KALSHI_WS_URL = os.getenv("KALSHI_WS_URL", "wss://demo-api.kalshi.co/trade-api/ws/v2")
+KALSHI_WS_PATH = "/trade-api/ws/v2"
+
+
+class SequenceGap(RuntimeError):
+    """A subscription skipped a seq number: the local books missed a delta."""
+
+
+class OrderBook:
+    """
+    Local order book for one market. Kalshi books only hold bids:
+    yes bids and no bids, as {price_in_cents: quantity}.
+    """
+
+    def __init__(self, ticker):
+        self.ticker = ticker
+        self.yes = {}
+        self.no = {}
+
+    def apply_snapshot(self, msg):
+        self.yes = {price: qty for price, qty in msg.get("yes", []) if qty > 0}
+        self.no = {price: qty for price, qty in msg.get("no", []) if qty > 0}
+
+    def apply_delta(self, msg):
+        book = self.yes if msg["side"] == "yes" else self.no
+        qty = book.get(msg["price"], 0) + msg["delta"]
+        if qty > 0:
+            book[msg["price"]] = qty
+        else:
+            book.pop(msg["price"], None)
+
+    @property
+    def yes_bid(self):
+        return max(self.yes) if self.yes else 0
+
+    @property
+    def no_ask(self):
+        # Buying NO at p is the same as selling YES at 100 - p
+        return 100 - self.yes_bid
+
+    @property
+    def yes_ask(self):
+        # Selling NO at p is the same as buying YES at 100 - p (0 = no offer)
+        return 100 - max(self.no) if self.no else 0
+
+    def to_market(self):
+        """Market dict in the shape returned by the REST API."""
+        return {"ticker": self.ticker, "yes_bid": self.yes_bid, "yes_ask": self.yes_ask, "no_ask": self.no_ask}
+
+
+class EventBook:
+    """
+    Order books for every market of one event plus the current most likely
+    market, updated incrementally as deltas arrive. The summary returned by
+    latest() is built at most once per applied delta.
+    """
+
+    def __init__(self, event):
+        self.event = event
+        self.books = {m["ticker"]: OrderBook(m["ticker"]) for m in event.get("markets", [])}
+        self.probabilities = {
+            m["ticker"]: implied_probability(m) for m in event.get("markets", [])
+        }
+        self.leader = None
+        self._latest = None
+        self._rescan()
+
+    def _rescan(self):
+        self.leader = max(self.probabilities, key=self.probabilities.get) if self.probabilities else None
+
+    def update(self, ticker):
+        """
+        Recompute the probability for one ticker and update the leader.
+
+        Only a drop in the current leader's probability requires a full
+        rescan; every other change is O(1).
+        """
+        book = self.books.get(ticker)
+        if book is None:
+            return
+        self._latest = None
+        probability = implied_probability(book.to_market())
+        self.probabilities[ticker] = probability
+
+        if self.leader is None or probability > self.probabilities[self.leader]:
+            self.leader = ticker
+        elif ticker == self.leader:
+            self._rescan()
+
+    def latest(self):
+        """Most likely outcome, in the same shape as get_latest_maket()."""
+        if self.leader is None:
+            return None
+        if self._latest is None:
+            self._latest = self._summarize()
+        return self._latest
+
+    def _summarize(self):
+        market = self.books[self.leader].to_market()
+        # Strike bounds from the REST snapshot, quotes from the live books
+        markets = [{**m, **self.books[m["ticker"]].to_market()} for m in self.event.get("markets", [])]
+        from market_distribution import summarize_markets  # numpy, loaded on first use as in kalshi_client
+        return {
+            'price': price_from_ticker(self.leader),
+            'probability': self.probabilities[self.leader],
+            'ticker': self.leader,
+            'yes_bid': market['yes_bid'],
+            'no_ask': market['no_ask'],
+            **(summarize_markets(markets) or {}),
+            'event': self.event
+        }
+
+
+def auth_headers():
+    """
+    Kalshi API key headers for the WebSocket handshake, or {} if no key is
+    configured (the local replay server does not need them).
+    """
+    key_id = os.getenv("KALSHI_API_KEY_ID")
+    key_path = os.getenv("KALSHI_PRIVATE_KEY_PATH")
+    if not key_id or not key_path:
+        return {}
+
+    # Only needed when authenticating against the real API
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import padding
+
+    with open(key_path, "rb") as f:
+        private_key = serialization.load_pem_private_key(f.read(), password=None)
+
+    timestamp = str(int(time.time() * 1000))
+    signature = private_key.sign(
+        (timestamp + "GET" + KALSHI_WS_PATH).encode(),
+        padding.PSS(mgf=padding.MGF1(hashes.SHA256()), salt_length=padding.PSS.DIGEST_LENGTH),
+        hashes.SHA256(),
+    )
+    return {
+        "KALSHI-ACCESS-KEY": key_id,
+        "KALSHI-ACCESS-SIGNATURE": base64.b64encode(signature).decode(),
+        "KALSHI-ACCESS-TIMESTAMP": timestamp,
+    }
+
+
+class KalshiStream:
+    """
+    Background WebSocket consumer for one Kalshi series.
+
+    latest() returns the current most likely market while the stream is
+    healthy, or None so that callers fall back to REST polling.
+    """
+
+    def __init__(self, series_ticker="KXEURUSD", url=KALSHI_WS_URL, max_silence=30,
+                 resubscribe_interval=3600, record_path=None, value_fn=snapshot_price):
+        self.series_ticker = series_ticker
+        self.url = url
+        self.max_silence = max_silence
+        # Reconnect periodically so a newly listed event is picked up
+        self.resubscribe_interval = resubscribe_interval
+        self.record_path = record_path
+        self.event_book = None
+        self.last_message_at = 0.0
+        self.connected = False
+        self.messages = 0
+        self.gaps = 0
+        # Published value of a snapshot; listeners are invoked with latest() when it changes
+        self.value_fn = value_fn
+        self.listeners = []
+        self._value = None
+        self._task = None
+        self._seq = {}  # subscription id -> last seq applied on this connection
+
+    @property
+    def healthy(self):
+        return (
+            self.connected
+            and self.event_book is not None
+            and time.monotonic() - self.last_message_at < self.max_silence
+        )
+
+    def latest(self):
+        return self.event_book.latest() if self.healthy else None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        backoff = 1
+        while True:
+            try:
+                await self._consume()
+                backoff = 1
+            except asyncio.CancelledError:
+                raise
+            except SequenceGap as e:
+                # No backoff: the new subscription starts with fresh snapshots
+                logger.warning(f"Kalshi stream {str(e)}; resubscribing")
+                FAILURES.labels("kalshi_stream_gap").inc()
+                self.gaps += 1
+                backoff = 1
+            except Exception as e:
+                logger.warning(f"Kalshi stream disconnected: {str(e)}; retrying in {backoff}s")
+                FAILURES.labels("kalshi_stream").inc()
+            self.connected = False
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 60)
+
+    async def _consume(self):
+        result = await get_events(self.series_ticker)
+        event = select_event(result.get("events", []))
+        if not event or not event.get("markets"):
+            raise RuntimeError(f"No open {self.series_ticker} event to subscribe to")
+
+        self.event_book = EventBook(event)
+        self._seq = {}
+        record = open(self.record_path, "a") if self.record_path else None
+
+        try:
+            async with websockets.connect(self.url, additional_headers=auth_headers()) as ws:
+                await ws.send(json.dumps({
+                    "id": 1,
+                    "cmd": "subscribe",
+                    "params": {
+                        "channels": ["orderbook_delta"],
+                        "market_tickers": list(self.event_book.books),
+                    },
+                }))
+                self.connected = True
+                self.last_message_at = subscribed_at = time.monotonic()
+                logger.info(f"Kalshi stream subscribed to {len(self.event_book.books)} markets of {event.get('event_ticker')}")
+
+                async for raw in ws:
+                    message = json.loads(raw)
+                    if record:
+                        # Receive time is stored so the replay server can reproduce the pacing
+                        record.write(json.dumps({**message, "ts": time.time()}) + "\n")
+                    self.handle_message(message)
+                    if time.monotonic() - subscribed_at > self.resubscribe_interval:
+                        break
+        finally:
+            if record:
+                record.close()
+
+    def handle_message(self, message):
+        """Apply one WebSocket message to the local order books."""
+        self.last_message_at = time.monotonic()
+        self.messages += 1
+
+        msg_type = message.get("type")
+        msg = message.get("msg", {})
+        if msg_type == "error":
+            raise RuntimeError(f"Kalshi stream error: {msg}")
+        self._check_seq(message)
+        if msg_type not in ("orderbook_snapshot", "orderbook_delta"):
+            return
+
+        ticker = msg.get("market_ticker")
+        book = self.event_book.books.get(ticker)
+        if book is None:
+            return
+
+        if msg_type == "orderbook_snapshot":
+            book.apply_snapshot(msg)
+        else:
+            book.apply_delta(msg)
+
+        self.event_book.update(ticker)
+        if not self.listeners:
+            return
+        # The expected price moves with every strike's quotes, not only when the leader changes
+        latest = self.event_book.latest()
+        value = self.value_fn(latest) if latest else None
+        if value != self._value:
+            self._value = value
+            for listener in self.listeners:
+                listener(latest)
+
+    def _check_seq(self, message):
+        """Raise SequenceGap unless the message is the next one of its subscription."""
+        seq = message.get("seq")
+        if seq is None:
+            return
+        sid = message.get("sid")
+        last = self._seq.get(sid)
+        if last is not None and seq != last + 1:
+            self.connected = False  # fall back to REST until the books are rebuilt
+            raise SequenceGap(f"subscription {sid} jumped from seq {last} to {seq}")
+        self._seq[sid] = seq
+
+
+async def serve_replay(path, host="localhost", port=8765, speed=1.0):
+    """
+    Serve recorded Kalshi WebSocket messages to any client that subscribes.
+
+    Messages are replayed with their original spacing divided by speed when
+    they carry a 'ts' field, otherwise back to back.
+    """
+    with open(path) as f:
+        messages = [line.strip() for line in f if line.strip()]
+
+    async def handler(ws):
+        await ws.recv()  # wait for the subscribe command
+        previous_ts = None
+        for raw in messages:
+            ts = json.loads(raw).get("ts")
+            if previous_ts is not None and ts is not None and speed > 0:
+                await asyncio.sleep(max(0, ts - previous_ts) / speed)
+            previous_ts = ts
+            await ws.send(raw)
+        await ws.wait_closed()
+
+    async with websockets.serve(handler, host, port):
+        logger.info(f"Replaying {len(messages)} messages from {path} on ws://{host}:{port}")
+        await asyncio.Future()
+
+
+async def record(path, series_ticker="KXEURUSD"):
+    """Connect to the live stream and append every raw message to path."""
+    stream = KalshiStream(series_ticker, record_path=path)
+    stream.start()
+    await asyncio.Future()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Kalshi WebSocket recorder / replay server")
+    parser.add_argument("command", choices=["record", "replay"])
+    parser.add_argument("path", help="JSON lines file of raw WebSocket messages")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed multiplier (0 = no delays)")
+    parser.add_argument("--series", default="KXEURUSD")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        asyncio.run(record(args.path, args.series))
+    else:
+        asyncio.run(serve_replay(args.path, args.host, args.port, args.speed))
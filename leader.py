@@ -0,0 +1,165 @@
+import logging
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from functools import cached_property
+
+logger = logging.getLogger(__name__)
+
+
+def default_owner_id():
+    """Unique id for this process: host, pid and a random suffix."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class SQLiteLease:
+    """
+    Time-limited leadership lease stored in a SQLite file shared by every
+    worker on one host (or on a shared volume).
+
+    The holder renews the lease on every acquire() or renew() call; if it
+    stops renewing for `ttl` seconds, any other worker can take over.
+    """
+
+    def __init__(self, db_path, name="scheduler", ttl=180, owner_id=None):
+        self.name = name
+        self.ttl = ttl
+        self.owner_id = owner_id or default_owner_id()
+        self.db_path = db_path
+
+    @cached_property
+    def db(self):
+        """The shared SQLite file, opened (and created) on first use."""
+        db = sqlite3.connect(self.db_path, timeout=5, isolation_level=None, check_same_thread=False)
+        db.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS leases (
+                name TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            );
+        """)
+        return db
+
+    async def acquire(self):
+        """
+        Take the lease if it is free or expired, or renew it if we hold it.
+
+        Returns:
+            bool: True if this process is the leader until now + ttl
+        """
+        now = time.time()
+        # One atomic upsert: only succeeds for the current owner or once the lease has expired
+        self.db.execute(
+            """
+            INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?)
+            ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at
+            WHERE leases.owner = excluded.owner OR leases.expires_at < ?
+            """,
+            (self.name, self.owner_id, now + self.ttl, now)
+        )
+        row = self.db.execute("SELECT owner FROM leases WHERE name = ?", (self.name,)).fetchone()
+        return row is not None and row[0] == self.owner_id
+
+    async def renew(self):
+        """
+        Extend the lease only if this process still holds it (never takes it over).
+
+        Returns:
+            bool: False if the lease expired or another worker holds it
+        """
+        now = time.time()
+        return self.db.execute(
+            "UPDATE leases SET expires_at = ? WHERE name = ? AND owner = ? AND expires_at >= ?",
+            (now + self.ttl, self.name, self.owner_id, now)
+        ).rowcount == 1
+
+    async def release(self):
+        self.db.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (self.name, self.owner_id))
+
+    def holder(self):
+        row = self.db.execute(
+            "SELECT owner, expires_at FROM leases WHERE name = ?", (self.name,)
+        ).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        return {"owner": row[0], "expires_at": row[1]}
+
+
+class RedisLease:
+    """
+    Same lease on Redis (SET NX PX plus an owner-checked renew), for workers
+    spread over several hosts. Requires the optional `redis` package.
+    """
+
+    RENEW_SCRIPT = """
+        if redis.call('get', KEYS[1]) == ARGV[1] then
+            return redis.call('pexpire', KEYS[1], ARGV[2])
+        end
+        return 0
+    """
+    RELEASE_SCRIPT = """
+        if redis.call('get', KEYS[1]) == ARGV[1] then
+            return redis.call('del', KEYS[1])
+        end
+        return 0
+    """
+
+    def __init__(self, url, name="scheduler", ttl=180, owner_id=None):
+        import redis.asyncio as redis
+
+        self.client = redis.from_url(url, decode_responses=True)
+        self.key = f"lease:{name}"
+        self.ttl = ttl
+        self.owner_id = owner_id or default_owner_id()
+
+    async def acquire(self):
+        ttl_ms = int(self.ttl * 1000)
+        if await self.client.set(self.key, self.owner_id, nx=True, px=ttl_ms):
+            return True
+        return await self.renew()
+
+    async def renew(self):
+        ttl_ms = int(self.ttl * 1000)
+        return bool(await self.client.eval(self.RENEW_SCRIPT, 1, self.key, self.owner_id, ttl_ms))
+
+    async def release(self):
+        await self.client.eval(self.RELEASE_SCRIPT, 1, self.key, self.owner_id)
+
+    def holder(self):
+        return None  # not tracked locally; inspect the key in Redis
+
+
+class AlwaysLeader:
+    """No election: for a dedicated single scheduler process."""
+
+    owner_id = "local"
+
+    async def acquire(self):
+        return True
+
+    async def renew(self):
+        return True
+
+    async def release(self):
+        pass
+
+    def holder(self):
+        return {"owner": self.owner_id, "expires_at": None}
+
+
+def make_lease(spec, name="scheduler", ttl=180):
+    """
+    Build a lease from a spec string (SCHEDULER_LEASE):
+        'sqlite:/path/to/leases.db' (default 'sqlite:scheduler_lease.db'),
+        'redis://host:6379/0', or 'none' to always lead.
+    """
+    if spec in (None, "", "none"):
+        return AlwaysLeader()
+    if spec.startswith(("redis://", "rediss://")):
+        return RedisLease(spec, name=name, ttl=ttl)
+    if spec.startswith("sqlite:"):
+        return SQLiteLease(spec[len("sqlite:"):], name=name, ttl=ttl)
+    raise ValueError(f"Unsupported lease backend '{spec}'")
@@ -0,0 +1,89 @@
+import asyncio
+import json
+import time
+
+
+class Broadcaster:
+    """
+    Fan-out of server-sent events to every connected dashboard.
+
+    Each event is encoded once and pushed to one small bounded queue per
+    client; a slow client loses its oldest queued events instead of
+    holding up the others. The latest event of each type is replayed to
+    new clients so they render immediately without extra API calls.
+
+    An optional producer (a coroutine function publishing events) runs
+    only while at least one client is connected: it is started by the
+    first subscriber and cancelled when the last one leaves.
+    """
+
+    def __init__(self, queue_size=32, producer=None):
+        self.queue_size = queue_size
+        self.producer = producer
+        self._producer_task = None
+        self._subscribers = set()
+        self._latest = {}  # event type -> encoded message
+        self.published = 0
+        self.dropped = 0
+
+    @property
+    def client_count(self):
+        return len(self._subscribers)
+
+    def subscribe(self):
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        for message in self._latest.values():
+            queue.put_nowait(message)
+        self._subscribers.add(queue)
+        if self.producer and (self._producer_task is None or self._producer_task.done()):
+            self._producer_task = asyncio.create_task(self.producer())
+        return queue
+
+    def unsubscribe(self, queue):
+        self._subscribers.discard(queue)
+        if not self._subscribers and self._producer_task is not None:
+            self._producer_task.cancel()
+            self._producer_task = None
+
+    @property
+    def producing(self):
+        return self._producer_task is not None and not self._producer_task.done()
+
+    async def stop(self):
+        """Cancel the producer (clients still connected get no further events)."""
+        task, self._producer_task = self._producer_task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    def publish(self, event_type, data):
+        """Encode data once as an SSE message and queue it for every client."""
+        message = f"event: {event_type}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
+        if self._latest.get(event_type) == message:
+            return
+        self._latest[event_type] = message
+        self.published += 1
+
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()
+                self.dropped += 1
+            queue.put_nowait(message)
+
+    async def events(self, request, heartbeat=15):
+        """
+        Async generator of SSE messages for one client, with a comment line
+        every `heartbeat` seconds so proxies keep the connection open.
+        """
+        queue = self.subscribe()
+        try:
+            yield b"retry: 5000\n\n"
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield f": keepalive {int(time.time())}\n\n".encode()
+        finally:
+            self.unsubscribe(queue)
@@ -1,17 +1,18 @@
-import uvicorn
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, Header, HTTPException, Path, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.templating import Jinja2Templates
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from web3 import Web3
-from eth_account import Account
+from web3 import AsyncWeb3, Web3
+from web3.exceptions import BadFunctionCallOutput, ContractLogicError
 from datetime import datetime
 from typing import Optional
+from functools import lru_cache
 import asyncio
 import logging
-templates = Jinja2Templates(directory="templates")
+import time
+import orjson
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -23,7 +24,27 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # Import Kalshi client
-from kalshi_client import get_latest_maket
+from kalshi_client import get_latest_maket, get_cache_stats, close_http_client, fetch_listeners
+from tx_manager import CallBatcher, TransactionManager
+from confirmations import ConfirmationTracker
+from call_encoder import EncodedCall, FunctionEncoder
+from fees import GasEstimateCache
+from faucet import FaucetQueue
+from oracle_indexer import SQLITE_MAX_INT, OracleIndexer, parse_bucket
+from kalshi_stream import KalshiStream
+from snapshot_archive import SnapshotArchive
+from oracle_policy import UpdatePolicy, compute_targets, rebalance_within_band
+from feeds import FEEDS, EUR_USD_FEED, compute_feeds, snapshot_price
+from live_updates import Broadcaster
+from leader import make_lease
+from nonces import SQLiteNonces
+from rpc_pool import RPCPool
+from admission import AdmissionLimiter, Overloaded
+from idempotency import IdempotencyConflict, IdempotencyInProgress, IdempotencyStore, fingerprint
+from metrics import (
+    FAILURES, IDEMPOTENT_REPLAYS, ORACLE_STALENESS_SECONDS, REBALANCES_SKIPPED, SCHEDULER_LEADER,
+    SUBMISSIONS_IN_FLIGHT, SUBMISSIONS_REJECTED, UPDATE_CYCLE_SECONDS, HTTPMetricsMiddleware, render_metrics
+)
 
 app = FastAPI(title="Kalshi Oracle x Circle")
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -36,43 +57,149 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(HTTPMetricsMiddleware)
+# Compresses larger JSON bodies (e.g. /kalshi/market?include=markets); SSE is left alone
+app.add_middleware(GZipMiddleware, minimum_size=1000, compresslevel=6)
 
 
 async def run_scheduler():
-    """Background task that runs the oracle update every 5 minutes"""
+    """
+    Background task that checks the update policies every ORACLE_CHECK_INTERVAL
+    seconds, or sooner when the live Kalshi stream reports a new leading market.
+
+    Only the process holding the scheduler lease submits; the others keep
+    retrying the lease and take over if the leader stops renewing it.
+    """
+    is_leader = False
     while True:
         try:
-            await scheduled_oracle_update()
+            leader = await scheduler_lease.acquire()
         except Exception as e:
-            logger.error(f"Error in scheduler loop: {str(e)}")
+            logger.error(f"Failed to acquire scheduler lease: {str(e)}")
+            FAILURES.labels("lease").inc()
+            leader = False
+
+        if leader and not is_leader:
+            logger.info(f"Acquired scheduler lease as {scheduler_lease.owner_id}")
+            reset_policy_state()
+        elif is_leader and not leader:
+            logger.warning("Lost scheduler lease, pausing oracle updates")
+        is_leader = leader
+        SCHEDULER_LEADER.set(1 if is_leader else 0)
+
+        if is_leader:
+            keeper = asyncio.create_task(keep_scheduler_lease(SCHEDULER_LEASE_TTL / 3))
+            try:
+                await scheduled_oracle_update()
+            except Exception as e:
+                logger.error(f"Error in scheduler loop: {str(e)}")
+                FAILURES.labels("scheduler").inc()
+            finally:
+                keeper.cancel()
 
-        # Wait 5 minutes before next run
-        await asyncio.sleep(300)  # 300 seconds = 5 minutes
+        # Wait for the next check (or an early wake-up from the stream)
+        try:
+            await asyncio.wait_for(scheduler_wakeup.wait(), timeout=ORACLE_CHECK_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        scheduler_wakeup.clear()
+
+
+async def renew_scheduler_lease():
+    """
+    Renew the scheduler lease without taking it over.
+
+    Returns:
+        bool: False if another worker may now be the leader
+    """
+    try:
+        if await scheduler_lease.renew():
+            return True
+        logger.warning("Lost scheduler lease during an update cycle")
+    except Exception as e:
+        logger.error(f"Failed to renew scheduler lease: {str(e)}")
+        FAILURES.labels("lease").inc()
+    return False
+
+
+async def keep_scheduler_lease(interval):
+    """Renew the lease every `interval` seconds while a cycle waits on RPCs and receipts"""
+    while True:
+        await asyncio.sleep(interval)
+        if not await renew_scheduler_lease():
+            return
 
 
 @app.on_event("startup")
 async def startup_event():
     """Start the background scheduler when the app starts"""
-    logger.info("Starting background scheduler...")
-    asyncio.create_task(run_scheduler())
-    logger.info("Scheduler started. Oracle updates will run every 5 minutes.")
+    if SCHEDULER_MODE == "embedded":
+        logger.info("Starting background scheduler...")
+        asyncio.create_task(run_scheduler())
+        logger.info(f"Scheduler started. Update policies checked every {ORACLE_CHECK_INTERVAL:g} seconds.")
+    else:
+        logger.info("Embedded scheduler disabled (SCHEDULER_MODE=off); run scheduler.py separately.")
+    rpc_pool.start()
+    oracle_indexer.start()
+    if kalshi_stream:
+        kalshi_stream.start()
+        logger.info("Kalshi WebSocket ingestion started (REST polling as fallback).")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release pooled HTTP connections"""
+    try:
+        await scheduler_lease.release()
+    except Exception as e:
+        logger.error(f"Failed to release scheduler lease: {str(e)}")
+    if faucet:
+        await faucet.stop()
+    if tx_manager:
+        await tx_manager.stop()
+    await oracle_indexer.stop()
+    if kalshi_stream:
+        await kalshi_stream.stop()
+    if snapshot_archive:
+        await snapshot_archive.stop()
+    await live_updates.stop()
+    await close_http_client()
+    await w3.provider.disconnect()
 
 # Configuration
 RPC_URL = "https://rpc.testnet.arc.network"
+# Comma-separated list of RPC endpoints; calls go to the healthiest one with failover
+RPC_URLS = [url.strip() for url in os.getenv("RPC_URLS", RPC_URL).split(",") if url.strip()]
 # Token addresses on ARC Testnet
-USDC_ADDRESS = "0x3600000000000000000000000000000000000000"  # Update with actual USDC address
-EURC_ADDRESS = "0x89B50855Aa3bE2F677cD6303Cec089B5F319D72a"  # Update with actual EURC address
+USDC_ADDRESS = os.getenv("USDC_ADDRESS", "0x3600000000000000000000000000000000000000")  # Update with actual USDC address
+EURC_ADDRESS = os.getenv("EURC_ADDRESS", "0x89B50855Aa3bE2F677cD6303Cec089B5F319D72a")  # Update with actual EURC address
 # Mock token addresses for testing
-MOCK_USDC_ADDRESS = "0xB0F5067211bBCBc4E8302E5b52939086d4397bBe"  # Update with deployed Mock USDC address
-MOCK_EURC_ADDRESS = "0xd927Fe415c5e74F103A104A9313DDbae26125D1F"  # Update with deployed Mock EURC address
-CONTRACT_ADDRESS = "0xc1256868D57378ef0309928Dedce736815A8bC41"
-TREASURY_CONTRACT_ADDRESS = "0xB241a0d436446AAd90Be026306F2cdaE26FB712f"
+MOCK_USDC_ADDRESS = os.getenv("MOCK_USDC_ADDRESS", "0xB0F5067211bBCBc4E8302E5b52939086d4397bBe")  # Update with deployed Mock USDC address
+MOCK_EURC_ADDRESS = os.getenv("MOCK_EURC_ADDRESS", "0xd927Fe415c5e74F103A104A9313DDbae26125D1F")  # Update with deployed Mock EURC address
+CONTRACT_ADDRESS = os.getenv("ORACLE_CONTRACT_ADDRESS", "0xc1256868D57378ef0309928Dedce736815A8bC41")
+TREASURY_CONTRACT_ADDRESS = os.getenv("TREASURY_CONTRACT_ADDRESS", "0xB241a0d436446AAd90Be026306F2cdaE26FB712f")
+# BatchMinter helper used by the faucet to send many mints in one tx (unset: one tx per mint)
+BATCH_MINTER_ADDRESS = os.getenv("BATCH_MINTER_ADDRESS", "0x0000000000000000000000000000000000000000")
 PRIVATE_KEY = os.getenv("PRIVATE_KEY")  # Set via environment variable
 
-# Initialize Web3
-w3 = Web3(Web3.HTTPProvider(RPC_URL))
+# Initialize Web3 (async provider so RPC calls never block the event loop)
+rpc_pool = RPCPool(
+    RPC_URLS,
+    timeout=float(os.getenv("RPC_TIMEOUT", "10")),
+    hedge_percentile=float(os.getenv("RPC_HEDGE_PERCENTILE", "0.95"))
+)
+w3 = AsyncWeb3(rpc_pool)
 
 # Contract ABI - simplified for the fulfillPredictionMarketDataEurUsd function
+# KalshiLinkOracle.DataPoint struct fields
+DATA_POINT_COMPONENTS = [
+    {"internalType": "address", "name": "submitter", "type": "address"},
+    {"internalType": "uint256", "name": "submitterTimestamp", "type": "uint256"},
+    {"internalType": "uint256", "name": "blockNumber", "type": "uint256"},
+    {"internalType": "uint256", "name": "value", "type": "uint256"},
+    {"internalType": "uint256", "name": "resolutionTimestamp", "type": "uint256"}
+]
+
 CONTRACT_ABI = [
     {
         "inputs": [
@@ -85,6 +212,29 @@ CONTRACT_ABI = [
         "stateMutability": "nonpayable",
         "type": "function"
     },
+    {
+        "inputs": [
+            {"internalType": "bytes32[]", "name": "_feedIds", "type": "bytes32[]"},
+            {"internalType": "uint256[]", "name": "_values", "type": "uint256[]"},
+            {"internalType": "uint256", "name": "_timestamp", "type": "uint256"},
+            {"internalType": "uint256[]", "name": "_resolutionTimestamps", "type": "uint256[]"}
+        ],
+        "name": "fulfillFeedsBatch",
+        "outputs": [],
+        "stateMutability": "nonpayable",
+        "type": "function"
+    },
+    {
+        "inputs": [
+            {"internalType": "uint256[]", "name": "_values", "type": "uint256[]"},
+            {"internalType": "uint256[]", "name": "_timestamps", "type": "uint256[]"},
+            {"internalType": "uint256[]", "name": "_resolutionTimestamps", "type": "uint256[]"}
+        ],
+        "name": "fulfillBatch",
+        "outputs": [],
+        "stateMutability": "nonpayable",
+        "type": "function"
+    },
     {
         "inputs": [],
         "name": "name",
@@ -125,6 +275,87 @@ CONTRACT_ABI = [
         ],
         "stateMutability": "view",
         "type": "function"
+    },
+    {
+        "inputs": [],
+        "name": "latestDataPoint",
+        "outputs": [
+            {"internalType": "uint256", "name": "count", "type": "uint256"},
+            {
+                "components": DATA_POINT_COMPONENTS,
+                "internalType": "struct KalshiLinkOracle.DataPoint",
+                "name": "latest",
+                "type": "tuple"
+            }
+        ],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [
+            {"internalType": "uint256", "name": "_start", "type": "uint256"},
+            {"internalType": "uint256", "name": "_count", "type": "uint256"}
+        ],
+        "name": "getDataPoints",
+        "outputs": [
+            {
+                "components": DATA_POINT_COMPONENTS,
+                "internalType": "struct KalshiLinkOracle.DataPoint[]",
+                "name": "points",
+                "type": "tuple[]"
+            }
+        ],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [{"internalType": "bytes32", "name": "", "type": "bytes32"}],
+        "name": "nextIndexFeed",
+        "outputs": [{"internalType": "uint256", "name": "", "type": "uint256"}],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [
+            {"internalType": "bytes32", "name": "_feedId", "type": "bytes32"},
+            {"internalType": "uint256", "name": "_index", "type": "uint256"}
+        ],
+        "name": "getFeedDataPoint",
+        "outputs": [
+            {
+                "components": DATA_POINT_COMPONENTS,
+                "internalType": "struct KalshiLinkOracle.DataPoint",
+                "name": "",
+                "type": "tuple"
+            }
+        ],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "anonymous": False,
+        "inputs": [
+            {"indexed": True, "internalType": "uint256", "name": "index", "type": "uint256"},
+            {"indexed": True, "internalType": "address", "name": "submitter", "type": "address"},
+            {"indexed": False, "internalType": "uint256", "name": "value", "type": "uint256"},
+            {"indexed": False, "internalType": "uint256", "name": "submitterTimestamp", "type": "uint256"},
+            {"indexed": False, "internalType": "uint256", "name": "resolutionTimestamp", "type": "uint256"}
+        ],
+        "name": "DataPointFulfilled",
+        "type": "event"
+    },
+    {
+        "anonymous": False,
+        "inputs": [
+            {"indexed": True, "internalType": "bytes32", "name": "feedId", "type": "bytes32"},
+            {"indexed": True, "internalType": "uint256", "name": "index", "type": "uint256"},
+            {"indexed": True, "internalType": "address", "name": "submitter", "type": "address"},
+            {"indexed": False, "internalType": "uint256", "name": "value", "type": "uint256"},
+            {"indexed": False, "internalType": "uint256", "name": "submitterTimestamp", "type": "uint256"},
+            {"indexed": False, "internalType": "uint256", "name": "resolutionTimestamp", "type": "uint256"}
+        ],
+        "name": "FeedFulfilled",
+        "type": "event"
     }
 ]
 
@@ -185,6 +416,41 @@ TREASURY_ABI = [
         "outputs": [{"internalType": "uint256", "name": "", "type": "uint256"}],
         "stateMutability": "view",
         "type": "function"
+    },
+    {
+        "inputs": [],
+        "name": "balOfUsdc",
+        "outputs": [{"internalType": "uint256", "name": "", "type": "uint256"}],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [],
+        "name": "balOfEurc",
+        "outputs": [{"internalType": "uint256", "name": "", "type": "uint256"}],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [],
+        "name": "rebalanceToleranceBps",
+        "outputs": [{"internalType": "uint256", "name": "", "type": "uint256"}],
+        "stateMutability": "view",
+        "type": "function"
+    }
+]
+
+BATCH_MINTER_ABI = [
+    {
+        "inputs": [
+            {"internalType": "address[]", "name": "_tokens", "type": "address[]"},
+            {"internalType": "address[]", "name": "_recipients", "type": "address[]"},
+            {"internalType": "uint256[]", "name": "_amounts", "type": "uint256[]"}
+        ],
+        "name": "mintBatch",
+        "outputs": [],
+        "stateMutability": "nonpayable",
+        "type": "function"
     }
 ]
 
@@ -192,139 +458,654 @@ TREASURY_ABI = [
 contract = w3.eth.contract(address=Web3.to_checksum_address(CONTRACT_ADDRESS), abi=CONTRACT_ABI)
 treasury_contract = w3.eth.contract(address=Web3.to_checksum_address(TREASURY_CONTRACT_ADDRESS), abi=TREASURY_ABI)
 
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+# ERC20 contracts, created once instead of on every request
+mock_token_contracts = {
+    token: w3.eth.contract(address=Web3.to_checksum_address(token_address), abi=ERC20_ABI)
+    for token, token_address in (("USDC", MOCK_USDC_ADDRESS), ("EURC", MOCK_EURC_ADDRESS))
+    if token_address != ZERO_ADDRESS
+}
+real_token_contracts = {
+    token: w3.eth.contract(address=Web3.to_checksum_address(token_address), abi=ERC20_ABI)
+    for token, token_address in (("USDC", USDC_ADDRESS), ("EURC", EURC_ADDRESS))
+    if token_address != ZERO_ADDRESS
+}
+
+# Selectors and calldata encoders for the hot functions, resolved once at startup
+fulfill_encoder = FunctionEncoder(w3, contract, "fulfillPredictionMarketDataEurUsd")
+fulfill_batch_encoder = FunctionEncoder(w3, contract, "fulfillBatch")
+rebalance_encoder = FunctionEncoder(w3, treasury_contract, "reBalance")
+mock_mint_encoders = {
+    token: FunctionEncoder(w3, token_contract, "mint") for token, token_contract in mock_token_contracts.items()
+}
+mock_balance_encoders = {
+    token: FunctionEncoder(w3, token_contract, "balanceOf") for token, token_contract in mock_token_contracts.items()
+}
+real_balance_encoders = {
+    token: FunctionEncoder(w3, token_contract, "balanceOf") for token, token_contract in real_token_contracts.items()
+}
+
+# Repeat visitors send the same addresses; checksumming costs ~30us each time
+cached_checksum_address = lru_cache(maxsize=4096)(Web3.to_checksum_address)
+
+# Results of view calls that never change (decimals, symbol, name, owner),
+# keyed by (contract address, function name) and kept for the process lifetime
+immutable_call_cache = {}
+
+
+async def batch_read(calls, immutable_calls=()):
+    """
+    Run contract view calls in a single JSON-RPC batch request.
+
+    Immutable calls are only sent the first time they are seen; afterwards
+    they are answered from immutable_call_cache. Calls may be web3 contract
+    functions or pre-encoded EncodedCalls.
+
+    Returns:
+        tuple: (results for immutable_calls, results for calls)
+    """
+    missing = [c for c in immutable_calls if (c.address, c.fn_name) not in immutable_call_cache]
+    requests = missing + list(calls)
+
+    results = []
+    if requests:
+        async with w3.batch_requests() as batch:
+            for call in requests:
+                batch.add(call.request() if isinstance(call, EncodedCall) else call)
+            results = await batch.async_execute()
+        results = [
+            call.encoder.decode(result) if isinstance(call, EncodedCall) else result
+            for call, result in zip(requests, results)
+        ]
+
+    for call, result in zip(missing, results):
+        immutable_call_cache[(call.address, call.fn_name)] = result
+
+    immutable_results = [immutable_call_cache[(c.address, c.fn_name)] for c in immutable_calls]
+    return immutable_results, results[len(missing):]
+
+
+# Single sender for every transaction signed with PRIVATE_KEY (pipelined sends). Nonces come
+# from a SQLite counter (NONCE_DB_PATH) shared with the other workers and scheduler.py on the host.
+tx_manager = TransactionManager(
+    w3, PRIVATE_KEY,
+    nonces=SQLiteNonces(os.getenv("NONCE_DB_PATH", "nonces.db")),
+    gas_cache=GasEstimateCache(
+        ttl=float(os.getenv("GAS_ESTIMATE_TTL", "600")),
+        # reBalance costs several times more when it trades than inside the band
+        uncached=[rebalance_encoder.selector]
+    ),
+    # Shared receipt tracker: newHeads over RPC_WS_URL if set, otherwise one block poller
+    tracker=ConfirmationTracker(
+        w3,
+        confirmations=int(os.getenv("CONFIRMATION_DEPTH", "1")),
+        poll_interval=float(os.getenv("BLOCK_POLL_INTERVAL", "2")),
+        ws_url=os.getenv("RPC_WS_URL")
+    )
+) if PRIVATE_KEY else None
+
+
+# KalshiLinkOracle packs both timestamps into uint40 fields
+MAX_UINT40 = 2**40 - 1
+
+
+def fulfill_single(point):
+    value, timestamp, resolution_timestamp = point
+    return fulfill_encoder(value, timestamp, resolution_timestamp)
+
+
+def fulfill_batch(points):
+    values, timestamps, resolution_timestamps = zip(*points)
+    return fulfill_batch_encoder(list(values), list(timestamps), list(resolution_timestamps))
+
+
+async def oracle_has_fulfill_batch():
+    """Probe fulfillBatch with an empty batch; oracles deployed before it revert"""
+    try:
+        await contract.functions.fulfillBatch([], [], []).call({"from": tx_manager.address})
+        return True
+    except (BadFunctionCallOutput, ContractLogicError):
+        return False
+
+
+# EUR/USD points queued while a submission is being broadcast go out together in one
+# fulfillBatch tx. Oracles without fulfillBatch (probed before the first batch) get one
+# tx per point; ORACLE_BATCH_MAX=1 disables batching altogether.
+oracle_batcher = CallBatcher(
+    tx_manager, fulfill_single, fulfill_batch,
+    max_size=int(os.getenv("ORACLE_BATCH_MAX", "50")),
+    batch_check=oracle_has_fulfill_batch
+) if tx_manager else None
+
+batch_minter_contract = w3.eth.contract(
+    address=Web3.to_checksum_address(BATCH_MINTER_ADDRESS), abi=BATCH_MINTER_ABI
+) if BATCH_MINTER_ADDRESS != ZERO_ADDRESS else None
+FAUCET_MINTS_PER_TX = int(os.getenv("FAUCET_MINTS_PER_TX", "200"))
+
+
+async def resolve_faucet_amounts(addresses):
+    """
+    Mock token amounts matching each address's real USDC/EURC balances,
+    read for all addresses in one batch (1000 tokens if no real token is configured).
+
+    Returns:
+        dict: {address: {token: (mint_amount, display_amount)}}
+    """
+    real_tokens = [token for token in mock_token_contracts if token in real_token_contracts]
+    decimals, balances = await batch_read(
+        [real_balance_encoders[token](address) for address in addresses for token in real_tokens],
+        [real_token_contracts[token].functions.decimals() for token in real_tokens]
+    )
+    decimals = dict(zip(real_tokens, decimals))
+    balances = iter(balances)
+
+    amounts = {}
+    for address in addresses:
+        amounts[address] = {}
+        for token in mock_token_contracts:
+            if token in real_token_contracts:
+                real_balance = next(balances)
+                # Multiply by 10^12 to convert from 6 decimals to 18 decimals
+                amounts[address][token] = (real_balance * (10 ** 12), real_balance / (10 ** decimals[token]))
+            else:
+                amounts[address][token] = (1000 * (10 ** 18), 1000)
+    return amounts
+
+
+async def submit_faucet_mints(mints):
+    """
+    Send (token, address, amount) mints: batched through BatchMinter when deployed,
+    otherwise one pipelined mint tx each.
+
+    Returns:
+        list of (TxHandle, [indexes into mints])
+    """
+    if batch_minter_contract:
+        sent = []
+        for start in range(0, len(mints), FAUCET_MINTS_PER_TX):
+            chunk = mints[start:start + FAUCET_MINTS_PER_TX]
+            handle = await tx_manager.submit(
+                batch_minter_contract.functions.mintBatch(
+                    [mock_token_contracts[token].address for token, _, _ in chunk],
+                    [address for _, address, _ in chunk],
+                    [amount for _, _, amount in chunk]
+                ),
+                label=f"mintBatch({len(chunk)})"
+            )
+            sent.append((handle, list(range(start, start + len(chunk)))))
+        return sent
+
+    handles = [
+        tx_manager.enqueue(mock_mint_encoders[token](address, amount))
+        for token, address, amount in mints
+    ]
+    await asyncio.gather(*(handle.sent() for handle in handles), return_exceptions=True)
+    return [(handle, [i]) for i, handle in enumerate(handles)]
+
+
+faucet = FaucetQueue(
+    resolve_faucet_amounts,
+    submit_faucet_mints,
+    interval=float(os.getenv("FAUCET_FLUSH_INTERVAL", "5")),
+    cooldown=float(os.getenv("FAUCET_COOLDOWN", "3600")),
+    # Shared with the other workers so /mint-tokens/{job_id} and the cooldown work on any of them
+    db_path=os.getenv("FAUCET_DB_PATH", "faucet_jobs.db")
+) if tx_manager else None
+
+# Local SQLite copy of all oracle DataPoints, kept in sync in the background
+oracle_indexer = OracleIndexer(
+    w3, contract,
+    db_path=os.getenv("ORACLE_DB_PATH", "oracle_data.db"),
+    # Block the oracle was deployed at: an empty index is backfilled from its logs
+    deploy_block=int(os.environ["ORACLE_DEPLOY_BLOCK"]) if os.getenv("ORACLE_DEPLOY_BLOCK") else None
+)
+
+
+def oracle_staleness():
+    """Seconds since the newest indexed DataPoint was submitted (0 if none yet)"""
+    latest = oracle_indexer.latest_timestamp()
+    return time.time() - latest if latest else 0
+
+
+ORACLE_STALENESS_SECONDS.set_function(oracle_staleness)
+
+
+# Kalshi ingestion: "poll" (REST on demand) or "stream" (WebSocket order books, REST fallback).
+# Stream listeners fire when the EUR/USD feed value (per ORACLE_PRICE_SOURCE) changes.
+KALSHI_INGEST_MODE = os.getenv("KALSHI_INGEST_MODE", "poll")
+kalshi_stream = (
+    KalshiStream(value_fn=FEEDS[EUR_USD_FEED].value_fn) if KALSHI_INGEST_MODE == "stream" else None
+)
+
+# Optional Parquet archive of every fetched Kalshi snapshot (needs pyarrow)
+KALSHI_ARCHIVE_DIR = os.getenv("KALSHI_ARCHIVE_DIR")
+snapshot_archive = SnapshotArchive(
+    KALSHI_ARCHIVE_DIR,
+    flush_interval=float(os.getenv("KALSHI_ARCHIVE_FLUSH_INTERVAL", "60"))
+) if KALSHI_ARCHIVE_DIR else None
+if snapshot_archive:
+    fetch_listeners.append(snapshot_archive.record)
+
+# Deviation/heartbeat triggers: the oracle write and the treasury rebalance
+# are only sent when their value moved enough or the heartbeat expired
+ORACLE_CHECK_INTERVAL = float(os.getenv("ORACLE_CHECK_INTERVAL", "30"))
+feed_policies = {
+    name: UpdatePolicy.from_env(name, "ORACLE", deviation=0.005, heartbeat=3600)
+    for name in FEEDS
+}
+oracle_policy = feed_policies[EUR_USD_FEED]
+rebalance_policy = UpdatePolicy.from_env("rebalance", "REBALANCE", deviation=0.01, heartbeat=6 * 3600)
+scheduler_wakeup = asyncio.Event()
+
+# Treasury tolerance band in basis points, read from rebalanceToleranceBps; treasuries
+# deployed before the band existed use REBALANCE_TOLERANCE_BPS (their reBalance always trades)
+REBALANCE_TOLERANCE_BPS = int(os.getenv("REBALANCE_TOLERANCE_BPS", "0"))
+treasury_band_reads = None  # whether the treasury has rebalanceToleranceBps (None until probed)
+
+# Leader election so any number of web workers can run with exactly one active scheduler.
+# SCHEDULER_MODE: 'embedded' (every worker competes for the lease) or 'off' (HTTP only,
+# with scheduler.py running elsewhere). SCHEDULER_LEASE: 'sqlite:path', 'redis://...' or 'none'.
+SCHEDULER_MODE = os.getenv("SCHEDULER_MODE", "embedded")
+# The leader renews the lease every SCHEDULER_LEASE_TTL / 3 seconds during a cycle and
+# right before each submission, so a cycle blocked on receipts keeps its leadership.
+SCHEDULER_LEASE_TTL = float(os.getenv("SCHEDULER_LEASE_TTL", "180"))
+scheduler_lease = make_lease(os.getenv("SCHEDULER_LEASE", "sqlite:scheduler_lease.db"), ttl=SCHEDULER_LEASE_TTL)
+
+if kalshi_stream:
+    kalshi_stream.listeners.append(lambda market: scheduler_wakeup.set())
+
+# Admission control for /oracle/submit: at most SUBMIT_MAX_IN_FLIGHT submissions are
+# waiting to be broadcast and SUBMIT_MAX_QUEUE more wait up to SUBMIT_QUEUE_TIMEOUT seconds;
+# the rest get 429 with Retry-After. Scheduled updates bypass it. The default lets one
+# full batch form while the previous one is being sent.
+submission_limiter = AdmissionLimiter(
+    max_in_flight=int(os.getenv("SUBMIT_MAX_IN_FLIGHT", str(2 * int(os.getenv("ORACLE_BATCH_MAX", "50"))))),
+    max_queue=int(os.getenv("SUBMIT_MAX_QUEUE", "200")),
+    queue_timeout=float(os.getenv("SUBMIT_QUEUE_TIMEOUT", "5"))
+)
+SUBMISSIONS_IN_FLIGHT.set_function(lambda: submission_limiter.in_flight)
+
+# Idempotency-Key results for /oracle/submit, shared by the workers on this host
+idempotency_store = IdempotencyStore(
+    os.getenv("IDEMPOTENCY_DB_PATH", "idempotency.db"),
+    ttl=float(os.getenv("IDEMPOTENCY_TTL", "86400"))
+)
+
+# Server-sent events for dashboards: one shared producer, any number of clients
+LIVE_MARKET_INTERVAL = float(os.getenv("LIVE_MARKET_INTERVAL", "10"))
+
+
+class KalshiEventSummary(BaseModel):
+    event_ticker: Optional[str] = None
+    series_ticker: Optional[str] = None
+    title: Optional[str] = None
+    sub_title: Optional[str] = None
+    strike_date: Optional[str] = None
+    markets: Optional[list[dict]] = None  # raw markets, only with include=markets
+
+
+class KalshiMarket(BaseModel):
+    price: Optional[str] = None
+    probability: Optional[float] = None
+    ticker: Optional[str] = None
+    yes_bid: Optional[int] = None
+    no_ask: Optional[int] = None
+    expected_price: Optional[float] = None
+    median_price: Optional[float] = None
+    mode_price: Optional[float] = None
+    confidence_band: Optional[list[float]] = None
+    band_quantiles: Optional[list[float]] = None
+    event: Optional[KalshiEventSummary] = None
+
+
+class KalshiMarketResponse(BaseModel):
+    success: bool
+    market: Optional[KalshiMarket] = None
+    message: Optional[str] = None
+
+
+def market_payload(market, fields=None, include_markets=False):
+    """
+    Compact market snapshot: the summary fields plus a short event header.
+    The raw event with every nested market is only sent with include_markets.
+
+    Args:
+        market: snapshot from get_market_snapshot()
+        fields: optional set of KalshiMarket field names to keep
+        include_markets: add the event's raw markets
+    """
+    if not market:
+        return {"success": False, "message": "No market found"}
+    compact = {k: v for k, v in market.items() if k in KalshiMarket.model_fields and k != 'event'}
+    event = market.get('event') or {}
+    compact['event'] = {k: event[k] for k in KalshiEventSummary.model_fields if k != 'markets' and k in event}
+    if include_markets:
+        compact['event']['markets'] = event.get('markets', [])
+    if fields:
+        compact = {k: v for k, v in compact.items() if k in fields}
+    return {"success": True, "market": compact}
+
+
+async def oracle_info_from_index():
+    """Same payload as /oracle/info, built from the local index and cached metadata"""
+    (name, owner), _ = await batch_read([], [contract.functions.name(), contract.functions.owner()])
+    total = oracle_indexer.count
+    latest = oracle_indexer.get_data_point(total - 1) if total else None
+    return {
+        "name": name,
+        "owner": owner,
+        "total_data_points": total,
+        "contract_address": CONTRACT_ADDRESS,
+        "latest_observation": latest["value"] if latest else None
+    }
+
+
+async def publish_oracle_info():
+    try:
+        live_updates.publish("oracle", await oracle_info_from_index())
+    except Exception as e:
+        logger.error(f"Failed to publish oracle info: {str(e)}")
+
+
+async def run_live_producer():
+    """
+    Feeds /stream with Kalshi snapshots on a timer (served from the cache).
+    Runs only while a /stream client is connected, so idle workers don't poll.
+    """
+    await publish_oracle_info()
+    while True:
+        try:
+            live_updates.publish("market", market_payload(await get_market_snapshot()))
+        except Exception as e:
+            logger.error(f"Failed to publish market snapshot: {str(e)}")
+        await asyncio.sleep(LIVE_MARKET_INTERVAL)
+
+
+live_updates = Broadcaster(producer=run_live_producer)
+
+
+def publish_new_data_point(data_point):
+    # With no clients connected the producer publishes the current state when it starts instead
+    if live_updates.client_count:
+        asyncio.create_task(publish_oracle_info())
+
+
+oracle_indexer.listeners.append(publish_new_data_point)
+if kalshi_stream:
+    kalshi_stream.listeners.append(lambda market: live_updates.publish("market", market_payload(market)))
+
+
+async def get_market_snapshot():
+    """Most likely Kalshi market, from the live stream when healthy, otherwise via REST"""
+    if kalshi_stream:
+        market = kalshi_stream.latest()
+        if market:
+            return market
+    return await get_latest_maket()
+
+
+def reset_policy_state():
+    """Forget last published values so they are reloaded from chain (e.g. after a leader change)"""
+    for policy in feed_policies.values():
+        policy.last_value = None
+    rebalance_policy.last_value = None
+
+
+async def load_policy_state():
+    """Initialise the trigger policies from the last values published on chain"""
+    if oracle_policy.last_value is None:
+        await oracle_indexer.sync()
+        latest = oracle_indexer.get_data_point(oracle_indexer.count - 1)
+        if latest:
+            oracle_policy.record(latest["value"], latest["submission_timestamp"])
+
+    # Other feeds are not indexed: read their newest point straight from the contract
+    feeds = [name for name, policy in feed_policies.items() if name != EUR_USD_FEED and policy.last_value is None]
+    if feeds:
+        try:
+            _, counts = await batch_read([contract.functions.nextIndexFeed(FEEDS[n].feed_id) for n in feeds])
+            published = [(name, count) for name, count in zip(feeds, counts) if count > 0]
+            if published:
+                _, points = await batch_read([
+                    contract.functions.getFeedDataPoint(FEEDS[name].feed_id, count - 1) for name, count in published
+                ])
+                for (name, _), point in zip(published, points):
+                    # DataPoint: (submitter, submitterTimestamp, blockNumber, value, resolutionTimestamp)
+                    feed_policies[name].record(point[3], point[1])
+        except (BadFunctionCallOutput, ContractLogicError) as e:
+            # Oracle deployed before multi-feed support: nothing published for these feeds yet
+            logger.warning(f"Could not load last feed values from chain: {e}")
+
+    if rebalance_policy.last_value is None:
+        proportion = await treasury_contract.functions.usdToEurProportion().call()
+        # The last rebalance time is not stored on chain; the heartbeat starts now
+        rebalance_policy.record(proportion // 10**18, int(datetime.now().timestamp()))
+
+
+async def read_treasury_state():
+    """
+    Current target proportion, balances and tolerance band of the treasury in one batch.
+
+    Returns:
+        tuple: (usd_perc: int, usdc_balance: int, eurc_balance: int, tolerance_bps: int)
+    """
+    global treasury_band_reads
+    calls = [
+        treasury_contract.functions.usdToEurProportion(),
+        treasury_contract.functions.balOfUsdc(),
+        treasury_contract.functions.balOfEurc(),
+    ]
+    if treasury_band_reads is not False:
+        try:
+            _, (proportion, usd_balance, eur_balance, tolerance_bps) = await batch_read(
+                calls + [treasury_contract.functions.rebalanceToleranceBps()]
+            )
+            treasury_band_reads = True
+            return proportion // 10**18, usd_balance, eur_balance, tolerance_bps
+        except (BadFunctionCallOutput, ContractLogicError):
+            if treasury_band_reads:
+                raise
+            treasury_band_reads = False
+
+    _, (proportion, usd_balance, eur_balance) = await batch_read(calls)
+    return proportion // 10**18, usd_balance, eur_balance, REBALANCE_TOLERANCE_BPS
+
 
 # Scheduled task to fetch Kalshi data, submit to oracle, and rebalance treasury
 async def scheduled_oracle_update():
     """
-    Scheduled task that runs every 5 minutes to:
-    1. Fetch latest Kalshi market data
-    2. Submit to oracle contract
-    3. Rebalance treasury based on market data
+    Scheduled task that runs every ORACLE_CHECK_INTERVAL seconds to:
+    1. Fetch every registered Kalshi series once and compute all feeds
+    2. Submit the feeds that deviated or hit their heartbeat, batched into one tx
+    3. Rebalance treasury under its own deviation/heartbeat policy
     """
+    cycle_start = time.perf_counter()
     try:
-        logger.info("Starting scheduled oracle update...")
-
-        if not PRIVATE_KEY:
+        if not tx_manager:
             logger.error("Private key not configured, skipping scheduled update")
             return
 
-        # Get account from private key
-        account = Account.from_key(PRIVATE_KEY)
+        try:
+            await load_policy_state()
+        except Exception as e:
+            logger.error(f"Failed to load last on-chain values: {str(e)}")
+            FAILURES.labels("policy_state").inc()
+            return
 
-        # Step 1: Fetch Kalshi market data
+        # Step 1: Fetch Kalshi market data for all feeds
         try:
-            market_data = get_latest_maket()
+            # The live stream (when healthy) replaces the REST fetch for EUR/USD
+            live = {EUR_USD_FEED: kalshi_stream.latest()} if kalshi_stream else None
+            feed_results = await compute_feeds(snapshots=live)
+
+            market_data = feed_results.get(EUR_USD_FEED)
             if not market_data:
                 logger.warning("No Kalshi market data found, skipping update")
+                FAILURES.labels("kalshi_fetch").inc()
                 return
 
             price = market_data.get('price')
             probability = market_data.get('probability')
             ticker = market_data.get('ticker')
 
-            logger.info(f"Fetched Kalshi market - Ticker: {ticker}, Price: {price}, Probability: {probability:.2%}")
-
-            # Convert price string to float (e.g., '1.163' -> 1.163)
-            # This represents the EUR/USD exchange rate
-            price_float = float(price)
-
-            # Calculate target USD percentage based on EUR/USD exchange rate
-            # Formula: USD% = 100 / EUR/USD rate
-            # Example: EUR/USD = 1.163 → USD% = 100 / 1.163 = 86%
-            # Higher EUR/USD (strong EUR) → Lower USD%
-            # Lower EUR/USD (weak EUR) → Higher USD%
-            target_usd_perc = 100 / price_float
+            # EUR/USD exchange rate used for the oracle and the treasury target
+            price_float = snapshot_price(market_data)
+            target_usd_perc, oracle_value = compute_targets(price_float)
 
-            # Ensure target is in valid range (1-99%)
-            target_usd_perc = int(max(1, min(99, target_usd_perc)))
+        except Exception as e:
+            logger.error(f"Failed to fetch Kalshi data: {str(e)}")
+            FAILURES.labels("kalshi_fetch").inc()
+            return
 
-            # Convert target USD percentage to oracle format (percentage * 1000)
-            # For 37% USD, this would be 37000
-            oracle_value = int(target_usd_perc * 1000)
+        current_time = int(datetime.now().timestamp())
+        due_feeds = []
+        for name, result in feed_results.items():
+            if result:
+                reason = feed_policies[name].check(result['value'], current_time)
+                if reason:
+                    due_feeds.append((name, result['value'], reason))
+        rebalance_reason = rebalance_policy.check(target_usd_perc, current_time)
+
+        if rebalance_reason:
+            # Skip the transaction when reBalance would neither trade nor move the proportion
+            try:
+                current_usd_perc, usd_balance, eur_balance, tolerance_bps = await read_treasury_state()
+                if rebalance_within_band(target_usd_perc, current_usd_perc, usd_balance, eur_balance, tolerance_bps):
+                    logger.info(
+                        f"Treasury within {tolerance_bps} bps of target {target_usd_perc}% "
+                        f"(on-chain {current_usd_perc}%), skipping {rebalance_reason} rebalance"
+                    )
+                    REBALANCES_SKIPPED.inc()
+                    rebalance_policy.record(target_usd_perc, current_time)
+                    rebalance_reason = None
+            except Exception as e:
+                # Fall back to sending: the contract's own band still applies
+                logger.error(f"Failed to read treasury state: {str(e)}")
+                FAILURES.labels("treasury_state").inc()
 
-            # Ensure value is in valid range
-            oracle_value = max(1, min(99999, oracle_value))
+        if not due_feeds and not rebalance_reason:
+            return
 
-            logger.info(f"Calculated oracle value - EUR/USD: {price_float}, Target USD%: {target_usd_perc}%, Oracle value: {oracle_value}")
+        logger.info(f"Fetched Kalshi market - Ticker: {ticker}, Price: {price}, Probability: {probability:.2%}")
+        logger.info(f"Calculated oracle value - EUR/USD: {price_float}, Target USD%: {target_usd_perc}%, Oracle value: {oracle_value}")
 
-        except Exception as e:
-            logger.error(f"Failed to fetch Kalshi data: {str(e)}")
+        # Leadership may have moved while fetching: never submit without the lease
+        if not await renew_scheduler_lease():
             return
 
         # Step 2: Submit data to oracle
-        try:
-            current_time = int(datetime.now().timestamp())
-            resolution_time = current_time + (24 * 60 * 60)  # 24 hours from now
-
-            nonce = w3.eth.get_transaction_count(account.address)
-
-            # Estimate gas
-            gas_estimate = contract.functions.fulfillPredictionMarketDataEurUsd(
-                oracle_value,
-                current_time,
-                resolution_time
-            ).estimate_gas({'from': account.address})
-
-            # Build transaction
-            transaction = contract.functions.fulfillPredictionMarketDataEurUsd(
-                oracle_value,
-                current_time,
-                resolution_time
-            ).build_transaction({
-                'from': account.address,
-                'nonce': nonce,
-                'gas': gas_estimate + 10000,
-                'gasPrice': w3.eth.gas_price,
-            })
-
-            # Sign and send transaction
-            signed_txn = account.sign_transaction(transaction)
-            tx_hash = w3.eth.send_raw_transaction(signed_txn.raw_transaction)
-            tx_receipt = w3.eth.wait_for_transaction_receipt(tx_hash, timeout=120)
-
-            logger.info(f"Oracle data submitted successfully. TX: {tx_hash.hex()}, Value: {oracle_value / 1000}%")
+        oracle_tx = None
+        if due_feeds:
+            try:
+                logger.info("Submitting oracle update: " + ", ".join(f"{n}={v} ({r})" for n, v, r in due_feeds))
 
-        except Exception as e:
-            logger.error(f"Failed to submit oracle data: {str(e)}")
-            return
+                if [n for n, _, _ in due_feeds] == [EUR_USD_FEED]:
+                    resolution_time = current_time + FEEDS[EUR_USD_FEED].resolution_offset
+                    oracle_tx = await oracle_batcher.submit((oracle_value, current_time, resolution_time))
+                else:
+                    # Several feeds due: one transaction for all of them
+                    oracle_tx = await tx_manager.submit(
+                        contract.functions.fulfillFeedsBatch(
+                            [FEEDS[n].feed_id for n, _, _ in due_feeds],
+                            [v for _, v, _ in due_feeds],
+                            current_time,
+                            [current_time + FEEDS[n].resolution_offset for n, _, _ in due_feeds]
+                        )
+                    )
 
-        # Step 3: Rebalance treasury based on market data
-        try:
-            # Use the same target_usd_perc calculated above for oracle submission
-            logger.info(f"Rebalancing treasury - EUR/USD: {price_float}, Target USD%: {target_usd_perc}%")
+                for name, value, _ in due_feeds:
+                    feed_policies[name].record(value, current_time)
+
+            except Exception as e:
+                logger.error(f"Failed to submit oracle data: {str(e)}")
+                FAILURES.labels("oracle_submit").inc()
+                return
 
-            nonce = w3.eth.get_transaction_count(account.address)
+        # Step 3: Rebalance treasury based on market data
+        rebalance_tx = None
+        if rebalance_reason:
+            if oracle_tx and not await renew_scheduler_lease():
+                return
+            try:
+                # Use the same target_usd_perc calculated above for oracle submission
+                logger.info(f"Rebalancing treasury ({rebalance_reason}) - EUR/USD: {price_float}, Target USD%: {target_usd_perc}%")
 
-            # Estimate gas
-            gas_estimate = treasury_contract.functions.reBalance(
-                target_usd_perc
-            ).estimate_gas({'from': account.address})
+                # Sent with the next nonce while the oracle tx is still pending
+                rebalance_tx = await tx_manager.submit(
+                    rebalance_encoder(target_usd_perc)
+                )
+                rebalance_policy.record(target_usd_perc, current_time)
 
-            # Build transaction
-            transaction = treasury_contract.functions.reBalance(
-                target_usd_perc
-            ).build_transaction({
-                'from': account.address,
-                'nonce': nonce,
-                'gas': gas_estimate + 10000,
-                'gasPrice': w3.eth.gas_price,
-            })
+            except Exception as e:
+                logger.error(f"Failed to rebalance treasury: {str(e)}")
+                FAILURES.labels("rebalance_submit").inc()
+                return
 
-            # Sign and send transaction
-            signed_txn = account.sign_transaction(transaction)
-            tx_hash = w3.eth.send_raw_transaction(signed_txn.raw_transaction)
-            tx_receipt = w3.eth.wait_for_transaction_receipt(tx_hash, timeout=120)
+        # Step 4: Wait for the transactions to be mined
+        reverted = []
+        try:
+            if oracle_tx:
+                receipt = await oracle_tx.wait()
+                if receipt['status'] == 1:
+                    logger.info(f"Oracle data submitted successfully. TX: {oracle_tx.tx_hash}, Feeds: {len(due_feeds)}")
+                else:
+                    reverted.append(f"oracle {oracle_tx.tx_hash}")
 
-            logger.info(f"Treasury rebalanced successfully. TX: {tx_hash.hex()}, Target USD: {target_usd_perc}%")
+            if rebalance_tx:
+                receipt = await rebalance_tx.wait()
+                if receipt['status'] == 1:
+                    logger.info(f"Treasury rebalanced successfully. TX: {rebalance_tx.tx_hash}, Target USD: {target_usd_perc}%")
+                else:
+                    reverted.append(f"reBalance {rebalance_tx.tx_hash}")
 
         except Exception as e:
-            logger.error(f"Failed to rebalance treasury: {str(e)}")
+            logger.error(f"Failed to confirm scheduled transactions: {str(e)}")
+            FAILURES.labels("confirm").inc()
+            # Reload the last published values from chain on the next check
+            reset_policy_state()
+            return
+
+        if reverted:
+            logger.error(f"Scheduled transactions reverted: {', '.join(reverted)}")
+            FAILURES.labels("tx_reverted").inc()
+            # The policies recorded values that never made it on chain
+            reset_policy_state()
             return
 
+        UPDATE_CYCLE_SECONDS.observe(time.perf_counter() - cycle_start)
         logger.info("Scheduled oracle update completed successfully")
+        live_updates.publish("scheduler", {
+            "timestamp": current_time,
+            "eur_usd": price_float,
+            "target_usd_perc": target_usd_perc,
+            "feeds": {name: value for name, value, _ in due_feeds},
+            "oracle_tx": oracle_tx.tx_hash if oracle_tx else None,
+            "rebalance_tx": rebalance_tx.tx_hash if rebalance_tx else None
+        })
+        # Pick up the new DataPoint(s) right away instead of on the next poll
+        if oracle_tx:
+            asyncio.create_task(oracle_indexer.sync())
 
     except Exception as e:
         logger.error(f"Error in scheduled oracle update: {str(e)}")
+        FAILURES.labels("update_cycle").inc()
+
+
+@app.get("/oracle/policy")
+async def get_update_policies():
+    """Current deviation/heartbeat trigger settings and last published values"""
+    return {
+        "check_interval": ORACLE_CHECK_INTERVAL,
+        "feeds": {name: policy.to_dict() for name, policy in feed_policies.items()},
+        "rebalance": rebalance_policy.to_dict(),
+        # Policy state above is only live in the worker holding the lease
+        "scheduler": {
+            "mode": SCHEDULER_MODE,
+            "worker": scheduler_lease.owner_id,
+            "leader": scheduler_lease.holder()
+        }
+    }
 
 
 class OracleData(BaseModel):
@@ -340,10 +1121,24 @@ class OracleResponse(BaseModel):
     data: Optional[dict] = None
 
 
+@lru_cache(maxsize=None)
+def get_templates():
+    """Jinja environment, built on the first page view rather than at import"""
+    from fastapi.templating import Jinja2Templates
+    return Jinja2Templates(directory="templates")
+
+
 @app.get("/", response_class=HTMLResponse)
 async def root(request: Request):
     """Serve the main web interface"""
-    return templates.TemplateResponse("index.html", {"request": request})
+    return get_templates().TemplateResponse("index.html", {"request": request})
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics"""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
 
 
 @app.get("/api")
@@ -361,19 +1156,62 @@ async def api_info():
 async def health_check():
     """Health check endpoint"""
     try:
-        is_connected = w3.is_connected()
-        block_number = w3.eth.block_number if is_connected else None
+        is_connected = await w3.is_connected()
+        block_number = await w3.eth.block_number if is_connected else None
 
         return {
             "status": "healthy" if is_connected else "unhealthy",
             "rpc_connected": is_connected,
             "current_block": block_number,
-            "contract_address": CONTRACT_ADDRESS
+            "contract_address": CONTRACT_ADDRESS,
+            "rpc_endpoints": rpc_pool.status()
         }
     except Exception as e:
         raise HTTPException(status_code=503, detail=f"Service unhealthy: {str(e)}")
 
 
+async def fetch_token_balances(addresses):
+    """
+    Get Mock USDC and EURC balances for many checksum addresses in one RPC round trip.
+
+    Returns:
+        dict: {address: {token: balance info}}
+    """
+    tokens = list(mock_token_contracts.items())
+    metadata_calls = []
+    for _, token_contract in tokens:
+        metadata_calls += [token_contract.functions.decimals(), token_contract.functions.symbol()]
+    balance_calls = [
+        mock_balance_encoders[token](address)
+        for address in addresses
+        for token, _ in tokens
+    ]
+
+    try:
+        metadata, balances_raw = await batch_read(balance_calls, metadata_calls)
+    except Exception as e:
+        return {address: {token: {"error": str(e)} for token, _ in tokens} for address in addresses}
+
+    results = {}
+    for address_index, address in enumerate(addresses):
+        balances = {}
+        for token_index, (token, token_contract) in enumerate(tokens):
+            decimals = metadata[2 * token_index]
+            symbol = metadata[2 * token_index + 1]
+            balance = balances_raw[address_index * len(tokens) + token_index]
+
+            balances[token] = {
+                "symbol": symbol,
+                "balance_raw": str(balance),
+                "balance": str(balance / (10 ** decimals)),
+                "decimals": decimals,
+                "contract_address": token_contract.address
+            }
+        results[address] = balances
+
+    return results
+
+
 @app.get("/balance")
 async def get_token_balances(address: Optional[str] = None):
     """Get Mock USDC and EURC token balances for an address on ARC Testnet"""
@@ -382,67 +1220,54 @@ async def get_token_balances(address: Optional[str] = None):
 
     try:
         # Convert to checksum address
-        checksum_address = Web3.to_checksum_address(target_address)
+        checksum_address = cached_checksum_address(target_address)
 
-        balances = {}
-
-        # Get Mock USDC balance
-        if MOCK_USDC_ADDRESS != "0x0000000000000000000000000000000000000000":
-            try:
-                usdc_contract = w3.eth.contract(
-                    address=Web3.to_checksum_address(MOCK_USDC_ADDRESS),
-                    abi=ERC20_ABI
-                )
-                usdc_balance = usdc_contract.functions.balanceOf(checksum_address).call()
-                usdc_decimals = usdc_contract.functions.decimals().call()
-                usdc_symbol = usdc_contract.functions.symbol().call()
-
-                balances["USDC"] = {
-                    "symbol": usdc_symbol,
-                    "balance_raw": str(usdc_balance),
-                    "balance": str(usdc_balance / (10 ** usdc_decimals)),
-                    "decimals": usdc_decimals,
-                    "contract_address": MOCK_USDC_ADDRESS
-                }
-            except Exception as e:
-                balances["USDC"] = {"error": str(e)}
-
-        # Get Mock EURC balance
-        if MOCK_EURC_ADDRESS != "0x0000000000000000000000000000000000000000":
-            try:
-                eurc_contract = w3.eth.contract(
-                    address=Web3.to_checksum_address(MOCK_EURC_ADDRESS),
-                    abi=ERC20_ABI
-                )
-                eurc_balance = eurc_contract.functions.balanceOf(checksum_address).call()
-                eurc_decimals = eurc_contract.functions.decimals().call()
-                eurc_symbol = eurc_contract.functions.symbol().call()
-
-                balances["EURC"] = {
-                    "symbol": eurc_symbol,
-                    "balance_raw": str(eurc_balance),
-                    "balance": str(eurc_balance / (10 ** eurc_decimals)),
-                    "decimals": eurc_decimals,
-                    "contract_address": MOCK_EURC_ADDRESS
-                }
-            except Exception as e:
-                balances["EURC"] = {"error": str(e)}
+        balances = await fetch_token_balances([checksum_address])
 
         return {
             "address": checksum_address,
             "chain": "Arc Testnet",
-            "balances": balances
+            "balances": balances[checksum_address]
         }
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to fetch balances: {str(e)}")
 
 
+@app.get("/balances")
+async def get_many_token_balances(addresses: str):
+    """
+    Get Mock USDC and EURC token balances for many addresses in one RPC round trip.
+    Pass addresses as a comma-separated list (max 200).
+    """
+    try:
+        checksum_addresses = list(dict.fromkeys(
+            cached_checksum_address(a.strip()) for a in addresses.split(",") if a.strip()
+        ))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid address: {str(e)}")
+
+    if not checksum_addresses or len(checksum_addresses) > 200:
+        raise HTTPException(status_code=400, detail="Provide between 1 and 200 addresses")
+
+    return {
+        "chain": "Arc Testnet",
+        "balances": await fetch_token_balances(checksum_addresses)
+    }
+
+
 @app.post("/mint-tokens")
-async def mint_test_tokens(address: str):
-    """Mint Mock USDC and EURC tokens matching the user's real token balances"""
+async def mint_test_tokens(address: str, wait: bool = False):
+    """
+    Queue a mint of Mock USDC and EURC matching the user's real token balances.
+
+    Returns a job id right away; mints are flushed every few seconds as one
+    batched transaction. Poll /mint-tokens/{job_id}, or pass wait=true to
+    wait for the result. Repeated requests within the cooldown return the
+    existing job.
+    """
 
     # Validate private key is configured
-    if not PRIVATE_KEY:
+    if not faucet:
         raise HTTPException(
             status_code=500,
             detail="Private key not configured. Set PRIVATE_KEY environment variable."
@@ -450,171 +1275,140 @@ async def mint_test_tokens(address: str):
 
     try:
         # Convert to checksum address
-        checksum_address = Web3.to_checksum_address(address)
+        checksum_address = cached_checksum_address(address)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid address")
 
-        # Get account from private key
-        account = Account.from_key(PRIVATE_KEY)
+    job, deduplicated = await faucet.request(checksum_address)
 
-        results = {}
-
-        # Get real USDC balance and mint matching Mock USDC
-        if MOCK_USDC_ADDRESS != "0x0000000000000000000000000000000000000000":
-            try:
-                mock_usdc_contract = w3.eth.contract(
-                    address=Web3.to_checksum_address(MOCK_USDC_ADDRESS),
-                    abi=ERC20_ABI
-                )
+    if wait:
+        try:
+            job = await faucet.wait(job, timeout=tx_manager.receipt_timeout + faucet.interval)
+        except asyncio.TimeoutError:
+            pass
+        return {
+            "success": job.status == "minted",
+            "address": checksum_address,
+            "job_id": job.job_id,
+            "status": job.status,
+            "results": job.results
+        }
 
-                # Get real USDC balance
-                if USDC_ADDRESS != "0x0000000000000000000000000000000000000000":
-                    real_usdc_contract = w3.eth.contract(
-                        address=Web3.to_checksum_address(USDC_ADDRESS),
-                        abi=ERC20_ABI
-                    )
-                    real_usdc_balance = real_usdc_contract.functions.balanceOf(checksum_address).call()
-                    real_usdc_decimals = real_usdc_contract.functions.decimals().call()
+    return {
+        "success": True,
+        "address": checksum_address,
+        "job_id": job.job_id,
+        "status": job.status,
+        "deduplicated": deduplicated
+    }
 
-                    # Multiply by 10^12 to convert from 6 decimals to 18 decimals
-                    mock_usdc_mint_amount = real_usdc_balance * (10 ** 12)
-                    usdc_balance_formatted = real_usdc_balance / (10 ** real_usdc_decimals)
-                else:
-                    # Default to 1000 if no real USDC address configured
-                    usdc_balance_formatted = 1000
-                    mock_usdc_mint_amount = 1000 * (10 ** 18)
-
-                # Build mint transaction for Mock USDC
-                nonce = w3.eth.get_transaction_count(account.address)
-                gas_estimate = mock_usdc_contract.functions.mint(
-                    checksum_address,
-                    mock_usdc_mint_amount
-                ).estimate_gas({'from': account.address})
-
-                transaction = mock_usdc_contract.functions.mint(
-                    checksum_address,
-                    mock_usdc_mint_amount
-                ).build_transaction({
-                    'from': account.address,
-                    'nonce': nonce,
-                    'gas': gas_estimate + 10000,
-                    'gasPrice': w3.eth.gas_price,
-                })
-
-                # Sign and send transaction
-                signed_txn = account.sign_transaction(transaction)
-                tx_hash = w3.eth.send_raw_transaction(signed_txn.raw_transaction)
-                tx_receipt = w3.eth.wait_for_transaction_receipt(tx_hash, timeout=120)
-
-                results["USDC"] = {
-                    "success": tx_receipt['status'] == 1,
-                    "transaction_hash": tx_hash.hex(),
-                    "amount": str(usdc_balance_formatted),
-                    "matched_real_balance": True
-                }
-            except Exception as e:
-                results["USDC"] = {"error": str(e)}
 
-        # Get real EURC balance and mint matching Mock EURC
-        if MOCK_EURC_ADDRESS != "0x0000000000000000000000000000000000000000":
-            try:
-                mock_eurc_contract = w3.eth.contract(
-                    address=Web3.to_checksum_address(MOCK_EURC_ADDRESS),
-                    abi=ERC20_ABI
-                )
+@app.get("/mint-tokens/{job_id}")
+async def get_mint_job(job_id: str):
+    """Get the status and per-token results of a faucet job"""
+    job = await faucet.get(job_id) if faucet else None
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
 
-                # Get real EURC balance
-                if EURC_ADDRESS != "0x0000000000000000000000000000000000000000":
-                    real_eurc_contract = w3.eth.contract(
-                        address=Web3.to_checksum_address(EURC_ADDRESS),
-                        abi=ERC20_ABI
-                    )
-                    real_eurc_balance = real_eurc_contract.functions.balanceOf(checksum_address).call()
-                    real_eurc_decimals = real_eurc_contract.functions.decimals().call()
 
-                    # Multiply by 10^12 to convert from 6 decimals to 18 decimals
-                    mock_eurc_mint_amount = real_eurc_balance * (10 ** 12)
-                    eurc_balance_formatted = real_eurc_balance / (10 ** real_eurc_decimals)
-                else:
-                    # Default to 1000 if no real EURC address configured
-                    eurc_balance_formatted = 1000
-                    mock_eurc_mint_amount = 1000 * (10 ** 18)
-
-                # Build mint transaction for Mock EURC
-                nonce = w3.eth.get_transaction_count(account.address)
-                gas_estimate = mock_eurc_contract.functions.mint(
-                    checksum_address,
-                    mock_eurc_mint_amount
-                ).estimate_gas({'from': account.address})
-
-                transaction = mock_eurc_contract.functions.mint(
-                    checksum_address,
-                    mock_eurc_mint_amount
-                ).build_transaction({
-                    'from': account.address,
-                    'nonce': nonce,
-                    'gas': gas_estimate + 10000,
-                    'gasPrice': w3.eth.gas_price,
-                })
-
-                # Sign and send transaction
-                signed_txn = account.sign_transaction(transaction)
-                tx_hash = w3.eth.send_raw_transaction(signed_txn.raw_transaction)
-                tx_receipt = w3.eth.wait_for_transaction_receipt(tx_hash, timeout=120)
-
-                results["EURC"] = {
-                    "success": tx_receipt['status'] == 1,
-                    "transaction_hash": tx_hash.hex(),
-                    "amount": str(eurc_balance_formatted),
-                    "matched_real_balance": True
-                }
-            except Exception as e:
-                results["EURC"] = {"error": str(e)}
+@app.get("/kalshi/market", responses={200: {"model": KalshiMarketResponse}})
+async def get_kalshi_market(
+    fields: Optional[str] = Query(None, description="Comma-separated market fields, e.g. price,probability,ticker,event"),
+    include: Optional[str] = Query(None, description="'markets' to add the event's raw markets")
+):
+    """Test endpoint to get today's Kalshi market"""
+    selected = None
+    if fields:
+        selected = {f.strip() for f in fields.split(",") if f.strip()}
+        unknown = selected - set(KalshiMarket.model_fields)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    includes = {i.strip() for i in include.split(",")} if include else set()
+    if includes - {"markets"}:
+        raise HTTPException(status_code=400, detail="include only supports 'markets'")
 
-        return {
-            "success": True,
-            "address": checksum_address,
-            "results": results
-        }
+    try:
+        market = await get_market_snapshot()
+        # KalshiMarketResponse only documents the schema (tests check the payload
+        # against it); orjson skips re-validating the snapshot on every request
+        return Response(
+            content=orjson.dumps(market_payload(market, selected, "markets" in includes)),
+            media_type="application/json"
+        )
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to mint tokens: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to fetch Kalshi market: {str(e)}")
 
 
-@app.get("/kalshi/market")
-async def get_kalshi_market():
-    """Test endpoint to get today's Kalshi market"""
-    try:
-        market = get_latest_maket()
+@app.get("/stream")
+async def stream_updates(request: Request):
+    """
+    Server-sent events with live Kalshi snapshots ('market'), on-chain oracle
+    updates ('oracle') and scheduler results ('scheduler')
+    """
+    return StreamingResponse(
+        live_updates.events(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
-        if market:
-            return {
-                "success": True,
-                "market": market
-            }
-        else:
-            return {
-                "success": False,
-                "message": "No market found"
-            }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to fetch Kalshi market: {str(e)}")
+
+@app.get("/kalshi/cache/stats")
+async def get_kalshi_cache_stats():
+    """Hit/miss/coalesced counters for the Kalshi market cache and upstream request count"""
+    stats = get_cache_stats()
+    if snapshot_archive:
+        stats["archive"] = {**snapshot_archive.stats, "buffered_rows": snapshot_archive.buffered_rows}
+    return stats
+
+
+def data_point_dict(index, data_point):
+    """API representation of a DataPoint struct (submitter, submitterTimestamp, blockNumber, value, resolutionTimestamp)"""
+    return {
+        "index": index,
+        "submitter": data_point[0],
+        "submission_timestamp": data_point[1],
+        "block_number": data_point[2],
+        "value": data_point[3],
+        "value_percentage": data_point[3] / 1000,  # Convert back to percentage
+        "resolution_timestamp": data_point[4]
+    }
+
+
+async def read_latest_data_point(immutable_calls=()):
+    """
+    Number of data points and the newest DataPoint (or None), in one round trip
+    on contracts with latestDataPoint(); older deployments need a second call.
+
+    Returns:
+        tuple: (immutable_results, count, data_point or None)
+    """
+    # getDataPoints and latestDataPoint ship together, so the indexer's probe covers both
+    if oracle_indexer.range_reads is not False:
+        try:
+            immutable_results, ((count, latest),) = await batch_read(
+                [contract.functions.latestDataPoint()], immutable_calls
+            )
+            return immutable_results, count, latest if count else None
+        except (BadFunctionCallOutput, ContractLogicError):
+            if oracle_indexer.range_reads:
+                raise
+            oracle_indexer.range_reads = False
+
+    immutable_results, (count,) = await batch_read([contract.functions.nextIndexDataPoint()], immutable_calls)
+    latest = await contract.functions.getDataPoint(count - 1).call() if count else None
+    return immutable_results, count, latest
 
 
 @app.get("/oracle/info")
 async def get_oracle_info():
     """Get oracle contract information"""
     try:
-        name = contract.functions.name().call()
-        owner = contract.functions.owner().call()
-        next_index = contract.functions.nextIndexDataPoint().call()
-
-        # Get latest observation if there are any data points
-        latest_observation = None
-        if next_index > 0:
-            try:
-                data_point = contract.functions.getDataPoint(next_index - 1).call()
-                # DataPoint struct: (submitter, submitterTimestamp, blockNumber, value, resolutionTimestamp)
-                latest_observation = data_point[3]  # value is at index 3
-            except Exception as e:
-                print(f"Failed to fetch latest data point: {e}")
+        # name and owner are cached after the first request
+        (name, owner), next_index, data_point = await read_latest_data_point(
+            [contract.functions.name(), contract.functions.owner()]
+        )
+        latest_observation = data_point[3] if data_point else None  # value is at index 3
 
         return {
             "name": name,
@@ -627,32 +1421,187 @@ async def get_oracle_info():
         raise HTTPException(status_code=500, detail=f"Failed to fetch oracle info: {str(e)}")
 
 
-@app.get("/oracle/data/{index}")
-async def get_data_point(index: int):
-    """Get a specific data point by index"""
+@app.get("/oracle/latest")
+async def get_latest_data_point():
+    """Get the newest data point and the total count in a single contract call"""
     try:
-        data_point = contract.functions.getDataPoint(index).call()
-        # DataPoint struct: (submitter, submitterTimestamp, blockNumber, value, resolutionTimestamp)
+        _, count, data_point = await read_latest_data_point()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch latest data point: {str(e)}")
+    if data_point is None:
+        raise HTTPException(status_code=404, detail="No data points yet")
+    return {"total_data_points": count, "data_point": data_point_dict(count - 1, data_point)}
+
+
+@app.get("/oracle/data")
+async def get_data_points(
+    from_ts: Optional[int] = Query(None, alias="from", ge=0, le=SQLITE_MAX_INT),
+    to_ts: Optional[int] = Query(None, alias="to", ge=0, le=SQLITE_MAX_INT),
+    limit: int = Query(100, ge=1, le=5000),
+    by: str = Query("submitter", pattern="^(submitter|resolution)$"),
+    start: Optional[int] = Query(None, ge=0, le=SQLITE_MAX_INT),
+    count: int = Query(100, ge=1, le=5000)
+):
+    """
+    Get data points in a time range (newest first), served from the local index.
+    Filter on submitter timestamp (default) or resolution timestamp with by=resolution.
 
+    With start= (and count=), return data points by index instead, oldest first;
+    points not indexed yet are pulled with getDataPoints range reads first.
+    """
+    if start is not None:
+        try:
+            await oracle_indexer.ensure_indexed(start + count)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to fetch data points: {str(e)}")
         return {
-            "index": index,
-            "submitter": data_point[0],
-            "submission_timestamp": data_point[1],
-            "block_number": data_point[2],
-            "value": data_point[3],
-            "value_percentage": data_point[3] / 1000,
-            "resolution_timestamp": data_point[4]
+            "total_indexed": oracle_indexer.count,
+            "data_points": oracle_indexer.get_slice(start, count)
         }
+
+    return {
+        "total_indexed": oracle_indexer.count,
+        "data_points": oracle_indexer.get_range(from_ts, to_ts, limit, by)
+    }
+
+
+@app.get("/oracle/series")
+async def get_data_series(
+    bucket: str = "1h",
+    from_ts: Optional[int] = Query(None, alias="from", ge=0, le=SQLITE_MAX_INT),
+    to_ts: Optional[int] = Query(None, alias="to", ge=0, le=SQLITE_MAX_INT)
+):
+    """Get oracle values aggregated into time buckets (e.g. 5m, 1h, 1d), served from the local index"""
+    try:
+        bucket_seconds = parse_bucket(bucket)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {
+        "bucket": bucket,
+        "bucket_seconds": bucket_seconds,
+        "series": oracle_indexer.get_series(bucket_seconds, from_ts, to_ts)
+    }
+
+
+@app.get("/oracle/data/{index}")
+async def get_data_point(index: int = Path(ge=0, le=SQLITE_MAX_INT)):
+    """Get a specific data point by index"""
+    # Serve from the local index when the point has already been synced
+    data_point = oracle_indexer.get_data_point(index)
+    if data_point:
+        return data_point
+
+    try:
+        data_point = await contract.functions.getDataPoint(index).call()
+        return data_point_dict(index, data_point)
     except Exception as e:
         raise HTTPException(status_code=404, detail=f"Data point not found: {str(e)}")
 
 
+async def broadcast_oracle_data(data):
+    """
+    Admit one submission and queue it for the oracle, returning once its
+    transaction is broadcast. Raises Overloaded if no slot frees up in time.
+
+    Returns:
+        dict: OracleResponse fields as of the broadcast
+    """
+    # Use current timestamp if not provided
+    timestamp = data.timestamp if data.timestamp else int(datetime.now().timestamp())
+
+    async with submission_limiter.admit():
+        # Queue, sign and send transaction (batched with other submissions queued meanwhile)
+        tx = await oracle_batcher.submit((data.value, timestamp, data.resolution_timestamp))
+
+    return {
+        "success": True,
+        "transaction_hash": tx.tx_hash,
+        "message": "Transaction sent, pending confirmation",
+        "data": {
+            "value": data.value,
+            "value_percentage": data.value / 1000,
+            "timestamp": timestamp,
+            "resolution_timestamp": data.resolution_timestamp,
+            "nonce": tx.nonce,
+            "block_number": None,
+            "gas_used": None
+        }
+    }
+
+
+async def confirm_oracle_response(sent, wait):
+    """OracleResponse for a broadcast submission, with its receipt if wait is set"""
+    if not wait:
+        return OracleResponse(**sent)
+
+    tx = tx_manager.get(sent["transaction_hash"])
+    if tx is None:
+        # Sent by another worker or before a restart: track it via /tx/{tx_hash}
+        return OracleResponse(**sent)
+
+    # Wait for transaction receipt
+    tx_receipt = await tx.wait()
+    response_data = dict(sent["data"], block_number=tx_receipt['blockNumber'], gas_used=tx_receipt['gasUsed'])
+    return OracleResponse(
+        success=tx_receipt['status'] == 1,
+        transaction_hash=tx.tx_hash,
+        message="Data submitted successfully" if tx_receipt['status'] == 1 else "Transaction failed",
+        data=response_data
+    )
+
+
+def settle_idempotency_key(key, submission):
+    """
+    Complete or release an Idempotency-Key (if any) once its broadcast_oracle_data task is done.
+
+    The key is only released when nothing was broadcast: the submission was
+    refused by admission control or its transaction failed to send. A task
+    cancelled at shutdown leaves the key pending until pending_timeout, as
+    its point may already be on the way.
+    """
+    if submission.cancelled():
+        return
+    error = submission.exception()  # retrieved even without a key, as the client may be gone
+    if key is None:
+        return
+    if error is None:
+        idempotency_store.complete(key, submission.result())
+    else:
+        idempotency_store.abort(key, error if isinstance(error, Overloaded) else None)
+
+
+def overloaded_error(e):
+    """429 response for a submission refused by admission control"""
+    SUBMISSIONS_REJECTED.labels(e.reason).inc()
+    return HTTPException(
+        status_code=429,
+        detail="Too many submissions in flight, retry later",
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
+
 @app.post("/oracle/submit", response_model=OracleResponse)
-async def submit_oracle_data(data: OracleData):
-    """Submit new EUR/USD prediction market data to the oracle"""
+async def submit_oracle_data(
+    data: OracleData,
+    response: Response,
+    wait: bool = False,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
+    """
+    Submit new EUR/USD prediction market data to the oracle.
+
+    Returns as soon as the transaction is broadcast; pass wait=true to
+    wait for the receipt. Track pending transactions via /tx/{tx_hash}.
+
+    Send an Idempotency-Key header to make retries safe: a repeated request
+    with the same key and body returns the original transaction instead of
+    submitting again. Under overload the request is refused with 429 and a
+    Retry-After header.
+    """
 
     # Validate private key is configured
-    if not PRIVATE_KEY:
+    if not tx_manager:
         raise HTTPException(
             status_code=500,
             detail="Private key not configured. Set PRIVATE_KEY environment variable."
@@ -665,64 +1614,86 @@ async def submit_oracle_data(data: OracleData):
             detail="Value must be between 1 and 99999"
         )
 
-    try:
-        # Get account from private key
-        account = Account.from_key(PRIVATE_KEY)
-
-        # Use current timestamp if not provided
-        timestamp = data.timestamp if data.timestamp else int(datetime.now().timestamp())
-
-        # Build transaction
-        nonce = w3.eth.get_transaction_count(account.address)
-
-        # Estimate gas
-        gas_estimate = contract.functions.fulfillPredictionMarketDataEurUsd(
-            data.value,
-            timestamp,
-            data.resolution_timestamp
-        ).estimate_gas({'from': account.address})
-
-        # Build transaction
-        transaction = contract.functions.fulfillPredictionMarketDataEurUsd(
-            data.value,
-            timestamp,
-            data.resolution_timestamp
-        ).build_transaction({
-            'from': account.address,
-            'nonce': nonce,
-            'gas': gas_estimate + 10000,  # Add buffer
-            'gasPrice': w3.eth.gas_price,
-        })
+    # Timestamps are stored as uint40; anything else would revert the whole batch on chain
+    for name, timestamp in (("timestamp", data.timestamp), ("resolution_timestamp", data.resolution_timestamp)):
+        if timestamp is not None and not 0 < timestamp <= MAX_UINT40:
+            raise HTTPException(status_code=400, detail=f"{name} must be between 1 and {MAX_UINT40}")
 
-        # Sign transaction
-        signed_txn = account.sign_transaction(transaction)
-
-        # Send transaction
-        tx_hash = w3.eth.send_raw_transaction(signed_txn.raw_transaction)
-
-        # Wait for transaction receipt
-        tx_receipt = w3.eth.wait_for_transaction_receipt(tx_hash, timeout=120)
-
-        return OracleResponse(
-            success=tx_receipt['status'] == 1,
-            transaction_hash=tx_hash.hex(),
-            message="Data submitted successfully" if tx_receipt['status'] == 1 else "Transaction failed",
-            data={
-                "value": data.value,
-                "value_percentage": data.value / 1000,
-                "timestamp": timestamp,
-                "resolution_timestamp": data.resolution_timestamp,
-                "block_number": tx_receipt['blockNumber'],
-                "gas_used": tx_receipt['gasUsed']
-            }
-        )
+    sent = None
+    if idempotency_key is not None:
+        if not 1 <= len(idempotency_key) <= 255:
+            raise HTTPException(status_code=400, detail="Idempotency-Key must be 1-255 characters")
+        try:
+            sent = await idempotency_store.begin(idempotency_key, fingerprint(data.model_dump()))
+        except IdempotencyConflict as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        except IdempotencyInProgress as e:
+            raise HTTPException(status_code=409, detail=str(e), headers={"Retry-After": "1"})
+        except Overloaded as e:
+            # Same-key request this one waited on was refused: refuse it too
+            raise overloaded_error(e)
+        if sent is not None:
+            IDEMPOTENT_REPLAYS.inc()
+            response.headers["Idempotent-Replayed"] = "true"
+
+    if sent is None:
+        # The submission runs on its own and settles the key itself: a client that
+        # disconnects after its point was queued must not free the key for a retry
+        # that would send the point a second time
+        submission = asyncio.create_task(broadcast_oracle_data(data))
+        submission.add_done_callback(lambda task: settle_idempotency_key(idempotency_key, task))
+        try:
+            sent = await asyncio.shield(submission)
+        except Overloaded as e:
+            raise overloaded_error(e)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to submit data: {str(e)}")
 
+    try:
+        return await confirm_oracle_response(sent, wait)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to submit data: {str(e)}")
 
 
+@app.get("/tx/fees")
+async def get_fee_state():
+    """Cached EIP-1559 fee suggestion, gas estimate cache, confirmation tracker and /oracle/submit admission state"""
+    if not tx_manager:
+        raise HTTPException(status_code=500, detail="Private key not configured")
+    return {
+        "fees": tx_manager.fees.to_dict(),
+        "gas_estimates": tx_manager.gas_cache.stats(),
+        "confirmations": tx_manager.tracker.to_dict(),
+        "admission": submission_limiter.to_dict(),
+        "idempotency": idempotency_store.stats()
+    }
+
+
+@app.get("/tx/{tx_hash}")
+async def get_transaction_status(tx_hash: str):
+    """Get the status of a transaction sent by this server"""
+    tx = tx_manager.get(tx_hash) if tx_manager else None
+    if tx is None:
+        raise HTTPException(status_code=404, detail="Transaction not found")
+    return tx.to_dict()
+
+
+@app.post("/tx/{tx_hash}/speed-up")
+async def speed_up_transaction(tx_hash: str, factor: float = Query(1.125, ge=1.1, le=3.0)):
+    """Replace a stuck transaction (same nonce and call) with higher fees"""
+    if not tx_manager:
+        raise HTTPException(status_code=500, detail="Private key not configured")
+    try:
+        handle = await tx_manager.speed_up(tx_hash, factor)
+    except ValueError as e:
+        raise HTTPException(status_code=409 if "mined" in str(e) else 404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to replace transaction: {str(e)}")
+    return handle.to_dict()
+
+
 @app.post("/oracle/submit-latest")
-async def submit_latest_eur_usd():
+async def submit_latest_eur_usd(response: Response):
     """
     Submit latest EUR/USD data with auto-populated fields.
     This endpoint can be called periodically to update the oracle.
@@ -742,8 +1713,9 @@ async def submit_latest_eur_usd():
         resolution_timestamp=resolution_time
     )
 
-    return await submit_oracle_data(data)
+    return await submit_oracle_data(data, response, idempotency_key=None)
 
 
 if __name__ == "__main__":
+    import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,98 @@
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlightCache:
+    """
+    In-process TTL cache for async loaders.
+
+    - Values younger than ttl are served straight from the cache.
+    - Values older than ttl but younger than stale_ttl are served stale
+      while one background task refreshes them. After a failed refresh
+      the next one waits retry_backoff seconds, doubling with every
+      further failure up to max_retry_backoff.
+    - Concurrent misses for the same key share a single in-flight load.
+    """
+
+    def __init__(self, ttl=10.0, stale_ttl=60.0, retry_backoff=1.0, max_retry_backoff=30.0):
+        self.ttl = ttl
+        self.stale_ttl = max(stale_ttl, ttl)
+        self.retry_backoff = retry_backoff
+        self.max_retry_backoff = max_retry_backoff
+        self._entries = {}  # key -> (value, loaded_at)
+        self._inflight = {}  # key -> asyncio.Task
+        self._failures = {}  # key -> (consecutive failed loads, monotonic time of the next refresh)
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "stale_served": 0,
+            "refreshes": 0,
+            "errors": 0,
+        }
+
+    async def get(self, key, loader):
+        """
+        Return the cached value for key, calling loader() to (re)load it.
+
+        Args:
+            key: cache key
+            loader: zero-argument coroutine function returning the value
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, loaded_at = entry
+            now = time.monotonic()
+            age = now - loaded_at
+            if age < self.ttl:
+                self.stats["hits"] += 1
+                return value
+            if age < self.stale_ttl:
+                self.stats["stale_served"] += 1
+                if key not in self._inflight and now >= self._failures.get(key, (0, now))[1]:
+                    self.stats["refreshes"] += 1
+                    self._start_load(key, loader)
+                return value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+        else:
+            self.stats["misses"] += 1
+            task = self._start_load(key, loader)
+        return await asyncio.shield(task)
+
+    def invalidate(self, key=None):
+        """Drop one key, or every key if none is given."""
+        if key is None:
+            self._entries.clear()
+            self._failures.clear()
+        else:
+            self._entries.pop(key, None)
+            self._failures.pop(key, None)
+
+    def _start_load(self, key, loader):
+        task = asyncio.create_task(self._load(key, loader))
+        # Background refreshes may have no awaiter; mark their errors as retrieved
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self._inflight[key] = task
+        return task
+
+    async def _load(self, key, loader):
+        try:
+            value = await loader()
+            self._entries[key] = (value, time.monotonic())
+            self._failures.pop(key, None)
+            return value
+        except Exception as e:
+            self.stats["errors"] += 1
+            failures = self._failures.get(key, (0, 0))[0] + 1
+            backoff = min(self.max_retry_backoff, self.retry_backoff * 2 ** (failures - 1))
+            self._failures[key] = (failures, time.monotonic() + backoff)
+            logger.warning(f"Cache load failed for {key}: {str(e)}")
+            raise
+        finally:
+            self._inflight.pop(key, None)
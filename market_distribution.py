@@ -0,0 +1,138 @@
+import numpy as np
+
+# Quantiles reported for the confidence band around the median
+BAND_QUANTILES = (0.05, 0.95)
+
+
+def market_strike(market):
+    """
+    Representative EUR/USD level for one market.
+
+    'between' buckets use the midpoint of floor and cap; the open-ended
+    tails use their single bound. Falls back to the price in the ticker.
+    """
+    floor_strike = market.get("floor_strike")
+    cap_strike = market.get("cap_strike")
+    if floor_strike is not None and cap_strike is not None:
+        return (floor_strike + cap_strike) / 2
+    if floor_strike is not None:
+        return floor_strike
+    if cap_strike is not None:
+        return cap_strike
+    try:
+        # Ticker format: KXEURUSD-25NOV1810-T1.17399 or KXEURUSD-25NOV1810-B1.17399
+        return float(market.get("ticker", "").split("-")[-1].lstrip("TB"))
+    except ValueError:
+        return np.nan
+
+
+def market_arrays(markets):
+    """
+    Build strike, yes bid and yes ask arrays (prices in cents) for one event.
+    """
+    n = len(markets)
+    strikes = np.fromiter((market_strike(m) for m in markets), dtype=float, count=n)
+    bids = np.fromiter((m.get("yes_bid") or 0 for m in markets), dtype=float, count=n)
+    asks = np.fromiter((m.get("yes_ask") or 0 for m in markets), dtype=float, count=n)
+    return strikes, bids, asks
+
+
+def pad_events(events):
+    """
+    Stack the markets of many events into (n_events, max_markets) arrays.
+    Padding has strike 0 and zero prices, so it carries no probability.
+    """
+    width = max((len(e.get("markets", [])) for e in events), default=0)
+    strikes = np.zeros((len(events), width))
+    bids = np.zeros((len(events), width))
+    asks = np.zeros((len(events), width))
+    for row, event in enumerate(events):
+        markets = event.get("markets", [])
+        strikes[row, :len(markets)], bids[row, :len(markets)], asks[row, :len(markets)] = market_arrays(markets)
+    return strikes, bids, asks
+
+
+def mid_prices(bids, asks):
+    """
+    Mid-price per market. The mid needs both sides quoted; a missing ask
+    leaves just the bid, and a market with no bid (ask only, or unquoted)
+    gets no weight.
+    """
+    return np.where(bids > 0, np.where(asks > 0, (bids + asks) / 2, bids), 0.0)
+
+
+def distribution(strikes, bids, asks, quantiles=BAND_QUANTILES):
+    """
+    Normalise mid-prices into a probability distribution across strikes and
+    summarise it. Works on 1-D arrays (one event) or 2-D arrays (one row per
+    event) in a single vectorised pass.
+
+    Returns:
+        dict of arrays: probabilities, expected, median, mode, lower, upper
+    """
+    strikes = np.atleast_2d(np.nan_to_num(strikes, nan=0.0))
+    mids = np.atleast_2d(mid_prices(np.asarray(bids, float), np.asarray(asks, float)))
+    mids = np.where(strikes > 0, mids, 0.0)
+
+    total = mids.sum(axis=-1, keepdims=True)
+    valid = total[:, 0] > 0
+    probabilities = mids / np.where(total > 0, total, 1.0)
+
+    expected = (probabilities * strikes).sum(axis=-1)
+
+    order = np.argsort(strikes, axis=-1)
+    sorted_strikes = np.take_along_axis(strikes, order, axis=-1)
+    cdf = np.cumsum(np.take_along_axis(probabilities, order, axis=-1), axis=-1)
+
+    def quantile(q):
+        index = np.minimum((cdf < q).sum(axis=-1), strikes.shape[-1] - 1)
+        return np.take_along_axis(sorted_strikes, index[:, None], axis=-1)[:, 0]
+
+    mode = np.take_along_axis(strikes, probabilities.argmax(axis=-1)[:, None], axis=-1)[:, 0]
+
+    def masked(values):
+        return np.where(valid, values, np.nan)
+
+    return {
+        "probabilities": probabilities,
+        "expected": masked(expected),
+        "median": masked(quantile(0.5)),
+        "mode": masked(mode),
+        "lower": masked(quantile(quantiles[0])),
+        "upper": masked(quantile(quantiles[1])),
+    }
+
+
+def summarize_markets(markets, quantiles=BAND_QUANTILES):
+    """
+    Distribution summary for one event's markets.
+
+    Returns:
+        dict: {
+            'expected_price': float,
+            'median_price': float,
+            'mode_price': float,
+            'confidence_band': [lower, upper],
+            'band_quantiles': [q_low, q_high]
+        }
+        or None if no market is quoted
+    """
+    if not markets:
+        return None
+    result = distribution(*market_arrays(markets), quantiles=quantiles)
+    if np.isnan(result["expected"][0]):
+        return None
+    return {
+        "expected_price": round(float(result["expected"][0]), 5),
+        "median_price": round(float(result["median"][0]), 5),
+        "mode_price": round(float(result["mode"][0]), 5),
+        "confidence_band": [round(float(result["lower"][0]), 5), round(float(result["upper"][0]), 5)],
+        "band_quantiles": list(quantiles),
+    }
+
+
+def summarize_events(events, quantiles=BAND_QUANTILES):
+    """Vectorised summary for many events at once (one array entry per event)."""
+    result = distribution(*pad_events(events), quantiles=quantiles)
+    result.pop("probabilities")
+    return result
@@ -0,0 +1,118 @@
+import time
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+# Kalshi
+KALSHI_FETCH_SECONDS = Histogram(
+    "kalshi_fetch_seconds", "Latency of upstream Kalshi /events requests", ["series"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10),
+)
+
+# Chain
+RPC_CALL_SECONDS = Histogram(
+    "rpc_call_seconds", "Latency of RPC calls on the transaction path", ["call"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60, 120),
+)
+GAS_USED = Histogram(
+    "tx_gas_used", "Gas used per mined transaction", ["function"],
+    buckets=(25_000, 50_000, 75_000, 100_000, 150_000, 200_000, 300_000, 500_000, 1_000_000),
+)
+RPC_ENDPOINT_REQUESTS = Counter(
+    "rpc_endpoint_requests_total", "RPC requests per pooled endpoint by outcome", ["endpoint", "outcome"],
+)
+RPC_HEDGED_REQUESTS = Counter("rpc_hedged_requests_total", "Reads re-sent to a second endpoint after the hedge delay")
+TRACKED_TRANSACTIONS = Gauge("tracked_transactions", "Transactions waiting for confirmation")
+CHAIN_REORGS = Counter("chain_reorgs_total", "Tracked transactions whose receipt was dropped or moved by a reorg")
+ORACLE_STALENESS_SECONDS = Gauge(
+    "oracle_staleness_seconds", "Now minus the submitterTimestamp of the latest on-chain DataPoint",
+)
+
+# Scheduler
+UPDATE_CYCLE_SECONDS = Histogram(
+    "oracle_update_cycle_seconds", "End-to-end duration of one scheduled oracle update",
+    buckets=(0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60, 120, 300),
+)
+FAILURES = Counter("oracle_failures_total", "Failures by pipeline stage", ["stage"])
+SCHEDULER_LEADER = Gauge("scheduler_leader", "1 if this process holds the scheduler lease")
+REBALANCES_SKIPPED = Counter(
+    "rebalances_skipped_total", "Due rebalances not sent because the treasury was within its tolerance band",
+)
+
+# HTTP
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_seconds", "HTTP request latency by route", ["method", "route", "status"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+HTTP_STREAM_SECONDS = Histogram(
+    "http_stream_connection_seconds", "Lifetime of streaming (server-sent events) responses by route", ["route"],
+    buckets=(1, 10, 60, 300, 900, 1800, 3600, 4 * 3600, 12 * 3600, 24 * 3600),
+)
+HTTP_STREAMS_OPEN = Gauge("http_streams_open", "Streaming (server-sent events) responses currently open", ["route"])
+SUBMISSIONS_IN_FLIGHT = Gauge("oracle_submissions_in_flight", "/oracle/submit requests holding an admission slot")
+SUBMISSIONS_REJECTED = Counter(
+    "oracle_submissions_rejected_total", "/oracle/submit requests refused with 429 by admission control", ["reason"],
+)
+IDEMPOTENT_REPLAYS = Counter(
+    "idempotent_replays_total", "Requests answered from the Idempotency-Key store instead of running again",
+)
+
+
+async def observe_rpc(call, awaitable):
+    """Await an RPC call and record its latency under the given call name."""
+    start = time.perf_counter()
+    try:
+        return await awaitable
+    finally:
+        RPC_CALL_SECONDS.labels(call).observe(time.perf_counter() - start)
+
+
+def render_metrics():
+    """Prometheus text exposition of every metric in the default registry."""
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+class HTTPMetricsMiddleware:
+    """
+    Plain ASGI middleware recording request latency per route template
+    (e.g. /oracle/data/{index}), which keeps label cardinality bounded.
+
+    Server-sent event responses stay open for as long as the client is
+    connected, so they are kept out of http_request_seconds and recorded as
+    connection lifetimes in http_stream_connection_seconds instead.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+        streaming = False
+
+        def route_path():
+            route = scope.get("route")
+            return route.path if route is not None else "unmatched"
+
+        async def send_wrapper(message):
+            nonlocal status, streaming
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                content_type = dict(message.get("headers", [])).get(b"content-type", b"")
+                if content_type.startswith(b"text/event-stream"):
+                    streaming = True
+                    HTTP_STREAMS_OPEN.labels(route_path()).inc()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            if streaming:
+                HTTP_STREAMS_OPEN.labels(route_path()).dec()
+                HTTP_STREAM_SECONDS.labels(route_path()).observe(elapsed)
+            else:
+                HTTP_REQUEST_SECONDS.labels(scope["method"], route_path(), str(status)).observe(elapsed)
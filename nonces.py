@@ -0,0 +1,136 @@
+import asyncio
+import logging
+import sqlite3
+import time
+from functools import cached_property
+
+logger = logging.getLogger(__name__)
+
+
+class LocalNonces:
+    """Next nonce per sender kept in memory: enough when one process sends for the key."""
+
+    def __init__(self):
+        self._next = {}
+
+    async def allocate(self, address, chain_nonce):
+        """
+        Reserve the next nonce for an address.
+
+        Args:
+            address: sender address
+            chain_nonce: async fn() -> pending transaction count, called when
+                there is no counter yet (first use or after reset())
+
+        Returns:
+            int
+        """
+        if address not in self._next:
+            self._next[address] = await chain_nonce()
+        nonce = self._next[address]
+        self._next[address] = nonce + 1
+        return nonce
+
+    async def reset(self, address, nonce, chain_nonce):
+        """
+        Release a nonce whose transaction failed to send.
+
+        Sends are sequential in one process, so every other reserved nonce was
+        broadcast: forget the counter and resync from the chain next time.
+        """
+        self._next.pop(address, None)
+
+
+class SQLiteNonces:
+    """
+    Next nonce per sender in a SQLite file shared by every process on one
+    host (HTTP workers and scheduler.py), so processes signing with the same
+    key never hand out the same nonce.
+
+    Each allocation is one atomic increment. The counter is seeded from the
+    chain's pending count on first use and when no process has allocated
+    for `idle_resync` seconds (by then every reserved nonce was broadcast,
+    so the chain is authoritative again, e.g. after a local node restart).
+    Concurrent seeds never move a live counter backwards, and reset() only
+    rewinds it when no other allocation happened since the failed one.
+    """
+
+    def __init__(self, db_path, idle_resync=60):
+        self.idle_resync = idle_resync
+        self.db_path = db_path
+        self._lock = asyncio.Lock()
+
+    @cached_property
+    def db(self):
+        """The shared SQLite file, opened (and created) on first use."""
+        db = sqlite3.connect(self.db_path, timeout=5, isolation_level=None, check_same_thread=False)
+        db.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS nonces (
+                address TEXT PRIMARY KEY,
+                next_nonce INTEGER NOT NULL,
+                updated_at REAL NOT NULL
+            );
+        """)
+        return db
+
+    def _increment(self, address, now):
+        row = self.db.execute(
+            """
+            UPDATE nonces SET next_nonce = next_nonce + 1, updated_at = ?
+            WHERE address = ? AND updated_at >= ?
+            RETURNING next_nonce - 1
+            """,
+            (now, address.lower(), now - self.idle_resync)
+        ).fetchone()
+        return row[0] if row else None
+
+    async def allocate(self, address, chain_nonce):
+        """
+        Reserve the next nonce for an address (see LocalNonces.allocate).
+
+        Returns:
+            int
+        """
+        nonce = self._increment(address, time.time())
+        if nonce is not None:
+            return nonce
+        async with self._lock:
+            pending = await chain_nonce()
+            now = time.time()
+            self.db.execute(
+                """
+                INSERT INTO nonces (address, next_nonce, updated_at) VALUES (?, ?, ?)
+                ON CONFLICT(address) DO UPDATE SET
+                    next_nonce = CASE WHEN nonces.updated_at < ? THEN excluded.next_nonce
+                                      ELSE MAX(nonces.next_nonce, excluded.next_nonce) END,
+                    updated_at = excluded.updated_at
+                """,
+                (address.lower(), pending, now, now - self.idle_resync)
+            )
+            return self._increment(address, now)
+
+    async def reset(self, address, nonce, chain_nonce):
+        """
+        Release a nonce whose transaction failed to send.
+
+        If the counter still stands right after `nonce`, nobody else holds a
+        later one, so it is rewound to `nonce` (or to the chain's pending count
+        if that is higher, e.g. the tx did reach a node before the error).
+        Otherwise another process holds a later nonce that may not be
+        broadcast yet: the gap is left for the idle resync to close.
+        """
+        async with self._lock:
+            try:
+                pending = await chain_nonce()
+            except Exception as e:
+                logger.warning(f"Failed to get pending nonce for {address}: {str(e)}")
+                pending = nonce
+            rewound = self.db.execute(
+                "UPDATE nonces SET next_nonce = MAX(?, ?), updated_at = ? WHERE address = ? AND next_nonce = ?",
+                (nonce, pending, time.time(), address.lower(), nonce + 1)
+            ).rowcount
+        if rewound:
+            logger.info(f"Nonce {nonce} for {address} released; next nonce {max(nonce, pending)}")
+        else:
+            logger.warning(f"Nonce {nonce} for {address} left unused: later nonces already allocated")
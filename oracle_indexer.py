@@ -0,0 +1,360 @@
+import asyncio
+import logging
+import sqlite3
+import time
+from functools import cached_property
+
+from web3.exceptions import BadFunctionCallOutput, ContractLogicError
+
+from metrics import FAILURES
+
+logger = logging.getLogger(__name__)
+
+# Supported bucket sizes for time-series queries, e.g. '5m', '1h', '1d'
+BUCKET_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+# Largest integer SQLite stores (signed 64-bit); binding anything larger raises OverflowError
+SQLITE_MAX_INT = 2 ** 63 - 1
+
+
+def clamp_int(value):
+    """Clamp an index or timestamp into SQLite's integer range."""
+    return max(-SQLITE_MAX_INT - 1, min(SQLITE_MAX_INT, value))
+
+
+def parse_bucket(bucket):
+    """
+    Parse a bucket size such as '15m' or '1h' into seconds.
+
+    Raises:
+        ValueError: if the bucket size is not understood
+    """
+    bucket = bucket.strip().lower()
+    if len(bucket) < 2 or bucket[-1] not in BUCKET_UNITS or not bucket[:-1].isdigit():
+        raise ValueError(f"Invalid bucket '{bucket}', expected e.g. 5m, 1h, 1d")
+    seconds = int(bucket[:-1]) * BUCKET_UNITS[bucket[-1]]
+    if seconds <= 0:
+        raise ValueError("Bucket size must be positive")
+    if seconds > SQLITE_MAX_INT:
+        raise ValueError("Bucket size is too large")
+    return seconds
+
+
+class OracleIndexer:
+    """
+    Keeps a local SQLite copy of every KalshiLinkOracle DataPoint.
+
+    A background task follows nextIndexDataPoint and fetches any new
+    points with getDataPoints range reads (or JSON-RPC batches of
+    getDataPoint on deployments without them); history queries are then
+    served from the local store without touching the chain. An empty store
+    can be backfilled from DataPointFulfilled logs starting at deploy_block;
+    any index a backfill missed is fetched by the next sync.
+
+    Concurrent sync() calls share one in-flight sync, so a burst of requests
+    for unindexed points costs one round of reads.
+    """
+
+    def __init__(self, w3, contract, db_path="oracle_data.db", poll_interval=30, batch_size=100,
+                 range_size=500, deploy_block=None, log_block_range=10000):
+        self.w3 = w3
+        self.contract = contract
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.range_size = range_size
+        self.deploy_block = deploy_block
+        self.log_block_range = log_block_range
+        self.range_reads = None  # whether the contract has getDataPoints (None until probed)
+        self.db_path = db_path
+        self._closed = False
+        self._contiguous = 0  # no gaps below this index (only ever grows: points are never deleted)
+        self._latest_timestamp = None
+        self._task = None
+        self._sync_task = None
+        self.chain_count = None  # nextIndexDataPoint as of the last sync
+        self.synced_at = None  # monotonic time the last sync finished
+        self.listeners = []  # callables invoked with the newest DataPoint after new points are stored
+
+    @cached_property
+    def db(self):
+        """The local store, opened (and created) on first use, so constructing an indexer touches no files."""
+        db = sqlite3.connect(self.db_path, check_same_thread=False)
+        db.row_factory = sqlite3.Row
+        db.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS data_points (
+                idx INTEGER PRIMARY KEY,
+                submitter TEXT NOT NULL,
+                submitter_timestamp INTEGER NOT NULL,
+                block_number INTEGER NOT NULL,
+                value INTEGER NOT NULL,
+                resolution_timestamp INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_submitter_timestamp ON data_points (submitter_timestamp);
+            CREATE INDEX IF NOT EXISTS idx_resolution_timestamp ON data_points (resolution_timestamp);
+        """)
+        db.commit()
+        return db
+
+    @property
+    def count(self):
+        """Number of DataPoints stored from index 0 without a gap (the local high-water mark)."""
+        if self.db.execute("SELECT 1 FROM data_points WHERE idx = ?", (self._contiguous,)).fetchone():
+            row = self.db.execute(
+                """
+                SELECT idx + 1 FROM data_points d
+                WHERE idx >= ? AND NOT EXISTS (SELECT 1 FROM data_points e WHERE e.idx = d.idx + 1)
+                ORDER BY idx LIMIT 1
+                """,
+                (self._contiguous,)
+            ).fetchone()
+            self._contiguous = row[0]
+        return self._contiguous
+
+    def _gaps(self, start, end):
+        """[from, to) index ranges in [start, end) that are not stored locally."""
+        gaps = []
+        expected = start
+        for (idx,) in self.db.execute(
+            "SELECT idx FROM data_points WHERE idx >= ? AND idx < ? ORDER BY idx", (start, end)
+        ):
+            if idx > expected:
+                gaps.append((expected, idx))
+            expected = idx + 1
+        if expected < end:
+            gaps.append((expected, end))
+        return gaps
+
+    def _refresh_latest(self):
+        row = self.db.execute("SELECT submitter_timestamp FROM data_points ORDER BY idx DESC LIMIT 1").fetchone()
+        self._latest_timestamp = row[0] if row else None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        tasks = [task for task in (self._task, self._sync_task) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._sync_task = None
+        self._closed = True
+        if "db" in self.__dict__:
+            self.db.close()
+
+    async def _run(self):
+        if self.deploy_block is not None and self.count == 0:
+            try:
+                await self.backfill(self.deploy_block)
+            except Exception as e:
+                logger.error(f"Oracle indexer log backfill failed: {str(e)}")
+                FAILURES.labels("indexer_backfill").inc()
+        while True:
+            try:
+                await self.sync()
+            except Exception as e:
+                logger.error(f"Oracle indexer sync failed: {str(e)}")
+                FAILURES.labels("indexer_sync").inc()
+            await asyncio.sleep(self.poll_interval)
+
+    async def sync(self):
+        """
+        Fetch every DataPoint between the local and on-chain high-water marks,
+        or wait for the sync already in progress.
+
+        Returns:
+            int: number of new DataPoints stored
+        """
+        if self._sync_task is None or self._sync_task.done():
+            self._sync_task = asyncio.ensure_future(self._sync())
+        # Shielded: a caller giving up doesn't cancel the sync for the others
+        return await asyncio.shield(self._sync_task)
+
+    async def ensure_indexed(self, end, max_age=2.0):
+        """
+        Sync if DataPoints below index `end` may exist on chain but not
+        locally. Skipped when a sync within the last `max_age` seconds left
+        the index complete, so clients polling past the newest point don't
+        each cost a chain read.
+
+        Returns:
+            int: number of new DataPoints stored
+        """
+        if self.count >= end:
+            return 0
+        if (self.synced_at is not None and time.monotonic() - self.synced_at < max_age
+                and self.count >= self.chain_count):
+            return 0
+        return await self.sync()
+
+    async def _sync(self):
+        next_index = await self.contract.functions.nextIndexDataPoint().call()
+        added = 0
+
+        # Normally one range from the high-water mark; more after a backfill that missed some logs
+        for start, end in self._gaps(self.count, next_index):
+            while start < end:
+                data_points = await self._fetch_range(start, end)
+
+                # DataPoint struct: (submitter, submitterTimestamp, blockNumber, value, resolutionTimestamp)
+                self.db.executemany(
+                    "INSERT OR REPLACE INTO data_points VALUES (?, ?, ?, ?, ?, ?)",
+                    [(start + i, *dp) for i, dp in enumerate(data_points)]
+                )
+                self.db.commit()
+
+                added += len(data_points)
+                start += len(data_points)
+
+        if added:
+            self._refresh_latest()
+        self.chain_count = next_index
+        self.synced_at = time.monotonic()
+
+        if added:
+            logger.info(f"Oracle indexer stored {added} new data points (total {next_index})")
+            latest = self.get_data_point(next_index - 1)
+            for listener in self.listeners:
+                listener(latest)
+        return added
+
+    async def _fetch_range(self, start, next_index):
+        """Fetch the next chunk of DataPoints from start (never past next_index)."""
+        if self.range_reads is not False:
+            count = min(self.range_size, next_index - start)
+            try:
+                data_points = await self.contract.functions.getDataPoints(start, count).call()
+                self.range_reads = True
+                if data_points:
+                    return data_points
+            except (BadFunctionCallOutput, ContractLogicError):
+                if self.range_reads:
+                    raise
+                logger.info("getDataPoints not available on this deployment, using batched getDataPoint")
+                self.range_reads = False
+
+        end = min(start + self.batch_size, next_index)
+        async with self.w3.batch_requests() as batch:
+            for index in range(start, end):
+                batch.add(self.contract.functions.getDataPoint(index))
+            return await batch.async_execute()
+
+    async def backfill(self, from_block, to_block=None):
+        """
+        Rebuild DataPoints from DataPointFulfilled logs, log_block_range blocks per eth_getLogs call.
+
+        Returns:
+            int: number of DataPoints stored
+        """
+        if to_block is None:
+            to_block = await self.w3.eth.block_number
+        event = self.contract.events.DataPointFulfilled
+        stored = 0
+        for start in range(from_block, to_block + 1, self.log_block_range):
+            logs = await event.get_logs(from_block=start, to_block=min(start + self.log_block_range - 1, to_block))
+            self.db.executemany(
+                "INSERT OR IGNORE INTO data_points VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (log["args"]["index"], log["args"]["submitter"], log["args"]["submitterTimestamp"],
+                     log["blockNumber"], log["args"]["value"], log["args"]["resolutionTimestamp"])
+                    for log in logs
+                ]
+            )
+            self.db.commit()
+            stored += len(logs)
+        self._refresh_latest()
+        logger.info(f"Oracle indexer backfilled {stored} data points from logs (blocks {from_block}-{to_block})")
+        return stored
+
+    def latest_timestamp(self):
+        """submitterTimestamp of the newest stored DataPoint, or None (kept in memory, so usable after stop())."""
+        if self._latest_timestamp is None and not self._closed:
+            self._refresh_latest()
+        return self._latest_timestamp
+
+    def get_data_point(self, index):
+        """Return one stored DataPoint as a dict, or None if not indexed yet."""
+        if not 0 <= index <= SQLITE_MAX_INT:
+            return None
+        row = self.db.execute("SELECT * FROM data_points WHERE idx = ?", (index,)).fetchone()
+        return self._row_to_dict(row) if row else None
+
+    def get_slice(self, start, count):
+        """Return up to count stored DataPoints from index start, oldest first."""
+        rows = self.db.execute(
+            "SELECT * FROM data_points WHERE idx >= ? AND idx < ? ORDER BY idx",
+            (clamp_int(start), clamp_int(start + count))
+        ).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    def get_range(self, from_ts=None, to_ts=None, limit=100, by="submitter"):
+        """
+        Return DataPoints whose timestamp falls in [from_ts, to_ts], newest first.
+
+        Args:
+            by: 'submitter' to filter on submitterTimestamp, 'resolution'
+                to filter on resolutionTimestamp
+        """
+        column = "resolution_timestamp" if by == "resolution" else "submitter_timestamp"
+        rows = self.db.execute(
+            f"SELECT * FROM data_points WHERE {column} BETWEEN ? AND ? "
+            f"ORDER BY {column} DESC, idx DESC LIMIT ?",
+            (clamp_int(from_ts) if from_ts is not None else 0,
+             clamp_int(to_ts) if to_ts is not None else SQLITE_MAX_INT,
+             limit)
+        ).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    def get_series(self, bucket_seconds, from_ts=None, to_ts=None):
+        """
+        Aggregate values into time buckets of submitterTimestamp.
+
+        Returns:
+            list of dicts with bucket start, count and open/high/low/close/avg values
+        """
+        rows = self.db.execute(
+            """
+            SELECT
+                (submitter_timestamp / :bucket) * :bucket AS bucket_start,
+                COUNT(*) AS count,
+                MIN(value) AS low,
+                MAX(value) AS high,
+                AVG(value) AS average,
+                -- Range conditions (not division) so these lookups use the timestamp index
+                -- Also bounded by [from, to]: open/close of a bucket cut by the range come from inside it
+                (SELECT value FROM data_points d2
+                 WHERE d2.submitter_timestamp >= (d.submitter_timestamp / :bucket) * :bucket
+                   AND d2.submitter_timestamp < (d.submitter_timestamp / :bucket + 1) * :bucket
+                   AND d2.submitter_timestamp BETWEEN :from_ts AND :to_ts
+                 ORDER BY d2.submitter_timestamp, d2.idx LIMIT 1) AS open,
+                (SELECT value FROM data_points d2
+                 WHERE d2.submitter_timestamp >= (d.submitter_timestamp / :bucket) * :bucket
+                   AND d2.submitter_timestamp < (d.submitter_timestamp / :bucket + 1) * :bucket
+                   AND d2.submitter_timestamp BETWEEN :from_ts AND :to_ts
+                 ORDER BY d2.submitter_timestamp DESC, d2.idx DESC LIMIT 1) AS close
+            FROM data_points d
+            WHERE submitter_timestamp BETWEEN :from_ts AND :to_ts
+            GROUP BY submitter_timestamp / :bucket
+            ORDER BY bucket_start
+            """,
+            {
+                "bucket": bucket_seconds,
+                "from_ts": clamp_int(from_ts) if from_ts is not None else 0,
+                "to_ts": clamp_int(to_ts) if to_ts is not None else SQLITE_MAX_INT,
+            }
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    @staticmethod
+    def _row_to_dict(row):
+        return {
+            "index": row["idx"],
+            "submitter": row["submitter"],
+            "submission_timestamp": row["submitter_timestamp"],
+            "block_number": row["block_number"],
+            "value": row["value"],
+            "value_percentage": row["value"] / 1000,
+            "resolution_timestamp": row["resolution_timestamp"]
+        }
@@ -0,0 +1,198 @@
+import csv
+import os
+
+
+def compute_targets(price_float):
+    """
+    Map a EUR/USD rate to the treasury target and the oracle value.
+
+    Formula: USD% = 100 / EUR/USD rate
+    Example: EUR/USD = 1.163 → USD% = 100 / 1.163 = 86%
+    Higher EUR/USD (strong EUR) → Lower USD%
+    Lower EUR/USD (weak EUR) → Higher USD%
+
+    Returns:
+        tuple: (target_usd_perc: int 1-99, oracle_value: int 1-99999)
+    """
+    target_usd_perc = 100 / price_float
+
+    # Ensure target is in valid range (1-99%)
+    target_usd_perc = int(max(1, min(99, target_usd_perc)))
+
+    # Convert target USD percentage to oracle format (percentage * 1000)
+    # For 37% USD, this would be 37000
+    oracle_value = int(target_usd_perc * 1000)
+
+    # Ensure value is in valid range
+    oracle_value = max(1, min(99999, oracle_value))
+
+    return target_usd_perc, oracle_value
+
+
+def rebalance_amounts(target_usd_perc, usd_balance, eur_balance, tolerance_bps=0):
+    """
+    Mirror of TreasuryManager.reBalance: the EURC mint and USDC burn (in wei)
+    it would perform for a target, or (0, 0) inside the tolerance band.
+
+    Returns:
+        tuple: (eur_to_mint, usd_to_burn)
+    """
+    total = usd_balance + eur_balance
+    target_usd = target_usd_perc * total // 100
+    target_eur = (100 - target_usd_perc) * total // 100
+    if abs(usd_balance - target_usd) * 10_000 <= tolerance_bps * total:
+        return 0, 0
+    return max(target_eur - eur_balance, 0), max(usd_balance - target_usd, 0)
+
+
+def rebalance_within_band(target_usd_perc, current_usd_perc, usd_balance, eur_balance, tolerance_bps=0):
+    """
+    Whether a reBalance transaction can be skipped: the on-chain proportion is
+    within tolerance_bps of the target and the contract would not mint or burn.
+    """
+    if abs(target_usd_perc - current_usd_perc) * 100 > tolerance_bps:
+        return False
+    return rebalance_amounts(target_usd_perc, usd_balance, eur_balance, tolerance_bps) == (0, 0)
+
+
+class UpdatePolicy:
+    """
+    Price-feed style trigger: update when the new value deviates from the
+    last published value by at least `deviation` (relative, 0.005 = 0.5%)
+    or when `heartbeat` seconds have passed since the last update.
+    """
+
+    def __init__(self, name, deviation, heartbeat):
+        self.name = name
+        self.deviation = deviation
+        self.heartbeat = heartbeat
+        self.last_value = None
+        self.last_update = None
+
+    @classmethod
+    def from_env(cls, name, prefix, deviation, heartbeat):
+        """Build a policy from {prefix}_DEVIATION / {prefix}_HEARTBEAT env vars."""
+        return cls(
+            name,
+            float(os.getenv(f"{prefix}_DEVIATION", deviation)),
+            float(os.getenv(f"{prefix}_HEARTBEAT", heartbeat)),
+        )
+
+    def check(self, value, now):
+        """
+        Decide whether an update is due.
+
+        Returns:
+            str or None: reason ('initial', 'deviation', 'heartbeat'), or None to skip
+        """
+        if self.last_value is None or self.last_update is None:
+            return "initial"
+        if self.last_value == 0:
+            if value != 0:
+                return "deviation"
+        elif abs(value - self.last_value) / abs(self.last_value) >= self.deviation:
+            return "deviation"
+        if now - self.last_update >= self.heartbeat:
+            return "heartbeat"
+        return None
+
+    def record(self, value, now):
+        """Remember the value that was just published."""
+        self.last_value = value
+        self.last_update = now
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "deviation": self.deviation,
+            "heartbeat": self.heartbeat,
+            "last_value": self.last_value,
+            "last_update": self.last_update,
+        }
+
+
+def load_price_series(path):
+    """
+    Load a recorded market series from CSV with 'timestamp' (unix seconds)
+    and 'price' (EUR/USD) columns.
+
+    Returns:
+        list of (timestamp, price) tuples sorted by timestamp
+    """
+    with open(path, newline="") as f:
+        rows = [(int(float(r["timestamp"])), float(r["price"])) for r in csv.DictReader(f)]
+    return sorted(rows)
+
+
+def simulate(series, policy, value_index=1, check_interval=None):
+    """
+    Replay a (timestamp, price) series through a policy.
+
+    Args:
+        series: list of (timestamp, price)
+        policy: UpdatePolicy (its state is reset first)
+        value_index: 1 to trigger on the oracle value, 0 on the rebalance target
+        check_interval: only evaluate the policy every N seconds (None = every sample)
+
+    Returns:
+        dict with transaction count, reasons and staleness statistics
+    """
+    policy.last_value = None
+    policy.last_update = None
+    reasons = {"initial": 0, "deviation": 0, "heartbeat": 0}
+    max_age = 0
+    max_error = 0.0
+    age_total = 0
+    last_check = None
+
+    for timestamp, price in series:
+        value = compute_targets(price)[value_index]
+
+        if check_interval is None or last_check is None or timestamp - last_check >= check_interval:
+            last_check = timestamp
+            reason = policy.check(value, timestamp)
+            if reason:
+                reasons[reason] += 1
+                policy.record(value, timestamp)
+
+        age = timestamp - policy.last_update if policy.last_update is not None else 0
+        max_age = max(max_age, age)
+        age_total += age
+        if policy.last_value:
+            max_error = max(max_error, abs(value - policy.last_value) / abs(policy.last_value))
+
+    return {
+        "policy": policy.name,
+        "deviation": policy.deviation,
+        "heartbeat": policy.heartbeat,
+        "transactions": sum(reasons.values()),
+        "reasons": reasons,
+        "max_staleness_seconds": max_age,
+        "avg_staleness_seconds": age_total / len(series) if series else 0,
+        "max_deviation": max_error,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Replay a price series through oracle update policies")
+    parser.add_argument("series", help="CSV file with timestamp,price columns")
+    parser.add_argument("--deviation", type=float, action="append", help="Deviation thresholds to compare")
+    parser.add_argument("--heartbeat", type=float, default=3600)
+    parser.add_argument("--target", choices=["oracle", "rebalance"], default="oracle")
+    parser.add_argument("--check-interval", type=float, default=float(os.getenv("ORACLE_CHECK_INTERVAL", "30")),
+                        help="Seconds between policy checks, as the scheduler runs them (ORACLE_CHECK_INTERVAL)")
+    args = parser.parse_args()
+
+    series = load_price_series(args.series)
+    value_index = 1 if args.target == "oracle" else 0
+
+    # Baseline: the old fixed 5-minute timer, as a heartbeat-only policy on the same check cadence
+    results = [simulate(series, UpdatePolicy("fixed-300s", float("inf"), 300), value_index, args.check_interval)]
+    for deviation in args.deviation or [0.005, 0.01, 0.02]:
+        policy = UpdatePolicy(f"deviation-{deviation:g}", deviation, args.heartbeat)
+        results.append(simulate(series, policy, value_index, args.check_interval))
+
+    print(json.dumps(results, indent=2))
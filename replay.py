@@ -0,0 +1,1472 @@
+"""
+Record/replay stand-ins for the Kalshi REST API and the Arc JSON-RPC
+endpoint, so the update pipeline can run and be benchmarked offline.
+
+Kalshi /events snapshots:
+
+    python replay.py record-kalshi kalshi.jsonl --interval 10 --count 360
+    python replay.py serve-kalshi kalshi.jsonl --port 8766 --latency 0.08 --jitter 0.03
+    KALSHI_API_URL=http://localhost:8766/trade-api/v2 python main.py
+
+JSON-RPC traffic (proxy in front of a node, recording and/or adding latency):
+
+    python replay.py proxy-rpc --upstream https://rpc.testnet.arc.network --record rpc.jsonl --port 8546
+    python replay.py serve-rpc rpc.jsonl --port 8546 --latency 0.05 --jitter 0.02
+    RPC_URLS=http://localhost:8546 python main.py
+
+End-to-end update-cycle benchmark against a local Hardhat node:
+
+    npx hardhat node
+    npm run deploy:local                     # writes .env.local
+    python replay.py bench kalshi.jsonl --env-file .env.local --cycles 50 --rpc-latency 0.05
+
+/health latency while a submission waits on its receipt:
+
+    python replay.py load-health --env-file .env.local --requests 2000 --receipt-delay 10
+
+Overload test of /oracle/submit (admission control and Idempotency-Key retries):
+
+    python replay.py load-submit --env-file .env.local --submissions 300 --copies 3 --concurrency 300
+
+Burst of faucet requests (500 new addresses at once, minted in batched txs):
+
+    python replay.py load-mint --env-file .env.local --addresses 500
+
+RPC requests per confirmed transaction: shared ConfirmationTracker vs per-tx receipt polling
+(stub chain, no node needed):
+
+    python replay.py bench-confirmations --transactions 50 --block-time 0.5 --confirmations 1 3
+
+RPC calls to read 1,000 oracle DataPoints (range views vs getDataPoint vs logs):
+
+    python replay.py bench-history --env-file .env.local --points 1000
+
+/kalshi/market payload size and encode time per recorded snapshot (full event vs compact,
+fields= and include=markets; no chain needed):
+
+    python replay.py bench-market kalshi.jsonl --repeat 200
+
+Cold start (import time of main.py, files it creates) and calldata encode time per hot function:
+
+    python replay.py bench-startup --imports 5 --repeat 2000
+
+Instrumentation overhead (HTTPMetricsMiddleware per request, observe_rpc per call), metrics on vs off:
+
+    python replay.py bench-metrics --requests 2000 --calls 100000
+
+/stream fan-out (server memory per connection, broadcast latency; no chain needed):
+
+    python replay.py load-stream --clients 1000 --events 50
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import time
+from collections import Counter, defaultdict
+
+from aiohttp import ClientSession, ClientTimeout, TCPConnector, web
+
+logger = logging.getLogger(__name__)
+
+KALSHI_REPLAY_BASE = "/trade-api/v2"
+
+
+def delay(latency, jitter):
+    """One simulated network delay: latency +/- a uniform jitter, never negative."""
+    return max(0.0, latency + random.uniform(-jitter, jitter))
+
+
+def read_jsonl(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class JsonlWriter:
+    """Appends one JSON record per line, flushed as it goes so a crash loses nothing."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "a")
+
+    def write(self, record):
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+async def record_kalshi(path, series_tickers=("KXEURUSD",), interval=10, count=None):
+    """
+    Poll the live Kalshi /events endpoint and append every response to path
+    as {"ts", "series", "status", "body"}.
+    """
+    from kalshi_client import close_http_client, events_query, get_http_client
+
+    writer = JsonlWriter(path)
+    recorded = 0
+    try:
+        while count is None or recorded < count:
+            for series in series_tickers:
+                try:
+                    response = await get_http_client().get("/events", params=events_query(series))
+                    writer.write({
+                        "ts": time.time(),
+                        "series": series,
+                        "status": response.status_code,
+                        "body": response.json(),
+                    })
+                except Exception as e:
+                    logger.error(f"Failed to record Kalshi events for {series}: {str(e)}")
+            recorded += 1
+            logger.info(f"Recorded Kalshi snapshot {recorded} to {path}")
+            await asyncio.sleep(interval)
+    finally:
+        writer.close()
+        await close_http_client()
+
+
+class KalshiReplay:
+    """
+    Serves recorded /events responses: each request for a series gets that
+    series' next snapshot, looping at the end of the recording. Responses
+    carry an ETag and honour If-None-Match like the real API.
+    """
+
+    def __init__(self, path, latency=0.0, jitter=0.0, loop=True):
+        self.latency = latency
+        self.jitter = jitter
+        self.loop = loop
+        self.snapshots = defaultdict(list)  # series -> [(status, body bytes, etag)]
+        for record in read_jsonl(path):
+            body = json.dumps(record["body"]).encode()
+            etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+            self.snapshots[record["series"]].append((record.get("status", 200), body, etag))
+        self._positions = Counter()
+        self.requests = 0
+
+    def next_snapshot(self, series):
+        snapshots = self.snapshots.get(series)
+        if not snapshots:
+            return None
+        position = self._positions[series]
+        self._positions[series] += 1
+        if self.loop:
+            return snapshots[position % len(snapshots)]
+        return snapshots[min(position, len(snapshots) - 1)]
+
+    async def handle_events(self, request):
+        self.requests += 1
+        await asyncio.sleep(delay(self.latency, self.jitter))
+        snapshot = self.next_snapshot(request.query.get("series_ticker"))
+        if snapshot is None:
+            return web.json_response({"error": "series not recorded"}, status=404)
+        status, body, etag = snapshot
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.Response(status=status, body=body, content_type="application/json", headers={"ETag": etag})
+
+    def app(self):
+        app = web.Application()
+        app.router.add_get(f"{KALSHI_REPLAY_BASE}/events", self.handle_events)
+        return app
+
+
+class RPCProxy:
+    """
+    Forwards JSON-RPC requests (single or batch) to an upstream node, adding
+    simulated latency and optionally recording every exchange as
+    {"ts", "request", "response", "latency"}.
+
+    receipt_delay holds each raw transaction that long before passing it on
+    (answering with its hash right away), so an auto-mining node behaves like
+    a chain with that block time.
+    """
+
+    def __init__(self, upstream, record_path=None, latency=0.0, jitter=0.0, receipt_delay=0.0):
+        self.upstream = upstream
+        self.latency = latency
+        self.jitter = jitter
+        self.receipt_delay = receipt_delay
+        self._held = None  # forwarding of the last held transaction (keeps nonce order)
+        self.writer = JsonlWriter(record_path) if record_path else None
+        self.methods = Counter()
+        self.requests = 0
+        self.raw_transactions = []  # params of every eth_sendRawTransaction, in order
+        self._session = None
+
+    async def handle(self, request):
+        body = await request.json()
+        self.requests += 1
+        for call in body if isinstance(body, list) else [body]:
+            self.methods[call.get("method")] += 1
+            if call.get("method") == "eth_sendRawTransaction":
+                self.raw_transactions.append(call["params"][0])
+
+        await asyncio.sleep(delay(self.latency, self.jitter))
+        if self._session is None:
+            self._session = ClientSession(timeout=ClientTimeout(total=60))
+        if self.receipt_delay and isinstance(body, dict) and body.get("method") == "eth_sendRawTransaction":
+            return web.json_response(self._hold(body))
+        start = time.perf_counter()
+        async with self._session.post(self.upstream, json=body) as upstream_response:
+            result = await upstream_response.json(content_type=None)
+        if self.writer:
+            self.writer.write({
+                "ts": time.time(),
+                "request": body,
+                "response": result,
+                "latency": round(time.perf_counter() - start, 4),
+            })
+        return web.json_response(result)
+
+    def _hold(self, call):
+        from eth_utils import keccak
+
+        raw = call["params"][0]
+        previous = self._held
+
+        async def forward():
+            if previous is not None:
+                await previous
+            await asyncio.sleep(self.receipt_delay)
+            async with self._session.post(self.upstream, json=call) as upstream_response:
+                result = await upstream_response.json(content_type=None)
+            if result.get("error"):
+                logger.error(f"Held transaction rejected upstream: {result['error']}")
+
+        self._held = asyncio.create_task(forward())
+        return {"jsonrpc": "2.0", "id": call.get("id"), "result": "0x" + keccak(hexstr=raw).hex()}
+
+    def app(self):
+        app = web.Application()
+        app.router.add_post("/", self.handle)
+        app.on_cleanup.append(self._close)
+        return app
+
+    async def _close(self, app):
+        if self._held is not None:
+            self._held.cancel()
+        if self._session is not None:
+            await self._session.close()
+        if self.writer:
+            self.writer.close()
+
+
+class RPCReplay:
+    """
+    Answers JSON-RPC from a recording made by RPCProxy.
+
+    A call is answered with the next recorded result for the same method and
+    params; failing that (e.g. a freshly signed transaction), with the next
+    recorded result for the same method. Each sequence sticks at its last
+    entry once exhausted. Unknown methods get a -32601 error.
+    """
+
+    def __init__(self, path, latency=0.0, jitter=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.by_call = defaultdict(list)
+        self.by_method = defaultdict(list)
+        for record in read_jsonl(path):
+            requests, responses = record["request"], record["response"]
+            if not isinstance(requests, list):
+                requests, responses = [requests], [responses]
+            responses_by_id = {r.get("id"): r for r in responses}
+            for call in requests:
+                response = responses_by_id.get(call.get("id"))
+                if response is None:
+                    continue
+                answer = {k: v for k, v in response.items() if k in ("result", "error")}
+                self.by_call[self.call_key(call)].append(answer)
+                self.by_method[call["method"]].append(answer)
+        self._positions = Counter()
+        self.requests = 0
+        self.unmatched = Counter()
+
+    @staticmethod
+    def call_key(call):
+        return call["method"] + json.dumps(call.get("params", []), sort_keys=True)
+
+    def _next(self, key, answers):
+        position = self._positions[key]
+        self._positions[key] += 1
+        return answers[min(position, len(answers) - 1)]
+
+    def answer(self, call):
+        key = self.call_key(call)
+        if key in self.by_call:
+            answer = self._next(key, self.by_call[key])
+        elif call["method"] in self.by_method:
+            answer = self._next(call["method"], self.by_method[call["method"]])
+        else:
+            self.unmatched[call["method"]] += 1
+            answer = {"error": {"code": -32601, "message": f"{call['method']} not recorded"}}
+        return {"jsonrpc": "2.0", "id": call.get("id"), **answer}
+
+    async def handle(self, request):
+        body = await request.json()
+        self.requests += 1
+        await asyncio.sleep(delay(self.latency, self.jitter))
+        if isinstance(body, list):
+            return web.json_response([self.answer(call) for call in body])
+        return web.json_response(self.answer(body))
+
+    def app(self):
+        app = web.Application()
+        app.router.add_post("/", self.handle)
+        return app
+
+
+class StubChain:
+    """
+    Minimal chain for receipt tracking: a block every `block_time` seconds,
+    transactions included a chosen number of blocks after submit(), and
+    eth_blockNumber / eth_getTransactionReceipt over HTTP (single or batch)
+    plus eth_subscribe newHeads over a WebSocket at /ws. reorg() moves an
+    included transaction to a later block with a different hash.
+
+    Raw transactions are accepted unchecked (with flat gas and fee answers)
+    and included in the next block, enough for a TransactionManager to send
+    and confirm them.
+    """
+
+    def __init__(self, block_time=0.5):
+        self.block_time = block_time
+        self.head = 0
+        self.reorgs = 0
+        self._included = {}  # tx_hash -> block number
+        self._sockets = set()
+        self._task = None
+        self.methods = Counter()
+        self.requests = 0
+        self.sent = 0  # raw transactions accepted
+
+    def submit(self, tx_hash, blocks=1):
+        """Include tx_hash `blocks` blocks after the current head."""
+        self._included[tx_hash.lower()] = self.head + blocks
+
+    def reorg(self, tx_hash, blocks=1):
+        """Move an included transaction `blocks` blocks past the head, in a block with a new hash."""
+        self.reorgs += 1
+        self._included[tx_hash.lower()] = self.head + blocks
+
+    def block_hash(self, number):
+        return "0x" + hashlib.sha256(f"{number}:{self.reorgs}".encode()).hexdigest()
+
+    def receipt(self, tx_hash):
+        number = self._included.get(tx_hash.lower())
+        if number is None or number > self.head:
+            return None
+        return {
+            "blockHash": self.block_hash(number), "blockNumber": hex(number), "transactionHash": tx_hash,
+            "transactionIndex": "0x0", "from": "0x" + "11" * 20, "to": "0x" + "22" * 20, "status": "0x1",
+            "gasUsed": "0x5208", "cumulativeGasUsed": "0x5208", "effectiveGasPrice": "0x1", "logs": [],
+            "logsBloom": "0x" + "00" * 256, "contractAddress": None, "type": "0x2",
+        }
+
+    def answer(self, call):
+        self.methods[call["method"]] += 1
+        if call["method"] == "eth_blockNumber":
+            result = hex(self.head)
+        elif call["method"] == "eth_chainId":
+            result = "0x7a69"
+        elif call["method"] == "eth_getTransactionReceipt":
+            result = self.receipt(call["params"][0])
+        elif call["method"] == "eth_sendRawTransaction":
+            from eth_utils import keccak
+
+            result = "0x" + keccak(hexstr=call["params"][0]).hex()
+            self.submit(result)
+            self.sent += 1
+        elif call["method"] == "eth_getTransactionCount":
+            result = hex(self.sent)
+        elif call["method"] == "eth_estimateGas":
+            result = "0x5208"
+        elif call["method"] == "eth_feeHistory":
+            blocks = int(call["params"][0], 16) if isinstance(call["params"][0], str) else call["params"][0]
+            result = {"oldestBlock": hex(max(0, self.head - blocks + 1)), "baseFeePerGas": ["0x1"] * (blocks + 1),
+                      "gasUsedRatio": [0.5] * blocks, "reward": [["0x1"]] * blocks}
+        else:
+            return {"jsonrpc": "2.0", "id": call["id"], "error": {"code": -32601, "message": "method not found"}}
+        return {"jsonrpc": "2.0", "id": call["id"], "result": result}
+
+    async def handle(self, request):
+        body = await request.json()
+        self.requests += 1
+        if isinstance(body, list):
+            return web.json_response([self.answer(call) for call in body])
+        return web.json_response(self.answer(body))
+
+    async def handle_ws(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        async for message in ws:
+            call = json.loads(message.data)
+            self.methods[call["method"]] += 1
+            await ws.send_json({"jsonrpc": "2.0", "id": call["id"], "result": "0x1"})
+            self._sockets.add(ws)
+        self._sockets.discard(ws)
+        return ws
+
+    async def _mine(self):
+        while True:
+            await asyncio.sleep(self.block_time)
+            self.head += 1
+            header = {"jsonrpc": "2.0", "method": "eth_subscription",
+                      "params": {"subscription": "0x1", "result": {"number": hex(self.head)}}}
+            for ws in list(self._sockets):
+                try:
+                    await ws.send_json(header)
+                except ConnectionError:
+                    self._sockets.discard(ws)
+
+    def app(self):
+        app = web.Application()
+        app.router.add_post("/", self.handle)
+        app.router.add_get("/ws", self.handle_ws)
+        app.on_startup.append(self._start)
+        app.on_shutdown.append(self._close)
+        return app
+
+    async def _start(self, app):
+        self._task = asyncio.create_task(self._mine())
+
+    async def _close(self, app):
+        self._task.cancel()
+        for ws in list(self._sockets):
+            await ws.close()
+
+
+async def start_app(app, host, port):
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+
+async def serve(app, host, port, description):
+    runner = await start_app(app, host, port)
+    logger.info(f"{description} on http://{host}:{port}")
+    try:
+        await asyncio.Future()
+    finally:
+        await runner.cleanup()
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def bench(kalshi_path, cycles=20, env_file=None, host="127.0.0.1", kalshi_port=8766, rpc_port=8546,
+                kalshi_latency=0.0, kalshi_jitter=0.0, rpc_latency=0.0, rpc_jitter=0.0):
+    """
+    Run scheduled_oracle_update back to back against replayed Kalshi data and
+    the RPC endpoint from env_file (normally a local Hardhat node), with every
+    cycle forced to submit, and report latency and throughput.
+    """
+    if env_file:
+        from dotenv import load_dotenv
+        load_dotenv(env_file, override=True)
+
+    kalshi = KalshiReplay(kalshi_path, kalshi_latency, kalshi_jitter)
+    runners = [await start_app(kalshi.app(), host, kalshi_port)]
+    proxy = RPCProxy(os.environ.get("RPC_URLS", "http://127.0.0.1:8545").split(",")[0], None, rpc_latency, rpc_jitter)
+    runners.append(await start_app(proxy.app(), host, rpc_port))
+
+    os.environ.update({
+        "KALSHI_API_URL": f"http://{host}:{kalshi_port}{KALSHI_REPLAY_BASE}",
+        "RPC_URLS": f"http://{host}:{rpc_port}",
+        # Every cycle fetches a fresh snapshot and submits both transactions
+        "KALSHI_CACHE_TTL": "0",
+        "KALSHI_INGEST_MODE": "poll",
+        "ORACLE_HEARTBEAT": "0",
+        "REBALANCE_HEARTBEAT": "0",
+        "SCHEDULER_MODE": "off",
+        "SCHEDULER_LEASE": "none",
+        "ORACLE_DB_PATH": os.environ.get("ORACLE_DB_PATH", ":memory:"),
+        "NONCE_DB_PATH": os.environ.get("NONCE_DB_PATH", ":memory:"),
+    })
+    import main
+
+    durations = []
+    background = asyncio.all_tasks()
+    try:
+        start = time.perf_counter()
+        for _ in range(cycles):
+            cycle_start = time.perf_counter()
+            await main.scheduled_oracle_update()
+            durations.append(time.perf_counter() - cycle_start)
+        elapsed = time.perf_counter() - start
+        # Let follow-up work started by the cycles (indexer syncs) finish before the stand-ins go away
+        spawned = asyncio.all_tasks() - background - {asyncio.current_task()}
+        if spawned:
+            await asyncio.wait(spawned, timeout=10)
+    finally:
+        await main.shutdown_event()
+        for runner in runners:
+            await runner.cleanup()
+
+    result = {
+        "cycles": cycles,
+        "p50_ms": round(percentile(durations, 0.5) * 1000, 1),
+        "p95_ms": round(percentile(durations, 0.95) * 1000, 1),
+        "max_ms": round(max(durations) * 1000, 1),
+        "cycles_per_second": round(cycles / elapsed, 2),
+        "transactions": proxy.methods["eth_sendRawTransaction"],
+        "kalshi_requests": kalshi.requests,
+        "rpc_http_requests": proxy.requests,
+        "rpc_calls_per_cycle": round(sum(proxy.methods.values()) / cycles, 1),
+        "rpc_methods": dict(proxy.methods.most_common()),
+    }
+    print(json.dumps(result, indent=2))
+    return result
+
+
+async def load_health(requests=2000, concurrency=100, receipt_delay=10.0, env_file=None,
+                      host="127.0.0.1", rpc_port=8546, rpc_latency=0.0, rpc_jitter=0.0):
+    """
+    Measure /health latency in-process with nothing else running, then again
+    while a POST /oracle/submit?wait=true is waiting on its receipt (held back
+    for receipt_delay seconds by the RPC proxy), against the RPC endpoint from
+    env_file (normally a local Hardhat node).
+    """
+    import httpx
+
+    if env_file:
+        from dotenv import load_dotenv
+        load_dotenv(env_file, override=True)
+
+    proxy = RPCProxy(
+        os.environ.get("RPC_URLS", "http://127.0.0.1:8545").split(",")[0], None, rpc_latency, rpc_jitter, receipt_delay
+    )
+    runners = [await start_app(proxy.app(), host, rpc_port)]
+    os.environ.update({
+        "RPC_URLS": f"http://{host}:{rpc_port}",
+        "SCHEDULER_MODE": "off",
+        "SCHEDULER_LEASE": "none",
+        "ORACLE_DB_PATH": os.environ.get("ORACLE_DB_PATH", ":memory:"),
+        "IDEMPOTENCY_DB_PATH": os.environ.get("IDEMPOTENCY_DB_PATH", ":memory:"),
+        "NONCE_DB_PATH": os.environ.get("NONCE_DB_PATH", ":memory:"),
+        "FAUCET_DB_PATH": os.environ.get("FAUCET_DB_PATH", ":memory:"),
+    })
+    import main
+
+    async def hammer(http):
+        latencies = []
+        clients = asyncio.Semaphore(concurrency)
+
+        async def one():
+            async with clients:
+                start = time.perf_counter()
+                response = await http.get("/health")
+                latencies.append(time.perf_counter() - start)
+                response.raise_for_status()
+
+        await asyncio.gather(*(one() for _ in range(requests)))
+        return latencies
+
+    def summary(latencies):
+        return {
+            "requests": len(latencies),
+            "p50_ms": round(percentile(latencies, 0.5) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+            "max_ms": round(max(latencies) * 1000, 2),
+        }
+
+    transport = httpx.ASGITransport(app=main.app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://oracle", timeout=None) as http:
+            await hammer(http)  # warm up connections and caches
+            idle = await hammer(http)
+
+            now = int(time.time())
+            submit = asyncio.create_task(http.post(
+                "/oracle/submit", params={"wait": "true"},
+                json={"value": 50000, "timestamp": now, "resolution_timestamp": now + 86400}
+            ))
+            while proxy.methods["eth_sendRawTransaction"] == 0 and not submit.done():
+                await asyncio.sleep(0.01)
+            busy_start = time.perf_counter()
+            busy = await hammer(http)
+            busy_seconds = time.perf_counter() - busy_start
+            overlapped = not submit.done()
+            submit_response = await submit
+    finally:
+        await main.shutdown_event()
+        for runner in runners:
+            await runner.cleanup()
+
+    result = {
+        "idle": summary(idle),
+        "during_submit": summary(busy),
+        "during_submit_seconds": round(busy_seconds, 2),
+        # False means the receipt arrived before the /health burst finished: raise --receipt-delay
+        "submit_pending_throughout": overlapped,
+        "submit_status": submit_response.status_code,
+        "p99_ratio": round(percentile(busy, 0.99) / percentile(idle, 0.99), 2),
+    }
+    print(json.dumps(result, indent=2))
+    return result
+
+
+def transaction_calldata(raw):
+    """Calldata of a signed raw transaction (legacy or typed)."""
+    import rlp
+
+    raw = bytes.fromhex(raw[2:] if raw.startswith("0x") else raw)
+    if raw[0] >= 0xc0:
+        return rlp.decode(raw)[5]
+    fields = rlp.decode(raw[1:])
+    return fields[7] if raw[0] == 2 else fields[6]
+
+
+def oracle_points(raw_transactions, encoders):
+    """(value, timestamp, resolution_timestamp) of every point carried by the given oracle transactions."""
+    from eth_abi import decode
+
+    by_selector = {encoder.selector: encoder for encoder in encoders}
+    points = []
+    for raw in raw_transactions:
+        data = transaction_calldata(raw)
+        encoder = by_selector.get(data[:4])
+        if encoder is None:
+            continue
+        args = decode(encoder.input_types, data[4:])
+        points.extend(zip(*args) if encoder.fn_name == "fulfillBatch" else [tuple(args)])
+    return points
+
+
+async def load_submit(submissions=200, copies=3, concurrency=200, max_attempts=20, env_file=None,
+                      host="127.0.0.1", rpc_port=8546, rpc_latency=0.0, rpc_jitter=0.0):
+    """
+    Overload POST /oracle/submit in-process against the RPC endpoint from
+    env_file (normally a local Hardhat node).
+
+    Every logical submission is sent `copies` times at once with the same
+    Idempotency-Key (a client retrying after a timeout), by up to
+    `concurrency` clients that retry 409/429 responses after Retry-After.
+    Reports latency per status and checks that each submission was
+    broadcast exactly once.
+    """
+    import httpx
+
+    if env_file:
+        from dotenv import load_dotenv
+        load_dotenv(env_file, override=True)
+
+    proxy = RPCProxy(os.environ.get("RPC_URLS", "http://127.0.0.1:8545").split(",")[0], None, rpc_latency, rpc_jitter)
+    runners = [await start_app(proxy.app(), host, rpc_port)]
+    os.environ.update({
+        "RPC_URLS": f"http://{host}:{rpc_port}",
+        "SCHEDULER_MODE": "off",
+        "SCHEDULER_LEASE": "none",
+        "ORACLE_DB_PATH": os.environ.get("ORACLE_DB_PATH", ":memory:"),
+        "IDEMPOTENCY_DB_PATH": os.environ.get("IDEMPOTENCY_DB_PATH", ":memory:"),
+        "NONCE_DB_PATH": os.environ.get("NONCE_DB_PATH", ":memory:"),
+        "FAUCET_DB_PATH": os.environ.get("FAUCET_DB_PATH", ":memory:"),
+    })
+    import main
+
+    run = hashlib.sha1(os.urandom(8)).hexdigest()[:8]
+    base_timestamp = int(time.time())
+    latencies = defaultdict(list)
+    replayed = 0
+    hashes = defaultdict(set)  # key -> transaction hashes returned for it
+    clients = asyncio.Semaphore(concurrency)
+
+    async def client(http, i):
+        nonlocal replayed
+        body = {"value": 1 + i % 99999, "timestamp": base_timestamp, "resolution_timestamp": base_timestamp + 86400 + i}
+        headers = {"Idempotency-Key": f"load-{run}-{i}"}
+        for _ in range(max_attempts):
+            async with clients:
+                start = time.perf_counter()
+                response = await http.post("/oracle/submit", json=body, headers=headers)
+                latencies[response.status_code].append(time.perf_counter() - start)
+            if response.status_code == 200:
+                replayed += response.headers.get("Idempotent-Replayed") == "true"
+                hashes[headers["Idempotency-Key"]].add(response.json()["transaction_hash"])
+                return
+            if response.status_code not in (409, 429):
+                logger.error(f"Submission {i} failed: {response.status_code} {response.text}")
+                return
+            await asyncio.sleep(float(response.headers.get("Retry-After", "1")))
+        logger.error(f"Submission {i} gave up after {max_attempts} attempts")
+
+    transport = httpx.ASGITransport(app=main.app)
+    background = asyncio.all_tasks()
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://oracle", timeout=None) as http:
+            start = time.perf_counter()
+            await asyncio.gather(*(client(http, i) for i in range(submissions) for _ in range(copies)))
+            elapsed = time.perf_counter() - start
+        spawned = asyncio.all_tasks() - background - {asyncio.current_task()}
+        if spawned:
+            await asyncio.wait(spawned, timeout=10)
+    finally:
+        await main.shutdown_event()
+        for runner in runners:
+            await runner.cleanup()
+
+    points = Counter(oracle_points(proxy.raw_transactions, [main.fulfill_encoder, main.fulfill_batch_encoder]))
+    ours = {
+        (1 + i % 99999, base_timestamp, base_timestamp + 86400 + i): i for i in range(submissions)
+    }
+    broadcast = Counter({point: count for point, count in points.items() if point in ours})
+    result = {
+        "submissions": submissions,
+        "requests": submissions * copies,
+        "seconds": round(elapsed, 2),
+        "responses": {str(status): len(values) for status, values in sorted(latencies.items())},
+        "latency_ms": {
+            str(status): {
+                "p50": round(percentile(values, 0.5) * 1000, 1),
+                "p95": round(percentile(values, 0.95) * 1000, 1),
+                "max": round(max(values) * 1000, 1),
+            }
+            for status, values in sorted(latencies.items())
+        },
+        "idempotent_replays": replayed,
+        "keys_with_several_tx_hashes": sum(len(h) > 1 for h in hashes.values()),
+        "transactions": proxy.methods["eth_sendRawTransaction"],
+        "points_broadcast": sum(broadcast.values()),
+        "points_missing": submissions - len(broadcast),
+        "points_duplicated": sum(count > 1 for count in broadcast.values()),
+        "admission": main.submission_limiter.to_dict(),
+    }
+    print(json.dumps(result, indent=2))
+    return result
+
+
+async def load_mint(addresses=500, copies=1, flush_interval=1.0, env_file=None,
+                    host="127.0.0.1", rpc_port=8546, rpc_latency=0.0, rpc_jitter=0.0):
+    """
+    Send `addresses` x `copies` concurrent POST /mint-tokens in-process
+    against the RPC endpoint from env_file (normally a local Hardhat node
+    with BatchMinter deployed), wait for every job, and check that each
+    address was minted exactly once and holds every mock token.
+    """
+    import httpx
+    from web3 import Web3
+
+    if env_file:
+        from dotenv import load_dotenv
+        load_dotenv(env_file, override=True)
+
+    proxy = RPCProxy(os.environ.get("RPC_URLS", "http://127.0.0.1:8545").split(",")[0], None, rpc_latency, rpc_jitter)
+    runners = [await start_app(proxy.app(), host, rpc_port)]
+    os.environ.update({
+        "RPC_URLS": f"http://{host}:{rpc_port}",
+        "SCHEDULER_MODE": "off",
+        "SCHEDULER_LEASE": "none",
+        "FAUCET_FLUSH_INTERVAL": str(flush_interval),
+        "ORACLE_DB_PATH": os.environ.get("ORACLE_DB_PATH", ":memory:"),
+        "IDEMPOTENCY_DB_PATH": os.environ.get("IDEMPOTENCY_DB_PATH", ":memory:"),
+        "NONCE_DB_PATH": os.environ.get("NONCE_DB_PATH", ":memory:"),
+        "FAUCET_DB_PATH": os.environ.get("FAUCET_DB_PATH", ":memory:"),
+    })
+    import main
+
+    users = [Web3.to_checksum_address(os.urandom(20)) for _ in range(addresses)]
+    latencies = []
+    statuses = Counter()
+    job_ids = defaultdict(set)  # address -> job ids returned for it
+
+    async def client(http, address):
+        start = time.perf_counter()
+        response = await http.post("/mint-tokens", params={"address": address})
+        latencies.append(time.perf_counter() - start)
+        statuses[response.status_code] += 1
+        if response.status_code == 200:
+            job_ids[address].add(response.json()["job_id"])
+        else:
+            logger.error(f"Mint request for {address} failed: {response.status_code} {response.text}")
+
+    transport = httpx.ASGITransport(app=main.app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://oracle", timeout=None) as http:
+            start = time.perf_counter()
+            await asyncio.gather(*(client(http, address) for address in users for _ in range(copies)))
+            accepted = time.perf_counter() - start
+            jobs = [await main.faucet.get(job_id) for ids in job_ids.values() for job_id in ids]
+            timeout = main.tx_manager.receipt_timeout + 2 * flush_interval
+            jobs = await asyncio.gather(*(main.faucet.wait(job, timeout) for job in jobs), return_exceptions=True)
+            elapsed = time.perf_counter() - start
+        _, balances = await main.batch_read([
+            main.mock_balance_encoders[token](address) for address in users for token in main.mock_balance_encoders
+        ])
+    finally:
+        await main.shutdown_event()
+        for runner in runners:
+            await runner.cleanup()
+
+    tokens = len(main.mock_balance_encoders)
+    balances = [balances[i:i + tokens] for i in range(0, len(balances), tokens)]
+    job_statuses = Counter(job.status if not isinstance(job, Exception) else "timeout" for job in jobs)
+    result = {
+        "requests": addresses * copies,
+        "addresses": addresses,
+        "responses": {str(status): count for status, count in sorted(statuses.items())},
+        "accept_latency_ms": {
+            "p50": round(percentile(latencies, 0.5) * 1000, 1),
+            "p99": round(percentile(latencies, 0.99) * 1000, 1),
+            "max": round(max(latencies) * 1000, 1),
+        },
+        "accept_seconds": round(accepted, 2),
+        "all_minted_seconds": round(elapsed, 2),
+        "jobs": dict(job_statuses),
+        "addresses_with_several_jobs": sum(len(ids) > 1 for ids in job_ids.values()),
+        "addresses_unfunded": sum(not all(balance > 0 for balance in row) for row in balances),
+        "transactions": proxy.methods["eth_sendRawTransaction"],
+        "batched": main.batch_minter_contract is not None,
+    }
+    print(json.dumps(result, indent=2))
+    return result
+
+
+async def bench_confirmations(transactions=50, spread=1.0, block_time=0.5, depths=(1, 3), poll_latency=0.1,
+                              host="127.0.0.1", port=8768):
+    """
+    RPC requests per confirmed transaction and mean confirmation wait on a
+    StubChain: `transactions` hashes submitted over `spread` seconds and
+    included 1-3 blocks later, waited for by one wait_for_transaction_receipt
+    loop each (the former per-tx polling) and by a ConfirmationTracker
+    following blocks by polling and by newHeads, at every depth in `depths`.
+    """
+    from web3 import AsyncHTTPProvider, AsyncWeb3
+
+    from confirmations import ConfirmationTracker
+
+    chain = StubChain(block_time)
+    runner = await start_app(chain.app(), host, port)
+    w3 = AsyncWeb3(AsyncHTTPProvider(f"http://{host}:{port}"))
+    rng = random.Random(1)
+
+    async def run(label, wait):
+        requests, methods = chain.requests, Counter(chain.methods)
+        waits = []
+
+        async def one(i):
+            await asyncio.sleep(spread * i / transactions)
+            tx_hash = "0x" + hashlib.sha256(f"{label}:{i}".encode()).hexdigest()
+            chain.submit(tx_hash, rng.randint(1, 3))
+            start = time.perf_counter()
+            await wait(tx_hash)
+            waits.append(time.perf_counter() - start)
+
+        await asyncio.gather(*(one(i) for i in range(transactions)))
+        calls = chain.methods - methods
+        return label, {
+            "http_requests_per_tx": round((chain.requests - requests) / transactions, 2),
+            "rpc_calls_per_tx": round(sum(calls.values()) / transactions, 2),
+            "mean_wait_s": round(sum(waits) / len(waits), 2),
+        }
+
+    results = {}
+    try:
+        label, results[label] = await run(
+            "per_tx_polling", lambda h: w3.eth.wait_for_transaction_receipt(h, timeout=60, poll_latency=poll_latency)
+        )
+        for depth in depths:
+            for source, ws_url in (("poll", None), ("newHeads", f"ws://{host}:{port}/ws")):
+                tracker = ConfirmationTracker(w3, confirmations=depth, poll_interval=block_time / 2, ws_url=ws_url)
+                label, results[label] = await run(
+                    f"tracker_{source}_depth_{depth}", lambda h: tracker.wait_for_receipt(h, timeout=60)
+                )
+                await tracker.stop()
+    finally:
+        await w3.provider.disconnect()
+        await runner.cleanup()
+
+    print(json.dumps(results, indent=2))
+    return results
+
+
+async def bench_history(points=1000, env_file=None, host="127.0.0.1", rpc_port=8546, rpc_latency=0.0, rpc_jitter=0.0):
+    """
+    Write DataPoints to the oracle from env_file (normally a local Hardhat
+    node) until it holds at least `points`, then index all of them into an
+    empty store three ways (getDataPoints range reads, JSON-RPC batches of
+    getDataPoint as on older deployments, and DataPointFulfilled logs) and
+    count the RPC calls, HTTP requests and time each one takes. Also counts
+    the requests behind one /oracle/info.
+    """
+    import httpx
+
+    from oracle_indexer import OracleIndexer
+
+    if env_file:
+        from dotenv import load_dotenv
+        load_dotenv(env_file, override=True)
+
+    proxy = RPCProxy(os.environ.get("RPC_URLS", "http://127.0.0.1:8545").split(",")[0], None, rpc_latency, rpc_jitter)
+    runners = [await start_app(proxy.app(), host, rpc_port)]
+    os.environ.update({
+        "RPC_URLS": f"http://{host}:{rpc_port}",
+        "SCHEDULER_MODE": "off",
+        "SCHEDULER_LEASE": "none",
+        "ORACLE_DB_PATH": ":memory:",
+        "IDEMPOTENCY_DB_PATH": os.environ.get("IDEMPOTENCY_DB_PATH", ":memory:"),
+        "NONCE_DB_PATH": os.environ.get("NONCE_DB_PATH", ":memory:"),
+        "FAUCET_DB_PATH": os.environ.get("FAUCET_DB_PATH", ":memory:"),
+    })
+    import main
+
+    async def measure(label, run):
+        indexer = OracleIndexer(main.w3, main.contract, db_path=":memory:")
+        methods, requests = Counter(proxy.methods), proxy.requests
+        start = time.perf_counter()
+        await run(indexer)
+        elapsed = time.perf_counter() - start
+        stored = indexer.count
+        indexer.db.close()
+        calls = proxy.methods - methods
+        return label, {
+            "points": stored,
+            "rpc_calls": sum(calls.values()),
+            "http_requests": proxy.requests - requests,
+            "ms": round(elapsed * 1000, 1),
+            "rpc_methods": dict(calls.most_common()),
+        }
+
+    async def legacy(indexer):
+        indexer.range_reads = False
+        await indexer.sync()
+
+    deploy_block = int(os.environ.get("ORACLE_DEPLOY_BLOCK", "0"))
+    try:
+        existing = await main.contract.functions.nextIndexDataPoint().call()
+        now = int(time.time())
+        for start in range(existing, points, 100):
+            count = min(100, points - start)
+            values = [1 + (start + i) % 99999 for i in range(count)]
+            handle = await main.tx_manager.submit(
+                main.contract.functions.fulfillBatch(values, [now] * count, [now + 86400] * count)
+            )
+            await handle.wait(main.tx_manager.receipt_timeout)
+
+        results = dict([
+            await measure("getDataPoints", lambda indexer: indexer.sync()),
+            await measure("getDataPoint_batches", legacy),
+            await measure("logs", lambda indexer: indexer.backfill(deploy_block)),
+        ])
+
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://oracle", timeout=None) as http:
+            await http.get("/oracle/info")  # fills the immutable name/owner cache
+            methods, requests = Counter(proxy.methods), proxy.requests
+            response = await http.get("/oracle/info")
+            response.raise_for_status()
+            results["oracle_info"] = {
+                "rpc_calls": sum((proxy.methods - methods).values()),
+                "http_requests": proxy.requests - requests,
+            }
+    finally:
+        await main.shutdown_event()
+        for runner in runners:
+            await runner.cleanup()
+
+    print(json.dumps(results, indent=2))
+    return results
+
+
+def bench_market(kalshi_path, repeat=200):
+    """
+    /kalshi/market payload size (raw, and on the wire: gzipped by
+    GZipMiddleware from 1000 bytes)
+    and encode time for every recorded KXEURUSD snapshot in kalshi_path: the
+    former full response (whole event through FastAPI's jsonable_encoder)
+    against the compact orjson payload, a fields= projection and
+    include=markets.
+    """
+    import gzip
+
+    import orjson
+    from fastapi.encoders import jsonable_encoder
+
+    from kalshi_client import market_snapshot, select_event
+
+    os.environ.update({
+        "SCHEDULER_MODE": "off",
+        "SCHEDULER_LEASE": "none",
+        "ORACLE_DB_PATH": ":memory:",
+        "IDEMPOTENCY_DB_PATH": ":memory:",
+        "NONCE_DB_PATH": ":memory:",
+        "FAUCET_DB_PATH": ":memory:",
+    })
+    import main
+
+    snapshots = [
+        market_snapshot(select_event(record["body"].get("events", [])))
+        for record in read_jsonl(kalshi_path)
+        if record["status"] == 200 and record["series"] == "KXEURUSD"
+    ]
+    snapshots = [s for s in snapshots if s]
+    if not snapshots:
+        raise SystemExit(f"No KXEURUSD snapshots with markets in {kalshi_path}")
+
+    def full(market):
+        # What FastAPI's default JSONResponse did with {"success": True, "market": market}
+        return json.dumps(
+            jsonable_encoder({"success": True, "market": market}),
+            ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode()
+
+    variants = {
+        "full_event": full,
+        "compact": lambda m: orjson.dumps(main.market_payload(m)),
+        "fields_price_probability": lambda m: orjson.dumps(main.market_payload(m, {"price", "probability"})),
+        "include_markets": lambda m: orjson.dumps(main.market_payload(m, include_markets=True)),
+    }
+    results = {"snapshots": len(snapshots)}
+    for label, encode in variants.items():
+        bodies = [encode(m) for m in snapshots]
+        wire = [len(gzip.compress(b, 6)) if len(b) >= 1000 else len(b) for b in bodies]
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for market in snapshots:
+                encode(market)
+        elapsed = time.perf_counter() - start
+        results[label] = {
+            "bytes": round(sum(map(len, bodies)) / len(bodies)),
+            "wire_bytes": round(sum(wire) / len(wire)),
+            "encode_us": round(elapsed / (repeat * len(snapshots)) * 1e6, 1),
+        }
+    print(json.dumps(results, indent=2))
+    return results
+
+
+def bench_startup(imports=5, repeat=2000):
+    """
+    Cold start of main.py and per-request calldata encoding.
+
+    Imports main in `imports` fresh interpreters with the default settings
+    and reports the median wall time, the slowest modules main imports
+    directly (from python -X importtime), whether numpy was loaded and any files the import
+    created in the working directory. Then times FunctionEncoder against
+    web3's contract.encode_abi for each hot function.
+    """
+    import subprocess
+    import sys
+
+    root = os.path.dirname(os.path.abspath(__file__))
+    probe = "import sys, time; t = time.perf_counter(); import main; print(time.perf_counter() - t, 'numpy' in sys.modules)"
+    before = set(os.listdir(root))
+    walls, modules = [], {}
+    for _ in range(imports):
+        done = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", probe], cwd=root, capture_output=True, text=True, check=True
+        )
+        wall, numpy_loaded = done.stdout.split()[-2:]
+        walls.append(float(wall))
+        for line in done.stderr.splitlines():
+            # "import time: self [us] | cumulative | imported package", two spaces of indent per level
+            parts = line.split("|")
+            if len(parts) == 3 and parts[1].strip().isdigit() and len(parts[2]) - len(parts[2].lstrip()) == 3:
+                modules.setdefault(parts[2].strip(), []).append(int(parts[1]))
+    slowest = sorted(modules.items(), key=lambda item: -percentile(item[1], 0.5))[:8]
+    results = {
+        "import_main_ms": round(percentile(walls, 0.5) * 1000, 1),
+        "slowest_imports_ms": {name: round(percentile(us, 0.5) / 1000, 1) for name, us in slowest},
+        "numpy_loaded": numpy_loaded == "True",
+        "files_created": sorted(set(os.listdir(root)) - before),
+    }
+
+    os.environ.update({
+        "SCHEDULER_MODE": "off",
+        "SCHEDULER_LEASE": "none",
+        "ORACLE_DB_PATH": ":memory:",
+        "IDEMPOTENCY_DB_PATH": ":memory:",
+        "NONCE_DB_PATH": ":memory:",
+        "FAUCET_DB_PATH": ":memory:",
+    })
+    import main
+
+    address = "0x5B38Da6a701c568545dCfcB03FcB875f56beddC4"
+    now = int(time.time())
+    calls = [
+        (main.fulfill_encoder, main.contract, (116_050, now, now + 86400)),
+        (main.fulfill_batch_encoder, main.contract, ([116_050] * 50, [now] * 50, [now + 86400] * 50)),
+        (main.rebalance_encoder, main.treasury_contract, (60,)),
+    ]
+    token, contract = next(iter(main.mock_token_contracts.items()))
+    calls.append((main.mock_mint_encoders[token], contract, (address, 10**24)))
+    calls.append((main.mock_balance_encoders[token], contract, (address,)))
+    encode_us = {}
+    for encoder, contract, args in calls:
+        timings = {}
+        for label, encode in (
+            ("FunctionEncoder", lambda: encoder.encode(*args)),
+            ("web3_encode_abi", lambda: contract.encode_abi(encoder.fn_name, args=list(args))),
+        ):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                encode()
+            timings[label] = round((time.perf_counter() - start) / repeat * 1e6, 1)
+        encode_us[encoder.fn_name] = timings
+    results["encode_us"] = encode_us
+    print(json.dumps(results, indent=2))
+    return results
+
+
+async def bench_metrics(requests=2000, calls=100000, rounds=3):
+    """
+    Instrumentation overhead with metrics on and off: in-process requests to
+    main.app's /kalshi/cache/stats with and without HTTPMetricsMiddleware in
+    the middleware stack, and observe_rpc around an awaitable that completes
+    at once against awaiting it directly. Variants alternate for `rounds`
+    rounds and the fastest round of each is reported.
+    """
+    import httpx
+
+    os.environ.update({
+        "SCHEDULER_MODE": "off",
+        "SCHEDULER_LEASE": "none",
+        "ORACLE_DB_PATH": ":memory:",
+        "IDEMPOTENCY_DB_PATH": ":memory:",
+        "NONCE_DB_PATH": ":memory:",
+        "FAUCET_DB_PATH": ":memory:",
+    })
+    import main
+    from metrics import HTTPMetricsMiddleware, observe_rpc
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)  # one INFO line per request otherwise
+    middleware = list(main.app.user_middleware)
+
+    async def http_round(metrics):
+        main.app.user_middleware = [m for m in middleware if metrics or m.cls is not HTTPMetricsMiddleware]
+        main.app.middleware_stack = None  # rebuilt on the next request
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://oracle") as http:
+            for _ in range(50):
+                await http.get("/kalshi/cache/stats")
+            start = time.perf_counter()
+            for _ in range(requests):
+                await http.get("/kalshi/cache/stats")
+            return (time.perf_counter() - start) / requests
+
+    async def done():
+        return None
+
+    async def rpc_round(metrics):
+        start = time.perf_counter()
+        if metrics:
+            for _ in range(calls):
+                await observe_rpc("bench", done())
+        else:
+            for _ in range(calls):
+                await done()
+        return (time.perf_counter() - start) / calls
+
+    timings = defaultdict(list)
+    try:
+        for _ in range(rounds):
+            for metrics in (True, False):
+                timings[("http", metrics)].append(await http_round(metrics))
+                timings[("rpc", metrics)].append(await rpc_round(metrics))
+    finally:
+        main.app.user_middleware = middleware
+        main.app.middleware_stack = None
+        await main.shutdown_event()
+
+    results = {}
+    for kind, label in (("http", "http_request_us"), ("rpc", "observe_rpc_us")):
+        on, off = min(timings[(kind, True)]) * 1e6, min(timings[(kind, False)]) * 1e6
+        results[label] = {"metrics_on": round(on, 2), "metrics_off": round(off, 2), "overhead": round(on - off, 2)}
+    print(json.dumps(results, indent=2))
+    return results
+
+
+def serve_stream(host, port, queue_size=32):
+    """
+    /stream backed by a live_updates.Broadcaster exactly as in main.py, plus
+    POST /publish, in its own process so its memory can be measured alone.
+    """
+    import uvicorn
+    from fastapi import FastAPI, Request
+    from fastapi.responses import StreamingResponse
+
+    from live_updates import Broadcaster
+
+    broadcaster = Broadcaster(queue_size)
+    app = FastAPI()
+
+    @app.get("/stream")
+    async def stream(request: Request):
+        return StreamingResponse(
+            broadcaster.events(request),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
+    @app.post("/publish")
+    async def publish(seq: int, size: int = 0):
+        broadcaster.publish("market", {"seq": seq, "sent": time.time(), "pad": "x" * size})
+        return {"clients": broadcaster.client_count, "published": broadcaster.published, "dropped": broadcaster.dropped}
+
+    uvicorn.run(app, host=host, port=port, log_level="warning")
+
+
+def process_rss(pid):
+    """Resident set size of a process in bytes (Linux /proc)."""
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+async def load_stream(clients=1000, events=50, interval=0.1, payload=256, queue_size=32,
+                      host="127.0.0.1", port=8767):
+    """
+    SSE fan-out benchmark: open `clients` /stream connections to a server
+    process, record its memory per connection, then publish `events`
+    messages and measure how long each takes to reach every client.
+    """
+    import multiprocessing
+    import resource
+
+    # One descriptor per connection on both sides
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != resource.RLIM_INFINITY and soft < clients + 256:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(hard, clients * 2 + 256), hard))
+
+    server = multiprocessing.get_context("spawn").Process(target=serve_stream, args=(host, port, queue_size), daemon=True)
+    server.start()
+    base = f"http://{host}:{port}"
+    received = defaultdict(list)  # seq -> delivery latencies
+    connected = 0
+    all_connected = asyncio.Event()
+
+    async def client(session):
+        nonlocal connected
+        async with session.get(f"{base}/stream") as response:
+            connected += 1
+            if connected == clients:
+                all_connected.set()
+            async for line in response.content:
+                if line.startswith(b"data: "):
+                    data = json.loads(line[6:])
+                    received[data["seq"]].append(time.time() - data["sent"])
+                    if data["seq"] == events - 1:
+                        return
+
+    try:
+        async with ClientSession(connector=TCPConnector(limit=0), timeout=ClientTimeout(total=None)) as session:
+            for _ in range(100):
+                try:
+                    async with session.post(f"{base}/publish", params={"seq": -1}):
+                        break
+                except OSError:
+                    await asyncio.sleep(0.1)
+            await asyncio.sleep(0.5)
+            rss_idle = process_rss(server.pid)
+
+            readers = [asyncio.create_task(client(session)) for _ in range(clients)]
+            await asyncio.wait_for(all_connected.wait(), timeout=120)
+            await asyncio.sleep(1)
+            rss_connected = process_rss(server.pid)
+
+            start = time.perf_counter()
+            for seq in range(events):
+                async with session.post(f"{base}/publish", params={"seq": seq, "size": payload}) as response:
+                    stats = await response.json()
+                await asyncio.sleep(interval)
+            await asyncio.wait_for(asyncio.gather(*readers), timeout=60 + events * interval)
+            elapsed = time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.join(timeout=10)
+
+    deliveries = [latency for seq in range(events) for latency in received[seq]]
+    fan_out = [max(received[seq]) for seq in range(events) if received[seq]]
+    result = {
+        "clients": clients,
+        "events": events,
+        "payload_bytes": payload,
+        "seconds": round(elapsed, 2),
+        "server_rss_idle_mb": round(rss_idle / 2**20, 1),
+        "server_rss_connected_mb": round(rss_connected / 2**20, 1),
+        "memory_per_connection_kb": round((rss_connected - rss_idle) / clients / 1024, 1),
+        "delivery_ms": {
+            "p50": round(percentile(deliveries, 0.5) * 1000, 2),
+            "p99": round(percentile(deliveries, 0.99) * 1000, 2),
+            "max": round(max(deliveries) * 1000, 2),
+        },
+        # Time until the last client had an event, per event
+        "fan_out_ms": {
+            "p50": round(percentile(fan_out, 0.5) * 1000, 2),
+            "p99": round(percentile(fan_out, 0.99) * 1000, 2),
+        },
+        "deliveries_missing": clients * events - len(deliveries),
+        "dropped_by_server": stats["dropped"],
+    }
+    print(json.dumps(result, indent=2))
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Kalshi / JSON-RPC recorder, replay servers and benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_network(p, port):
+        p.add_argument("--host", default="127.0.0.1")
+        p.add_argument("--port", type=int, default=port)
+        p.add_argument("--latency", type=float, default=0.0, help="Mean added delay in seconds")
+        p.add_argument("--jitter", type=float, default=0.0, help="Uniform +/- jitter in seconds")
+
+    p = sub.add_parser("record-kalshi", help="Poll live Kalshi /events into a JSON lines file")
+    p.add_argument("path")
+    p.add_argument("--series", default="KXEURUSD", help="Comma-separated series tickers")
+    p.add_argument("--interval", type=float, default=10)
+    p.add_argument("--count", type=int, default=None)
+
+    p = sub.add_parser("serve-kalshi", help="Serve recorded /events snapshots")
+    p.add_argument("path")
+    add_network(p, 8766)
+
+    p = sub.add_parser("proxy-rpc", help="Forward JSON-RPC to --upstream, recording and/or adding latency")
+    p.add_argument("--upstream", required=True)
+    p.add_argument("--record", default=None, help="JSON lines file to append exchanges to")
+    add_network(p, 8546)
+
+    p = sub.add_parser("serve-rpc", help="Answer JSON-RPC from a recording")
+    p.add_argument("path")
+    add_network(p, 8546)
+
+    p = sub.add_parser("bench", help="Benchmark scheduled_oracle_update against replayed Kalshi data")
+    p.add_argument("kalshi_path")
+    p.add_argument("--cycles", type=int, default=20)
+    p.add_argument("--env-file", default=None, help="e.g. .env.local written by scripts/deploy-local.js")
+    p.add_argument("--kalshi-latency", type=float, default=0.0)
+    p.add_argument("--kalshi-jitter", type=float, default=0.0)
+    p.add_argument("--rpc-latency", type=float, default=0.0)
+    p.add_argument("--rpc-jitter", type=float, default=0.0)
+
+    p = sub.add_parser("load-health", help="/health latency with and without a submission waiting on its receipt")
+    p.add_argument("--requests", type=int, default=2000)
+    p.add_argument("--concurrency", type=int, default=100)
+    p.add_argument("--receipt-delay", type=float, default=10.0, help="Seconds the proxy hides each receipt")
+    p.add_argument("--env-file", default=None, help="e.g. .env.local written by scripts/deploy-local.js")
+    p.add_argument("--rpc-latency", type=float, default=0.0)
+    p.add_argument("--rpc-jitter", type=float, default=0.0)
+
+    p = sub.add_parser("load-submit", help="Overload /oracle/submit with Idempotency-Key retries and check for duplicate txs")
+    p.add_argument("--submissions", type=int, default=200, help="Distinct data points to submit")
+    p.add_argument("--copies", type=int, default=3, help="Concurrent requests per point sharing one Idempotency-Key")
+    p.add_argument("--concurrency", type=int, default=200, help="Clients with a request in flight at once")
+    p.add_argument("--max-attempts", type=int, default=20)
+    p.add_argument("--env-file", default=None, help="e.g. .env.local written by scripts/deploy-local.js")
+    p.add_argument("--rpc-latency", type=float, default=0.0)
+    p.add_argument("--rpc-jitter", type=float, default=0.0)
+
+    p = sub.add_parser("load-mint", help="Concurrent /mint-tokens requests: batched mints, dedup and funding checks")
+    p.add_argument("--addresses", type=int, default=500, help="Distinct addresses requesting tokens at once")
+    p.add_argument("--copies", type=int, default=1, help="Concurrent requests per address (cooldown dedup)")
+    p.add_argument("--flush-interval", type=float, default=1.0, help="FAUCET_FLUSH_INTERVAL for the run")
+    p.add_argument("--env-file", default=None, help="e.g. .env.local written by scripts/deploy-local.js")
+    p.add_argument("--rpc-latency", type=float, default=0.0)
+    p.add_argument("--rpc-jitter", type=float, default=0.0)
+
+    p = sub.add_parser("bench-confirmations", help="RPC requests per confirmed tx: shared tracker vs per-tx polling")
+    p.add_argument("--transactions", type=int, default=50)
+    p.add_argument("--spread", type=float, default=1.0, help="Seconds over which the transactions are sent")
+    p.add_argument("--block-time", type=float, default=0.5)
+    p.add_argument("--confirmations", type=int, nargs="+", default=[1, 3])
+    p.add_argument("--poll-latency", type=float, default=0.1, help="Per-tx receipt poll interval of the baseline")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8768)
+
+    p = sub.add_parser("bench-history", help="RPC calls to index N oracle DataPoints: range views, per-index reads, logs")
+    p.add_argument("--points", type=int, default=1000)
+    p.add_argument("--env-file", default=None, help="e.g. .env.local written by scripts/deploy-local.js")
+    p.add_argument("--rpc-latency", type=float, default=0.0)
+    p.add_argument("--rpc-jitter", type=float, default=0.0)
+
+    p = sub.add_parser("bench-market", help="/kalshi/market payload bytes and encode time per recorded snapshot")
+    p.add_argument("kalshi_path")
+    p.add_argument("--repeat", type=int, default=200, help="Encodes of every snapshot per variant")
+
+    p = sub.add_parser("bench-startup", help="main.py import time, files it creates, and calldata encode time")
+    p.add_argument("--imports", type=int, default=5, help="Fresh interpreters importing main")
+    p.add_argument("--repeat", type=int, default=2000, help="Encodes per hot function and encoder")
+
+    p = sub.add_parser("bench-metrics", help="Per-request and per-RPC cost of the Prometheus instrumentation, on vs off")
+    p.add_argument("--requests", type=int, default=2000, help="In-process HTTP requests per round and variant")
+    p.add_argument("--calls", type=int, default=100000, help="observe_rpc calls per round and variant")
+    p.add_argument("--rounds", type=int, default=3)
+
+    p = sub.add_parser("load-stream", help="/stream fan-out: server memory per connection and broadcast latency")
+    p.add_argument("--clients", type=int, default=1000)
+    p.add_argument("--events", type=int, default=50)
+    p.add_argument("--interval", type=float, default=0.1, help="Seconds between published events")
+    p.add_argument("--payload", type=int, default=256, help="Padding bytes per event")
+    p.add_argument("--queue-size", type=int, default=32, help="Broadcaster queue per client")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8767)
+
+    args = parser.parse_args()
+    if args.command == "record-kalshi":
+        asyncio.run(record_kalshi(args.path, args.series.split(","), args.interval, args.count))
+    elif args.command == "serve-kalshi":
+        replay = KalshiReplay(args.path, args.latency, args.jitter)
+        asyncio.run(serve(replay.app(), args.host, args.port, f"Replaying Kalshi events from {args.path}"))
+    elif args.command == "proxy-rpc":
+        proxy = RPCProxy(args.upstream, args.record, args.latency, args.jitter)
+        asyncio.run(serve(proxy.app(), args.host, args.port, f"Proxying JSON-RPC to {args.upstream}"))
+    elif args.command == "serve-rpc":
+        replay = RPCReplay(args.path, args.latency, args.jitter)
+        asyncio.run(serve(replay.app(), args.host, args.port, f"Replaying JSON-RPC from {args.path}"))
+    elif args.command == "load-health":
+        asyncio.run(load_health(
+            args.requests, args.concurrency, args.receipt_delay, args.env_file,
+            rpc_latency=args.rpc_latency, rpc_jitter=args.rpc_jitter,
+        ))
+    elif args.command == "load-submit":
+        result = asyncio.run(load_submit(
+            args.submissions, args.copies, args.concurrency, args.max_attempts, args.env_file,
+            rpc_latency=args.rpc_latency, rpc_jitter=args.rpc_jitter,
+        ))
+        if result["points_missing"] or result["points_duplicated"]:
+            raise SystemExit(1)
+    elif args.command == "load-mint":
+        result = asyncio.run(load_mint(
+            args.addresses, args.copies, args.flush_interval, args.env_file,
+            rpc_latency=args.rpc_latency, rpc_jitter=args.rpc_jitter,
+        ))
+        if result["addresses_unfunded"] or result["addresses_with_several_jobs"] or set(result["jobs"]) != {"minted"}:
+            raise SystemExit(1)
+    elif args.command == "bench-confirmations":
+        asyncio.run(bench_confirmations(
+            args.transactions, args.spread, args.block_time, args.confirmations, args.poll_latency, args.host, args.port
+        ))
+    elif args.command == "bench-history":
+        asyncio.run(bench_history(
+            args.points, args.env_file, rpc_latency=args.rpc_latency, rpc_jitter=args.rpc_jitter,
+        ))
+    elif args.command == "bench-market":
+        bench_market(args.kalshi_path, args.repeat)
+    elif args.command == "bench-startup":
+        result = bench_startup(args.imports, args.repeat)
+        if result["files_created"]:
+            raise SystemExit(1)
+    elif args.command == "bench-metrics":
+        asyncio.run(bench_metrics(args.requests, args.calls, args.rounds))
+    elif args.command == "load-stream":
+        asyncio.run(load_stream(
+            args.clients, args.events, args.interval, args.payload, args.queue_size, args.host, args.port
+        ))
+    else:
+        asyncio.run(bench(
+            args.kalshi_path, args.cycles, args.env_file,
+            kalshi_latency=args.kalshi_latency, kalshi_jitter=args.kalshi_jitter,
+            rpc_latency=args.rpc_latency, rpc_jitter=args.rpc_jitter,
+        ))
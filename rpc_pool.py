@@ -0,0 +1,281 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from urllib.parse import urlparse
+
+from aiohttp import ClientTimeout
+from eth_utils import keccak, to_bytes
+from web3 import AsyncHTTPProvider
+from web3.providers.async_base import AsyncJSONBaseProvider
+
+from metrics import RPC_ENDPOINT_REQUESTS, RPC_HEDGED_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+# Sent to a single endpoint with failover, never hedged (a signed tx is idempotent,
+# so re-sending the same raw tx elsewhere after a transport error is safe)
+WRITE_METHODS = {"eth_sendRawTransaction", "eth_sendTransaction"}
+
+# Reads of the pending pool, which differs between nodes: a lagging node's
+# pending nonce or gas estimate is stale, so these go to the best endpoint only
+CONSISTENT_METHODS = {"eth_getTransactionCount", "eth_estimateGas"}
+
+# Error messages for a raw tx the node already holds (geth/reth, Hardhat/Anvil),
+# e.g. when a failover resends a tx the first endpoint accepted before timing out
+ALREADY_KNOWN_ERRORS = ("already known", "known transaction")
+
+# Stateful on the node that created them, so never spread over endpoints
+STICKY_METHODS = {"eth_newFilter", "eth_newBlockFilter", "eth_getFilterChanges", "eth_uninstallFilter"}
+
+# Answers that never change for a chain; web3 asks for eth_chainId twice around every eth_call
+IMMUTABLE_METHODS = {"eth_chainId", "net_version"}
+
+# JSON-RPC error codes that mean "this node is unhealthy", not "the call failed"
+ENDPOINT_ERROR_CODES = {-32005, 429}
+
+
+def already_known_as_sent(response, raw_transaction):
+    """Turn an "already known" reply to eth_sendRawTransaction into a result with the tx hash."""
+    error = response.get("error") if isinstance(response, dict) else None
+    if not error or not any(text in str(error.get("message", "")).lower() for text in ALREADY_KNOWN_ERRORS):
+        return response
+    raw = to_bytes(hexstr=raw_transaction) if isinstance(raw_transaction, str) else bytes(raw_transaction)
+    return {"jsonrpc": "2.0", "id": response.get("id"), "result": "0x" + keccak(raw).hex()}
+
+
+class EndpointError(Exception):
+    """An endpoint answered with a rate-limit or overload error."""
+
+
+class Endpoint:
+    """
+    One RPC URL with rolling latency and error statistics.
+
+    The score is the latency EWMA inflated by the error EWMA; consecutive
+    failures put the endpoint in an exponential cooldown.
+    """
+
+    def __init__(self, url, timeout=10, alpha=0.2, window=200):
+        self.url = url
+        self.name = urlparse(url).netloc or url  # label without path/query, which may hold API keys
+        self.provider = AsyncHTTPProvider(
+            url,
+            request_kwargs={"timeout": ClientTimeout(total=timeout)},
+            exception_retry_configuration=None  # the pool retries on other endpoints instead
+        )
+        self.alpha = alpha
+        self.latencies = deque(maxlen=window)
+        self.latency_ewma = None
+        self.error_ewma = 0.0
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        self.block_number = None
+
+    @property
+    def available(self):
+        return time.monotonic() >= self.cooldown_until
+
+    @property
+    def score(self):
+        latency = self.latency_ewma if self.latency_ewma is not None else 0.1
+        return latency * (1 + 10 * self.error_ewma)
+
+    def percentile(self, q):
+        """Latency percentile (0-1) over the recent window, or None without enough samples."""
+        if len(self.latencies) < 20:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def record_latency(self, seconds):
+        self.latencies.append(seconds)
+        if self.latency_ewma is None:
+            self.latency_ewma = seconds
+        else:
+            self.latency_ewma += self.alpha * (seconds - self.latency_ewma)
+
+    def record_success(self, seconds):
+        self.record_latency(seconds)
+        self.error_ewma *= 1 - self.alpha
+        self.consecutive_failures = 0
+        RPC_ENDPOINT_REQUESTS.labels(self.name, "success").inc()
+
+    def record_failure(self, seconds):
+        self.record_latency(seconds)
+        self.error_ewma += self.alpha * (1 - self.error_ewma)
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= 3:
+            backoff = min(300, 5 * 2 ** (self.consecutive_failures - 3))
+            self.cooldown_until = time.monotonic() + backoff
+        RPC_ENDPOINT_REQUESTS.labels(self.name, "failure").inc()
+
+    def to_dict(self):
+        p50, p95 = self.percentile(0.5), self.percentile(0.95)
+        return {
+            "endpoint": self.name,
+            "available": self.available,
+            "latency_ewma_ms": round(self.latency_ewma * 1000, 1) if self.latency_ewma is not None else None,
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "error_rate": round(self.error_ewma, 3),
+            "consecutive_failures": self.consecutive_failures,
+            "block_number": self.block_number,
+        }
+
+
+class RPCPool(AsyncJSONBaseProvider):
+    """
+    web3 async provider spreading calls over several RPC endpoints.
+
+    - Every call goes to the healthiest endpoint first and fails over to
+      the next one on transport errors, timeouts or rate limiting.
+    - Reads (single calls and JSON-RPC batches) are hedged: if the first
+      endpoint has not answered within its `hedge_percentile` latency, the
+      same request is sent to the next endpoint and the first answer wins.
+    - Writes and pending-state reads (nonce, gas estimate) go to one
+      endpoint at a time, with failover. A raw tx that an endpoint reports
+      as already known counts as sent, under its locally computed hash.
+    """
+
+    def __init__(self, urls, timeout=10, hedge_percentile=0.95, hedge_min_delay=0.05, default_hedge_delay=0.5):
+        super().__init__()
+        if not urls:
+            raise ValueError("RPCPool needs at least one endpoint")
+        self.endpoints = [Endpoint(url, timeout=timeout) for url in urls]
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.default_hedge_delay = default_hedge_delay
+        self._health_task = None
+        self._immutable_results = {}  # method -> result
+
+    def __str__(self):
+        return f"RPC pool {', '.join(e.name for e in self.endpoints)}"
+
+    def ranked(self):
+        """Endpoints best first; endpoints in cooldown only as a last resort."""
+        return sorted(self.endpoints, key=lambda e: (not e.available, e.score))
+
+    def hedge_delay(self, endpoint):
+        latency = endpoint.percentile(self.hedge_percentile)
+        if latency is None:
+            return self.default_hedge_delay
+        return max(self.hedge_min_delay, latency)
+
+    async def _timed(self, endpoint, send):
+        start = time.perf_counter()
+        try:
+            response = await send(endpoint.provider)
+        except asyncio.CancelledError:
+            # Lost a hedge race: still a useful (lower bound) latency sample
+            endpoint.record_latency(time.perf_counter() - start)
+            raise
+        except Exception:
+            endpoint.record_failure(time.perf_counter() - start)
+            raise
+        error = response.get("error") if isinstance(response, dict) else None
+        if error and error.get("code") in ENDPOINT_ERROR_CODES:
+            endpoint.record_failure(time.perf_counter() - start)
+            raise EndpointError(f"{endpoint.name}: {error.get('message')}")
+        endpoint.record_success(time.perf_counter() - start)
+        return response
+
+    async def _failover(self, send):
+        last_error = None
+        for endpoint in self.ranked():
+            try:
+                return await self._timed(endpoint, send)
+            except Exception as e:
+                logger.warning(f"RPC endpoint {endpoint.name} failed, trying next: {str(e)}")
+                last_error = e
+        raise last_error
+
+    async def _hedged(self, send):
+        candidates = iter(self.ranked())
+        pending = {}
+        last_error = None
+        hedged = False
+
+        def launch():
+            endpoint = next(candidates, None)
+            if endpoint is not None:
+                pending[asyncio.ensure_future(self._timed(endpoint, send))] = endpoint
+            return endpoint
+
+        first = launch()
+        try:
+            while pending:
+                timeout = None if hedged else self.hedge_delay(first)
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # The first endpoint is slower than usual: race a second one
+                    hedged = True
+                    if launch() is not None:
+                        RPC_HEDGED_REQUESTS.inc()
+                    continue
+                for task in done:
+                    endpoint = pending.pop(task)
+                    if task.exception() is None:
+                        return task.result()
+                    last_error = task.exception()
+                    logger.warning(f"RPC endpoint {endpoint.name} failed, trying next: {str(last_error)}")
+                    if not pending:
+                        launch()
+            raise last_error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def make_request(self, method, params):
+        if method in self._immutable_results:
+            return {"jsonrpc": "2.0", "id": 0, "result": self._immutable_results[method]}
+        send = lambda provider: provider.make_request(method, params)
+        if method in IMMUTABLE_METHODS:
+            response = await self._hedged(send) if len(self.endpoints) > 1 else await self._failover(send)
+            if "result" in response:
+                self._immutable_results[method] = response["result"]
+            return response
+        if method == "eth_sendRawTransaction":
+            return already_known_as_sent(await self._failover(send), params[0])
+        if method in WRITE_METHODS or method in CONSISTENT_METHODS or method in STICKY_METHODS \
+                or len(self.endpoints) == 1:
+            return await self._failover(send)
+        return await self._hedged(send)
+
+    async def make_batch_request(self, batch_requests):
+        send = lambda provider: provider.make_batch_request(batch_requests)
+        if any(method in WRITE_METHODS or method in CONSISTENT_METHODS for method, _ in batch_requests) \
+                or len(self.endpoints) == 1:
+            return await self._failover(send)
+        return await self._hedged(send)
+
+    async def check_health(self):
+        """Probe every endpoint with eth_blockNumber so idle or recovered endpoints get fresh samples."""
+        async def probe(endpoint):
+            try:
+                response = await self._timed(endpoint, lambda p: p.make_request("eth_blockNumber", []))
+                endpoint.block_number = int(response["result"], 16)
+            except Exception as e:
+                logger.warning(f"RPC endpoint {endpoint.name} health check failed: {str(e)}")
+
+        await asyncio.gather(*(probe(e) for e in self.endpoints))
+
+    def start(self, interval=15):
+        """Start periodic health checks (only useful with more than one endpoint)."""
+        if self._health_task is None and len(self.endpoints) > 1:
+            self._health_task = asyncio.create_task(self._run_health(interval))
+
+    async def _run_health(self, interval):
+        while True:
+            await self.check_health()
+            await asyncio.sleep(interval)
+
+    def status(self):
+        return [e.to_dict() for e in self.ranked()]
+
+    async def disconnect(self):
+        if self._health_task:
+            self._health_task.cancel()
+            self._health_task = None
+        for endpoint in self.endpoints:
+            await endpoint.provider.disconnect()
@@ -0,0 +1,37 @@
+"""
+Standalone oracle scheduler.
+
+Runs the oracle/rebalance scheduler without the HTTP server, so the web
+tier can be started with SCHEDULER_MODE=off and scaled freely:
+
+    SCHEDULER_MODE=off gunicorn main:app -k uvicorn.workers.UvicornWorker -w 4
+    python scheduler.py
+
+Several copies may run for failover; the scheduler lease (SCHEDULER_LEASE)
+keeps exactly one of them submitting.
+"""
+import asyncio
+import logging
+
+import main
+
+logger = logging.getLogger(__name__)
+
+
+async def run():
+    main.rpc_pool.start()
+    main.oracle_indexer.start()
+    if main.kalshi_stream:
+        main.kalshi_stream.start()
+    logger.info(f"Standalone scheduler {main.scheduler_lease.owner_id} started")
+    try:
+        await main.run_scheduler()
+    finally:
+        await main.shutdown_event()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,61 @@
+const fs = require("fs");
+const { ethers, network } = require("hardhat");
+
+// Deploys the full stack on a local Hardhat node and writes .env.local for main.py / replay.py:
+//   npx hardhat node
+//   npx hardhat run scripts/deploy-local.js --network localhost
+// LOCAL_RPC_URL picks another node and DEPLOY_ENV_FILE another output file (used by tests/conftest.py).
+const HARDHAT_MNEMONIC = "test test test test test test test test test test test junk";
+
+async function main() {
+  const [owner] = await ethers.getSigners();
+  const MockERC20 = await ethers.getContractFactory("MockERC20");
+
+  const usdc = await MockERC20.deploy("Mock USDC", "mUSDC");
+  const eurc = await MockERC20.deploy("Mock EURC", "mEURC");
+  const pst = await MockERC20.deploy("Prediction Share Token", "PST");
+  await Promise.all([usdc.deployed(), eurc.deployed(), pst.deployed()]);
+
+  const TreasuryManager = await ethers.getContractFactory("TreasuryManager");
+  const treasury = await TreasuryManager.deploy(usdc.address, eurc.address, pst.address);
+
+  const KalshiLinkOracle = await ethers.getContractFactory("KalshiLinkOracle");
+  const oracle = await KalshiLinkOracle.deploy(owner.address);
+
+  const BatchMinter = await ethers.getContractFactory("BatchMinter");
+  const batchMinter = await BatchMinter.deploy(owner.address);
+  await Promise.all([treasury.deployed(), oracle.deployed(), batchMinter.deployed()]);
+
+  // Seed the treasury so reBalance has balances to move
+  await (await usdc.mint(treasury.address, ethers.utils.parseEther("1000"))).wait();
+  await (await eurc.mint(treasury.address, ethers.utils.parseEther("1000"))).wait();
+
+  const deployBlock = oracle.deployTransaction.blockNumber
+    || (await oracle.deployTransaction.wait()).blockNumber;
+  // Default key of the first Hardhat account; only valid on a local node
+  const privateKey = ethers.Wallet.fromMnemonic(HARDHAT_MNEMONIC).privateKey;
+
+  const env = {
+    RPC_URLS: network.config.url,
+    PRIVATE_KEY: privateKey,
+    ORACLE_CONTRACT_ADDRESS: oracle.address,
+    ORACLE_DEPLOY_BLOCK: deployBlock,
+    TREASURY_CONTRACT_ADDRESS: treasury.address,
+    MOCK_USDC_ADDRESS: usdc.address,
+    MOCK_EURC_ADDRESS: eurc.address,
+    // No real tokens locally: the faucet falls back to a fixed amount
+    USDC_ADDRESS: ethers.constants.AddressZero,
+    EURC_ADDRESS: ethers.constants.AddressZero,
+    BATCH_MINTER_ADDRESS: batchMinter.address,
+  };
+  const envFile = process.env.DEPLOY_ENV_FILE || ".env.local";
+  fs.writeFileSync(envFile, Object.entries(env).map(([k, v]) => `${k}=${v}`).join("\n") + "\n");
+
+  console.table(Object.entries(env).map(([name, value]) => ({ name, value: String(value) })));
+  console.log(`Wrote ${envFile}`);
+}
+
+main().catch(error => {
+  console.error(error);
+  process.exit(1);
+});
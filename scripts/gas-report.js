@@ -0,0 +1,40 @@
+const { ethers } = require("hardhat");
+
+// Gas per data point for single fulfilments vs fulfillBatch, on the in-process Hardhat network:
+//   npx hardhat run scripts/gas-report.js --network hardhat
+async function main() {
+  const [owner] = await ethers.getSigners();
+  const KalshiLinkOracle = await ethers.getContractFactory("KalshiLinkOracle");
+  const oracle = await KalshiLinkOracle.deploy(owner.address);
+  await oracle.deployed();
+
+  const now = Math.floor(Date.now() / 1000);
+  const rows = [];
+
+  // Single submissions (the first one also initialises nextIndexDataPoint)
+  for (let i = 0; i < 3; i++) {
+    const tx = await oracle.fulfillPredictionMarketDataEurUsd(86000 + i, now, now + 86400);
+    const receipt = await tx.wait();
+    rows.push({ call: "fulfillPredictionMarketDataEurUsd", points: 1, gasUsed: receipt.gasUsed.toNumber() });
+  }
+
+  for (const size of [1, 5, 10, 25, 50]) {
+    const values = Array.from({ length: size }, (_, i) => 86000 + i);
+    const timestamps = values.map(() => now);
+    const resolutions = values.map(() => now + 86400);
+    const tx = await oracle.fulfillBatch(values, timestamps, resolutions);
+    const receipt = await tx.wait();
+    rows.push({ call: "fulfillBatch", points: size, gasUsed: receipt.gasUsed.toNumber() });
+  }
+
+  console.table(rows.map(r => ({ ...r, gasPerPoint: Math.round(r.gasUsed / r.points) })));
+
+  // The getters keep their ABI
+  const latest = await oracle.latestDataPoint();
+  console.log("Points:", latest.count.toString(), "latest value:", latest.latest.value.toString());
+}
+
+main().catch(error => {
+  console.error(error);
+  process.exit(1);
+});
@@ -0,0 +1,61 @@
+const { ethers } = require("hardhat");
+
+// Gas per TreasuryManager.reBalance scenario on the in-process Hardhat network:
+//   npx hardhat run scripts/rebalance-gas.js --network hardhat
+// For a before/after comparison, run it once more against the previous contract
+// (git stash / checkout contracts/TreasuryManager.sol); the tolerance-band rows are
+// skipped when the contract has no rebalanceToleranceBps.
+async function main() {
+  const MockERC20 = await ethers.getContractFactory("MockERC20");
+  const usdc = await MockERC20.deploy("Mock USDC", "USDC");
+  const eurc = await MockERC20.deploy("Mock EURC", "EURC");
+  const pst = await MockERC20.deploy("Pool Share Token", "PST");
+  await Promise.all([usdc.deployed(), eurc.deployed(), pst.deployed()]);
+
+  const TreasuryManager = await ethers.getContractFactory("TreasuryManager");
+  const treasury = await TreasuryManager.deploy(usdc.address, eurc.address, pst.address);
+  await treasury.deployed();
+
+  const ether = (n) => ethers.utils.parseEther(String(n));
+  await (await usdc.mint(treasury.address, ether(1000))).wait();
+  await (await eurc.mint(treasury.address, ether(1000))).wait();
+
+  const rows = [];
+  async function rebalance(scenario, targetUsdPerc) {
+    const receipt = await (await treasury.reBalance(targetUsdPerc)).wait();
+    const [usd, eur] = await Promise.all([treasury.balOfUsdc(), treasury.balOfEurc()]);
+    rows.push({
+      scenario,
+      target: targetUsdPerc,
+      gasUsed: receipt.gasUsed.toNumber(),
+      usdc: ethers.utils.formatEther(usd),
+      eurc: ethers.utils.formatEther(eur),
+    });
+  }
+
+  await rebalance("mint + burn (50% -> 40%)", 40);
+  await rebalance("same target again (nothing to trade)", 40);
+  await rebalance("higher target (proportion only)", 60);
+  await rebalance("back to 40% (nothing to trade)", 40);
+
+  // A deposit of 5 USDC leaves the USDC balance 0.15% of TVL above target
+  await (await usdc.mint(treasury.address, ether(5))).wait();
+  const hasBand = TreasuryManager.interface.functions["rebalanceToleranceBps()"] !== undefined;
+  if (hasBand) {
+    await (await treasury.setRebalanceTolerance(100)).wait();
+    await rebalance("0.15% drift, 1% band (no trade)", 40);
+    await (await usdc.mint(treasury.address, ether(100))).wait();
+    await rebalance("3% drift, 1% band (mint + burn)", 40);
+    await (await treasury.setRebalanceTolerance(0)).wait();
+  } else {
+    await rebalance("0.15% drift, no band (mint + burn)", 40);
+  }
+
+  console.table(rows);
+  console.log("Skipped off-chain by the scheduler (within band): 0 gas, no transaction");
+}
+
+main().catch(error => {
+  console.error(error);
+  process.exit(1);
+});
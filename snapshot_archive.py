@@ -0,0 +1,397 @@
+"""
+Append-only Parquet archive of every Kalshi event snapshot, for backtesting.
+
+Each fetched snapshot is flattened to one row per market and buffered in
+memory; a background task writes the buffer out as a zstd-compressed Parquet
+file per UTC day partition (root/date=YYYY-MM-DD/part-*.parquet). Finished
+days are compacted into a single file, under a lock file so that workers
+sharing the archive never compact the same day at once. pyarrow is only
+imported when the archive is used.
+
+    KALSHI_ARCHIVE_DIR=archive python main.py            # archive while serving
+    python snapshot_archive.py bench /tmp/archive --rows 5000000
+"""
+import asyncio
+import fcntl
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+
+from metrics import FAILURES
+
+logger = logging.getLogger(__name__)
+
+# (column, pyarrow type name) in file order
+COLUMNS = (
+    ("fetched_at", "timestamp_ms"),
+    ("series", "dictionary"),
+    ("event_ticker", "dictionary"),
+    ("strike_date", "timestamp_ms"),
+    ("ticker", "dictionary"),
+    ("strike_type", "dictionary"),
+    ("floor_strike", "float64"),
+    ("cap_strike", "float64"),
+    ("yes_bid", "int16"),
+    ("yes_ask", "int16"),
+    ("no_bid", "int16"),
+    ("no_ask", "int16"),
+    ("last_price", "int16"),
+    ("volume", "int64"),
+    ("open_interest", "int64"),
+)
+MARKET_FIELDS = ("ticker", "strike_type", "floor_strike", "cap_strike", "yes_bid", "yes_ask",
+                 "no_bid", "no_ask", "last_price", "volume", "open_interest")
+
+
+def arrow_schema():
+    import pyarrow as pa
+
+    types = {
+        "timestamp_ms": pa.timestamp("ms", tz="UTC"),
+        "dictionary": pa.dictionary(pa.int32(), pa.string()),
+        "float64": pa.float64(),
+        "int16": pa.int16(),
+        "int64": pa.int64(),
+    }
+    return pa.schema([(name, types[kind]) for name, kind in COLUMNS])
+
+
+def parse_timestamp_ms(value):
+    """Milliseconds since the epoch for an ISO-8601 timestamp, or None."""
+    if not value:
+        return None
+    try:
+        return int(datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp() * 1000)
+    except ValueError:
+        return None
+
+
+def day_of(timestamp_ms):
+    return datetime.fromtimestamp(timestamp_ms / 1000, timezone.utc).strftime("%Y-%m-%d")
+
+
+class SnapshotArchive:
+    """
+    Buffers event snapshots and appends them to the archive in the background.
+
+    The buffer is flushed every `flush_interval` seconds, or as soon as it
+    holds `max_rows` rows. If writes fall behind and the buffer reaches
+    `max_buffered_rows`, new snapshots are dropped (counted in `stats`)
+    rather than growing memory without bound.
+    """
+
+    def __init__(self, root, flush_interval=60, max_rows=100_000, max_buffered_rows=1_000_000, compression="zstd"):
+        self.root = root
+        self.flush_interval = flush_interval
+        self.max_rows = max_rows
+        self.max_buffered_rows = max_buffered_rows
+        self.compression = compression
+        self.stats = {"snapshots": 0, "rows_written": 0, "files_written": 0, "dropped_snapshots": 0}
+        self._buffer = {}  # day -> {column: [values]}
+        self._buffered_rows = 0
+        self._compacted = set()
+        self._task = None
+        self._wakeup = asyncio.Event()
+
+    @property
+    def buffered_rows(self):
+        return self._buffered_rows
+
+    def record(self, series_ticker, result, fetched_at=None):
+        """Buffer one /events response (every event and market in it)."""
+        events = result.get("events") or []
+        n = sum(len(e.get("markets") or []) for e in events)
+        if n == 0:
+            return
+        if self._buffered_rows + n > self.max_buffered_rows:
+            self.stats["dropped_snapshots"] += 1
+            FAILURES.labels("archive").inc()
+            return
+
+        fetched_ms = int((fetched_at or time.time()) * 1000)
+        columns = self._buffer.get(day_of(fetched_ms))
+        if columns is None:
+            columns = self._buffer[day_of(fetched_ms)] = {name: [] for name, _ in COLUMNS}
+        for event in events:
+            markets = event.get("markets") or []
+            if not markets:
+                continue
+            m = len(markets)
+            columns["fetched_at"].extend([fetched_ms] * m)
+            columns["series"].extend([series_ticker] * m)
+            columns["event_ticker"].extend([event.get("event_ticker")] * m)
+            columns["strike_date"].extend([parse_timestamp_ms(event.get("strike_date"))] * m)
+            for field in MARKET_FIELDS:
+                columns[field].extend(market.get(field) for market in markets)
+
+        self._buffered_rows += n
+        self.stats["snapshots"] += 1
+        self.start()
+        if self._buffered_rows >= self.max_rows:
+            self._wakeup.set()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flush loop and write out whatever is still buffered."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Snapshot archive flush failed: {str(e)}")
+                FAILURES.labels("archive").inc()
+
+    async def flush(self):
+        """
+        Write the buffered rows out (in a worker thread).
+
+        Returns:
+            int: number of rows written
+        """
+        if not self._buffer:
+            return 0
+        buffer, self._buffer = self._buffer, {}
+        rows, self._buffered_rows = self._buffered_rows, 0
+        try:
+            await asyncio.to_thread(self._write, buffer)
+        except Exception:
+            # Keep the rows for the next attempt (still bounded by max_buffered_rows)
+            for day, columns in buffer.items():
+                pending = self._buffer.setdefault(day, {name: [] for name, _ in COLUMNS})
+                for name, values in columns.items():
+                    pending[name][:0] = values
+            self._buffered_rows += rows
+            raise
+        self.stats["rows_written"] += rows
+        return rows
+
+    def _write(self, buffer):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = arrow_schema()
+        today = day_of(time.time() * 1000)
+        for day, columns in buffer.items():
+            table = pa.Table.from_pydict(columns, schema=schema)
+            directory = os.path.join(self.root, f"date={day}")
+            os.makedirs(directory, exist_ok=True)
+            name = f"part-{columns['fetched_at'][0]}-{uuid.uuid4().hex[:8]}.parquet"
+            # Written under a hidden name, then renamed: readers never see a partial file
+            tmp_path = os.path.join(directory, f"_{name}.tmp")
+            pq.write_table(table, tmp_path, compression=self.compression, row_group_size=len(table))
+            os.replace(tmp_path, os.path.join(directory, name))
+            self.stats["files_written"] += 1
+
+        for day in self.days():
+            if day < today and day not in self._compacted:
+                self.compact(day)
+
+    def days(self):
+        """UTC days present in the archive, oldest first."""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(d[5:] for d in os.listdir(self.root) if d.startswith("date="))
+
+    def compact(self, day):
+        """
+        Merge all part files of a finished day into one file, sorted by fetch time.
+
+        Workers sharing the archive take an exclusive lock on the day first;
+        if another one holds it, this one skips the day and checks it again
+        after its next flush.
+
+        Returns:
+            bool: False if another worker was compacting the day
+        """
+        import pyarrow.parquet as pq
+
+        directory = os.path.join(self.root, f"date={day}")
+        with open(os.path.join(directory, "_compact.lock"), "a") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+            # Listed under the lock: parts another worker already merged are gone
+            parts = sorted(f for f in os.listdir(directory) if f.endswith(".parquet"))
+            if len(parts) > 1:
+                table = pq.read_table([os.path.join(directory, f) for f in parts], schema=arrow_schema())
+                table = table.sort_by("fetched_at")
+                name = f"part-{day}-compacted-{uuid.uuid4().hex[:8]}.parquet"
+                tmp_path = os.path.join(directory, f"_{name}.tmp")
+                pq.write_table(table, tmp_path, compression=self.compression, row_group_size=256 * 1024)
+                os.replace(tmp_path, os.path.join(directory, name))
+                for f in parts:
+                    os.remove(os.path.join(directory, f))
+                logger.info(f"Compacted {len(parts)} archive files for {day} ({len(table)} rows)")
+        self._compacted.add(day)
+        return True
+
+    def scan(self, start=None, end=None, columns=None, tickers=None):
+        """
+        Read archived rows with fetched_at in [start, end) (UNIX seconds).
+
+        Only the day partitions overlapping the range are opened, files are
+        memory-mapped, and only the requested columns are decoded.
+
+        Returns:
+            pyarrow.Table
+        """
+        return scan(self.root, start, end, columns, tickers)
+
+
+def scan(root, start=None, end=None, columns=None, tickers=None):
+    """Module-level form of SnapshotArchive.scan, for offline analysis."""
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    from pyarrow import fs
+
+    if not os.path.isdir(root):
+        return arrow_schema().empty_table().select(columns) if columns else arrow_schema().empty_table()
+
+    partitioning = ds.partitioning(pa.schema([("date", pa.string())]), flavor="hive")
+    dataset = ds.dataset(
+        root, format="parquet", partitioning=partitioning, schema=arrow_schema().append(pa.field("date", pa.string())),
+        filesystem=fs.LocalFileSystem(use_mmap=True),
+    )
+
+    condition = None
+
+    def both(a, b):
+        return b if a is None else a & b
+
+    if start is not None:
+        condition = both(condition, ds.field("date") >= day_of(start * 1000))
+        condition = both(condition, ds.field("fetched_at") >= pa.scalar(int(start * 1000), pa.timestamp("ms", tz="UTC")))
+    if end is not None:
+        condition = both(condition, ds.field("date") <= day_of(end * 1000))
+        condition = both(condition, ds.field("fetched_at") < pa.scalar(int(end * 1000), pa.timestamp("ms", tz="UTC")))
+    if tickers:
+        condition = both(condition, ds.field("ticker").isin(list(tickers)))
+
+    return dataset.to_table(columns=columns or [name for name, _ in COLUMNS], filter=condition)
+
+
+def synthetic_snapshot(fetched_at, markets_per_event=40, rng=None):
+    """A /events response shaped like KXEURUSD, for benchmarks."""
+    import random
+
+    rng = rng or random
+    center = 1.16 + rng.uniform(-0.01, 0.01)
+    markets = []
+    for k in range(markets_per_event):
+        floor_strike = round(1.11 + k * 0.0025, 4)
+        p = max(1, min(99, int(60 * 2.718 ** (-((floor_strike - center) / 0.005) ** 2))))
+        markets.append({
+            "ticker": f"KXEURUSD-25NOV1810-B{floor_strike + 0.00125:.5f}", "strike_type": "between",
+            "floor_strike": floor_strike, "cap_strike": round(floor_strike + 0.0025, 4),
+            "yes_bid": p, "yes_ask": p + 1, "no_bid": 99 - p, "no_ask": 100 - p,
+            "last_price": p, "volume": rng.randint(0, 100_000), "open_interest": rng.randint(0, 50_000),
+        })
+    strike_date = datetime.fromtimestamp(fetched_at - fetched_at % 86400 + 86400, timezone.utc).isoformat()
+    return {"events": [{"event_ticker": "KXEURUSD-25NOV1810", "strike_date": strike_date, "markets": markets}]}
+
+
+async def bench(root, rows=5_000_000, markets_per_event=40, interval=10.0, max_rows=100_000):
+    """
+    Archive `rows` synthetic market rows (one snapshot every `interval`
+    simulated seconds), then time full and filtered scans.
+    """
+    import random
+    import shutil
+
+    import pyarrow.compute as pc
+
+    shutil.rmtree(root, ignore_errors=True)
+    rng = random.Random(1)
+    archive = SnapshotArchive(root, flush_interval=3600, max_rows=max_rows)
+    snapshots = rows // markets_per_event
+    t0 = time.time() - snapshots * interval
+    # Reuse a handful of bodies: record() cost does not depend on the values
+    bodies = [synthetic_snapshot(t0, markets_per_event, rng) for _ in range(256)]
+
+    start = time.perf_counter()
+    for i in range(snapshots):
+        archive.record("KXEURUSD", bodies[i % len(bodies)], fetched_at=t0 + i * interval)
+        if archive.buffered_rows >= max_rows:
+            await archive.flush()
+    await archive.stop()
+    for day in archive.days()[:-1]:
+        archive.compact(day)
+    write_seconds = time.perf_counter() - start
+
+    size = sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(root) for f in files)
+    timings = {}
+
+    def timed(label, fn):
+        begin = time.perf_counter()
+        result = fn()
+        timings[label] = round(time.perf_counter() - begin, 3)
+        return result
+
+    full = timed("scan_all_columns_s", lambda: scan(root))
+    timed("scan_3_columns_s", lambda: scan(root, columns=["fetched_at", "ticker", "yes_bid"]))
+    day = 86400
+    window = timed("scan_last_day_s", lambda: scan(root, start=t0 + snapshots * interval - day))
+    one = timed("scan_one_ticker_s", lambda: scan(root, columns=["fetched_at", "yes_bid"],
+                                                  tickers=[bodies[0]["events"][0]["markets"][20]["ticker"]]))
+    timed("mean_yes_bid_s", lambda: pc.mean(scan(root, columns=["yes_bid"])["yes_bid"]).as_py())
+
+    return {
+        "rows": full.num_rows,
+        "days": len(archive.days()),
+        "files": archive.stats["files_written"],
+        "write_seconds": round(write_seconds, 2),
+        "write_rows_per_second": int(full.num_rows / write_seconds),
+        "bytes_on_disk": size,
+        "bytes_per_row": round(size / full.num_rows, 2),
+        "scan_rows_per_second": int(full.num_rows / timings["scan_all_columns_s"]),
+        "last_day_rows": window.num_rows,
+        "one_ticker_rows": one.num_rows,
+        **timings,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Kalshi snapshot archive tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("bench", help="Write and scan synthetic snapshots")
+    p.add_argument("root", help="Archive directory (deleted first)")
+    p.add_argument("--rows", type=int, default=5_000_000)
+    p.add_argument("--markets", type=int, default=40, help="Markets per snapshot")
+    p.add_argument("--interval", type=float, default=10.0, help="Simulated seconds between snapshots")
+
+    p = sub.add_parser("scan", help="Print row counts and a preview for a time range")
+    p.add_argument("root")
+    p.add_argument("--start", type=float, help="UNIX seconds")
+    p.add_argument("--end", type=float, help="UNIX seconds")
+    p.add_argument("--ticker", action="append")
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        print(json.dumps(asyncio.run(bench(args.root, args.rows, args.markets, args.interval)), indent=2))
+    else:
+        table = scan(args.root, args.start, args.end, tickers=args.ticker)
+        print(f"{table.num_rows} rows")
+        for row in table.slice(0, 10).to_pylist():
+            print(row)
@@ -142,10 +142,8 @@ window.addEventListener('load', () => {
         treasuryContractEl.href = `https://testnet.arcscan.app/address/${TREASURY_CONTRACT_ADDRESS}?tab=tokens`;
     }
 
-    // Start auto-refresh for Kalshi data every 30 seconds
-    kalshiInterval = setInterval(() => {
-        loadKalshiMarketData();
-    }, 30000);
+    // Live updates over server-sent events (falls back to polling)
+    connectLiveUpdates();
 
     // Animate balance section accordion opening on page load
     setTimeout(() => {
@@ -351,7 +349,15 @@ async function autoMintTokens() {
         const data = await response.json();
 
         if (data.success) {
-            console.log('Mock tokens minted successfully:', data.results);
+            // Mints are batched server-side; refresh balances once the job settles
+            waitForMintJob(data.job_id).then((job) => {
+                if (job.status === 'minted') {
+                    console.log('Mock tokens minted successfully:', job.results);
+                    loadBalances();
+                } else {
+                    console.warn('Failed to mint tokens:', job);
+                }
+            }).catch((error) => console.error('Failed to auto-mint tokens:', error));
         } else {
             console.warn('Failed to mint tokens:', data);
         }
@@ -361,6 +367,23 @@ async function autoMintTokens() {
     }
 }
 
+async function waitForMintJob(jobId, timeoutMs = 180000) {
+    // Poll a queued faucet job until its batched mint transaction settles
+    const deadline = Date.now() + timeoutMs;
+    while (Date.now() < deadline) {
+        const response = await fetch(`/mint-tokens/${jobId}`);
+        const job = await response.json();
+        if (!response.ok) {
+            throw new Error(job.detail || 'Unknown mint job');
+        }
+        if (job.status === 'minted' || job.status === 'failed') {
+            return job;
+        }
+        await new Promise((resolve) => setTimeout(resolve, 2000));
+    }
+    throw new Error('Timed out waiting for mint transaction');
+}
+
 async function loadTreasuryProportions() {
     try {
         if (!provider) return;
@@ -407,22 +430,29 @@ async function mintTestTokens() {
 
         const data = await response.json();
 
-        if (response.ok && data.success) {
+        if (!response.ok || !data.success) {
+            showResult(`Error: ${data.detail || 'Failed to mint tokens'}`, 'error');
+            return;
+        }
+
+        const job = await waitForMintJob(data.job_id);
+
+        if (job.status === 'minted') {
             let message = 'Test tokens minted successfully!<br>';
 
-            if (data.results.USDC && data.results.USDC.success) {
-                message += `USDC: ${data.results.USDC.amount} tokens<br>`;
+            if (job.results.USDC && job.results.USDC.success) {
+                message += `USDC: ${job.results.USDC.amount} tokens<br>`;
             }
-            if (data.results.EURC && data.results.EURC.success) {
-                message += `EURC: ${data.results.EURC.amount} tokens<br>`;
+            if (job.results.EURC && job.results.EURC.success) {
+                message += `EURC: ${job.results.EURC.amount} tokens<br>`;
             }
 
             showResult(message, 'success');
 
             // Refresh balances after minting
-            setTimeout(() => loadBalances(), 2000);
+            loadBalances();
         } else {
-            showResult(`Error: ${data.detail || 'Failed to mint tokens'}`, 'error');
+            showResult(`Error: ${job.error || 'Failed to mint tokens'}`, 'error');
         }
     } catch (error) {
         console.error('Failed to mint tokens:', error);
@@ -691,22 +721,7 @@ async function approveAndWithdraw() {
 async function loadOracleInfo() {
     try {
         const response = await fetch('/oracle/info');
-        const data = await response.json();
-
-        contractAddress.textContent = `${data.contract_address.substring(0, 6)}...${data.contract_address.substring(38)} 🔗`;
-        contractAddress.href = `https://testnet.arcscan.app/address/${data.contract_address}`;
-        ownerAddress.textContent = `${data.owner.substring(0, 6)}...${data.owner.substring(38)} 🔗`;
-        ownerAddress.href = `https://testnet.arcscan.app/address/${data.owner}`;
-        totalDataPoints.textContent = data.total_data_points;
-
-        // Display latest observation if available
-        if (data.latest_observation !== undefined && data.latest_observation !== null) {
-            // Convert from contract format (value * 1000) to percentage
-            const percentage = data.latest_observation / 1000;
-            latestObservation.textContent = `${percentage.toFixed(3)}%`;
-        } else {
-            latestObservation.textContent = 'No data yet';
-        }
+        renderOracleInfo(await response.json());
     } catch (error) {
         console.error('Failed to load oracle info:', error);
         contractAddress.textContent = 'Error';
@@ -717,50 +732,96 @@ async function loadOracleInfo() {
     }
 }
 
+function renderOracleInfo(data) {
+    contractAddress.textContent = `${data.contract_address.substring(0, 6)}...${data.contract_address.substring(38)} 🔗`;
+    contractAddress.href = `https://testnet.arcscan.app/address/${data.contract_address}`;
+    ownerAddress.textContent = `${data.owner.substring(0, 6)}...${data.owner.substring(38)} 🔗`;
+    ownerAddress.href = `https://testnet.arcscan.app/address/${data.owner}`;
+    totalDataPoints.textContent = data.total_data_points;
+
+    // Display latest observation if available
+    if (data.latest_observation !== undefined && data.latest_observation !== null) {
+        // Convert from contract format (value * 1000) to percentage
+        const percentage = data.latest_observation / 1000;
+        latestObservation.textContent = `${percentage.toFixed(3)}%`;
+    } else {
+        latestObservation.textContent = 'No data yet';
+    }
+}
+
 async function loadKalshiMarketData() {
     try {
-        const response = await fetch('/kalshi/market');
-        const data = await response.json();
+        const response = await fetch('/kalshi/market?fields=price,probability,ticker,event');
+        renderKalshiMarket(await response.json());
+    } catch (error) {
+        console.error('Failed to load Kalshi market data:', error);
+        eurUsdRate.textContent = 'Error';
+        kalshiProbability.textContent = 'Error';
+        kalshiTicker.textContent = 'Error';
+        kalshiTicker.href = '#';
+    }
+}
 
-        if (data.success && data.market) {
-            const market = data.market;
+function renderKalshiMarket(data) {
+    if (data.success && data.market) {
+        const market = data.market;
 
-            // Display EUR/USD rate
-            eurUsdRate.textContent = market.price || 'N/A';
+        // Display EUR/USD rate
+        eurUsdRate.textContent = market.price || 'N/A';
 
-            // Display probability as percentage
-            const prob = market.probability;
-            if (prob !== null && prob !== undefined) {
-                kalshiProbability.textContent = `${(prob * 100).toFixed(2)}%`;
-            } else {
-                kalshiProbability.textContent = 'N/A';
-            }
+        // Display probability as percentage
+        const prob = market.probability;
+        if (prob !== null && prob !== undefined) {
+            kalshiProbability.textContent = `${(prob * 100).toFixed(2)}%`;
+        } else {
+            kalshiProbability.textContent = 'N/A';
+        }
 
-            // Display ticker
-            if (market.ticker) {
-                kalshiTicker.textContent = `${market.ticker} 🔗`;
-                // Use event_ticker from the event object for the URL
-                const eventId = market.event?.event_ticker || market.ticker;
-                kalshiTicker.href = `https://demo.kalshi.co/markets/kxeurusd/eurusd-daily-range/${eventId.toLowerCase()}`;
-            } else {
-                kalshiTicker.textContent = 'N/A';
-                kalshiTicker.href = '#';
-            }
+        // Display ticker
+        if (market.ticker) {
+            kalshiTicker.textContent = `${market.ticker} 🔗`;
+            // Use event_ticker from the event object for the URL
+            const eventId = market.event?.event_ticker || market.ticker;
+            kalshiTicker.href = `https://demo.kalshi.co/markets/kxeurusd/eurusd-daily-range/${eventId.toLowerCase()}`;
         } else {
-            eurUsdRate.textContent = 'No data';
-            kalshiProbability.textContent = 'No data';
-            kalshiTicker.textContent = 'No data';
+            kalshiTicker.textContent = 'N/A';
             kalshiTicker.href = '#';
         }
-    } catch (error) {
-        console.error('Failed to load Kalshi market data:', error);
-        eurUsdRate.textContent = 'Error';
-        kalshiProbability.textContent = 'Error';
-        kalshiTicker.textContent = 'Error';
+    } else {
+        eurUsdRate.textContent = 'No data';
+        kalshiProbability.textContent = 'No data';
+        kalshiTicker.textContent = 'No data';
         kalshiTicker.href = '#';
     }
 }
 
+function startKalshiPolling() {
+    if (kalshiInterval) return;
+    // Auto-refresh Kalshi data every 30 seconds
+    kalshiInterval = setInterval(() => {
+        loadKalshiMarketData();
+    }, 30000);
+}
+
+function connectLiveUpdates() {
+    if (!window.EventSource) {
+        startKalshiPolling();
+        return;
+    }
+
+    const source = new EventSource('/stream');
+    source.addEventListener('oracle', (e) => renderOracleInfo(JSON.parse(e.data)));
+    source.addEventListener('market', (e) => renderKalshiMarket(JSON.parse(e.data)));
+    source.addEventListener('open', () => {
+        if (kalshiInterval) {
+            clearInterval(kalshiInterval);
+            kalshiInterval = null;
+        }
+    });
+    // EventSource reconnects by itself; poll meanwhile so the page never goes stale
+    source.addEventListener('error', startKalshiPolling);
+}
+
 async function submitOracleData(e) {
     e.preventDefault();
 
@@ -777,7 +838,7 @@ async function submitOracleData(e) {
     submitBtn.textContent = 'Submitting...';
 
     try {
-        const response = await fetch('/oracle/submit', {
+        const response = await fetch('/oracle/submit?wait=true', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
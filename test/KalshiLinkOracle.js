@@ -0,0 +1,166 @@
+const { expect } = require("chai");
+const { ethers } = require("hardhat");
+
+const EUR_USD = ethers.utils.formatBytes32String("KXEURUSD");
+const GBP_USD = ethers.utils.formatBytes32String("KXGBPUSD");
+
+describe("KalshiLinkOracle", function () {
+  let owner, other, oracle, now;
+
+  beforeEach(async function () {
+    [owner, other] = await ethers.getSigners();
+    const KalshiLinkOracle = await ethers.getContractFactory("KalshiLinkOracle");
+    oracle = await KalshiLinkOracle.deploy(owner.address);
+    await oracle.deployed();
+    now = Math.floor(Date.now() / 1000);
+  });
+
+  describe("packed storage", function () {
+    const MAX_UINT40 = ethers.BigNumber.from(2).pow(40).sub(1);
+    const MAX_UINT32 = ethers.BigNumber.from(2).pow(32).sub(1);
+
+    it("round-trips every field through the packed layout", async function () {
+      const tx = await oracle.fulfillPredictionMarketDataEurUsd(86123, now, now + 86400);
+      const receipt = await tx.wait();
+
+      const point = await oracle.getDataPoint(0);
+      expect(point.submitter).to.equal(owner.address);
+      expect(point.submitterTimestamp).to.equal(now);
+      expect(point.blockNumber).to.equal(receipt.blockNumber);
+      expect(point.value).to.equal(86123);
+      expect(point.resolutionTimestamp).to.equal(now + 86400);
+
+      // The former public-mapping getter returns the same fields
+      const legacy = await oracle.dataEurUsd(0);
+      expect(legacy.value).to.equal(86123);
+      expect(legacy.resolutionTimestamp).to.equal(now + 86400);
+    });
+
+    it("accepts the largest uint40 timestamps and uint32 value", async function () {
+      await (await oracle.fulfillPredictionMarketDataEurUsd(MAX_UINT32, MAX_UINT40, MAX_UINT40)).wait();
+
+      const point = await oracle.getDataPoint(0);
+      expect(point.value).to.equal(MAX_UINT32);
+      expect(point.submitterTimestamp).to.equal(MAX_UINT40);
+      expect(point.resolutionTimestamp).to.equal(MAX_UINT40);
+    });
+
+    it("rejects timestamps and values that do not fit", async function () {
+      await expect(oracle.fulfillPredictionMarketDataEurUsd(1, MAX_UINT40.add(1), now))
+        .to.be.revertedWith("Timestamp out of range");
+      await expect(oracle.fulfillPredictionMarketDataEurUsd(1, now, MAX_UINT40.add(1)))
+        .to.be.revertedWith("Timestamp out of range");
+      await expect(oracle.fulfillPredictionMarketDataEurUsd(MAX_UINT32.add(1), now, now))
+        .to.be.revertedWith("Value out of range");
+      expect(await oracle.nextIndexDataPoint()).to.equal(0);
+    });
+  });
+
+  describe("fulfillBatch", function () {
+    it("appends every point and emits one DataPointFulfilled each", async function () {
+      await (await oracle.fulfillPredictionMarketDataEurUsd(1, now, now)).wait();
+
+      const tx = oracle.fulfillBatch([86000, 86100, 86200], [now, now + 1, now + 2], [now + 10, now + 11, now + 12]);
+
+      await expect(tx).to.emit(oracle, "DataPointFulfilled").withArgs(1, owner.address, 86000, now, now + 10);
+      await expect(tx).to.emit(oracle, "DataPointFulfilled").withArgs(2, owner.address, 86100, now + 1, now + 11);
+      await expect(tx).to.emit(oracle, "DataPointFulfilled").withArgs(3, owner.address, 86200, now + 2, now + 12);
+      expect(await oracle.nextIndexDataPoint()).to.equal(4);
+      expect((await oracle.getDataPoint(3)).value).to.equal(86200);
+    });
+
+    it("accepts an empty batch (used by the service to probe for fulfillBatch)", async function () {
+      await (await oracle.fulfillBatch([], [], [])).wait();
+
+      expect(await oracle.nextIndexDataPoint()).to.equal(0);
+    });
+
+    it("reverts the whole batch if one point is out of range", async function () {
+      const tooLate = ethers.BigNumber.from(2).pow(40);
+
+      await expect(oracle.fulfillBatch([1, 2], [now, tooLate], [now, now])).to.be.revertedWith("Timestamp out of range");
+      await expect(oracle.fulfillBatch([1, 2], [now], [now, now])).to.be.revertedWith("Length mismatch");
+      await expect(oracle.connect(other).fulfillBatch([1], [now], [now]))
+        .to.be.revertedWithCustomError(oracle, "OwnableUnauthorizedAccount");
+      expect(await oracle.nextIndexDataPoint()).to.equal(0);
+    });
+  });
+
+  describe("range reads", function () {
+    it("latestDataPoint returns the count and an empty point before the first write", async function () {
+      const [count, latest] = await oracle.latestDataPoint();
+
+      expect(count).to.equal(0);
+      expect(latest.submitter).to.equal(ethers.constants.AddressZero);
+      expect(latest.value).to.equal(0);
+    });
+
+    it("latestDataPoint returns the newest point", async function () {
+      for (const value of [86000, 86500, 87000]) {
+        await (await oracle.fulfillPredictionMarketDataEurUsd(value, now, now + 86400)).wait();
+      }
+
+      const [count, latest] = await oracle.latestDataPoint();
+
+      expect(count).to.equal(3);
+      expect(latest.value).to.equal(87000);
+      expect(latest.submitter).to.equal(owner.address);
+    });
+
+    it("getDataPoints returns a slice that matches getDataPoint", async function () {
+      await (await oracle.fulfillBatch([1, 2, 3, 4, 5], Array(5).fill(now), Array(5).fill(now + 1))).wait();
+
+      const points = await oracle.getDataPoints(1, 3);
+
+      expect(points.map(p => p.value.toNumber())).to.deep.equal([2, 3, 4]);
+      for (let i = 0; i < points.length; i++) {
+        const single = await oracle.getDataPoint(1 + i);
+        expect(points[i].value).to.equal(single.value);
+        expect(points[i].blockNumber).to.equal(single.blockNumber);
+      }
+    });
+
+    it("getDataPoints is cut at the end of the series and empty past it", async function () {
+      await (await oracle.fulfillBatch([1, 2, 3], Array(3).fill(now), Array(3).fill(now))).wait();
+
+      expect((await oracle.getDataPoints(1, 100)).length).to.equal(2);
+      expect((await oracle.getDataPoints(3, 10)).length).to.equal(0);
+      expect((await oracle.getDataPoints(50, 10)).length).to.equal(0);
+    });
+
+    it("getDataPoints returns everything from _start for the largest _count", async function () {
+      await (await oracle.fulfillBatch([1, 2, 3], Array(3).fill(now), Array(3).fill(now))).wait();
+
+      const rest = await oracle.getDataPoints(1, ethers.constants.MaxUint256);
+
+      expect(rest.map(p => p.value.toNumber())).to.deep.equal([2, 3]);
+      expect((await oracle.getDataPoints(0, ethers.constants.MaxUint256)).length).to.equal(3);
+      expect((await oracle.getDataPoints(ethers.constants.MaxUint256, ethers.constants.MaxUint256)).length).to.equal(0);
+    });
+  });
+
+  describe("fulfillFeedsBatch", function () {
+    it("emits FeedFulfilled for other feeds and DataPointFulfilled for EUR/USD", async function () {
+      const tx = oracle.fulfillFeedsBatch([EUR_USD, GBP_USD, GBP_USD], [86000, 1270, 1275], now, [now + 1, now + 2, now + 3]);
+
+      await expect(tx).to.emit(oracle, "DataPointFulfilled").withArgs(0, owner.address, 86000, now, now + 1);
+      await expect(tx).to.emit(oracle, "FeedFulfilled").withArgs(GBP_USD, 0, owner.address, 1270, now, now + 2);
+      await expect(tx).to.emit(oracle, "FeedFulfilled").withArgs(GBP_USD, 1, owner.address, 1275, now, now + 3);
+    });
+
+    it("keeps a separate series per feed", async function () {
+      await (await oracle.fulfillFeedsBatch([EUR_USD, GBP_USD], [86000, 1270], now, [now, now])).wait();
+
+      expect(await oracle.nextIndexDataPoint()).to.equal(1);
+      expect(await oracle.nextIndexFeed(GBP_USD)).to.equal(1);
+      expect((await oracle.getFeedDataPoint(GBP_USD, 0)).value).to.equal(1270);
+      expect((await oracle.getFeedDataPoint(EUR_USD, 0)).value).to.equal(86000);
+    });
+
+    it("rejects mismatched lengths and other senders", async function () {
+      await expect(oracle.fulfillFeedsBatch([GBP_USD], [1, 2], now, [now])).to.be.revertedWith("Length mismatch");
+      await expect(oracle.connect(other).fulfillFeedsBatch([GBP_USD], [1], now, [now]))
+        .to.be.revertedWithCustomError(oracle, "OwnableUnauthorizedAccount");
+    });
+  });
+});
@@ -0,0 +1,207 @@
+"""
+Shared fixtures.
+
+Unit tests run anywhere. Tests that need contracts take the `oracle_app`
+or `local_chain` fixture, which starts `npx hardhat node`, deploys the
+stack with scripts/deploy-local.js (KalshiLinkOracle, TreasuryManager,
+MockERC20 tokens, BatchMinter) and imports main.py against it with Kalshi
+served by replay.KalshiReplay. They are skipped when Hardhat is not
+installed (npm install). To reuse a running node instead:
+
+    npx hardhat node
+    npm run deploy:local
+    LOCAL_CHAIN_ENV=.env.local pytest
+"""
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+from dotenv import dotenv_values
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for_rpc(url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            httpx.post(url, json={"jsonrpc": "2.0", "id": 1, "method": "eth_chainId", "params": []}, timeout=2)
+            return
+        except httpx.HTTPError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.5)
+
+
+def kalshi_event(price, strike_date="2030-01-01T15:00:00Z", spacing=0.0025, markets=9):
+    """
+    A KXEURUSD /events body with `markets` range markets around `price`,
+    the one containing it priced highest.
+    """
+    first = round(price / spacing) * spacing - spacing * (markets // 2) - spacing / 2
+    rows = []
+    for i in range(markets):
+        floor = round(first + i * spacing, 5)
+        cap = round(floor + spacing, 5)
+        mid = (floor + cap) / 2
+        yes_bid = max(1, int(60 - abs(mid - price) / spacing * 25))
+        rows.append({
+            "ticker": f"KXEURUSD-30JAN0110-B{mid:.5f}",
+            "floor_strike": floor,
+            "cap_strike": cap,
+            "yes_bid": yes_bid,
+            "yes_ask": yes_bid + 1,
+            "no_bid": 99 - yes_bid - 1,
+            "no_ask": 100 - yes_bid,
+            "volume": 1000 + i,
+            "status": "active",
+        })
+    return {"events": [{
+        "event_ticker": "KXEURUSD-30JAN0110",
+        "series_ticker": "KXEURUSD",
+        "title": "EUR/USD",
+        "strike_date": strike_date,
+        "markets": rows,
+    }]}
+
+
+def write_kalshi_recording(path, prices):
+    """One replay.py record-kalshi line per price."""
+    with open(path, "w") as f:
+        for i, price in enumerate(prices):
+            f.write(json.dumps({"ts": i, "series": "KXEURUSD", "status": 200, "body": kalshi_event(price)}) + "\n")
+    return path
+
+
+@pytest.fixture(scope="session")
+def run():
+    """Run a coroutine on the session's event loop (shared with main.py's clients)."""
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.close()
+
+
+@pytest.fixture(scope="session")
+def local_chain(tmp_path_factory):
+    """Env values of a local Hardhat node with the full stack deployed."""
+    env_file = os.getenv("LOCAL_CHAIN_ENV")
+    if env_file:
+        yield dotenv_values(env_file)
+        return
+    if not (ROOT / "node_modules" / ".bin" / "hardhat").exists():
+        pytest.skip("Hardhat is not installed (npm install)")
+
+    url = f"http://127.0.0.1:{free_port()}"
+    node = subprocess.Popen(
+        ["npx", "hardhat", "node", "--hostname", "127.0.0.1", "--port", url.rsplit(":", 1)[1]],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_for_rpc(url)
+        env_path = tmp_path_factory.mktemp("chain") / ".env.local"
+        subprocess.run(
+            ["npx", "hardhat", "run", "scripts/deploy-local.js", "--network", "localhost"],
+            cwd=ROOT, check=True, timeout=300, stdout=subprocess.DEVNULL,
+            env={**os.environ, "LOCAL_RPC_URL": url, "DEPLOY_ENV_FILE": str(env_path)}
+        )
+        yield dotenv_values(env_path)
+    finally:
+        node.terminate()
+        node.wait(timeout=30)
+
+
+@pytest.fixture(scope="session")
+def kalshi_replay(run, tmp_path_factory):
+    """replay.KalshiReplay serving a slowly drifting EUR/USD series, looped."""
+    from replay import KalshiReplay, start_app
+
+    prices = [1.16 + 0.0005 * ((i % 20) - 10) for i in range(40)]
+    path = write_kalshi_recording(tmp_path_factory.mktemp("kalshi") / "kalshi.jsonl", prices)
+    replay = KalshiReplay(path)
+    port = free_port()
+    runner = run(start_app(replay.app(), "127.0.0.1", port))
+    replay.url = f"http://127.0.0.1:{port}"
+    yield replay
+    run(runner.cleanup())
+
+
+@pytest.fixture(scope="session")
+def rpc_proxy(run, local_chain):
+    """replay.RPCProxy in front of the local node, counting calls and raw transactions."""
+    from replay import RPCProxy, start_app
+
+    proxy = RPCProxy(local_chain["RPC_URLS"].split(",")[0])
+    port = free_port()
+    runner = run(start_app(proxy.app(), "127.0.0.1", port))
+    proxy.url = f"http://127.0.0.1:{port}"
+    yield proxy
+    run(runner.cleanup())
+
+
+@pytest.fixture(scope="session")
+def main_module(request, run, kalshi_replay, tmp_path_factory):
+    """
+    main.py with Kalshi served by kalshi_replay and the embedded scheduler off,
+    imported once per session, so tests share its state and should compare
+    before/after values. It runs against the local chain (through rpc_proxy)
+    when Hardhat is installed, otherwise against an RPC port nobody listens
+    on: offline tests stub w3.provider or the functions a route calls.
+    """
+    from replay import KALSHI_REPLAY_BASE
+
+    try:
+        rpc_url = request.getfixturevalue("rpc_proxy").url
+        os.environ.update(request.getfixturevalue("local_chain"))
+    except pytest.skip.Exception:
+        rpc_url = f"http://127.0.0.1:{free_port()}"
+
+    state_dir = tmp_path_factory.mktemp("state")
+    os.environ.update({
+        "RPC_URLS": rpc_url,
+        "KALSHI_API_URL": f"{kalshi_replay.url}{KALSHI_REPLAY_BASE}",
+        "KALSHI_CACHE_TTL": "0",
+        "KALSHI_INGEST_MODE": "poll",
+        "SCHEDULER_MODE": "off",
+        "SCHEDULER_LEASE": "none",
+        "BLOCK_POLL_INTERVAL": "0.2",
+        "ORACLE_DB_PATH": str(state_dir / "oracle_data.db"),
+        "IDEMPOTENCY_DB_PATH": str(state_dir / "idempotency.db"),
+        "NONCE_DB_PATH": str(state_dir / "nonces.db"),
+        "FAUCET_DB_PATH": str(state_dir / "faucet_jobs.db"),
+    })
+    os.chdir(ROOT)
+    import main
+
+    yield main
+    run(main.shutdown_event())
+
+
+@pytest.fixture(scope="session")
+def oracle_app(local_chain, main_module):
+    """main.py configured against the local chain; skipped without Hardhat."""
+    return main_module
+
+
+def asgi_request(main, run, method, path, **kwargs):
+    """Send one request to main.app in process (no startup events run)."""
+    async def send():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://oracle") as http:
+            return await http.request(method, path, **kwargs)
+    return run(send())
+
+
+def asgi_get(main, run, path, **kwargs):
+    return asgi_request(main, run, "GET", path, **kwargs)
@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+from admission import AdmissionLimiter, Overloaded
+
+
+def test_full_queue_is_refused_at_once_and_slots_go_to_waiters_in_order():
+    limiter = AdmissionLimiter(max_in_flight=1, max_queue=2, queue_timeout=5)
+    order = []
+
+    async def worker(i, hold):
+        async with limiter.admit():
+            order.append(i)
+            await hold.wait()
+
+    async def scenario():
+        hold = asyncio.Event()
+        tasks = [asyncio.create_task(worker(i, hold)) for i in range(3)]
+        await asyncio.sleep(0.01)
+        with pytest.raises(Overloaded) as refused:
+            await worker(3, hold)
+        state = limiter.to_dict()
+        hold.set()
+        await asyncio.gather(*tasks)
+        return refused.value, state
+
+    refused, state = asyncio.run(scenario())
+    assert refused.reason == "queue_full"
+    assert refused.retry_after >= 1
+    assert (state["in_flight"], state["queued"]) == (1, 2)
+    assert order == [0, 1, 2]
+    assert limiter.in_flight == 0
+    assert limiter.rejected == {"queue_full": 1, "queue_timeout": 0}
+
+
+def test_waiter_times_out_without_leaking_a_slot():
+    limiter = AdmissionLimiter(max_in_flight=1, max_queue=5, queue_timeout=0.05)
+
+    async def scenario():
+        async with limiter.admit():
+            with pytest.raises(Overloaded) as refused:
+                async with limiter.admit():
+                    pass
+        async with limiter.admit():
+            pass
+        return refused.value
+
+    assert asyncio.run(scenario()).reason == "queue_timeout"
+    assert limiter.in_flight == 0
+    assert limiter.queued == 0
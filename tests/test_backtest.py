@@ -0,0 +1,79 @@
+import numpy as np
+
+from backtest import (
+    LIMB, MAX_WEI, WEI, _mul_div10000, check_indices, make_grid, rebalance, run_grid, synthetic_series, to_limbs,
+)
+from oracle_policy import UpdatePolicy, compute_targets, rebalance_amounts
+
+
+def replay(timestamps, prices, combo, usd, eur, initial_perc):
+    """One combo the slow way: UpdatePolicy checks and rebalance_amounts on Python ints."""
+    policy = UpdatePolicy("rebalance", combo["deviation"], combo["heartbeat"])
+    policy.record(initial_perc, timestamps[0])
+    transactions = state_changes = 0
+    for i in check_indices(timestamps, combo["cadence"]):
+        target = compute_targets(prices[i])[0]
+        if policy.check(target, timestamps[i]) is None:
+            continue
+        policy.record(target, timestamps[i])
+        transactions += 1
+        mint, burn = rebalance_amounts(target, usd, eur, combo["tolerance_bps"])
+        state_changes += bool(mint or burn)
+        usd, eur = usd - burn, eur + mint
+    return {"transactions": transactions, "state_changes": state_changes, "usd_wei": usd, "eur_wei": eur}
+
+
+def test_grid_matches_the_contract_math_inside_and_outside_the_band():
+    timestamps, prices = synthetic_series(days=3, annual_vol=0.5, start_price=1.4)
+    usd, eur = 1234 * WEI + 567, 789 * WEI + 1
+    grid = make_grid(["inverse"], [60, 900], [0.0, 0.02], [900, float("inf")], [0, 50, 200, 1000])
+
+    results = run_grid(timestamps, prices, grid, usd=usd, eur=eur, initial_perc=60)
+
+    for combo, result in zip(grid, results):
+        expected = replay(timestamps, prices, combo, usd, eur, 60)
+        assert {k: result[k] for k in expected} == expected, combo
+
+
+def test_band_trades_less_than_no_band():
+    # Target USD% steps down 49, 48, ..., 40 from a 50/50 treasury
+    prices = 100 / (np.arange(49, 39, -1) + 0.5)
+    timestamps = np.arange(len(prices), dtype=np.float64) * 60
+    grid = make_grid(["inverse"], [60], [0.0], [float("inf")], [0, 150])
+
+    no_band, band = run_grid(timestamps, prices, grid)
+
+    assert band["transactions"] == no_band["transactions"] == 10
+    assert no_band["state_changes"] == 10
+    assert band["state_changes"] == 5  # 48, 46, 44, 42, 40: every second step leaves the 1.5% band
+    assert band["final_usd_perc"] == no_band["final_usd_perc"] == 40
+
+
+def test_band_threshold_is_exact_in_limbs():
+    totals = [0, 1, 9_999, 10_001, 2**62, (2**63 - 1) // 100 * 10**12]
+    bps = np.array([0, 1, 99, 100, 5_000, 10_000], dtype=np.int64)
+    for total in totals:
+        hi, lo = _mul_div10000(bps, to_limbs(total, len(bps)))
+        assert [h * 10**12 + l for h, l in zip(hi.tolist(), lo.tolist())] == [b * total // 10_000 for b in bps.tolist()]
+
+
+def test_limb_rebalance_matches_rebalance_amounts():
+    rng = np.random.default_rng(7)
+    edges = [0, 1, LIMB - 1, LIMB, LIMB + 1, 2**53 + 1, 2**63, MAX_WEI - 1, MAX_WEI]
+    cases = [(int(u), int(e)) for u in edges for e in edges if u + e <= MAX_WEI]
+    cases += [(int(rng.integers(0, 2**62)) * 10**9 + int(rng.integers(0, 10**9)),
+               int(rng.integers(0, 2**62)) * 10**9 + int(rng.integers(0, 10**9))) for _ in range(200)]
+    cases = [(u, e) for u, e in cases if u + e <= MAX_WEI]
+    n = len(cases)
+    p = rng.integers(1, 100, n)
+    bps = rng.choice([0, 1, 50, 100, 2_500, 10_000], n)
+
+    usd = np.array([u // LIMB for u, _ in cases]), np.array([u % LIMB for u, _ in cases])
+    eur = np.array([e // LIMB for _, e in cases]), np.array([e % LIMB for _, e in cases])
+    for tolerance in (None, bps):
+        results = rebalance(p, usd, eur, tolerance)
+        for i, (u, e) in enumerate(cases):
+            mint, burn = rebalance_amounts(int(p[i]), u, e, 0 if tolerance is None else int(bps[i]))
+            new_usd, new_eur, minted, burned = (int(hi[i]) * LIMB + int(lo[i]) for hi, lo in results)
+            got = [minted, burned, new_usd, new_eur]
+            assert got == [mint, burn, u - burn, e + mint], (u, e, p[i], tolerance is not None and bps[i])
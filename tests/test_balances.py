@@ -0,0 +1,119 @@
+"""/balance and /balances: one JSON-RPC batch per request, token metadata fetched once per process."""
+from collections import Counter
+
+import pytest
+from aiohttp import web
+from eth_abi import encode
+from web3 import AsyncHTTPProvider
+
+from conftest import asgi_get, free_port
+from replay import start_app
+
+ADDRESSES = [
+    "0x5B38Da6a701c568545dCfcB03FcB875f56beddC4",
+    "0xAb8483F64d9C6d1EcF9b849Ae677dD3315835cb2",
+    "0x4B20993Bc481177ec7E8f571ceCaE8A9e22C02db",
+]
+SELECTORS = {
+    "0x70a08231": "balanceOf", "0x313ce567": "decimals", "0x95d89b41": "symbol", "0x06fdde03": "name",
+    "0x8da5cb5b": "owner",
+}
+
+
+class TokenNode:
+    """eth_call for ERC20 balanceOf/decimals/symbol and oracle name/owner over HTTP, counting requests and calls."""
+
+    def __init__(self):
+        self.requests = 0
+        self.calls = Counter()
+
+    def answer(self, call):
+        data = call["params"][0]["data"]
+        fn = SELECTORS[data[:10]]
+        self.calls[fn] += 1
+        if fn == "balanceOf":
+            result = encode(["uint256"], [int(data[-8:], 16) * 10**6])
+        elif fn == "decimals":
+            result = encode(["uint8"], [6])
+        elif fn == "owner":
+            result = encode(["address"], [ADDRESSES[2]])
+        else:
+            result = encode(["string"], ["MOCK"])
+        return {"jsonrpc": "2.0", "id": call["id"], "result": "0x" + result.hex()}
+
+    async def handle(self, request):
+        body = await request.json()
+        self.requests += 1
+        if isinstance(body, list):
+            return web.json_response([self.answer(call) for call in body])
+        return web.json_response(self.answer(body))
+
+
+@pytest.fixture
+def node(main_module, run, monkeypatch):
+    node = TokenNode()
+    app = web.Application()
+    app.router.add_post("/", node.handle)
+    port = free_port()
+    runner = run(start_app(app, "127.0.0.1", port))
+    provider = AsyncHTTPProvider(f"http://127.0.0.1:{port}")
+    monkeypatch.setattr(main_module.w3, "provider", provider)
+    # As in a fresh process: nothing cached yet
+    monkeypatch.setattr(main_module, "immutable_call_cache", {})
+    yield node
+    run(provider.disconnect())
+    run(runner.cleanup())
+
+
+def test_balance_is_one_round_trip(main_module, run, node):
+    tokens = len(main_module.mock_token_contracts)
+
+    first = asgi_get(main_module, run, "/balance", params={"address": ADDRESSES[0].lower()})
+    assert first.status_code == 200
+    assert node.requests == 1
+    assert node.calls == {"balanceOf": tokens, "decimals": tokens, "symbol": tokens}
+
+    second = asgi_get(main_module, run, "/balance", params={"address": ADDRESSES[1]})
+    assert second.status_code == 200
+    assert node.requests == 2
+    assert node.calls["balanceOf"] == 2 * tokens
+
+    balances = first.json()["balances"]
+    assert set(balances) == set(main_module.mock_token_contracts)
+    assert {b["symbol"] for b in balances.values()} == {"MOCK"}
+    assert {b["balance_raw"] for b in balances.values()} == {str(int(ADDRESSES[0][-8:], 16) * 10**6)}
+
+
+def test_balances_is_one_round_trip_for_many_addresses(main_module, run, node):
+    tokens = len(main_module.mock_token_contracts)
+
+    response = asgi_get(main_module, run, "/balances", params={"addresses": ",".join(ADDRESSES + ADDRESSES[:1])})
+
+    assert response.status_code == 200
+    assert node.requests == 1
+    assert node.calls["balanceOf"] == len(ADDRESSES) * tokens
+    assert list(response.json()["balances"]) == ADDRESSES
+
+
+def test_immutable_metadata_is_fetched_once_per_process(main_module, run, node):
+    tokens = len(main_module.mock_token_contracts)
+
+    for address in ADDRESSES:
+        assert asgi_get(main_module, run, "/balance", params={"address": address}).status_code == 200
+    assert asgi_get(main_module, run, "/balances", params={"addresses": ",".join(ADDRESSES)}).status_code == 200
+
+    assert node.requests == len(ADDRESSES) + 1
+    assert node.calls["decimals"] == node.calls["symbol"] == tokens
+    assert node.calls["balanceOf"] == 2 * len(ADDRESSES) * tokens
+
+
+def test_oracle_name_and_owner_are_fetched_once_per_process(main_module, run, node):
+    contract = main_module.contract
+    immutable = [contract.functions.name(), contract.functions.owner()]
+
+    first, _ = run(main_module.batch_read([], immutable))
+    second, _ = run(main_module.batch_read([], immutable))
+
+    assert first == second == ["MOCK", ADDRESSES[2]]
+    assert node.requests == 1
+    assert node.calls == {"name": 1, "owner": 1}
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from tx_manager import CallBatcher
+
+
+class Call:
+    def __init__(self, fn_name, items):
+        self.fn_name = fn_name
+        self.items = items
+
+
+class FakeTxManager:
+    def __init__(self):
+        self.sent = []
+
+    async def submit(self, contract_function, label=None):
+        await asyncio.sleep(0.01)
+        self.sent.append(contract_function)
+        return f"tx{len(self.sent)}"
+
+
+def single(item):
+    if item < 0:
+        raise ValueError(f"invalid item {item}")
+    return Call("single", [item])
+
+
+def batch(items):
+    return Call("batch", items)
+
+
+def submit_all(batcher, items):
+    async def scenario():
+        return await asyncio.gather(*(batcher.submit(item) for item in items), return_exceptions=True)
+    return asyncio.run(scenario())
+
+
+def test_invalid_item_fails_only_its_own_caller():
+    tx_manager = FakeTxManager()
+    batcher = CallBatcher(tx_manager, single, batch)
+
+    results = submit_all(batcher, [1, -1, 2, 3])
+
+    assert isinstance(results[1], ValueError)
+    assert results[0] == results[2] == results[3] == "tx1"
+    assert [(c.fn_name, c.items) for c in tx_manager.sent] == [("batch", [1, 2, 3])]
+
+
+@pytest.mark.parametrize("supported, expected", [(True, ["batch"]), (False, ["single"] * 3)])
+def test_batch_check_runs_once_and_falls_back_to_singles(supported, expected):
+    tx_manager = FakeTxManager()
+    checks = []
+
+    async def batch_check():
+        checks.append(1)
+        return supported
+
+    batcher = CallBatcher(tx_manager, single, batch, batch_check=batch_check)
+
+    submit_all(batcher, [1, 2, 3])
+    first = [c.fn_name for c in tx_manager.sent]
+    submit_all(batcher, [4, 5])
+
+    assert first == expected
+    assert len(checks) == 1
+
+
+def test_failed_batch_check_sends_singles_and_probes_again():
+    tx_manager = FakeTxManager()
+    outcomes = [RuntimeError("rpc down"), True]
+
+    async def batch_check():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    batcher = CallBatcher(tx_manager, single, batch, batch_check=batch_check)
+
+    assert submit_all(batcher, [1, 2]) == ["tx1", "tx2"]
+    assert submit_all(batcher, [3, 4]) == ["tx3", "tx3"]
+    assert [c.fn_name for c in tx_manager.sent] == ["single", "single", "batch"]
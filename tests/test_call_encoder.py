@@ -0,0 +1,49 @@
+"""FunctionEncoder calldata is byte-identical to web3's contract.encode_abi for every hot function."""
+import pytest
+from eth_abi import encode
+
+ADDRESS = "0x5B38Da6a701c568545dCfcB03FcB875f56beddC4"
+MAX = 2**256 - 1
+
+
+def hot_calls(main):
+    """(encoder, contract, args) for every FunctionEncoder main.py builds."""
+    now = 1_767_000_000
+    calls = [
+        (main.fulfill_encoder, main.contract, (116_050, now, now + 86400)),
+        (main.fulfill_encoder, main.contract, (0, 0, MAX)),
+        (main.fulfill_batch_encoder, main.contract, ([116_050, 116_075], [now, now + 1], [now + 86400] * 2)),
+        (main.fulfill_batch_encoder, main.contract, ([], [], [])),
+        (main.rebalance_encoder, main.treasury_contract, (60,)),
+    ]
+    for token, contract in main.mock_token_contracts.items():
+        calls.append((main.mock_mint_encoders[token], contract, (ADDRESS, 10**24)))
+        calls.append((main.mock_balance_encoders[token], contract, (ADDRESS,)))
+    for token, contract in main.real_token_contracts.items():
+        calls.append((main.real_balance_encoders[token], contract, (ADDRESS,)))
+    return calls
+
+
+def test_calldata_matches_web3(main_module):
+    calls = hot_calls(main_module)
+    assert {encoder.fn_name for encoder, _, _ in calls} == {
+        "fulfillPredictionMarketDataEurUsd", "fulfillBatch", "reBalance", "mint", "balanceOf"
+    }
+    for encoder, contract, args in calls:
+        assert encoder.address == contract.address
+        assert encoder.encode(*args) == contract.encode_abi(encoder.fn_name, args=list(args)), encoder.fn_name
+
+
+def test_decoded_results_match_the_abi(main_module):
+    encoder = main_module.real_balance_encoders["USDC"]
+    assert encoder.decode(encode(["uint256"], [MAX])) == MAX
+
+    owner = main_module.FunctionEncoder(main_module.w3, main_module.contract, "owner")
+    assert owner.decode(encode(["address"], [ADDRESS.lower()])) == ADDRESS
+
+
+def test_bad_arguments_are_rejected(main_module):
+    with pytest.raises(TypeError):
+        main_module.rebalance_encoder.encode()
+    with pytest.raises(ValueError):
+        main_module.mock_balance_encoders["USDC"].encode("0x1234")
@@ -0,0 +1,107 @@
+"""ConfirmationTracker against replay.StubChain: block polling, newHeads, batched receipts and reorgs."""
+import asyncio
+
+from prometheus_client import REGISTRY
+from web3 import AsyncHTTPProvider, AsyncWeb3
+
+from confirmations import ConfirmationTracker
+from conftest import free_port
+from replay import StubChain, start_app
+
+
+def tx_hash(i):
+    return "0x" + f"{i:064x}"
+
+
+async def with_chain(scenario, block_time=0.1, **tracker_kwargs):
+    chain = StubChain(block_time)
+    port = free_port()
+    runner = await start_app(chain.app(), "127.0.0.1", port)
+    w3 = AsyncWeb3(AsyncHTTPProvider(f"http://127.0.0.1:{port}"))
+    if tracker_kwargs.get("ws_url") == "chain":
+        tracker_kwargs["ws_url"] = f"ws://127.0.0.1:{port}/ws"
+    tracker = ConfirmationTracker(w3, **tracker_kwargs)
+    try:
+        return await scenario(chain, tracker)
+    finally:
+        await tracker.stop()
+        await w3.provider.disconnect()
+        await runner.cleanup()
+
+
+def test_polled_blocks_fetch_all_receipts_in_one_batch():
+    async def scenario(chain, tracker):
+        for i in range(20):
+            chain.submit(tx_hash(i), blocks=1 + i % 3)
+        receipts = await asyncio.gather(*(tracker.wait_for_receipt(tx_hash(i), timeout=5) for i in range(20)))
+        return receipts, chain, tracker
+
+    receipts, chain, tracker = asyncio.run(with_chain(scenario, poll_interval=0.05))
+
+    assert [r["transactionHash"].to_0x_hex() for r in receipts] == [tx_hash(i) for i in range(20)]
+    assert tracker.pending_count == 0
+    assert chain.methods["eth_blockNumber"] > 0
+    # One HTTP request per block for all 20 receipts, not one per transaction per poll
+    receipt_requests = chain.requests - chain.methods["eth_blockNumber"]
+    assert receipt_requests <= 5
+    assert chain.methods["eth_getTransactionReceipt"] >= 20
+
+
+def test_new_heads_replace_block_polling():
+    async def scenario(chain, tracker):
+        chain.submit(tx_hash(1), blocks=2)
+        receipt = await tracker.wait_for_receipt(tx_hash(1), timeout=5)
+        return receipt, chain, tracker.to_dict()
+
+    receipt, chain, state = asyncio.run(with_chain(scenario, ws_url="chain", poll_interval=0.05))
+
+    assert receipt["status"] == 1
+    assert chain.methods["eth_subscribe"] == 1
+    assert chain.methods["eth_blockNumber"] == 1  # the catch-up read after subscribing, then heads are pushed
+    assert state["source"] == "newHeads"
+
+
+def test_refused_subscription_falls_back_to_polling():
+    async def scenario(chain, tracker):
+        chain.submit(tx_hash(2), blocks=1)
+        receipt = await tracker.wait_for_receipt(tx_hash(2), timeout=5)
+        return receipt, chain, tracker.to_dict()
+
+    closed_port = free_port()
+    receipt, chain, state = asyncio.run(with_chain(
+        scenario, ws_url=f"ws://127.0.0.1:{closed_port}/ws", poll_interval=0.05
+    ))
+
+    assert receipt["status"] == 1
+    assert chain.methods["eth_blockNumber"] > 1
+    assert state["source"] == "poll"
+
+
+def test_reorg_before_the_confirmation_depth_moves_the_receipt():
+    reorgs_before = REGISTRY.get_sample_value("chain_reorgs_total") or 0
+
+    async def scenario(chain, tracker):
+        chain.submit(tx_hash(3), blocks=1)
+        waiter = asyncio.create_task(tracker.wait_for_receipt(tx_hash(3), timeout=5))
+        while tx_hash(3) not in tracker._entries or tracker._entries[tx_hash(3)].receipt is None:
+            await asyncio.sleep(0.01)
+        first = tracker._entries[tx_hash(3)].receipt
+        chain.reorg(tx_hash(3), blocks=2)
+        return first, await waiter
+
+    first, final = asyncio.run(with_chain(scenario, confirmations=4, poll_interval=0.02))
+
+    assert final["blockNumber"] > first["blockNumber"]
+    assert final["blockHash"] != first["blockHash"]
+    assert REGISTRY.get_sample_value("chain_reorgs_total") >= reorgs_before + 1
+
+
+def test_waiting_times_out_for_a_transaction_never_mined():
+    async def scenario(chain, tracker):
+        try:
+            await tracker.wait_for_receipt(tx_hash(4), timeout=0.3)
+        except asyncio.TimeoutError:
+            return tracker.pending_count
+        raise AssertionError("expected a timeout")
+
+    assert asyncio.run(with_chain(scenario, poll_interval=0.05)) == 0
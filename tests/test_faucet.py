@@ -0,0 +1,121 @@
+import asyncio
+import sqlite3
+import time
+
+from faucet import FaucetQueue
+
+ADDRESS = "0x00000000000000000000000000000000000000aA"
+
+
+class FakeHandle:
+    def __init__(self, tx_hash, mined):
+        self.tx_hash = tx_hash
+        self.mined = mined
+
+    async def wait(self):
+        await self.mined.wait()
+        return {"status": 1}
+
+
+def make_queue(db_path, mined, sent):
+    async def resolve_amounts(addresses):
+        return {address: {"USDC": (10**18, 1), "EURC": (10**18, 1)} for address in addresses}
+
+    async def submit_mints(mints):
+        sent.append(mints)
+        return [(FakeHandle(f"0x{len(sent):064x}", mined), list(range(len(mints))))]
+
+    return FaucetQueue(resolve_amounts, submit_mints, interval=0.05, db_path=db_path, poll_interval=0.05)
+
+
+def test_jobs_are_visible_and_deduplicated_across_workers(tmp_path):
+    db_path = str(tmp_path / "faucet_jobs.db")
+
+    async def scenario():
+        mined = asyncio.Event()
+        sent_a, sent_b = [], []
+        worker_a, worker_b = make_queue(db_path, mined, sent_a), make_queue(db_path, mined, sent_b)
+        try:
+            job, deduplicated = await worker_a.request(ADDRESS)
+            assert not deduplicated
+
+            # The other worker finds the job and refuses to mint again within the cooldown
+            seen = await worker_b.get(job.job_id)
+            again, deduplicated = await worker_b.request(ADDRESS)
+            assert seen.status == "queued"
+            assert deduplicated and again.job_id == job.job_id
+
+            waiter = asyncio.create_task(worker_b.wait(again, timeout=5))
+            await asyncio.sleep(0.2)
+            assert (await worker_b.get(job.job_id)).status == "submitted"
+            mined.set()
+            finished = await waiter
+            return finished, sent_a, sent_b
+        finally:
+            await worker_a.stop()
+            await worker_b.stop()
+
+    finished, sent_a, sent_b = asyncio.run(scenario())
+
+    assert finished.status == "minted"
+    assert set(finished.results) == {"USDC", "EURC"}
+    assert all(result["success"] for result in finished.results.values())
+    assert len(sent_a) == 1 and sent_b == []
+
+
+def test_job_of_a_dead_worker_does_not_block_the_address(tmp_path):
+    db_path = str(tmp_path / "faucet_jobs.db")
+
+    async def scenario():
+        mined = asyncio.Event()
+        dead = make_queue(db_path, mined, [])
+        job, _ = await dead.request(ADDRESS)
+        await dead.stop()  # died before flushing
+
+        live = make_queue(db_path, mined, [])
+        live.pending_timeout = 0
+        try:
+            return job, await live.request(ADDRESS)
+        finally:
+            await live.stop()
+
+    job, (retry, deduplicated) = asyncio.run(scenario())
+
+    assert not deduplicated
+    assert retry.job_id != job.job_id
+
+
+def test_claim_waits_for_the_write_lock_off_the_event_loop(tmp_path):
+    db_path = str(tmp_path / "faucet_jobs.db")
+
+    async def scenario():
+        worker = make_queue(db_path, asyncio.Event(), [])
+        await worker.get("warm-up")  # creates the file
+        other = sqlite3.connect(db_path, isolation_level=None)
+        other.execute("BEGIN IMMEDIATE")  # another worker holds the write lock
+
+        ticks = []
+
+        async def ticker():
+            while True:
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.01)
+
+        clock = asyncio.create_task(ticker())
+        request = asyncio.create_task(worker.request(ADDRESS))
+        await asyncio.sleep(0.3)
+        other.execute("COMMIT")
+        try:
+            job, deduplicated = await request
+        finally:
+            clock.cancel()
+            other.close()
+            await worker.stop()
+        return job, deduplicated, ticks
+
+    job, deduplicated, ticks = asyncio.run(scenario())
+
+    assert not deduplicated and job.status == "queued"
+    # The loop kept running while the claim waited for the lock
+    assert len(ticks) >= 20
+    assert max(b - a for a, b in zip(ticks, ticks[1:])) < 0.1
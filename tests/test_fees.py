@@ -0,0 +1,43 @@
+import asyncio
+
+from fees import GasEstimateCache
+
+REBALANCE = bytes.fromhex("a1b2c3d4")
+FULFILL = bytes.fromhex("0badf00d")
+
+
+class FakeFunction:
+    """Contract function whose estimate is whatever `gas` currently is."""
+
+    address = "0x" + "11" * 20
+
+    def __init__(self, gas):
+        self.gas = gas
+        self.estimates = 0
+
+    async def estimate_gas(self, transaction):
+        self.estimates += 1
+        return self.gas
+
+
+def test_uncached_selectors_are_estimated_on_every_send():
+    cache = GasEstimateCache(margin=1.0, buffer=0, uncached=[REBALANCE])
+    rebalance = FakeFunction(40000)
+    fulfill = FakeFunction(60000)
+    rebalance_data = "0x" + (REBALANCE + (25).to_bytes(32, "big")).hex()
+    fulfill_data = "0x" + (FULFILL + (25).to_bytes(32, "big")).hex()
+
+    async def scenario():
+        limits = [await cache.gas_limit(rebalance, rebalance_data, "0xsender")]
+        rebalance.gas = 110000  # same calldata size, but now the branch that mints and burns
+        limits.append(await cache.gas_limit(rebalance, rebalance_data, "0xsender"))
+        await cache.gas_limit(fulfill, fulfill_data, "0xsender")
+        await cache.gas_limit(fulfill, fulfill_data, "0xsender")
+        return limits
+
+    limits = asyncio.run(scenario())
+
+    assert limits == [40000, 110000]
+    assert rebalance.estimates == 2
+    assert fulfill.estimates == 1
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 1, "bypassed": 2}
@@ -0,0 +1,61 @@
+"""/kalshi/market: compact payload, fields= projection and include=markets."""
+import pytest
+
+from conftest import asgi_get, kalshi_event
+from kalshi_client import market_snapshot, select_event
+
+
+@pytest.fixture
+def snapshot(main_module, monkeypatch):
+    market = market_snapshot(select_event(kalshi_event(1.16, markets=40)["events"]))
+
+    async def latest():
+        return market
+
+    monkeypatch.setattr(main_module, "get_market_snapshot", latest)
+    return market
+
+
+def test_compact_payload_matches_the_documented_model(main_module, run, snapshot):
+    response = asgi_get(main_module, run, "/kalshi/market")
+
+    assert response.status_code == 200
+    body = main_module.KalshiMarketResponse.model_validate_json(response.content)
+    assert body.success
+    assert body.market.ticker == snapshot["ticker"]
+    assert body.market.event.event_ticker == "KXEURUSD-30JAN0110"
+    assert "markets" not in response.json()["market"]["event"]
+
+
+def test_fields_keeps_only_the_selected_fields(main_module, run, snapshot):
+    response = asgi_get(main_module, run, "/kalshi/market", params={"fields": "price, probability,event"})
+
+    assert response.status_code == 200
+    market = response.json()["market"]
+    assert set(market) == {"price", "probability", "event"}
+    assert market["price"] == snapshot["price"]
+
+
+def test_unknown_fields_are_rejected(main_module, run, snapshot):
+    response = asgi_get(main_module, run, "/kalshi/market", params={"fields": "price,volume,markets"})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Unknown fields: markets, volume"
+
+
+def test_unknown_include_is_rejected(main_module, run, snapshot):
+    response = asgi_get(main_module, run, "/kalshi/market", params={"include": "orderbook"})
+
+    assert response.status_code == 400
+
+
+def test_include_markets_adds_the_raw_markets_gzipped(main_module, run, snapshot):
+    response = asgi_get(
+        main_module, run, "/kalshi/market", params={"include": "markets"}, headers={"Accept-Encoding": "gzip"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    body = main_module.KalshiMarketResponse.model_validate_json(response.content)
+    assert body.market.event.markets == snapshot["event"]["markets"]
+    assert response.num_bytes_downloaded < len(response.content) / 3
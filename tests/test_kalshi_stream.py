@@ -0,0 +1,137 @@
+import asyncio
+import json
+
+import pytest
+
+import kalshi_stream
+from kalshi_stream import EventBook, KalshiStream, SequenceGap, serve_replay
+from conftest import free_port, kalshi_event
+
+
+def snapshot(seq, ticker, yes, no=()):
+    return {"type": "orderbook_snapshot", "sid": 1, "seq": seq,
+            "msg": {"market_ticker": ticker, "yes": [list(level) for level in yes], "no": [list(level) for level in no]}}
+
+
+def delta(seq, ticker, price, change, side="yes"):
+    return {"type": "orderbook_delta", "sid": 1, "seq": seq,
+            "msg": {"market_ticker": ticker, "price": price, "delta": change, "side": side}}
+
+
+@pytest.fixture
+def event():
+    return kalshi_event(1.16)["events"][0]
+
+
+def test_deltas_in_sequence_are_applied(event):
+    ticker = event["markets"][0]["ticker"]
+    stream = KalshiStream()
+    stream.event_book = EventBook(event)
+
+    stream.handle_message(snapshot(1, ticker, [(40, 10)]))
+    stream.handle_message(delta(2, ticker, 45, 3))
+
+    assert stream.event_book.books[ticker].yes_bid == 45
+
+
+def test_seq_gap_raises_and_marks_stream_unhealthy(event):
+    ticker = event["markets"][0]["ticker"]
+    stream = KalshiStream()
+    stream.event_book = EventBook(event)
+    stream.connected = True
+    stream.handle_message(snapshot(1, ticker, [(40, 10)]))
+
+    with pytest.raises(SequenceGap):
+        stream.handle_message(delta(3, ticker, 90, 1))
+
+    assert stream.event_book.books[ticker].yes_bid == 40  # the delta after the gap was not applied
+    assert not stream.healthy
+    assert stream.latest() is None  # callers fall back to REST
+
+
+def test_gap_resubscribes_and_rebuilds_books(event, tmp_path, monkeypatch):
+    ticker = event["markets"][0]["ticker"]
+    recording = tmp_path / "ws.jsonl"
+    recording.write_text("".join(json.dumps(m) + "\n" for m in [
+        snapshot(1, ticker, [(40, 10)]),
+        delta(2, ticker, 40, 5),
+        delta(4, ticker, 90, 1),  # seq 3 was dropped
+    ]))
+
+    async def get_events(series_ticker):
+        return {"events": [event]}
+
+    monkeypatch.setattr(kalshi_stream, "get_events", get_events)
+
+    async def scenario():
+        port = free_port()
+        server = asyncio.create_task(serve_replay(recording, "127.0.0.1", port, speed=0))
+        stream = KalshiStream(url=f"ws://127.0.0.1:{port}")
+        await asyncio.sleep(0.2)
+        stream.start()
+        try:
+            for _ in range(100):
+                if stream.gaps >= 2:
+                    break
+                await asyncio.sleep(0.05)
+            return stream
+        finally:
+            await stream.stop()
+            server.cancel()
+            await asyncio.gather(server, return_exceptions=True)
+
+    stream = asyncio.run(scenario())
+
+    # The same gap on every connection: each one was detected and led to a new subscription
+    assert stream.gaps >= 2
+    assert stream.messages >= 6
+    book = stream.event_book.books[ticker]
+    assert book.yes == {40: 15}
+
+
+def load_books(stream, event):
+    for seq, market in enumerate(event["markets"], start=1):
+        stream.handle_message(snapshot(seq, market["ticker"], [(market["yes_bid"], 10)], [(market["no_bid"], 10)]))
+
+
+def test_listeners_follow_the_published_value_not_only_the_leader(event):
+    stream = KalshiStream()  # value_fn defaults to snapshot_price under ORACLE_PRICE_SOURCE=expected
+    stream.event_book = EventBook(event)
+    leader = stream.event_book.leader
+    notified = []
+    stream.listeners.append(notified.append)
+
+    load_books(stream, event)
+
+    # Every snapshot moved the expected price while the leader stayed put
+    assert stream.event_book.leader == leader
+    assert len(notified) == len(event["markets"])
+    assert notified[-1] is stream.event_book.latest()
+
+    # More size at the same best bid leaves the value unchanged
+    ticker = event["markets"][0]["ticker"]
+    stream.handle_message(delta(len(event["markets"]) + 1, ticker, event["markets"][0]["yes_bid"], 5))
+    assert len(notified) == len(event["markets"])
+
+
+def test_latest_is_built_once_per_delta(event, monkeypatch):
+    import market_distribution
+
+    calls = []
+    summarize = market_distribution.summarize_markets
+    monkeypatch.setattr(market_distribution, "summarize_markets", lambda markets: calls.append(1) or summarize(markets))
+    stream = KalshiStream()
+    stream.event_book = EventBook(event)
+    stream.connected = True
+    stream.listeners.append(lambda market: None)
+    ticker = event["markets"][0]["ticker"]
+
+    stream.handle_message(snapshot(1, ticker, [(40, 10)]))
+    first = stream.latest()
+    assert stream.latest() is first
+    assert len(calls) == 1
+
+    stream.handle_message(delta(2, ticker, 41, 1))
+    assert stream.latest() is not first
+    assert stream.latest() is stream.event_book.latest()
+    assert len(calls) == 2
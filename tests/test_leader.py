@@ -0,0 +1,40 @@
+import asyncio
+
+from leader import SQLiteLease
+
+
+def test_renew_keeps_but_never_takes_the_lease(tmp_path):
+    db_path = str(tmp_path / "lease.db")
+
+    async def scenario():
+        first = SQLiteLease(db_path, ttl=0.2, owner_id="first")
+        second = SQLiteLease(db_path, ttl=0.2, owner_id="second")
+        results = {"first_acquires": await first.acquire(), "second_renews_held": await second.renew()}
+
+        await asyncio.sleep(0.1)
+        results["first_renews"] = await first.renew()
+        await asyncio.sleep(0.15)
+        # Renewed above, so still held 0.25 s after the first acquire
+        results["second_acquires_held"] = await second.acquire()
+
+        await asyncio.sleep(0.25)
+        results["second_acquires_expired"] = await second.acquire()
+        results["first_renews_lost"] = await first.renew()
+        return results
+
+    assert asyncio.run(scenario()) == {
+        "first_acquires": True,
+        "second_renews_held": False,
+        "first_renews": True,
+        "second_acquires_held": False,
+        "second_acquires_expired": True,
+        "first_renews_lost": False,
+    }
+
+
+def test_lease_file_is_created_on_first_use(tmp_path):
+    lease = SQLiteLease(str(tmp_path / "lease.db"))
+    assert not (tmp_path / "lease.db").exists()
+
+    assert asyncio.run(lease.acquire())
+    assert (tmp_path / "lease.db").exists()
@@ -0,0 +1,94 @@
+import asyncio
+
+from live_updates import Broadcaster
+from conftest import free_port
+
+
+def test_new_clients_get_the_latest_event_of_each_type():
+    broadcaster = Broadcaster()
+    broadcaster.publish("market", {"price": 1})
+    broadcaster.publish("market", {"price": 2})
+    broadcaster.publish("oracle", {"value": 86000})
+
+    queue = broadcaster.subscribe()
+
+    messages = [queue.get_nowait() for _ in range(queue.qsize())]
+    assert messages == [b'event: market\ndata: {"price":2}\n\n', b'event: oracle\ndata: {"value":86000}\n\n']
+
+
+def test_slow_client_drops_its_oldest_events_only():
+    broadcaster = Broadcaster(queue_size=2)
+    slow, fast = broadcaster.subscribe(), broadcaster.subscribe()
+
+    for i in range(3):
+        broadcaster.publish("market", {"i": i})
+        fast.get_nowait()
+
+    assert [slow.get_nowait() for _ in range(slow.qsize())] == [
+        b'event: market\ndata: {"i":1}\n\n', b'event: market\ndata: {"i":2}\n\n'
+    ]
+    assert broadcaster.dropped == 1
+
+
+def test_identical_events_are_published_once():
+    broadcaster = Broadcaster()
+    queue = broadcaster.subscribe()
+
+    broadcaster.publish("market", {"price": 1})
+    broadcaster.publish("market", {"price": 1})
+
+    assert queue.qsize() == 1
+    assert broadcaster.published == 1
+
+
+def test_fan_out_benchmark_reaches_every_client():
+    from replay import load_stream
+
+    result = asyncio.run(load_stream(clients=50, events=5, interval=0.02, port=free_port()))
+
+    assert result["deliveries_missing"] == 0
+    assert result["dropped_by_server"] == 0
+    assert result["fan_out_ms"]["p99"] < 5000
+
+
+def test_producer_runs_only_while_clients_are_connected():
+    runs = []
+
+    async def producer():
+        runs.append("started")
+        try:
+            while True:
+                broadcaster.publish("market", {"run": len(runs)})
+                await asyncio.sleep(0.01)
+        finally:
+            runs.append("stopped")
+
+    broadcaster = Broadcaster(producer=producer)
+
+    async def scenario():
+        await asyncio.sleep(0.03)
+        idle = list(runs)
+
+        first, second = broadcaster.subscribe(), broadcaster.subscribe()
+        message = await asyncio.wait_for(first.get(), timeout=1)
+        broadcaster.unsubscribe(first)
+        still_producing = broadcaster.producing
+        broadcaster.unsubscribe(second)
+        await asyncio.sleep(0.03)
+        after_last = list(runs)
+
+        # A new client gets the last event at once and restarts the producer
+        third = broadcaster.subscribe()
+        replayed = third.get_nowait()
+        await asyncio.sleep(0)
+        await broadcaster.stop()
+        return idle, message, still_producing, after_last, replayed
+
+    idle, message, still_producing, after_last, replayed = asyncio.run(scenario())
+    assert idle == []
+    assert message == b'event: market\ndata: {"run":1}\n\n'
+    assert still_producing
+    assert after_last == ["started", "stopped"]
+    assert replayed == message
+    assert runs == ["started", "stopped", "started", "stopped"]
+    assert not broadcaster.producing
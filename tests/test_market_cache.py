@@ -0,0 +1,124 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import market_cache
+from market_cache import SingleFlightCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(market_cache, "time", SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+class Loader:
+    """Loader returning 1, 2, 3, ... or raising while `failing` is set."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+        self.failing = False
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.failing:
+            raise RuntimeError("upstream down")
+        return self.calls
+
+
+async def settle():
+    """Let background refresh tasks run to completion."""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_concurrent_misses_share_one_load(clock):
+    cache = SingleFlightCache(ttl=10, stale_ttl=60)
+    loader = Loader(delay=0.05)
+
+    async def scenario():
+        return await asyncio.gather(*(cache.get("KXEURUSD", loader) for _ in range(20)))
+
+    assert asyncio.run(scenario()) == [1] * 20
+    assert loader.calls == 1
+    assert cache.stats["misses"] == 1
+    assert cache.stats["coalesced"] == 19
+
+
+def test_failed_load_reaches_every_waiter_and_is_not_cached(clock):
+    cache = SingleFlightCache(ttl=10, stale_ttl=60)
+    loader = Loader(delay=0.05)
+    loader.failing = True
+
+    async def scenario():
+        results = await asyncio.gather(*(cache.get("KXEURUSD", loader) for _ in range(5)), return_exceptions=True)
+        loader.failing = False
+        return results, await cache.get("KXEURUSD", loader)
+
+    results, value = asyncio.run(scenario())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    # A miss with nothing to serve retries straight away
+    assert value == 2
+    assert cache.stats["errors"] == 1
+
+
+def test_stale_value_is_served_while_one_refresh_runs(clock):
+    cache = SingleFlightCache(ttl=10, stale_ttl=60)
+    loader = Loader()
+
+    async def scenario():
+        first = await cache.get("KXEURUSD", loader)
+        clock.now += 15
+        stale = await asyncio.gather(*(cache.get("KXEURUSD", loader) for _ in range(5)))
+        await settle()
+        return first, stale, await cache.get("KXEURUSD", loader)
+
+    assert asyncio.run(scenario()) == (1, [1] * 5, 2)
+    assert loader.calls == 2
+    assert cache.stats["refreshes"] == 1
+    assert cache.stats["stale_served"] == 5
+
+
+def test_failed_refresh_backs_off_before_retrying(clock):
+    cache = SingleFlightCache(ttl=10, stale_ttl=600, retry_backoff=1, max_retry_backoff=4)
+    loader = Loader()
+
+    async def get():
+        value = await cache.get("KXEURUSD", loader)
+        await settle()
+        return value
+
+    async def scenario():
+        await get()
+        loader.failing = True
+        clock.now += 15
+        calls = []
+        # Failed refreshes are retried after 1, 2, 4, then at most 4 seconds
+        for step in [0, 0.5, 0.5, 1, 1, 1, 1, 2, 2, 4]:
+            clock.now += step
+            assert await get() == 1  # stale value keeps being served
+            calls.append(loader.calls)
+        loader.failing = False
+        clock.now += 4
+        assert await get() == 1  # starts the refresh that succeeds
+        refreshed = await get()
+        clock.now += 10.5  # stale again: no backoff left over from the failures
+        assert await get() == 7
+        return calls, refreshed, await get()
+
+    calls, refreshed, latest = asyncio.run(scenario())
+    assert calls == [2, 2, 3, 3, 4, 4, 4, 5, 5, 6]
+    assert (refreshed, latest) == (7, 8)
+    assert cache.stats["errors"] == 5
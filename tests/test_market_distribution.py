@@ -0,0 +1,49 @@
+import numpy as np
+
+from market_distribution import distribution, mid_prices, summarize_events, summarize_markets
+
+
+def market(floor, bid, ask):
+    return {"floor_strike": floor, "cap_strike": floor + 0.01, "yes_bid": bid, "yes_ask": ask}
+
+
+def test_mid_prices_need_a_bid():
+    bids = np.array([40, 40, 0, 0])
+    asks = np.array([50, 0, 30, 0])
+
+    assert mid_prices(bids, asks).tolist() == [45, 40, 0, 0]
+
+
+def test_ask_only_market_gets_no_weight():
+    markets = [market(1.15, 40, 42), market(1.16, 0, 90)]
+
+    summary = summarize_markets(markets)
+
+    assert summary["expected_price"] == 1.155
+    assert summary["mode_price"] == 1.155
+
+
+def test_event_quoted_only_on_the_ask_has_no_summary():
+    assert summarize_markets([market(1.15, 0, 5), market(1.16, 0, 7)]) is None
+
+
+def test_batch_matches_single_event():
+    events = [
+        {"markets": [market(1.15, 40, 42), market(1.16, 20, 24), market(1.17, 0, 3)]},
+        {"markets": [market(1.10, 10, 12)]},
+    ]
+
+    batch = summarize_events(events)
+
+    for row, event in enumerate(events):
+        single = summarize_markets(event["markets"])
+        assert round(float(batch["expected"][row]), 5) == single["expected_price"]
+        assert round(float(batch["median"][row]), 5) == single["median_price"]
+
+
+def test_distribution_probabilities_sum_to_one():
+    strikes = np.array([1.15, 1.16, 1.17])
+    result = distribution(strikes, np.array([10, 30, 0]), np.array([12, 0, 8]))
+
+    assert np.isclose(result["probabilities"].sum(), 1.0)
+    assert result["probabilities"][0, 2] == 0
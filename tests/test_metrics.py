@@ -0,0 +1,97 @@
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from prometheus_client import REGISTRY
+from prometheus_client.parser import text_string_to_metric_families
+from web3 import AsyncWeb3
+
+from call_encoder import FunctionEncoder
+from confirmations import ConfirmationTracker
+from conftest import asgi_get, free_port
+from metrics import HTTPMetricsMiddleware
+from replay import StubChain, start_app
+from rpc_pool import RPCPool
+from tx_manager import TransactionManager
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_streaming_responses_are_recorded_as_connections():
+    app = FastAPI()
+    app.add_middleware(HTTPMetricsMiddleware)
+
+    @app.get("/metrics-test/items/{item}")
+    async def item(item: int):
+        return {"item": item}
+
+    @app.get("/metrics-test/events")
+    async def events():
+        async def body():
+            for i in range(3):
+                await asyncio.sleep(0.05)
+                yield f"data: {i}\n\n"
+        return StreamingResponse(body(), media_type="text/event-stream")
+
+    requests_before = sample("http_request_seconds_count", method="GET", route="/metrics-test/items/{item}", status="200")
+    streams_before = sample("http_stream_connection_seconds_count", route="/metrics-test/events")
+    stream_time_before = sample("http_stream_connection_seconds_sum", route="/metrics-test/events")
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            assert (await http.get("/metrics-test/items/1")).status_code == 200
+            assert (await http.get("/metrics-test/items/2")).status_code == 200
+            assert (await http.get("/metrics-test/events")).text.count("data:") == 3
+
+    asyncio.run(scenario())
+
+    assert sample("http_request_seconds_count", method="GET", route="/metrics-test/items/{item}", status="200") == requests_before + 2
+    # The event stream is not a request latency sample...
+    assert sample("http_request_seconds_count", method="GET", route="/metrics-test/events", status="200") == 0
+    # ...but a connection lifetime, and no longer open
+    assert sample("http_stream_connection_seconds_count", route="/metrics-test/events") == streams_before + 1
+    assert sample("http_stream_connection_seconds_sum", route="/metrics-test/events") - stream_time_before >= 0.15
+    assert sample("http_streams_open", route="/metrics-test/events") == 0
+
+
+def test_exposition_has_rpc_and_tx_histograms_after_a_transaction(main_module, run):
+    async def send():
+        chain = StubChain(block_time=0.05)
+        port = free_port()
+        runner = await start_app(chain.app(), "127.0.0.1", port)
+        w3 = AsyncWeb3(RPCPool([f"http://127.0.0.1:{port}"]))
+        # Hardhat's first default account
+        tx_manager = TransactionManager(
+            w3, "0xac0974bec39a17e36ba4a6b4d238ff944bacb478cbed5efcae784d7bf4f2ff80",
+            tracker=ConfirmationTracker(w3, poll_interval=0.05)
+        )
+        try:
+            handle = await tx_manager.submit(FunctionEncoder(w3, main_module.treasury_contract, "reBalance")(55))
+            return await handle.wait(5)
+        finally:
+            await tx_manager.stop()
+            await w3.provider.disconnect()
+            await runner.cleanup()
+
+    receipt = run(send())
+    response = asgi_get(main_module, run, "/metrics")
+
+    assert receipt["status"] == 1
+    assert response.status_code == 200
+    families = {family.name: family for family in text_string_to_metric_families(response.text)}
+
+    def count(name, **labels):
+        return sum(
+            s.value for s in families[name].samples
+            if s.name == f"{name}_count" and all(s.labels.get(k) == v for k, v in labels.items())
+        )
+
+    for call in ("chain_id", "fee_history", "estimate_gas", "get_transaction_count", "send_raw_transaction",
+                 "block_number", "receipt_batch", "receipt_wait"):
+        assert count("rpc_call_seconds", call=call) >= 1, call
+    assert count("tx_gas_used", function="reBalance") >= 1
+    assert any(s.labels.get("outcome") == "success" for s in families["rpc_endpoint_requests"].samples)
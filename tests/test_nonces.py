@@ -0,0 +1,108 @@
+import asyncio
+import multiprocessing
+
+from nonces import LocalNonces, SQLiteNonces
+
+ADDRESS = "0x00000000000000000000000000000000000000aA"
+
+
+def allocate_many(db_path, count, start_nonce, results):
+    async def chain_nonce():
+        return start_nonce
+
+    async def run():
+        nonces = SQLiteNonces(db_path)
+        return [await nonces.allocate(ADDRESS, chain_nonce) for _ in range(count)]
+
+    results.extend(asyncio.run(run()))
+
+
+def test_processes_sharing_a_file_never_reuse_a_nonce(tmp_path):
+    db_path = str(tmp_path / "nonces.db")
+    context = multiprocessing.get_context("spawn")
+    with context.Manager() as manager:
+        results = manager.list()
+        workers = [context.Process(target=allocate_many, args=(db_path, 200, 7, results)) for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(timeout=60)
+        allocated = sorted(results)
+
+    assert allocated == list(range(7, 7 + 800))
+
+
+def test_reset_follows_the_chain_forwards(tmp_path):
+    chain = {"pending": 3}
+
+    async def chain_nonce():
+        return chain["pending"]
+
+    async def scenario():
+        nonces = SQLiteNonces(str(tmp_path / "nonces.db"))
+        first = [await nonces.allocate(ADDRESS, chain_nonce) for _ in range(2)]
+        chain["pending"] = 10  # another sender used the key
+        still_counting = await nonces.allocate(ADDRESS, chain_nonce)
+        await nonces.reset(ADDRESS, still_counting, chain_nonce)
+        return first, still_counting, await nonces.allocate(ADDRESS, chain_nonce)
+
+    assert asyncio.run(scenario()) == ([3, 4], 5, 10)
+
+
+def test_reset_reuses_the_failed_nonce_when_nothing_was_allocated_since(tmp_path):
+    async def chain_nonce():
+        return 3
+
+    async def scenario():
+        nonces = SQLiteNonces(str(tmp_path / "nonces.db"))
+        failed = await nonces.allocate(ADDRESS, chain_nonce)
+        await nonces.reset(ADDRESS, failed, chain_nonce)
+        return failed, await nonces.allocate(ADDRESS, chain_nonce)
+
+    assert asyncio.run(scenario()) == (3, 3)
+
+
+def test_reset_never_hands_out_a_nonce_another_process_holds(tmp_path):
+    db_path = str(tmp_path / "nonces.db")
+
+    async def chain_nonce():
+        return 3  # neither process has broadcast anything yet
+
+    async def scenario():
+        a, b = SQLiteNonces(db_path), SQLiteNonces(db_path)
+        a_nonce = await a.allocate(ADDRESS, chain_nonce)
+        b_nonce = await b.allocate(ADDRESS, chain_nonce)  # reserved, not broadcast yet
+        await a.reset(ADDRESS, a_nonce, chain_nonce)  # A's send failed
+        return a_nonce, b_nonce, [await a.allocate(ADDRESS, chain_nonce), await b.allocate(ADDRESS, chain_nonce)]
+
+    a_nonce, b_nonce, later = asyncio.run(scenario())
+
+    assert (a_nonce, b_nonce) == (3, 4)
+    assert later == [5, 6]
+
+
+def test_idle_counter_follows_the_chain_backwards(tmp_path):
+    chain = {"pending": 50}
+
+    async def chain_nonce():
+        return chain["pending"]
+
+    async def scenario():
+        nonces = SQLiteNonces(str(tmp_path / "nonces.db"), idle_resync=0.1)
+        before = await nonces.allocate(ADDRESS, chain_nonce)
+        chain["pending"] = 0  # local node restarted
+        await asyncio.sleep(0.2)
+        return before, await nonces.allocate(ADDRESS, chain_nonce)
+
+    assert asyncio.run(scenario()) == (50, 0)
+
+
+def test_local_nonces_count_up_from_the_chain():
+    async def chain_nonce():
+        return 4
+
+    async def scenario():
+        nonces = LocalNonces()
+        return [await nonces.allocate(ADDRESS, chain_nonce) for _ in range(3)]
+
+    assert asyncio.run(scenario()) == [4, 5, 6]
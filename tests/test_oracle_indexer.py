@@ -0,0 +1,165 @@
+import asyncio
+
+from conftest import asgi_get
+from oracle_indexer import SQLITE_MAX_INT, OracleIndexer
+
+
+class Call:
+    def __init__(self, result, delay=0.0, log=None, name=None):
+        self.result, self.delay, self.log, self.name = result, delay, log, name
+
+    async def call(self):
+        self.log.append(self.name)
+        await asyncio.sleep(self.delay)
+        return self.result
+
+
+class FakeOracle:
+    """Contract stand-in with nextIndexDataPoint and getDataPoints, logging every read."""
+
+    def __init__(self, count, delay=0.05):
+        self.points = [("0x" + "11" * 20, 1_700_000_000 + i, 100 + i, 86000 + i, 1_700_086_400 + i) for i in range(count)]
+        self.delay = delay
+        self.reads = []
+        self.functions = self
+
+    def nextIndexDataPoint(self):
+        return Call(len(self.points), self.delay, self.reads, "nextIndexDataPoint")
+
+    def getDataPoints(self, start, count):
+        return Call(self.points[start:start + count], self.delay, self.reads, "getDataPoints")
+
+
+def test_concurrent_syncs_share_one_read():
+    oracle = FakeOracle(250)
+
+    async def scenario():
+        indexer = OracleIndexer(None, oracle, db_path=":memory:", range_size=100)
+        added = await asyncio.gather(*(indexer.sync() for _ in range(20)))
+        return added, indexer.count
+
+    added, count = asyncio.run(scenario())
+
+    assert added == [250] * 20
+    assert count == 250
+    assert oracle.reads.count("nextIndexDataPoint") == 1
+    assert oracle.reads.count("getDataPoints") == 3
+
+
+def test_reads_past_the_newest_point_are_served_from_the_index():
+    oracle = FakeOracle(10, delay=0)
+
+    async def scenario():
+        indexer = OracleIndexer(None, oracle, db_path=":memory:")
+        await indexer.sync()
+        reads_after_sync = len(oracle.reads)
+        for _ in range(50):
+            await indexer.ensure_indexed(10 + 100)  # e.g. /oracle/data?start=10&count=100
+        cached_reads = len(oracle.reads) - reads_after_sync
+
+        oracle.points.append(("0x" + "22" * 20, 1, 2, 3, 4))
+        indexer.synced_at -= 10  # the index is stale now
+        added = await indexer.ensure_indexed(11)
+        return cached_reads, added, indexer.get_data_point(10)
+
+    cached_reads, added, newest = asyncio.run(scenario())
+
+    assert cached_reads == 0
+    assert added == 1
+    assert newest["value"] == 3
+
+
+def test_indexed_range_needs_no_sync():
+    oracle = FakeOracle(5, delay=0)
+
+    async def scenario():
+        indexer = OracleIndexer(None, oracle, db_path=":memory:")
+        await indexer.sync()
+        oracle.reads.clear()
+        indexer.synced_at -= 10
+        await indexer.ensure_indexed(5)
+        return [point["index"] for point in indexer.get_slice(2, 10)]
+
+    assert asyncio.run(scenario()) == [2, 3, 4]
+    assert oracle.reads == []
+
+
+def test_sync_fills_the_gaps_a_backfill_left():
+    oracle = FakeOracle(10, delay=0)
+
+    async def scenario():
+        indexer = OracleIndexer(None, oracle, db_path=":memory:")
+        # e.g. a failed eth_getLogs chunk: 3-4 missing, and nothing logged after 6
+        indexer.db.executemany(
+            "INSERT INTO data_points VALUES (?, ?, ?, ?, ?, ?)",
+            [(i, *oracle.points[i]) for i in (0, 1, 2, 5, 6)]
+        )
+        count_before = indexer.count
+        added = await indexer.sync()
+        return count_before, added, indexer.count, [point["index"] for point in indexer.get_slice(0, 10)]
+
+    count_before, added, count, indices = asyncio.run(scenario())
+
+    assert count_before == 3
+    assert added == 5
+    assert count == 10
+    assert indices == list(range(10))
+    assert oracle.reads.count("getDataPoints") == 2  # only the two holes
+
+
+def test_latest_timestamp_outlives_the_database():
+    oracle = FakeOracle(3, delay=0)
+
+    async def scenario():
+        indexer = OracleIndexer(None, oracle, db_path=":memory:")
+        await indexer.sync()
+        await indexer.stop()  # e.g. a /metrics scrape during shutdown
+        return indexer.latest_timestamp()
+
+    assert asyncio.run(scenario()) == oracle.points[-1][1]
+
+
+def test_series_open_and_close_stay_inside_the_range():
+    oracle = FakeOracle(10, delay=0)
+
+    async def scenario():
+        indexer = OracleIndexer(None, oracle, db_path=":memory:")
+        await indexer.sync()
+        first = oracle.points[0][1]
+        # All ten points share one hour bucket; the range cuts it to points 3-6
+        return indexer.get_series(3600, first + 3, first + 6)
+
+    (bucket,) = asyncio.run(scenario())
+
+    assert bucket["count"] == 4
+    assert (bucket["open"], bucket["close"]) == (86003, 86006)
+    assert (bucket["low"], bucket["high"]) == (86003, 86006)
+
+
+def test_out_of_range_integers_find_nothing():
+    oracle = FakeOracle(3, delay=0)
+
+    async def scenario():
+        indexer = OracleIndexer(None, oracle, db_path=":memory:")
+        await indexer.sync()
+        return (
+            indexer.get_data_point(2 ** 64),
+            indexer.get_data_point(-1),
+            indexer.get_slice(SQLITE_MAX_INT - 1, 5000),
+            [p["index"] for p in indexer.get_slice(1, 2 ** 70)],
+            indexer.get_range(2 ** 70, 2 ** 80),
+            len(indexer.get_range(0, 2 ** 80)),
+            indexer.get_series(3600, 2 ** 70),
+        )
+
+    assert asyncio.run(scenario()) == (None, None, [], [1, 2], [], 3, [])
+
+
+def test_oversized_integers_are_rejected_not_500(main_module, run):
+    huge = str(2 ** 64)
+
+    assert asgi_get(main_module, run, f"/oracle/data/{huge}").status_code == 422
+    for params in ({"start": huge}, {"from": huge}, {"to": huge}, {"start": "-1"}):
+        assert asgi_get(main_module, run, "/oracle/data", params=params).status_code == 422, params
+    assert asgi_get(main_module, run, "/oracle/series", params={"to": huge}).status_code == 422
+    assert asgi_get(main_module, run, "/oracle/series", params={"bucket": "9" * 20 + "d"}).status_code == 400
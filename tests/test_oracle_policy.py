@@ -0,0 +1,20 @@
+from oracle_policy import UpdatePolicy, simulate
+
+
+def test_simulate_only_checks_on_the_check_interval():
+    # The rate flips every 10 s, enough to trip a 0.5% deviation on every sample
+    series = [(t, 1.10 + 0.10 * (t // 10 % 2)) for t in range(0, 600, 10)]
+
+    every_sample = simulate(series, UpdatePolicy("deviation", 0.005, 3600), value_index=0)
+    every_70s = simulate(series, UpdatePolicy("deviation", 0.005, 3600), value_index=0, check_interval=70)
+
+    assert every_sample["transactions"] == len(series)
+    assert every_70s["transactions"] == 9
+
+
+def test_heartbeat_only_baseline_matches_a_fixed_timer():
+    series = [(t, 1.10) for t in range(0, 3600, 30)]
+
+    result = simulate(series, UpdatePolicy("fixed-300s", float("inf"), 300), check_interval=30)
+
+    assert result["reasons"] == {"initial": 1, "deviation": 0, "heartbeat": 11}
@@ -0,0 +1,199 @@
+"""RPCPool against stub JSON-RPC endpoints with injected latency and errors."""
+import asyncio
+import time
+
+from aiohttp import web
+from eth_utils import keccak
+from web3 import AsyncWeb3
+
+from conftest import free_port
+from replay import start_app
+from rpc_pool import RPCPool
+
+
+class StubNode:
+    """JSON-RPC endpoint answering eth_blockNumber/eth_chainId/eth_getTransactionCount/eth_sendRawTransaction."""
+
+    def __init__(self, block=100, latency=0.0, error=None, nonce=0, send_error=None):
+        self.block = block
+        self.latency = latency
+        self.error = error  # None, "http" (HTTP 500) or a JSON-RPC error code
+        self.nonce = nonce
+        self.send_error = send_error  # JSON-RPC error message for eth_sendRawTransaction
+        self.calls = []
+
+    def answer(self, call):
+        self.calls.append(call["method"])
+        if self.error is not None and self.error != "http":
+            return {"jsonrpc": "2.0", "id": call["id"], "error": {"code": self.error, "message": "stub error"}}
+        if call["method"] == "eth_sendRawTransaction" and self.send_error:
+            return {"jsonrpc": "2.0", "id": call["id"], "error": {"code": -32000, "message": self.send_error}}
+        result = {
+            "eth_blockNumber": hex(self.block),
+            "eth_chainId": "0x7a69",
+            "eth_getTransactionCount": hex(self.nonce),
+            "eth_sendRawTransaction": "0x" + "ab" * 32,
+        }[call["method"]]
+        return {"jsonrpc": "2.0", "id": call["id"], "result": result}
+
+    async def handle(self, request):
+        body = await request.json()
+        await asyncio.sleep(self.latency)
+        if self.error == "http":
+            return web.Response(status=500, text="stub failure")
+        if isinstance(body, list):
+            return web.json_response([self.answer(call) for call in body])
+        return web.json_response(self.answer(body))
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post("/", self.handle)
+        port = free_port()
+        self.runner = await start_app(app, "127.0.0.1", port)
+        self.url = f"http://127.0.0.1:{port}"
+        return self
+
+
+async def with_nodes(scenario, *nodes, **pool_kwargs):
+    nodes = [await node.start() for node in nodes]
+    pool_kwargs.setdefault("timeout", 5)
+    pool = RPCPool([node.url for node in nodes], **pool_kwargs)
+    try:
+        return await scenario(pool, *nodes)
+    finally:
+        await pool.disconnect()
+        for node in nodes:
+            await node.runner.cleanup()
+
+
+def test_rate_limited_endpoint_fails_over():
+    async def scenario(pool, limited, healthy):
+        # Both unscored: make the rate-limited one rank first
+        pool.endpoints[1].record_latency(1.0)
+        response = await pool.make_request("eth_blockNumber", [])
+        return response, pool.endpoints
+
+    response, (limited, healthy) = asyncio.run(with_nodes(scenario, StubNode(error=-32005), StubNode(block=7)))
+
+    assert response["result"] == hex(7)
+    assert limited.consecutive_failures == 1
+    assert healthy.consecutive_failures == 0
+
+
+def test_http_errors_put_an_endpoint_in_cooldown():
+    async def scenario(pool, broken, healthy):
+        pool.endpoints[1].record_latency(1.0)
+        for _ in range(3):
+            assert (await pool.make_request("eth_blockNumber", []))["result"] == hex(100)
+        calls_before = len(broken.calls)
+        await pool.make_request("eth_blockNumber", [])
+        return pool, broken, calls_before
+
+    pool, broken, calls_before = asyncio.run(with_nodes(scenario, StubNode(error="http"), StubNode()))
+
+    assert not pool.endpoints[0].available
+    assert pool.ranked()[0] is pool.endpoints[1]
+    assert len(broken.calls) == calls_before  # skipped while cooling down
+
+
+def test_slow_read_is_hedged_to_the_next_endpoint():
+    async def scenario(pool, slow, fast):
+        pool.endpoints[1].record_latency(1.0)  # the slow node ranks first
+        start = time.perf_counter()
+        response = await pool.make_request("eth_blockNumber", [])
+        return response, time.perf_counter() - start
+
+    response, elapsed = asyncio.run(with_nodes(
+        scenario, StubNode(block=1, latency=2.0), StubNode(block=2), default_hedge_delay=0.1
+    ))
+
+    assert response["result"] == hex(2)
+    assert elapsed < 1.0
+
+
+def test_writes_are_never_hedged():
+    async def scenario(pool, slow, fast):
+        pool.endpoints[1].record_latency(1.0)
+        await pool.make_request("eth_sendRawTransaction", ["0x00"])
+        return slow.calls, fast.calls
+
+    slow_calls, fast_calls = asyncio.run(with_nodes(
+        scenario, StubNode(latency=0.5), StubNode(), default_hedge_delay=0.05
+    ))
+
+    assert slow_calls == ["eth_sendRawTransaction"]
+    assert fast_calls == []
+
+
+def test_pending_nonce_reads_are_never_hedged():
+    async def scenario(pool, slow, lagging):
+        pool.endpoints[1].record_latency(1.0)  # the slow but up-to-date node ranks first
+        response = await pool.make_request("eth_getTransactionCount", ["0x" + "11" * 20, "pending"])
+        return response, lagging.calls
+
+    response, lagging_calls = asyncio.run(with_nodes(
+        scenario, StubNode(latency=0.3, nonce=8), StubNode(nonce=5), default_hedge_delay=0.05
+    ))
+
+    assert response["result"] == hex(8)
+    assert lagging_calls == []
+
+
+def test_already_known_after_a_timed_out_send_counts_as_sent():
+    raw = bytes.fromhex("02f86b827a690a")  # opaque to the stubs; only its hash matters
+
+    async def scenario(pool, accepted_then_timed_out, already_known):
+        pool.endpoints[1].record_latency(1.0)
+        # Through web3, as TransactionManager sends it
+        tx_hash = await AsyncWeb3(pool).eth.send_raw_transaction(raw)
+        return tx_hash, accepted_then_timed_out.calls, already_known.calls
+
+    tx_hash, first_calls, second_calls = asyncio.run(with_nodes(
+        scenario, StubNode(latency=1.0), StubNode(send_error="already known"), timeout=0.2
+    ))
+
+    assert first_calls == second_calls == ["eth_sendRawTransaction"]
+    assert tx_hash == keccak(raw)
+
+
+def test_other_send_errors_are_returned():
+    async def scenario(pool, node):
+        return await pool.make_request("eth_sendRawTransaction", ["0x00"])
+
+    response = asyncio.run(with_nodes(scenario, StubNode(send_error="nonce too low")))
+
+    assert response["error"]["message"] == "nonce too low"
+
+
+def test_immutable_answers_are_cached():
+    async def scenario(pool, node):
+        w3 = AsyncWeb3(pool)
+        chain_ids = [await w3.eth.chain_id for _ in range(5)]
+        return chain_ids, await w3.eth.block_number, node.calls
+
+    chain_ids, block, calls = asyncio.run(with_nodes(scenario, StubNode(block=42)))
+
+    assert chain_ids == [31337] * 5
+    assert block == 42
+    assert calls.count("eth_chainId") == 1
+
+
+def test_batches_fail_over_as_a_whole():
+    async def scenario(pool, broken, healthy):
+        pool.endpoints[1].record_latency(1.0)
+        return await pool.make_batch_request([("eth_blockNumber", []), ("eth_chainId", [])])
+
+    responses = asyncio.run(with_nodes(scenario, StubNode(error="http"), StubNode(block=9)))
+
+    assert [r["result"] for r in responses] == [hex(9), "0x7a69"]
+
+
+def test_health_check_records_block_numbers():
+    async def scenario(pool, first, second):
+        await pool.check_health()
+        return pool.status()
+
+    status = asyncio.run(with_nodes(scenario, StubNode(block=5), StubNode(block=6)))
+
+    assert sorted(s["block_number"] for s in status) == [5, 6]
+    assert all(s["available"] for s in status)
@@ -0,0 +1,91 @@
+"""Several scheduler.py processes sharing one lease: exactly one of them submits each cycle."""
+import asyncio
+import os
+import sqlite3
+import subprocess
+import sys
+import time
+
+import rlp
+
+from conftest import ROOT
+
+CHECK_INTERVAL = 2
+LEASE_TTL = 4
+
+
+def transaction_nonce(raw):
+    raw = bytes.fromhex(raw[2:])
+    if raw[0] >= 0xc0:
+        return int.from_bytes(rlp.decode(raw)[0], "big")
+    return int.from_bytes(rlp.decode(raw[1:])[1], "big")
+
+
+def lease_holder_pid(db_path):
+    row = sqlite3.connect(db_path).execute("SELECT owner FROM leases WHERE name = 'scheduler'").fetchone()
+    return int(row[0].split(":")[1]) if row else None
+
+
+def test_one_submission_per_cycle_across_processes(oracle_app, run, local_chain, kalshi_replay, rpc_proxy, tmp_path):
+    from replay import KALSHI_REPLAY_BASE, oracle_points
+
+    main = oracle_app
+    env = {
+        **os.environ,
+        **local_chain,
+        "RPC_URLS": rpc_proxy.url,
+        "KALSHI_API_URL": f"{kalshi_replay.url}{KALSHI_REPLAY_BASE}",
+        "KALSHI_CACHE_TTL": "0",
+        "KALSHI_INGEST_MODE": "poll",
+        "SCHEDULER_LEASE": f"sqlite:{tmp_path / 'lease.db'}",
+        "SCHEDULER_LEASE_TTL": str(LEASE_TTL),
+        "ORACLE_CHECK_INTERVAL": str(CHECK_INTERVAL),
+        # Every check is due, so the leader submits once per cycle
+        "ORACLE_HEARTBEAT": "0",
+        "REBALANCE_HEARTBEAT": "86400",
+        "BLOCK_POLL_INTERVAL": "0.2",
+        "NONCE_DB_PATH": str(tmp_path / "nonces.db"),
+        "IDEMPOTENCY_DB_PATH": str(tmp_path / "idempotency.db"),
+        "FAUCET_DB_PATH": str(tmp_path / "faucet_jobs.db"),
+    }
+    sent_before = len(rpc_proxy.raw_transactions)
+    schedulers = []
+    for i in range(3):
+        process_env = {**env, "ORACLE_DB_PATH": str(tmp_path / f"oracle_data_{i}.db")}
+        log = open(tmp_path / f"scheduler_{i}.log", "w")
+        schedulers.append(subprocess.Popen(
+            [sys.executable, "scheduler.py"], cwd=ROOT, env=process_env, stdout=log, stderr=subprocess.STDOUT
+        ))
+
+    try:
+        start = time.monotonic()
+        # The proxy and Kalshi replay run on the session loop, so wait on it
+        run(asyncio.sleep(15))
+        leader_pid = lease_holder_pid(str(tmp_path / "lease.db"))
+        first_phase = time.monotonic() - start
+        first_sent = len(rpc_proxy.raw_transactions)
+
+        # Kill the leader: another process takes over once the lease expires
+        leader = next(p for p in schedulers if p.pid == leader_pid)
+        leader.kill()
+        run(asyncio.sleep(LEASE_TTL + 3 * CHECK_INTERVAL + 4))
+    finally:
+        for process in schedulers:
+            process.terminate()
+        for process in schedulers:
+            process.wait(timeout=30)
+
+    raw = rpc_proxy.raw_transactions[sent_before:]
+    encoders = [main.fulfill_encoder, main.fulfill_batch_encoder]
+    points = oracle_points(raw[:first_sent - sent_before], encoders)
+    timestamps = sorted(timestamp for _, timestamp, _ in points)
+
+    # One leader: at most one point per check interval, never two in the same cycle
+    assert len(points) >= 3
+    assert len(points) <= first_phase / CHECK_INTERVAL + 1
+    assert len(set(timestamps)) == len(timestamps)
+    # Processes share the nonce counter, so no two transactions compete for a nonce
+    nonces = [transaction_nonce(tx) for tx in raw]
+    assert len(set(nonces)) == len(nonces)
+    # Failover: the new leader kept publishing
+    assert oracle_points(raw[first_sent - sent_before:], encoders)
@@ -0,0 +1,135 @@
+"""SnapshotArchive: record → flush → scan, day partitions, failed flushes and locked compaction."""
+import fcntl
+import os
+from datetime import datetime, timezone
+
+import pytest
+
+from conftest import kalshi_event
+from snapshot_archive import SnapshotArchive, scan
+
+pytest.importorskip("pyarrow")
+
+DAY1 = datetime(2020, 1, 1, tzinfo=timezone.utc).timestamp()
+DAY2 = DAY1 + 86400
+
+
+async def archive(archive, *snapshots):
+    """Record (fetched_at, markets) snapshots, flush them and stop the flush loop."""
+    for fetched_at, markets in snapshots:
+        archive.record("KXEURUSD", kalshi_event(1.16, markets=markets), fetched_at=fetched_at)
+    try:
+        return await archive.flush()
+    finally:
+        await archive.stop()
+
+
+def parts(root, day="2020-01-01"):
+    return sorted(f for f in os.listdir(os.path.join(root, f"date={day}")) if f.endswith(".parquet"))
+
+
+def fetched(root, **kwargs):
+    return [row["fetched_at"].timestamp() for row in scan(root, columns=["fetched_at"], **kwargs).to_pylist()]
+
+
+def write_parts(run, root, *fetched_at):
+    """One part file per snapshot for 2020-01-01, left uncompacted."""
+    for t in fetched_at:
+        writer = SnapshotArchive(root)
+        writer._compacted.add("2020-01-01")
+        run(archive(writer, (t, 2)))
+
+
+def test_recorded_snapshots_round_trip(run, tmp_path):
+    root = str(tmp_path)
+    body = kalshi_event(1.16, markets=5)
+    store = SnapshotArchive(root)
+
+    async def record():
+        store.record("KXEURUSD", body, fetched_at=DAY1 + 60)
+        assert store.buffered_rows == 5
+        try:
+            return await store.flush()
+        finally:
+            await store.stop()
+
+    assert run(record()) == 5
+    assert store.buffered_rows == 0
+
+    rows = store.scan().to_pylist()
+    markets = body["events"][0]["markets"]
+    assert [r["ticker"] for r in rows] == [m["ticker"] for m in markets]
+    assert [r["yes_bid"] for r in rows] == [m["yes_bid"] for m in markets]
+    assert {r["series"] for r in rows} == {"KXEURUSD"}
+    assert {r["event_ticker"] for r in rows} == {"KXEURUSD-30JAN0110"}
+    assert {r["fetched_at"].timestamp() for r in rows} == {DAY1 + 60}
+    assert store.scan(tickers=[markets[2]["ticker"]]).num_rows == 1
+
+
+def test_rows_are_partitioned_by_utc_day(run, tmp_path):
+    root = str(tmp_path)
+    store = SnapshotArchive(root)
+
+    run(archive(store, (DAY2 - 1, 3), (DAY2, 4)))
+
+    assert store.days() == ["2020-01-01", "2020-01-02"]
+    assert fetched(root) == [DAY2 - 1] * 3 + [DAY2] * 4
+    assert fetched(root, start=DAY2) == [DAY2] * 4
+    assert fetched(root, end=DAY2) == [DAY2 - 1] * 3
+
+
+def test_failed_flush_keeps_the_rows_for_the_next_one(run, tmp_path, monkeypatch):
+    root = str(tmp_path)
+    store = SnapshotArchive(root)
+
+    def disk_full(buffer):
+        raise OSError("disk full")
+
+    async def flush_twice():
+        store.record("KXEURUSD", kalshi_event(1.16, markets=3), fetched_at=DAY1)
+        with monkeypatch.context() as m:
+            m.setattr(store, "_write", disk_full)
+            with pytest.raises(OSError):
+                await store.flush()
+        store.record("KXEURUSD", kalshi_event(1.16, markets=2), fetched_at=DAY1 + 10)
+        assert store.buffered_rows == 5
+        try:
+            return await store.flush()
+        finally:
+            await store.stop()
+
+    assert run(flush_twice()) == 5
+    assert fetched(root) == [DAY1] * 3 + [DAY1 + 10] * 2
+    assert store.stats["rows_written"] == 5
+
+
+def test_finished_days_are_compacted_into_one_sorted_file(run, tmp_path):
+    root = str(tmp_path)
+    write_parts(run, root, DAY1 + 3, DAY1 + 1)
+    assert len(parts(root)) == 2
+
+    # The next flush of a past day compacts it
+    run(archive(SnapshotArchive(root), (DAY1 + 2, 2)))
+
+    assert len(parts(root)) == 1
+    assert fetched(root) == [DAY1 + 1] * 2 + [DAY1 + 2] * 2 + [DAY1 + 3] * 2
+
+
+def test_compaction_skips_a_day_another_worker_is_compacting(run, tmp_path):
+    root = str(tmp_path)
+    write_parts(run, root, DAY1 + 1, DAY1 + 2, DAY1 + 3)
+    before = parts(root)
+    store = SnapshotArchive(root)
+
+    with open(os.path.join(root, "date=2020-01-01", "_compact.lock"), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        assert store.compact("2020-01-01") is False
+        assert parts(root) == before
+        assert "2020-01-01" not in store._compacted
+
+    assert store.compact("2020-01-01") is True
+    assert len(parts(root)) == 1
+    assert fetched(root) == [DAY1 + 1] * 2 + [DAY1 + 2] * 2 + [DAY1 + 3] * 2
+    # A second worker arriving after the merge finds nothing left to do
+    assert SnapshotArchive(root).compact("2020-01-01") is True
+    assert len(parts(root)) == 1
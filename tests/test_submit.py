@@ -0,0 +1,133 @@
+"""/oracle/submit: Idempotency-Key replays, conflicts, admission control and when a key is released."""
+import asyncio
+
+import httpx
+import pytest
+
+from admission import Overloaded
+from conftest import asgi_request
+from idempotency import IdempotencyStore
+
+POINT = {"value": 86000, "timestamp": 1767000000, "resolution_timestamp": 1767086400}
+
+
+class Broadcast:
+    """Stands in for broadcast_oracle_data: counts calls, can fail or hold until released."""
+
+    def __init__(self):
+        self.calls = 0
+        self.error = None
+        self.release = None
+
+    async def __call__(self, data):
+        self.calls += 1
+        if self.release is not None:
+            await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return {
+            "success": True,
+            "transaction_hash": "0x" + f"{self.calls:064x}",
+            "message": "Transaction sent, pending confirmation",
+            "data": {"value": data.value},
+        }
+
+
+@pytest.fixture
+def broadcast(main_module, monkeypatch, tmp_path):
+    broadcast = Broadcast()
+    monkeypatch.setattr(main_module, "broadcast_oracle_data", broadcast)
+    monkeypatch.setattr(main_module, "tx_manager", main_module.tx_manager or object())
+    monkeypatch.setattr(
+        main_module, "idempotency_store", IdempotencyStore(str(tmp_path / "idempotency.db"), owner_id="this")
+    )
+    return broadcast
+
+
+def submit(main, run, key, point=POINT):
+    return asgi_request(main, run, "POST", "/oracle/submit", json=point, headers={"Idempotency-Key": key})
+
+
+def test_completed_key_is_replayed(main_module, run, broadcast):
+    first = submit(main_module, run, "replay")
+    second = submit(main_module, run, "replay")
+
+    assert first.status_code == second.status_code == 200
+    assert second.json() == first.json()
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert broadcast.calls == 1
+
+
+def test_key_reused_with_another_body_is_rejected(main_module, run, broadcast):
+    assert submit(main_module, run, "mismatch").status_code == 200
+
+    response = submit(main_module, run, "mismatch", {**POINT, "value": 86001})
+
+    assert response.status_code == 422
+    assert broadcast.calls == 1
+
+
+def test_key_claimed_by_another_worker_is_in_progress(main_module, run, broadcast, tmp_path):
+    other_worker = IdempotencyStore(str(tmp_path / "idempotency.db"), owner_id="other")
+    run(other_worker.begin("busy", main_module.fingerprint(main_module.OracleData(**POINT).model_dump())))
+
+    response = submit(main_module, run, "busy")
+
+    assert response.status_code == 409
+    assert response.headers["Retry-After"] == "1"
+    assert broadcast.calls == 0
+
+
+def test_overload_is_refused_with_retry_after_and_frees_the_key(main_module, run, broadcast):
+    broadcast.error = Overloaded("queue_full", 3)
+
+    refused = submit(main_module, run, "overloaded")
+    broadcast.error = None
+    retried = submit(main_module, run, "overloaded")
+
+    assert refused.status_code == 429
+    assert refused.headers["Retry-After"] == "3"
+    assert retried.status_code == 200
+    assert broadcast.calls == 2
+
+
+def test_failed_send_frees_the_key(main_module, run, broadcast):
+    broadcast.error = RuntimeError("nonce too low")
+
+    failed = submit(main_module, run, "failed")
+    broadcast.error = None
+    retried = submit(main_module, run, "failed")
+
+    assert failed.status_code == 500
+    assert retried.status_code == 200
+    assert "Idempotent-Replayed" not in retried.headers
+    assert broadcast.calls == 2
+
+
+def test_disconnected_client_keeps_the_key_of_a_queued_submission(main_module, run, broadcast):
+    async def scenario():
+        broadcast.release = asyncio.Event()
+        transport = httpx.ASGITransport(app=main_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://oracle") as http:
+            request = asyncio.create_task(
+                http.post("/oracle/submit", json=POINT, headers={"Idempotency-Key": "gone"})
+            )
+            while broadcast.calls == 0:
+                await asyncio.sleep(0.01)
+            request.cancel()  # the client goes away while its point is queued
+            await asyncio.gather(request, return_exceptions=True)
+
+            # The retry waits for the original submission instead of sending again
+            retry = asyncio.create_task(
+                http.post("/oracle/submit", json=POINT, headers={"Idempotency-Key": "gone"})
+            )
+            await asyncio.sleep(0.05)
+            broadcast.release.set()
+            return await retry
+
+    retried = run(scenario())
+
+    assert retried.status_code == 200
+    assert retried.headers["Idempotent-Replayed"] == "true"
+    assert broadcast.calls == 1
@@ -0,0 +1,77 @@
+"""TransactionManager against a local Hardhat node: local nonces, pipelining, background receipts."""
+import asyncio
+import time
+
+import httpx
+
+
+def test_pipelined_sends_use_consecutive_nonces(oracle_app, run):
+    main = oracle_app
+    now = int(time.time())
+    count_before = run(main.contract.functions.nextIndexDataPoint().call())
+
+    async def send(n):
+        handles = [
+            main.tx_manager.enqueue(main.fulfill_encoder(1000 + i, now, now + 86400))
+            for i in range(n)
+        ]
+        await asyncio.gather(*(handle.sent() for handle in handles))
+        receipts = await asyncio.gather(*(handle.wait(timeout=60) for handle in handles))
+        return handles, receipts
+
+    handles, receipts = run(send(5))
+
+    nonces = [handle.nonce for handle in handles]
+    assert nonces == list(range(nonces[0], nonces[0] + 5))
+    assert [receipt["status"] for receipt in receipts] == [1] * 5
+    assert run(main.contract.functions.nextIndexDataPoint().call()) == count_before + 5
+
+
+def test_submit_returns_before_receipt_and_tracks_it(oracle_app, run):
+    main = oracle_app
+    now = int(time.time())
+
+    async def submit_and_poll():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://oracle") as http:
+            response = await http.post(
+                "/oracle/submit", json={"value": 42000, "timestamp": now, "resolution_timestamp": now + 86400}
+            )
+            tx_hash = response.json()["transaction_hash"]
+            await main.tx_manager.get(tx_hash).wait(timeout=60)
+            return response, (await http.get(f"/tx/{tx_hash}")).json()
+
+    response, status = run(submit_and_poll())
+
+    assert response.status_code == 200
+    assert response.json()["message"] == "Transaction sent, pending confirmation"
+    assert status["status"] == "confirmed"
+    assert status["block_number"] is not None
+
+
+def test_out_of_range_timestamps_are_rejected_without_failing_the_batch(oracle_app, run):
+    main = oracle_app
+    now = int(time.time())
+    count_before = run(main.contract.functions.nextIndexDataPoint().call())
+    bodies = [
+        {"value": 1000, "timestamp": now, "resolution_timestamp": now + 86400},
+        {"value": 1001, "timestamp": 2**40, "resolution_timestamp": now + 86400},
+        {"value": 1002, "timestamp": now, "resolution_timestamp": 0},
+        {"value": 1003, "timestamp": now, "resolution_timestamp": 2**40 - 1},
+    ]
+
+    async def submit_all():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://oracle") as http:
+            responses = await asyncio.gather(*(http.post("/oracle/submit", json=body) for body in bodies))
+            for response in responses:
+                if response.status_code == 200:
+                    await main.tx_manager.get(response.json()["transaction_hash"]).wait(timeout=60)
+            return responses
+
+    responses = run(submit_all())
+
+    assert [r.status_code for r in responses] == [200, 400, 400, 200]
+    assert run(main.contract.functions.nextIndexDataPoint().call()) == count_before + 2
+    _, latest = run(main.contract.functions.latestDataPoint().call())
+    assert latest[4] == 2**40 - 1
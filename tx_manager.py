@@ -0,0 +1,392 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from eth_account import Account
+
+from confirmations import ConfirmationTracker
+from fees import FeeOracle, GasEstimateCache, bump_fees
+from metrics import FAILURES, GAS_USED, observe_rpc
+from nonces import LocalNonces
+
+logger = logging.getLogger(__name__)
+
+
+class TxHandle:
+    """
+    Handle for a transaction that has been queued by the TransactionManager.
+
+    Attributes:
+        label: str (human readable description, e.g. 'reBalance')
+        nonce: int (assigned when the transaction is signed)
+        tx_hash: str (hex hash, available once the transaction is broadcast)
+        receipt: dict (available once the transaction is mined)
+        error: str (set if signing, sending or receipt tracking failed)
+        replaced: list of earlier hashes for the same nonce (speed-ups)
+    """
+
+    def __init__(self, label):
+        self.label = label
+        self.nonce = None
+        self.tx_hash = None
+        self.receipt = None
+        self.error = None
+        self.replaced = []
+        self._transaction = None
+        self._function = None
+        loop = asyncio.get_running_loop()
+        self._sent = loop.create_future()
+        self._mined = loop.create_future()
+
+    @property
+    def status(self):
+        if self.error:
+            return "failed"
+        if self.receipt is not None:
+            return "confirmed" if self.receipt['status'] == 1 else "reverted"
+        if self.tx_hash:
+            return "pending"
+        return "queued"
+
+    async def sent(self):
+        """Wait until the transaction has been broadcast and return its hash."""
+        return await asyncio.shield(self._sent)
+
+    async def wait(self, timeout=None):
+        """Wait until the transaction has been mined and return its receipt."""
+        return await asyncio.wait_for(asyncio.shield(self._mined), timeout)
+
+    def to_dict(self):
+        data = {
+            "label": self.label,
+            "status": self.status,
+            "nonce": self.nonce,
+            "transaction_hash": self.tx_hash,
+        }
+        if self.receipt is not None:
+            data["block_number"] = self.receipt['blockNumber']
+            data["gas_used"] = self.receipt['gasUsed']
+        if self.replaced:
+            data["replaces"] = list(self.replaced)
+        if self.error:
+            data["error"] = self.error
+        return data
+
+    def _set_sent(self, tx_hash):
+        self.tx_hash = tx_hash
+        if not self._sent.done():
+            self._sent.set_result(tx_hash)
+
+    def _set_mined(self, receipt):
+        self.receipt = receipt
+        if not self._mined.done():
+            self._mined.set_result(receipt)
+
+    def _set_error(self, error):
+        self.error = str(error)
+        for future in (self._sent, self._mined):
+            if not future.done():
+                future.set_exception(RuntimeError(self.error))
+                # Mark as retrieved so unawaited handles don't log warnings
+                future.exception()
+
+
+class TransactionManager:
+    """
+    Single sender for all transactions signed by one private key.
+
+    Keeps a nonce counter so that several transactions can be in flight at
+    once, sends queued transactions in order from one worker task, and
+    tracks receipts in the background. The counter is in memory by default;
+    pass a nonces.SQLiteNonces when several processes sign with the key.
+
+    Gas limits come from a per-selector cache and EIP-1559 fees from a
+    background fee oracle, so sending costs one signature and one RPC call.
+    Receipts for all pending transactions are fetched together by one
+    ConfirmationTracker instead of a polling loop per transaction.
+    """
+
+    def __init__(self, w3, private_key, gas_buffer=10000, receipt_timeout=120, history_size=1000,
+                 fee_oracle=None, gas_cache=None, tracker=None, nonces=None):
+        self.w3 = w3
+        self.account = Account.from_key(private_key)
+        self.gas_buffer = gas_buffer
+        self.receipt_timeout = receipt_timeout
+        self.fees = fee_oracle or FeeOracle(w3)
+        self.gas_cache = gas_cache or GasEstimateCache(buffer=gas_buffer)
+        self.tracker = tracker or ConfirmationTracker(w3)
+        self.nonces = nonces or LocalNonces()
+        self._chain_id = None
+        self._queue = asyncio.Queue()
+        self._worker = None
+        self._receipt_tasks = set()
+        # Recently sent transactions by hash, for status lookups
+        self._handles = OrderedDict()
+        self._history_size = history_size
+
+    @property
+    def address(self):
+        return self.account.address
+
+    @property
+    def pending_count(self):
+        return self._queue.qsize() + len(self._receipt_tasks)
+
+    def get(self, tx_hash):
+        """Return the TxHandle for a recently sent transaction, or None."""
+        return self._handles.get(tx_hash.lower())
+
+    def start(self):
+        """Start the sender worker (idempotent)."""
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+        self.fees.start()
+
+    async def stop(self):
+        """Stop the sender worker and receipt trackers."""
+        tasks = list(self._receipt_tasks)
+        if self._worker is not None:
+            tasks.append(self._worker)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._worker = None
+        await self.fees.stop()
+        await self.tracker.stop()
+
+    async def submit(self, contract_function, label=None):
+        """
+        Queue a contract function call and return once it has been broadcast.
+
+        Args:
+            contract_function: bound web3 contract function, e.g.
+                contract.functions.reBalance(50)
+            label: optional description used in logs
+
+        Returns:
+            TxHandle with tx_hash set; await handle.wait() for the receipt
+        """
+        handle = self.enqueue(contract_function, label)
+        await handle.sent()
+        return handle
+
+    def enqueue(self, contract_function, label=None):
+        """Queue a contract function call without waiting for it to be sent."""
+        self.start()
+        handle = TxHandle(label or contract_function.fn_name)
+        self._queue.put_nowait((contract_function, handle))
+        return handle
+
+    async def _run(self):
+        while True:
+            contract_function, handle = await self._queue.get()
+            try:
+                await self._send(contract_function, handle)
+            except Exception as e:
+                logger.error(f"Failed to send {handle.label} transaction: {str(e)}")
+                FAILURES.labels("tx_send").inc()
+                handle._set_error(e)
+            finally:
+                self._queue.task_done()
+
+    async def _chain_nonce(self):
+        return await observe_rpc("get_transaction_count", self.w3.eth.get_transaction_count(self.address, 'pending'))
+
+    async def _send(self, contract_function, handle):
+        if self._chain_id is None:
+            self._chain_id = await observe_rpc("chain_id", self.w3.eth.chain_id)
+
+        # Encoded locally; gas and fees normally come from cache, so no RPC before the send
+        data = contract_function._encode_transaction_data()
+        gas_limit, fees = await asyncio.gather(
+            self.gas_cache.gas_limit(contract_function, data, self.address),
+            self.fees.fees(),
+        )
+
+        # Reserved last, so a failed estimate doesn't burn a nonce
+        nonce = await self.nonces.allocate(self.address, self._chain_nonce)
+        transaction = {
+            'to': contract_function.address,
+            'data': data,
+            'value': 0,
+            'chainId': self._chain_id,
+            'nonce': nonce,
+            'gas': gas_limit,
+            **fees,
+        }
+        if 'maxFeePerGas' in fees:
+            transaction['type'] = 2
+
+        try:
+            tx_hash = await self._sign_and_send(transaction)
+        except Exception:
+            await self.nonces.reset(self.address, nonce, self._chain_nonce)
+            raise
+
+        handle.nonce = nonce
+        handle._transaction = transaction
+        handle._function = contract_function
+        handle._set_sent(tx_hash)
+        self._remember(handle)
+        logger.info(f"Sent {handle.label} transaction. TX: {handle.tx_hash}, Nonce: {handle.nonce}")
+        self._watch(tx_hash, handle)
+
+    async def _sign_and_send(self, transaction):
+        signed_txn = self.account.sign_transaction(transaction)
+        tx_hash = await observe_rpc(
+            "send_raw_transaction",
+            self.w3.eth.send_raw_transaction(signed_txn.raw_transaction)
+        )
+        return tx_hash.to_0x_hex()
+
+    def _remember(self, handle):
+        self._handles[handle.tx_hash.lower()] = handle
+        while len(self._handles) > self._history_size:
+            self._handles.popitem(last=False)
+
+    def _watch(self, tx_hash, handle):
+        task = asyncio.create_task(self._track_receipt(tx_hash, handle))
+        self._receipt_tasks.add(task)
+        task.add_done_callback(self._receipt_tasks.discard)
+
+    async def speed_up(self, tx_hash, factor=1.125):
+        """
+        Replace a pending transaction with the same nonce and call at higher fees.
+
+        Returns:
+            TxHandle now pointing at the replacement hash (the old hash is kept in handle.replaced)
+
+        Raises:
+            ValueError: if the transaction is unknown or already mined
+        """
+        handle = self.get(tx_hash)
+        if handle is None or handle._transaction is None:
+            raise ValueError("Transaction not found")
+        if handle.receipt is not None:
+            raise ValueError("Transaction already mined")
+
+        fee_fields = ('maxFeePerGas', 'maxPriorityFeePerGas', 'gasPrice')
+        old = handle._transaction
+        transaction = {k: v for k, v in old.items() if k not in fee_fields}
+        transaction.update(bump_fees({k: old[k] for k in fee_fields if k in old}, await self.fees.fees(), factor))
+
+        new_hash = await self._sign_and_send(transaction)
+        handle.replaced.append(handle.tx_hash)
+        handle.tx_hash = new_hash
+        handle._transaction = transaction
+        self._remember(handle)
+        logger.info(f"Replaced {handle.label} transaction {handle.replaced[-1]} with {new_hash}, Nonce: {handle.nonce}")
+        self._watch(new_hash, handle)
+        return handle
+
+    async def _track_receipt(self, tx_hash, handle):
+        try:
+            receipt = await observe_rpc(
+                "receipt_wait",
+                self.tracker.wait_for_receipt(tx_hash, timeout=self.receipt_timeout)
+            )
+        except Exception as e:
+            # A replaced hash never gets mined once its replacement is
+            if handle.receipt is not None or tx_hash != handle.tx_hash:
+                return
+            logger.error(f"Failed to get receipt for {handle.label} transaction {handle.tx_hash}: {str(e)}")
+            FAILURES.labels("tx_receipt").inc()
+            handle._set_error(e)
+            return
+
+        if receipt['status'] != 1 and handle._function is not None:
+            # Re-estimate next time: the cached gas limit may be what made it fail
+            self.gas_cache.invalidate(handle._function, handle._transaction['data'])
+        # The other hashes for this nonce can never be mined now
+        for other_hash in handle.replaced + [handle.tx_hash]:
+            if other_hash != tx_hash:
+                self.tracker.forget(other_hash)
+        handle.tx_hash = tx_hash  # whichever of the original and its replacements was mined
+        GAS_USED.labels(handle.label).observe(receipt['gasUsed'])
+        handle._set_mined(receipt)
+        logger.info(f"{handle.label} transaction mined. TX: {handle.tx_hash}, Status: {receipt['status']}")
+
+
+class CallBatcher:
+    """
+    Coalesces calls that queue up while the previous transaction is being
+    broadcast into a single batch transaction.
+
+    `single(item)` builds the contract call for one item and `batch(items)`
+    the call for several; every caller gets the TxHandle of the transaction
+    that carried its item. Each item is encoded on its own first, so an
+    invalid one fails only its own caller.
+
+    `batch_check`, if given, is an async fn() -> bool run before the first
+    batch; if it returns False (a deployment without the batch function)
+    every item is sent as its own transaction.
+    """
+
+    def __init__(self, tx_manager, single, batch, max_size=50, batch_check=None):
+        self.tx_manager = tx_manager
+        self.single = single
+        self.batch = batch
+        self.max_size = max_size
+        self.batch_check = batch_check
+        self.batch_supported = None if batch_check else True
+        self._pending = []
+        self._flusher = None
+
+    async def submit(self, item):
+        """Queue one item and return the TxHandle once its transaction is broadcast."""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((item, future))
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush())
+        return await future
+
+    async def _batching(self):
+        if self.batch_supported is None:
+            try:
+                self.batch_supported = await self.batch_check()
+            except Exception as e:
+                # Unknown for now: send this chunk item by item and probe again next time
+                logger.error(f"Failed to check for batch support: {str(e)}")
+                FAILURES.labels("batch_check").inc()
+                return False
+            if not self.batch_supported:
+                logger.warning("Batch call not supported by the contract, sending calls one by one")
+        return self.batch_supported
+
+    async def _flush(self):
+        while self._pending:
+            # Let callers scheduled in the same loop iteration join this batch
+            await asyncio.sleep(0)
+            chunk, self._pending = self._pending[:self.max_size], self._pending[self.max_size:]
+
+            encoded = []  # (item, future, single call)
+            for item, future in chunk:
+                try:
+                    encoded.append((item, future, self.single(item)))
+                except Exception as e:
+                    if not future.done():
+                        future.set_exception(e)
+
+            if len(encoded) > 1 and await self._batching():
+                await self._send(encoded, batched=True)
+            else:
+                for entry in encoded:
+                    await self._send([entry])
+
+    async def _send(self, entries, batched=False):
+        """Broadcast one transaction for (item, future, single call) entries and settle their futures."""
+        try:
+            if batched:
+                contract_function = self.batch([item for item, _, _ in entries])
+                handle = await self.tx_manager.submit(
+                    contract_function, label=f"{contract_function.fn_name}({len(entries)})"
+                )
+            else:
+                handle = await self.tx_manager.submit(entries[0][2])
+        except Exception as e:
+            for _, future, _ in entries:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for _, future, _ in entries:
+            if not future.done():
+                future.set_result(handle)